@@ -0,0 +1,319 @@
+"""
+FinanzasOS — benchmarks/api_suite.py
+Suite de benchmarks de la API: recorre los routers (analytics,
+financial_health, flujo_caja, patrimonio, reportes) y POST
+/transactions/import con TestClient sobre bases sintéticas de
+benchmarks/datagen.py a varias escalas, y guarda los resultados en JSON.
+
+Por endpoint registra:
+    cold_ms            primer request (caches de SQLite / módulos fríos)
+    median_ms, p95_ms  sobre --n requests posteriores
+    peak_alloc_mb      pico de memoria Python asignada durante un request (tracemalloc)
+    bytes, queries     tamaño del cuerpo y consultas SQL (X-Query-Count)
+y por escala el pico de RSS del proceso. Cada escala corre en un subproceso
+propio (memoria aislada, DATABASE_URL distinto).
+
+Los caches en proceso (respuestas, PDFs, compresión) se desactivan por
+defecto para medir el cálculo real; --with-cache los deja activos. La
+consulta del tipo de cambio al BCRP se apunta a una dirección local que
+rechaza la conexión, para que la red no contamine las mediciones (el
+endpoint usa su fallback a la BD).
+
+Uso (desde backend/):
+    python -m benchmarks.api_suite                           # 1k, 100k y 1M
+    python -m benchmarks.api_suite --scales 1k,100k --n 5
+    python -m benchmarks.api_suite --only analytics,patrimonio
+    python -m benchmarks.api_suite --compare benchmarks/results/base.json --threshold 1.25
+
+Las bases generadas se guardan en --data-dir y se reutilizan entre corridas
+(misma escala y semilla → misma base); cada corrida mide sobre una copia.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+ESCALAS      = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+IMPORT_BATCH = 50
+LENTO_MS     = 10_000
+
+
+def _endpoints(ultimo: str, anterior: str, year: int, asset_id: int) -> list[tuple]:
+    """(grupo, método, plantilla, url) de cada endpoint medido."""
+    return [
+        ("analytics",        "GET", "/v3/analytics/resumen/{period}",   f"/v3/analytics/resumen/{ultimo}"),
+        ("analytics",        "GET", "/v3/analytics/alertas/{period}",   f"/v3/analytics/alertas/{ultimo}"),
+        ("analytics",        "GET", "/v3/analytics/comparativa",        f"/v3/analytics/comparativa?periodo_actual={ultimo}&periodo_anterior={anterior}"),
+        ("analytics",        "GET", "/v3/analytics/tendencia",          f"/v3/analytics/tendencia?meses=12&to={ultimo}"),
+        ("analytics",        "GET", "/v3/analytics/heatmap/{period}",   f"/v3/analytics/heatmap/{ultimo}"),
+        ("analytics",        "GET", "/v3/analytics/treemap/{period}",   f"/v3/analytics/treemap/{ultimo}"),
+        ("financial_health", "GET", "/financial-health",                f"/financial-health?period={ultimo}"),
+        ("flujo_caja",       "GET", "/v3/flujo-caja/{period}",          f"/v3/flujo-caja/{ultimo}"),
+        ("patrimonio",       "GET", "/v3/patrimonio/consolidado",       "/v3/patrimonio/consolidado"),
+        ("patrimonio",       "GET", "/v3/patrimonio/historial",         "/v3/patrimonio/historial"),
+        ("patrimonio",       "GET", "/v3/patrimonio/snapshots/{asset_id}", f"/v3/patrimonio/snapshots/{asset_id}"),
+        ("reportes",         "GET", "/v3/reportes/resumen/{period}",    f"/v3/reportes/resumen/{anterior}"),
+        ("reportes",         "GET", "/v3/reportes/estado-cuenta/{period}", f"/v3/reportes/estado-cuenta/{anterior}"),
+        ("reportes",         "GET", "/v3/reportes/anual/{year}",        f"/v3/reportes/anual/{year}"),
+        ("transactions",     "POST", "/transactions/import",            "/transactions/import"),
+    ]
+
+
+def _rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _pct(values: list[float], p: float) -> float:
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(p * (len(s) - 1))))]
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "desconocido"
+
+
+# ═══════════════════════════════════════════════════════════════
+# PROCESO HIJO: UNA ESCALA
+# ═══════════════════════════════════════════════════════════════
+
+def _import_payload(i: int, periodo: str) -> dict:
+    return {"transactions": [
+        {
+            "date":        f"{periodo}-{(j % 28) + 1:02d}",
+            "period":      periodo,
+            "description": f"IMPORT BENCH {i}-{j}",
+            "amount":      -round(10 + (i * 31 + j * 7) % 400, 2),
+            "type":        "gasto_variable",
+            "category":    "Compras",
+            "account":     "BCP",
+            "source":      "import_csv",
+        }
+        for j in range(IMPORT_BATCH)
+    ]}
+
+
+def run_scale(escala: str, db_path: str, n: int, only: set | None) -> dict:
+    """Mide cada endpoint contra la base ya generada en `db_path`."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    sys.path.insert(0, BACKEND_DIR)
+    rss_base = _rss_mb()
+
+    from fastapi.testclient import TestClient
+
+    import main
+    import models
+    from database import SessionLocal
+    from services import currency_service
+
+    currency_service.BCRP_API_URL = "http://127.0.0.1:9/bcrp"   # sin red: fallback a la BD
+
+    with SessionLocal() as db:
+        pers     = [p for (p,) in db.query(models.Transaction.period).distinct().order_by(models.Transaction.period)]
+        asset_id = db.query(models.Asset.id).order_by(models.Asset.id).first()[0]
+        total_tx = db.query(models.Transaction).count()
+    ultimo, anterior = pers[-1], pers[-2]
+    year   = int(anterior[:4])
+    client = TestClient(main.app)
+
+    resultados = {}
+    for grupo, metodo, plantilla, url in _endpoints(ultimo, anterior, year, asset_id):
+        if only and grupo not in only:
+            continue
+        contador = [0]
+
+        def _call():
+            contador[0] += 1
+            if metodo == "POST":
+                return client.post(url, json=_import_payload(contador[0], ultimo))
+            return client.get(url)
+
+        t0   = time.perf_counter()
+        resp = _call()
+        cold = (time.perf_counter() - t0) * 1000
+
+        # Endpoints que a gran escala tardan segundos (paquete anual, import): pocas repeticiones
+        reps    = n if cold < LENTO_MS else min(n, 2)
+        tiempos = []
+        for _ in range(reps):
+            t0   = time.perf_counter()
+            resp = _call()
+            tiempos.append((time.perf_counter() - t0) * 1000)
+
+        tracemalloc.start()
+        _call()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        resultados[f"{metodo} {plantilla}"] = {
+            "group":         grupo,
+            "url":           url,
+            "status":        resp.status_code,
+            "cold_ms":       round(cold, 1),
+            "median_ms":     round(statistics.median(tiempos), 1),
+            "p95_ms":        round(_pct(tiempos, 0.95), 1),
+            "min_ms":        round(min(tiempos), 1),
+            "n":             len(tiempos),
+            "peak_alloc_mb": round(pico / 1024 / 1024, 2),
+            "bytes":         len(resp.content),
+            "queries":       int(resp.headers.get("x-query-count", 0)),
+        }
+
+    return {
+        "rows":         total_tx,
+        "db_mb":        round(os.path.getsize(db_path) / 1024 / 1024, 1),
+        "rss_base_mb":  round(rss_base, 1),
+        "rss_peak_mb":  round(_rss_mb(), 1),
+        "endpoints":    resultados,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════
+# COMPARACIÓN
+# ═══════════════════════════════════════════════════════════════
+
+def compare(base: dict, actual: dict, threshold: float) -> list[str]:
+    """Endpoints cuya mediana empeoró más de `threshold` veces respecto a `base`."""
+    regresiones = []
+    for escala, res in actual["scales"].items():
+        previo = base.get("scales", {}).get(escala)
+        if not previo:
+            continue
+        for nombre, r in res["endpoints"].items():
+            p = previo["endpoints"].get(nombre)
+            if not p or p["median_ms"] <= 0:
+                continue
+            ratio = r["median_ms"] / p["median_ms"]
+            # Ruido: diferencias de menos de 5 ms no cuentan
+            if ratio >= threshold and r["median_ms"] - p["median_ms"] >= 5:
+                regresiones.append(
+                    f"[{escala}] {nombre}: {p['median_ms']:.1f} → {r['median_ms']:.1f} ms (x{ratio:.2f})"
+                )
+    return regresiones
+
+
+def _imprimir(escala: str, res: dict) -> None:
+    print(f"\n── {escala}: {res['rows']:,} transacciones · BD {res['db_mb']} MB · "
+          f"RSS pico {res['rss_peak_mb']} MB")
+    print(f"{'endpoint':<48} {'st':>3} {'frío':>9} {'mediana':>9} {'p95':>9} {'mem':>8} {'qs':>4}")
+    for nombre, r in res["endpoints"].items():
+        print(f"{nombre:<48} {r['status']:>3} {r['cold_ms']:>7.1f}ms {r['median_ms']:>7.1f}ms "
+              f"{r['p95_ms']:>7.1f}ms {r['peak_alloc_mb']:>6.1f}MB {r['queries']:>4}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scales",     default="1k,100k,1m", help=f"escalas: {','.join(ESCALAS)}")
+    ap.add_argument("--n",          type=int, default=10, help="requests medidos por endpoint")
+    ap.add_argument("--seed",       type=int, default=42)
+    ap.add_argument("--only",       default="", help="grupos: analytics,financial_health,flujo_caja,patrimonio,reportes,transactions")
+    ap.add_argument("--data-dir",   default=os.path.join(tempfile.gettempdir(), "finanzasos_bench"))
+    ap.add_argument("--out",        default=None, help="JSON de resultados (default benchmarks/results/<fecha>_<rev>.json)")
+    ap.add_argument("--compare",    default=None, help="JSON previo contra el cual detectar regresiones")
+    ap.add_argument("--threshold",  type=float, default=1.25, help="factor de empeoramiento que cuenta como regresión")
+    ap.add_argument("--with-cache", action="store_true", help="no desactivar los caches en proceso")
+    ap.add_argument("--_child",     nargs=2, metavar=("ESCALA", "DB"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    only = {g.strip() for g in args.only.split(",") if g.strip()} or None
+
+    if args._child:
+        print(json.dumps(run_scale(args._child[0], args._child[1], args.n, only)))
+        return
+
+    escalas = [e.strip().lower() for e in args.scales.split(",") if e.strip()]
+    for e in escalas:
+        if e not in ESCALAS:
+            sys.exit(f"Escala desconocida: {e} (opciones: {', '.join(ESCALAS)})")
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    env = {
+        **os.environ,
+        "PROFILE_SLOW_MS":      "1000000000",     # sin slow log durante el benchmark
+        "PROFILE_SLOW_QUERIES": "1000000000",
+        "PROFILE_SLOW_SQL_MS":  "1000000000",
+        "PDF_CACHE_DIR":        os.path.join(args.data_dir, "pdf_cache"),
+    }
+    if not args.with_cache:
+        env.update({"RESPONSE_CACHE_MAX": "0", "PDF_CACHE_MAX_MB": "0", "COMPRESSION_CACHE_MB": "0"})
+
+    salida = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_rev":   _git_rev(),
+            "python":    platform.python_version(),
+            "sqlite":    sqlite3.sqlite_version,
+            "platform":  platform.platform(),
+            "seed":      args.seed,
+            "n":         args.n,
+            "caches":    args.with_cache,
+        },
+        "scales": {},
+    }
+
+    for escala in escalas:
+        limpia = os.path.join(args.data_dir, f"bench_{escala}_s{args.seed}.db")
+        if not os.path.exists(limpia):
+            print(f"[{escala}] generando {limpia} …", flush=True)
+            gen = subprocess.run(
+                [sys.executable, "-m", "benchmarks.datagen", "--rows", str(ESCALAS[escala]),
+                 "--seed", str(args.seed), "--out", limpia],
+                cwd=BACKEND_DIR, capture_output=True, text=True,
+            )
+            if gen.returncode != 0:
+                print(f"[{escala}] error generando datos:\n{gen.stderr[-3000:]}")
+                continue
+            print(gen.stdout.rstrip())
+        # Se mide sobre una copia: /transactions/import inserta filas y la base
+        # generada debe quedar igual para la próxima corrida
+        db_path = os.path.join(args.data_dir, f"run_{escala}.db")
+        shutil.copyfile(limpia, db_path)
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.api_suite", "--_child", escala, db_path,
+             "--n", str(args.n), "--only", args.only],
+            cwd=BACKEND_DIR, capture_output=True, text=True, env=env,
+        )
+        os.unlink(db_path)
+        if proc.returncode != 0:
+            print(f"[{escala}] error:\n{proc.stderr[-3000:]}")
+            continue
+        res = json.loads(proc.stdout.strip().splitlines()[-1])
+        salida["scales"][escala] = res
+        _imprimir(escala, res)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d_%H%M%S}_{salida['meta']['git_rev']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(salida, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados: {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            base = json.load(f)
+        regresiones = compare(base, salida, args.threshold)
+        print(f"Comparado con {args.compare} ({base['meta'].get('git_rev')}): "
+              f"{len(regresiones)} regresión(es) ≥ x{args.threshold}")
+        for r in regresiones:
+            print("  " + r)
+        if regresiones:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
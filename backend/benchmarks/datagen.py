@@ -0,0 +1,290 @@
+"""
+FinanzasOS — benchmarks/datagen.py
+Generador sintético y reproducible (semilla fija) de datos realistas para
+benchmarks: años de transacciones repartidas en cuentas y categorías,
+presupuestos mensuales, cuentas / activos con snapshots de saldo, tipo de
+cambio diario, inversiones con precios en cache, snapshots de portafolio y
+resúmenes IA ya generados (para poder descargar los PDFs).
+
+La misma semilla y tamaño producen siempre la misma base. El volumen se
+reparte en `years` años que terminan en el mes actual (los endpoints con
+"mes actual" por defecto tienen datos).
+
+Uso (desde backend/):
+    python -m benchmarks.datagen --rows 100000 --out /tmp/finanzas_100k.db
+
+    from benchmarks import datagen
+    datagen.generate(engine, rows=100_000, seed=42)
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CUENTAS = [
+    {"name": "BCP",               "type": "banco",     "color": "#f97316", "active": True},
+    {"name": "Interbank",         "type": "banco",     "color": "#22c55e", "active": True},
+    {"name": "Yape",              "type": "billetera", "color": "#a855f7", "active": True},
+    {"name": "iO Crédito",        "type": "tarjeta",   "color": "#ef4444", "active": True},
+    {"name": "Financiera Efectiva", "type": "ahorro",  "color": "#0ea5e9", "active": True},
+    {"name": "Interactive Brokers", "type": "inversion", "color": "#eab308", "active": True},
+    {"name": "Binance",           "type": "inversion", "color": "#facc15", "active": True},
+]
+CUENTAS_GASTO = ["BCP", "Interbank", "Yape", "iO Crédito"]
+
+# tipo → [(categoría, [comercios], rango de monto)]
+CATALOGO = {
+    "gasto_variable": [
+        ("Alimentación", ["PLAZA VEA", "TOTTUS", "METRO", "WONG", "IZI*RAPPI", "PEDIDOSYA"], (8, 320)),
+        ("Transporte",   ["UBER TRIP", "CABIFY", "DIDI", "PRIMAX", "REPSOL"],               (6, 180)),
+        ("Ocio",         ["CINEPLANET", "SPOTIFY", "NETFLIX.COM", "STEAM", "TICKETMASTER"],  (15, 260)),
+        ("Salud",        ["INKAFARMA", "MIFARMA", "CLINICA SAN FELIPE"],                     (12, 450)),
+        ("Compras",      ["SAGA FALABELLA", "RIPLEY", "AMAZON.COM", "MERCADOLIBRE"],         (25, 900)),
+    ],
+    "gasto_fijo": [
+        ("Vivienda",   ["ALQUILER DEPARTAMENTO", "MANTENIMIENTO EDIFICIO"], (350, 1800)),
+        ("Servicios",  ["LUZ DEL SUR", "SEDAPAL", "MOVISTAR HOGAR", "CLARO MOVIL"], (40, 220)),
+        ("Educación",  ["PLATZI", "UDEMY", "COLEGIO"], (40, 900)),
+    ],
+    "deuda": [
+        ("Tarjeta de crédito", ["PAGO TARJETA IO", "PAGO TARJETA BCP"], (200, 2500)),
+        ("Préstamo",           ["CUOTA PRESTAMO PERSONAL"],             (300, 900)),
+    ],
+    "ahorro": [
+        ("Ahorro programado", ["TRANSF. AHORRO EFECTIVA", "DEPOSITO PLAZO FIJO"], (100, 1200)),
+        ("Inversión",         ["APORTE INTERACTIVE BROKERS", "COMPRA BINANCE"],  (100, 1500)),
+    ],
+    "ingreso": [
+        ("Sueldo",      ["ABONO PLANILLA"],               (4500, 7500)),
+        ("Freelance",   ["TRANSF. CLIENTE", "PAYPAL"],    (200, 2500)),
+        ("Otros",       ["DEVOLUCION", "INTERESES"],      (5, 300)),
+    ],
+}
+# Peso de cada tipo en el volumen mensual (el gasto variable domina)
+PESOS_TIPO = [("gasto_variable", 70), ("gasto_fijo", 10), ("deuda", 6), ("ahorro", 6), ("ingreso", 8)]
+
+INVERSIONES = [
+    # ticker, nombre, tipo, plataforma, precio base USD
+    ("BTC",  "Bitcoin",          "crypto", "Binance",            42000.0),
+    ("ETH",  "Ethereum",         "crypto", "Binance",             2300.0),
+    ("SOL",  "Solana",           "crypto", "Binance",               95.0),
+    ("AAPL", "Apple Inc.",       "stock",  "InteractiveBrokers",   180.0),
+    ("VOO",  "Vanguard S&P 500", "stock",  "InteractiveBrokers",   430.0),
+    ("MSFT", "Microsoft",        "stock",  "InteractiveBrokers",   390.0),
+]
+
+CHUNK = 20_000
+
+
+def periods(years: int, hasta: date | None = None) -> list[str]:
+    """Períodos YYYY-MM de los últimos `years` años, terminando en el mes de `hasta`."""
+    hasta = hasta or date.today()
+    total = years * 12
+    out   = []
+    y, m  = hasta.year, hasta.month
+    for _ in range(total):
+        out.append(f"{y}-{m:02d}")
+        y, m = (y, m - 1) if m > 1 else (y - 1, 12)
+    return out[::-1]
+
+
+def _dias(period: str, hasta: date) -> int:
+    y, m = map(int, period.split("-"))
+    if (y, m) == (hasta.year, hasta.month):
+        return hasta.day
+    return ((date(y + m // 12, m % 12 + 1, 1)) - timedelta(days=1)).day
+
+
+def _transacciones(rnd: random.Random, rows: int, pers: list[str], hasta: date):
+    """Genera los dicts de Transaction en orden cronológico (por período)."""
+    tipos, pesos = zip(*PESOS_TIPO)
+    por_mes      = rows // len(pers)
+    sobrantes    = rows - por_mes * len(pers)
+    for i, p in enumerate(pers):
+        n    = por_mes + (1 if i < sobrantes else 0)
+        dias = _dias(p, hasta)
+        for _ in range(n):
+            tp = rnd.choices(tipos, pesos)[0]
+            categoria, comercios, (lo, hi) = rnd.choice(CATALOGO[tp])
+            comercio = rnd.choice(comercios)
+            monto    = round(rnd.uniform(lo, hi), 2)
+            interno  = tp == "ahorro" and rnd.random() < 0.25
+            yield {
+                "date":        f"{p}-{rnd.randint(1, dias):02d}",
+                "period":      p,
+                "description": f"{comercio} {rnd.randint(1000, 9999)}",
+                "amount":      monto if tp == "ingreso" else -monto,
+                "type":        tp,
+                "category":    categoria,
+                "account":     rnd.choice(CUENTAS_GASTO) if tp != "ingreso" else "BCP",
+                "source":      "seed",
+                "excluir_del_analisis": interno,
+            }
+
+
+def _insert(conn, table, rows_iter) -> int:
+    total, lote = 0, []
+    for row in rows_iter:
+        lote.append(row)
+        if len(lote) >= CHUNK:
+            conn.execute(table.insert(), lote)
+            total += len(lote)
+            lote = []
+    if lote:
+        conn.execute(table.insert(), lote)
+        total += len(lote)
+    return total
+
+
+def generate(engine, rows: int, seed: int = 42, years: int | None = None, hasta: date | None = None) -> dict:
+    """
+    Puebla `engine` (tablas ya creadas) con ~`rows` transacciones y el resto
+    de entidades proporcionales al rango. Retorna el conteo por tabla.
+    """
+    import models
+    from benchmarks.pdf_render import CONTENIDO
+
+    rnd   = random.Random(seed)
+    hasta = hasta or date.today()
+    # Bases chicas: pocos años; grandes: hasta 10 años de historia
+    years = years or (2 if rows <= 5_000 else 5 if rows <= 200_000 else 10)
+    pers  = periods(years, hasta)
+    dias  = (hasta - date(int(pers[0][:4]), int(pers[0][5:]), 1)).days + 1
+    conteo = {}
+
+    with engine.begin() as conn:
+        conteo["transactions"] = _insert(
+            conn, models.Transaction.__table__, _transacciones(rnd, rows, pers, hasta)
+        )
+
+        categorias = sorted({c for tp in ("gasto_variable", "gasto_fijo") for c, _, _ in CATALOGO[tp]})
+        conteo["budgets"] = _insert(conn, models.Budget.__table__, (
+            {"period": p, "category": c, "amount": float(rnd.randrange(200, 2000, 50))}
+            for p in pers for c in categorias
+        ))
+
+        conn.execute(models.AppSettings.__table__.insert(), [{
+            "id": 1, "accounts": CUENTAS, "custom_rules": [], "system_rules": [],
+            "billing_cycles": [{"name": "iO Crédito", "cutDay": 20, "dueDay": 5, "account": "iO Crédito"}],
+            "categories": {tp: [c for c, _, _ in cats] for tp, cats in CATALOGO.items()},
+        }])
+        conn.execute(models.Profile.__table__.insert(), [{
+            "id": 1, "name": "Benchmark", "income": 6500.0, "pay_day": 28,
+            "accounts": CUENTAS, "onboarding_done": 1,
+            "recurring_services": [{"name": "Netflix", "amount": 44.9, "day": 12}],
+        }])
+
+        # Tipo de cambio diario y activos con un snapshot por semana
+        inicio = hasta - timedelta(days=dias - 1)
+        tc, tcs = 3.75, []
+        for d in range(dias):
+            tc = round(min(max(tc + rnd.gauss(0, 0.01), 3.3), 4.1), 4)
+            tcs.append(tc)
+        conteo["exchange_rate_logs"] = _insert(conn, models.ExchangeRateLog.__table__, (
+            {"date": datetime.combine(inicio + timedelta(days=d), datetime.min.time()) + timedelta(hours=9),
+             "usd_to_pen": tcs[d], "source": "BCRP_API"}
+            for d in range(dias)
+        ))
+
+        from routers.patrimonio import _asset_type_from_account, _currency_from_account
+        assets = []
+        for i, acc in enumerate(CUENTAS, start=1):
+            assets.append({
+                "id": i, "name": acc["name"], "institution": acc["name"],
+                "asset_type": _asset_type_from_account(acc), "currency": _currency_from_account(acc),
+                "is_active": True, "notes": "benchmark",
+            })
+        conn.execute(models.Asset.__table__.insert(), assets)
+
+        def _snapshots():
+            for a in assets:
+                saldo = rnd.uniform(500, 20000)
+                for d in range(0, dias, 7):
+                    saldo = max(0.0, saldo * (1 + rnd.gauss(0.002, 0.02)))
+                    usd   = a["currency"] == "USD"
+                    yield {
+                        "asset_id":      a["id"],
+                        "snapshot_date": datetime.combine(inicio + timedelta(days=d), datetime.min.time()),
+                        "balance":       round(saldo, 2),
+                        "balance_pen":   round(saldo * tcs[d], 2) if usd else round(saldo, 2),
+                        "exchange_rate": tcs[d] if usd else None,
+                        "source":        "IMPORT",
+                    }
+        conteo["asset_balance_snapshots"] = _insert(conn, models.AssetBalanceSnapshot.__table__, _snapshots())
+
+        # Inversiones, precios actuales y un snapshot de portafolio por día
+        precios = {t: base for t, _, _, _, base in INVERSIONES}
+        cantidades = {t: round(rnd.uniform(0.05, 3) if tipo == "crypto" else rnd.uniform(2, 40), 4)
+                      for t, _, tipo, _, _ in INVERSIONES}
+        conn.execute(models.Investment.__table__.insert(), [
+            {"name": nombre, "ticker": t, "type": tipo, "platform": plat,
+             "quantity": cantidades[t], "buy_price": base, "buy_date": inicio.isoformat(), "notes": ""}
+            for t, nombre, tipo, plat, base in INVERSIONES
+        ])
+
+        def _portafolio():
+            for d in range(dias):
+                for t in precios:
+                    precios[t] = max(0.01, precios[t] * (1 + rnd.gauss(0.0004, 0.025 if t in ("BTC", "ETH", "SOL") else 0.01)))
+                total = sum(cantidades[t] * precios[t] for t in precios)
+                yield {
+                    "date":          (inicio + timedelta(days=d)).isoformat(),
+                    "total_usd":     round(total, 2),
+                    "total_pen":     round(total * tcs[d], 2),
+                    "exchange_rate": tcs[d],
+                    "detail":        [
+                        {"ticker": t, "qty": cantidades[t], "price_usd": round(p, 4),
+                         "value_usd": round(cantidades[t] * p, 2)}
+                        for t, p in precios.items()
+                    ],
+                }
+        conteo["portfolio_snapshots"] = _insert(conn, models.PortfolioSnapshot.__table__, _portafolio())
+        conn.execute(models.PriceCache.__table__.insert(), [
+            {"ticker": t, "price_usd": round(p, 4), "source": "coingecko" if t in ("BTC", "ETH", "SOL") else "yahoo",
+             "updated_at": datetime.utcnow()}
+            for t, p in precios.items()
+        ])
+
+        # Resúmenes IA de los últimos 12 meses (los PDFs de reportes los requieren)
+        conteo["resumenes_mensuales"] = _insert(conn, models.ResumenMensual.__table__, (
+            {"periodo": p, "semaforo": CONTENIDO["semaforo"], "fuente": "LOCAL",
+             "contenido_json": json.dumps({**CONTENIDO, "_meta": {"fuente": "LOCAL", "periodo": p}}, ensure_ascii=False)}
+            for p in pers[-12:]
+        ))
+
+    return {"years": years, "desde": pers[0], "hasta": pers[-1], "rows": conteo}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows",  type=int, default=100_000, help="transacciones a generar")
+    ap.add_argument("--seed",  type=int, default=42)
+    ap.add_argument("--years", type=int, default=None, help="años de historia (default según --rows)")
+    ap.add_argument("--out",   required=True, help="archivo SQLite de destino (no debe existir)")
+    args = ap.parse_args()
+
+    if os.path.exists(args.out):
+        sys.exit(f"{args.out} ya existe")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.out)}"
+    sys.path.insert(0, BACKEND_DIR)
+    import models
+    from database import engine
+    from services import search_service
+
+    models.Base.metadata.create_all(bind=engine)
+    search_service.ensure_index(engine)
+    t0  = time.perf_counter()
+    res = generate(engine, args.rows, args.seed, args.years)
+    print(f"{args.out}: {res['desde']} → {res['hasta']} ({res['years']} años) en {time.perf_counter() - t0:.1f}s")
+    for tabla, n in res["rows"].items():
+        print(f"  {tabla:<26} {n:>10,}")
+
+
+if __name__ == "__main__":
+    main()
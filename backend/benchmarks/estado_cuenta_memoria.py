@@ -0,0 +1,161 @@
+"""
+FinanzasOS — benchmarks/estado_cuenta_memoria.py
+Benchmark de memoria del Estado de Cuenta: modo en memoria vs modo streaming.
+
+Crea una base SQLite temporal con N años de movimientos sintéticos y genera el
+PDF del rango completo con cada modo en un subproceso aislado, reportando el
+pico de RSS (ru_maxrss) por encima de la línea base del proceso y el tiempo.
+
+Uso (desde backend/):
+    python -m benchmarks.estado_cuenta_memoria --years 10 --per-month 300
+    python -m benchmarks.estado_cuenta_memoria --years 2 --modes stream
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CATEGORIAS = ["Alimentación", "Transporte", "Vivienda", "Salud", "Ocio",
+              "Servicios", "Educación", "Inversión", "Ahorro programado"]
+CUENTAS    = ["BCP", "BBVA", "iO Crédito", "Interbank", "Yape"]
+TIPOS      = ["gasto_variable"] * 6 + ["gasto_fijo"] * 2 + ["ingreso", "deuda", "ahorro"]
+
+
+def _rss_mb() -> float:
+    """Pico de RSS del proceso en MB (ru_maxrss está en KB en Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _periods(years: int) -> list[str]:
+    end_y = date.today().year - 1
+    return [f"{y}-{str(m).zfill(2)}" for y in range(end_y - years + 1, end_y + 1) for m in range(1, 13)]
+
+
+def seed(db_path: str, years: int, per_month: int, seed_value: int = 42) -> int:
+    """Pobla la base con movimientos sintéticos. Retorna la cantidad insertada."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    sys.path.insert(0, BACKEND_DIR)
+    import models
+    from database import engine
+
+    models.Base.metadata.create_all(bind=engine)
+    rnd   = random.Random(seed_value)
+    table = models.Transaction.__table__
+    total = 0
+    with engine.begin() as conn:
+        for p in _periods(years):
+            rows = []
+            for _ in range(per_month):
+                tp = rnd.choice(TIPOS)
+                rows.append({
+                    "date":        f"{p}-{str(rnd.randint(1, 28)).zfill(2)}",
+                    "period":      p,
+                    "description": f"Movimiento sintético {rnd.randint(1, 10**6)}",
+                    "amount":      round(rnd.uniform(5, 2500) * (1 if tp == "ingreso" else -1), 2),
+                    "type":        tp,
+                    "category":    rnd.choice(CATEGORIAS),
+                    "account":     rnd.choice(CUENTAS),
+                    "source":      "benchmark",
+                    "excluir_del_analisis": rnd.random() < 0.03,
+                })
+            conn.execute(table.insert(), rows)
+            total += len(rows)
+    return total
+
+
+def run_mode(mode: str, db_path: str, desde: str, hasta: str) -> dict:
+    """Genera el PDF del rango en el proceso actual y mide memoria/tiempo."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    sys.path.insert(0, BACKEND_DIR)
+    import models
+    from database import SessionLocal
+    from routers.reportes import _iter_movimientos, _resumen_rango
+    from services.pdf_service import generar_pdf_estado_cuenta, generar_pdf_estado_cuenta_stream
+
+    db   = SessionLocal()
+    T    = models.Transaction
+    q    = db.query(T).filter(T.period.between(desde, hasta))
+    out  = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False).name
+    base = _rss_mb()
+    t0   = time.perf_counter()
+
+    if mode == "list":
+        txs = [
+            {
+                "date": t.date, "description": t.description, "amount": t.amount,
+                "type": t.type, "category": t.category, "account": t.account,
+                "excluir_del_analisis": t.excluir_del_analisis,
+            }
+            for t in q.order_by(T.date).all()
+        ]
+        with open(out, "wb") as f:
+            f.write(generar_pdf_estado_cuenta(desde, txs))
+    else:
+        generar_pdf_estado_cuenta_stream(
+            out_path    = out,
+            desde       = desde,
+            hasta       = hasta,
+            resumen     = _resumen_rango(q),
+            movimientos = _iter_movimientos(q, internos=False),
+            internos    = _iter_movimientos(q, internos=True),
+        )
+
+    elapsed = time.perf_counter() - t0
+    size    = os.path.getsize(out)
+    os.unlink(out)
+    db.close()
+    return {
+        "mode":          mode,
+        "seconds":       round(elapsed, 2),
+        "rss_base_mb":   round(base, 1),
+        "rss_peak_mb":   round(_rss_mb(), 1),
+        "rss_delta_mb":  round(_rss_mb() - base, 1),
+        "pdf_mb":        round(size / 1024 / 1024, 2),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--years",     type=int, default=10)
+    ap.add_argument("--per-month", type=int, default=300)
+    ap.add_argument("--modes",     default="list,stream", help="list,stream")
+    ap.add_argument("--_child",    nargs=4, metavar=("MODE", "DB", "DESDE", "HASTA"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args._child:
+        print(json.dumps(run_mode(*args._child)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        periods = _periods(args.years)
+        n = seed(db_path, args.years, args.per_month)
+        print(f"Base sintética: {n:,} movimientos, {periods[0]} → {periods[-1]}")
+
+        for mode in args.modes.split(","):
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.estado_cuenta_memoria",
+                 "--_child", mode, db_path, periods[0], periods[-1]],
+                cwd=BACKEND_DIR, capture_output=True, text=True,
+                env={**os.environ, "PDF_CACHE_MAX_MB": "0"},
+            )
+            if proc.returncode != 0:
+                print(f"[{mode}] error:\n{proc.stderr[-2000:]}")
+                continue
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(f"[{r['mode']:>6}] {r['seconds']:>7.2f}s  "
+                  f"RSS pico {r['rss_peak_mb']:>7.1f} MB  (+{r['rss_delta_mb']:.1f} MB sobre base)  "
+                  f"PDF {r['pdf_mb']:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
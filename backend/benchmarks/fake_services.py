@@ -0,0 +1,510 @@
+"""
+FinanzasOS — benchmarks/fake_services.py
+Servicios externos simulados (sin red) para pruebas de carga y benchmarks
+de los jobs de precios, el tipo de cambio, Telegram y la ingesta con Gemini.
+
+Un solo servidor HTTP con un prefijo por servicio. Escucha además en un
+puerto propio por servicio (--port + 1, + 2, …, en el orden de SERVICES):
+así cada integración ve un host:port distinto, como en producción, y los
+circuit breakers por host (services/http_client.py) no se mezclan.
+
+    /coingecko   GET  /api/v3/simple/price?ids=..&vs_currencies=usd
+                 GET  /api/v3/coins/list
+                 GET  /api/v3/coins/markets?vs_currency=usd&ids=..
+    /erapi       GET  /v6/latest/USD
+    /yahoo       GET  /                      (cookie de consentimiento)
+                 GET  /v1/test/getcrumb
+                 GET  /v8/finance/chart/{ticker}
+    /stooq       GET  /q/l/?s=schd.us&f=sd2t2ohlcv&h&e=csv
+    /bcrp        GET  /estadisticas/series/api/{serie}/json
+                 GET  /estadisticas/series/api/{serie}/json/{inicio}/{fin}
+    /telegram    POST /bot{token}/sendMessage
+    /gemini      POST /v1beta/models/{model}:generateContent
+
+Los precios son deterministas por ticker (mismo ticker → mismo precio).
+Tickers que empiezan con "BAD" no existen: 404 en Yahoo, N/D en Stooq y
+ausentes en CoinGecko. La lista de CoinGecko trae las monedas conocidas y
+COIN_COUNT sintéticas (símbolo C0000…, id coin-0000…); una de cada diez
+tiene además una versión "bridged-" con el mismo símbolo y menor
+capitalización, para ejercitar la desambiguación. Una URL de más de
+MAX_URL caracteres recibe 414, como la API real.
+
+Fallas configurables por servicio (o para todos con "*"):
+    latency_ms     demora base de cada respuesta
+    jitter_ms      demora adicional uniforme en [0, jitter_ms]
+    error_rate     fracción de respuestas 503
+    rate_limit     requests/s permitidos (token bucket); el exceso recibe 429
+                   con Retry-After (Gemini: RESOURCE_EXHAUSTED, como la API real)
+    down           1 = no responde nunca (el cliente agota su timeout, como
+                   cuando Yahoo bloquea el contenedor)
+
+Uso (desde backend/):
+    python -m benchmarks.fake_services --port 8900 --latency-ms 80 --error-rate 0.05
+    python -m benchmarks.fake_services --fault yahoo:down=1 --fault coingecko:rate_limit=2
+    python -m benchmarks.fake_services --print-env      # variables para apuntar la app
+
+Mientras corre, se puede cambiar la configuración y leer contadores:
+    POST /_admin/faults   {"yahoo": {"error_rate": 0.5}, "*": {"latency_ms": 20}}
+    POST /_admin/reset    (fallas y contadores a cero)
+    GET  /_admin/stats    requests / 429 / 503 por servicio y mensajes de Telegram
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import random
+import threading
+import time
+import zlib
+from datetime import date, timedelta
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+SERVICES = ("coingecko", "erapi", "yahoo", "stooq", "bcrp", "telegram", "gemini")
+FAULT_KEYS = {"latency_ms": float, "jitter_ms": float, "error_rate": float, "rate_limit": float, "down": int}
+
+USD_PEN = 3.742
+
+
+# ═══════════════════════════════════════════════════════════════
+# ESTADO: FALLAS, RATE LIMIT Y CONTADORES
+# ═══════════════════════════════════════════════════════════════
+
+class _Estado:
+
+    def __init__(self, seed: int = 42):
+        self.lock     = threading.Lock()
+        self.rng      = random.Random(seed)
+        self.defaults = {"latency_ms": 0.0, "jitter_ms": 0.0, "error_rate": 0.0, "rate_limit": 0.0, "down": 0}
+        self.faults:  dict[str, dict] = {}
+        self.buckets: dict[str, list] = {}      # servicio → [tokens, último refill]
+        self.stats:   dict[str, dict] = {}
+        self.telegram: list[dict] = []
+
+    def reset(self) -> None:
+        with self.lock:
+            self.faults.clear()
+            self.buckets.clear()
+            self.stats.clear()
+            self.telegram.clear()
+
+    def configure(self, cambios: dict) -> None:
+        with self.lock:
+            for servicio, valores in cambios.items():
+                destino = self.defaults if servicio == "*" else self.faults.setdefault(servicio, {})
+                for k, v in valores.items():
+                    if k not in FAULT_KEYS:
+                        raise ValueError(f"Falla desconocida: {k}")
+                    destino[k] = FAULT_KEYS[k](v)
+                self.buckets.pop(servicio, None)
+            if "*" in cambios:
+                self.buckets.clear()
+
+    def fault(self, servicio: str) -> dict:
+        with self.lock:
+            return {**self.defaults, **self.faults.get(servicio, {})}
+
+    def count(self, servicio: str, kind: str) -> None:
+        with self.lock:
+            st = self.stats.setdefault(servicio, {"requests": 0, "ok": 0, "429": 0, "503": 0, "down": 0})
+            st[kind] = st.get(kind, 0) + 1
+
+    def take_token(self, servicio: str, rate: float) -> bool:
+        """Token bucket con capacidad = rate (ráfaga de un segundo)."""
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.setdefault(servicio, [rate, now])
+            bucket[0] = min(rate, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True
+            return False
+
+    def roll(self) -> float:
+        with self.lock:
+            return self.rng.random()
+
+
+estado = _Estado()
+app    = FastAPI(title="FinanzasOS — servicios simulados", docs_url=None, redoc_url=None)
+
+
+def _servicio(path: str) -> str:
+    return path.strip("/").split("/", 1)[0]
+
+
+@app.middleware("http")
+async def _fallas(request: Request, call_next):
+    servicio = _servicio(request.url.path)
+    if servicio not in SERVICES:
+        return await call_next(request)
+    f = estado.fault(servicio)
+    estado.count(servicio, "requests")
+
+    demora = f["latency_ms"] + (estado.roll() * f["jitter_ms"] if f["jitter_ms"] else 0.0)
+    if demora:
+        await asyncio.sleep(demora / 1000)
+
+    if f["down"]:
+        estado.count(servicio, "down")
+        try:
+            await asyncio.sleep(3600)   # agujero negro: vence el timeout del cliente
+        except asyncio.CancelledError:
+            return Response(status_code=503)    # apagado del servidor
+    if f["rate_limit"] and not estado.take_token(servicio, f["rate_limit"]):
+        estado.count(servicio, "429")
+        if servicio == "gemini":
+            return JSONResponse({"error": {
+                "code": 429, "message": "Resource has been exhausted (e.g. check quota).",
+                "status": "RESOURCE_EXHAUSTED",
+            }}, status_code=429)
+        return JSONResponse({"error": "rate limited"}, status_code=429, headers={"Retry-After": "1"})
+    if f["error_rate"] and estado.roll() < f["error_rate"]:
+        estado.count(servicio, "503")
+        return JSONResponse({"error": "service unavailable (simulado)"}, status_code=503)
+
+    estado.count(servicio, "ok")
+    return await call_next(request)
+
+
+# ═══════════════════════════════════════════════════════════════
+# DATOS DETERMINISTAS
+# ═══════════════════════════════════════════════════════════════
+
+def _precio(clave: str, base: float = 10.0, rango: float = 500.0) -> float:
+    return round(base + (zlib.crc32(clave.upper().encode()) % int(rango * 100)) / 100, 4)
+
+
+def _existe(ticker: str) -> bool:
+    return not ticker.upper().startswith("BAD")
+
+
+# ═══════════════════════════════════════════════════════════════
+# SERVICIOS
+# ═══════════════════════════════════════════════════════════════
+
+# ── CoinGecko ────────────────────────────────────────────────
+
+COIN_COUNT = 3000
+MAX_URL    = 8000
+
+_MONEDAS_CONOCIDAS = [
+    ("bitcoin", "btc", "Bitcoin"), ("ethereum", "eth", "Ethereum"), ("solana", "sol", "Solana"),
+    ("binancecoin", "bnb", "BNB"), ("cardano", "ada", "Cardano"), ("polkadot", "dot", "Polkadot"),
+    ("avalanche-2", "avax", "Avalanche"), ("matic-network", "matic", "Polygon"),
+    ("chainlink", "link", "Chainlink"), ("uniswap", "uni", "Uniswap"), ("ripple", "xrp", "XRP"),
+    ("litecoin", "ltc", "Litecoin"), ("dogecoin", "doge", "Dogecoin"), ("shiba-inu", "shib", "Shiba Inu"),
+    ("tether", "usdt", "Tether"), ("usd-coin", "usdc", "USDC"),
+    ("bridged-ether", "eth", "Bridged Ether"), ("wrapped-solana", "sol", "Wrapped SOL"),
+]
+
+
+@functools.lru_cache(maxsize=1)
+def _monedas() -> list[dict]:
+    monedas = [{"id": i, "symbol": s, "name": n} for i, s, n in _MONEDAS_CONOCIDAS]
+    for n in range(COIN_COUNT):
+        monedas.append({"id": f"coin-{n:04d}", "symbol": f"c{n:04d}", "name": f"Coin {n}"})
+        if n % 10 == 0:
+            monedas.append({"id": f"bridged-coin-{n:04d}", "symbol": f"c{n:04d}", "name": f"Bridged Coin {n}"})
+    return monedas
+
+
+def _market_cap(gid: str) -> float:
+    # Las versiones puenteadas/envueltas valen mucho menos que la original
+    factor = 1e3 if gid.startswith(("bridged-", "wrapped-")) else 1e7
+    return round(_precio(gid, base=1, rango=1000) * factor, 2)
+
+
+def _coingecko_ids(request: Request, ids: str) -> list[str]:
+    if len(str(request.url)) > MAX_URL:
+        raise HTTPException(414, "URI Too Long")
+    return [gid for gid in ids.split(",") if gid and _existe(gid)]
+
+
+@app.get("/coingecko/api/v3/simple/price")
+def coingecko_price(request: Request, ids: str = "", vs_currencies: str = "usd"):
+    return {gid: {"usd": _precio(gid, base=0.5, rango=60000)} for gid in _coingecko_ids(request, ids)}
+
+
+@app.get("/coingecko/api/v3/coins/list")
+def coingecko_list():
+    return _monedas()
+
+
+@app.get("/coingecko/api/v3/coins/markets")
+def coingecko_markets(request: Request, vs_currency: str = "usd", ids: str = ""):
+    filas = [
+        {"id": gid, "current_price": _precio(gid, base=0.5, rango=60000), "market_cap": _market_cap(gid)}
+        for gid in _coingecko_ids(request, ids)
+    ]
+    return sorted(filas, key=lambda f: -f["market_cap"])
+
+
+# ── open.er-api.com ─────────────────────────────────────────
+
+@app.get("/erapi/v6/latest/{base}")
+def erapi_latest(base: str):
+    return {"result": "success", "base_code": base.upper(), "rates": {"USD": 1.0, "PEN": USD_PEN, "EUR": 0.92}}
+
+
+# ── Yahoo Finance ───────────────────────────────────────────
+
+@app.get("/yahoo")
+@app.get("/yahoo/")
+def yahoo_home():
+    resp = PlainTextResponse("<html>consent</html>", media_type="text/html")
+    resp.set_cookie("A3", "fake-session", path="/")
+    return resp
+
+
+@app.get("/yahoo/v1/test/getcrumb")
+def yahoo_crumb():
+    return PlainTextResponse("FakeCrumb01")
+
+
+@app.get("/yahoo/v8/finance/chart/{ticker}")
+def yahoo_chart(ticker: str):
+    if not _existe(ticker):
+        return JSONResponse({"chart": {"result": None, "error": {
+            "code": "Not Found", "description": "No data found, symbol may be delisted",
+        }}}, status_code=404)
+    precio = _precio(ticker)
+    return {"chart": {"result": [{"meta": {
+        "symbol": ticker.upper(), "currency": "USD",
+        "regularMarketPrice": precio, "previousClose": round(precio * 0.99, 4),
+    }}], "error": None}}
+
+
+# ── Stooq ───────────────────────────────────────────────────
+
+@app.get("/stooq/q/l/")
+def stooq_quote(s: str = ""):
+    ticker = s.split(".")[0]
+    cabecera = "Symbol,Date,Time,Open,High,Low,Close,Volume"
+    if not _existe(ticker):
+        return PlainTextResponse(f"{cabecera}\n{s.upper()},N/D,N/D,N/D,N/D,N/D,N/D,N/D\n")
+    p = _precio(ticker)
+    return PlainTextResponse(f"{cabecera}\n{s.upper()},2026-10-16,22:00:09,{p},{p},{p},{p},1000\n")
+
+
+# ── BCRP ────────────────────────────────────────────────────
+
+_MESES_BCRP = ("Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Set", "Oct", "Nov", "Dic")
+
+
+def _tc_del_dia(d: date) -> float:
+    """Tipo de cambio determinista por día, oscilando alrededor de USD_PEN."""
+    return round(USD_PEN + ((zlib.crc32(d.isoformat().encode()) % 2001) - 1000) / 10000, 3)
+
+
+@app.get("/bcrp/estadisticas/series/api/{serie}/json")
+def bcrp_serie(serie: str):
+    return {
+        "config": {"series": [{"name": "Tipo de cambio - TC Interbancario (S/ por US$) - Venta"}]},
+        "periods": [{"name": "16.Oct.26", "values": [str(USD_PEN)]}],
+    }
+
+
+@app.get("/bcrp/estadisticas/series/api/{serie}/json/{inicio}/{fin}")
+def bcrp_serie_rango(serie: str, inicio: str, fin: str):
+    """Serie diaria (solo días hábiles, como el BCRP) entre dos fechas YYYY-MM-DD."""
+    d, hasta, periodos = date.fromisoformat(inicio), date.fromisoformat(fin), []
+    while d <= hasta:
+        if d.weekday() < 5:
+            nombre = f"{d.day:02d}.{_MESES_BCRP[d.month - 1]}.{d.year % 100:02d}"
+            periodos.append({"name": nombre, "values": [str(_tc_del_dia(d))]})
+        d += timedelta(days=1)
+    return {
+        "config": {"series": [{"name": "Tipo de cambio - TC Interbancario (S/ por US$) - Venta"}]},
+        "periods": periodos,
+    }
+
+
+# ── Telegram ────────────────────────────────────────────────
+
+@app.post("/telegram/bot{token}/sendMessage")
+async def telegram_send(token: str, request: Request):
+    body = await request.json()
+    with estado.lock:
+        estado.telegram.append({"chat_id": body.get("chat_id"), "chars": len(body.get("text", ""))})
+        message_id = len(estado.telegram)
+    return {"ok": True, "result": {"message_id": message_id, "chat": {"id": body.get("chat_id")},
+                                   "date": int(time.time()), "text": body.get("text", "")}}
+
+
+# ── Gemini (generateContent) ────────────────────────────────
+
+def _texto(contenido) -> str:
+    if isinstance(contenido, dict):
+        return " ".join(p.get("text", "") for p in contenido.get("parts", []))
+    if isinstance(contenido, list):
+        return " ".join(_texto(c) for c in contenido)
+    return str(contenido or "")
+
+
+def _respuesta_parser(prompt: str) -> dict:
+    """Una transacción por línea del texto crudo que termine en un monto."""
+    crudo = prompt.split("--- TEXTO CRUDO ---", 1)[-1].split("-------------------", 1)[0]
+    txs = []
+    for linea in crudo.splitlines():
+        partes = linea.strip().rsplit(" ", 1)
+        if len(partes) != 2:
+            continue
+        try:
+            monto = float(partes[1].replace(",", ""))
+        except ValueError:
+            continue
+        txs.append({
+            "date": time.strftime("%Y-%m-%d"), "description": partes[0], "merchant_clean": partes[0][:20],
+            "amount": abs(monto), "currency": "PEN", "type": "INGRESO" if monto > 0 else "GASTO",
+            "category_suggestion": None, "confidence": 0.9,
+        })
+    return {"transactions": txs, "summary": {
+        "total_parsed": len(txs), "possible_duplicates": 0,
+        "total_ingresos_pen": sum(t["amount"] for t in txs if t["type"] == "INGRESO"),
+        "total_gastos_pen":   sum(t["amount"] for t in txs if t["type"] == "GASTO"),
+        "currency_detected": "PEN",
+    }}
+
+
+def _respuesta_resumen() -> dict:
+    return {
+        "resumen_ejecutivo": "Mes simulado.", "semaforo": "verde", "diagnostico": "Respuesta simulada.",
+        "tasa_ahorro_pct": 20.0, "ratio_deuda_ingreso_pct": 10.0, "saldo_neto": 1000.0,
+        "top_categorias_gasto": [], "situacion_inversiones": None, "comparativa_mes_anterior": None,
+        "recomendaciones": ["Simulada 1", "Simulada 2", "Simulada 3"],
+        "proyeccion_anual": "Simulada.", "frase_motivadora": "Simulada.",
+    }
+
+
+@app.post("/gemini/{version}/models/{model_action:path}")
+async def gemini_generate(version: str, model_action: str, request: Request):
+    body    = await request.json()
+    sistema = _texto((body.get("systemInstruction") or body.get("system_instruction") or {}))
+    prompt  = _texto(body.get("contents"))
+    salida  = _respuesta_resumen() if "resumen_ejecutivo" in sistema else _respuesta_parser(prompt)
+    texto = json.dumps(salida, ensure_ascii=False)
+    return {
+        "candidates": [{"content": {"role": "model", "parts": [{"text": texto}]}, "finishReason": "STOP"}],
+        "usageMetadata": {
+            "promptTokenCount":     (len(sistema) + len(prompt)) // 4,
+            "candidatesTokenCount": len(texto) // 4,
+            "totalTokenCount":      (len(sistema) + len(prompt) + len(texto)) // 4,
+        },
+        "modelVersion": model_action.split(":", 1)[0],
+    }
+
+
+# ═══════════════════════════════════════════════════════════════
+# ADMINISTRACIÓN
+# ═══════════════════════════════════════════════════════════════
+
+@app.post("/_admin/faults")
+async def admin_faults(request: Request):
+    try:
+        estado.configure(await request.json())
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return {"defaults": estado.defaults, "faults": estado.faults}
+
+
+@app.post("/_admin/reset")
+def admin_reset():
+    estado.reset()
+    estado.configure({"*": {k: 0 for k in FAULT_KEYS}})
+    return {"ok": True}
+
+
+@app.get("/_admin/stats")
+def admin_stats():
+    with estado.lock:
+        return {"services": dict(estado.stats), "telegram_messages": len(estado.telegram)}
+
+
+@app.get("/_admin/health")
+def admin_health():
+    return Response(status_code=204)
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLI
+# ═══════════════════════════════════════════════════════════════
+
+def service_ports(port: int) -> dict[str, int]:
+    """Puerto propio de cada servicio: --port + 1, + 2, …"""
+    return {servicio: port + 1 + i for i, servicio in enumerate(SERVICES)}
+
+
+def env_for(host: str, port: int) -> dict[str, str]:
+    """Variables de entorno que apuntan la app a este servidor."""
+    url = {s: f"http://{host}:{p}/{s}" for s, p in service_ports(port).items()}
+    return {
+        "COINGECKO_API_URL":   f"{url['coingecko']}/api/v3",
+        "ER_API_URL":          f"{url['erapi']}/v6",
+        "YAHOO_FINANCE_URL":   url["yahoo"],
+        "YAHOO_QUERY_URLS":    url["yahoo"],
+        "STOOQ_URL":           url["stooq"],
+        "BCRP_API_URL":        f"{url['bcrp']}/estadisticas/series/api/PD04640PD/json",
+        "TELEGRAM_API_URL":    url["telegram"],
+        "GEMINI_BASE_URL":     f"{url['gemini']}/",
+        # yfinance no admite otra base: solo las capas HTTP
+        "PRICE_STOCK_SOURCES": "yahoo_http,stooq",
+    }
+
+
+def serve(host: str, port: int) -> None:
+    """Un servidor uvicorn sobre el puerto de administración y los de cada servicio."""
+    import socket
+    import uvicorn
+
+    sockets = []
+    for p in [port, *service_ports(port).values()]:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, p))
+        sockets.append(sock)
+    # Apagado rápido aunque haya requests colgados en un servicio "down"
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", timeout_graceful_shutdown=1))
+    asyncio.run(server.serve(sockets=sockets))
+
+
+def _parse_fault(spec: str) -> dict:
+    """'yahoo:down=1,latency_ms=200' → {'yahoo': {'down': '1', 'latency_ms': '200'}}"""
+    servicio, _, pares = spec.partition(":")
+    return {servicio: dict(p.split("=", 1) for p in pares.split(",") if p)}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host",       default="127.0.0.1")
+    ap.add_argument("--port",       type=int, default=8900, help="administración; los servicios usan los siguientes")
+    ap.add_argument("--seed",       type=int, default=42)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms",  type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--rate-limit", type=float, default=0.0, help="requests/s por servicio (0 = sin límite)")
+    ap.add_argument("--fault",      action="append", default=[], help="servicio:clave=valor[,clave=valor]")
+    ap.add_argument("--print-env",  action="store_true", help="imprime los export para la app y termina")
+    args = ap.parse_args()
+
+    if args.print_env:
+        for k, v in env_for(args.host, args.port).items():
+            print(f"export {k}={v}")
+        return
+
+    estado.rng = random.Random(args.seed)
+    estado.configure({"*": {
+        "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms,
+        "error_rate": args.error_rate, "rate_limit": args.rate_limit,
+    }})
+    for spec in args.fault:
+        estado.configure(_parse_fault(spec))
+
+    serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+FinanzasOS — benchmarks/integrations_suite.py
+Benchmark de las integraciones salientes contra los servicios simulados de
+benchmarks/fake_services.py (sin red, reproducible).
+
+Levanta el servidor simulado, apunta la app a él (COINGECKO_API_URL,
+YAHOO_QUERY_URLS, BCRP_API_URL, TELEGRAM_API_URL, GEMINI_BASE_URL…) y por
+cada escenario de fallas mide:
+
+    refresh        refresh manual (tipo de cambio, crypto y acciones en
+                   paralelo), --runs veces seguidas: la 2ª corrida muestra
+                   el efecto de los circuit breakers. Las --cryptos que no
+                   están en COINGECKO_IDS se resuelven con el índice de
+                   services/coingecko_index.py (llamadas a CoinGecko en
+                   la línea "servidor")
+    bcrp           CurrencyService.get_current_rate
+    telegram       send_message × --messages
+    gemini         generate_text del parser × --gemini-calls
+
+y registra además el estado de los breakers (por fuente y por host), la
+caché negativa y los contadores del servidor simulado (requests, 429, 503).
+
+Escenarios:
+    healthy        sin fallas
+    slow           150 ms ± 100 ms en todos los servicios
+    flaky          30 % de respuestas 503
+    rate_limited   CoinGecko y Gemini a 1 req/s, Telegram a 2 req/s
+    yahoo_down     Yahoo no responde (timeout del cliente)
+
+Uso (desde backend/):
+    python -m benchmarks.integrations_suite
+    python -m benchmarks.integrations_suite --scenarios healthy,yahoo_down --stocks 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import date, datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+ESCENARIOS = {
+    "healthy":      {},
+    "slow":         {"*": {"latency_ms": 150, "jitter_ms": 100}},
+    "flaky":        {"*": {"error_rate": 0.3}},
+    "rate_limited": {"coingecko": {"rate_limit": 1}, "gemini": {"rate_limit": 1}, "telegram": {"rate_limit": 2}},
+    "yahoo_down":   {"yahoo": {"down": 1}},
+}
+
+
+def _puertos_libres(n: int) -> int:
+    """Primer puerto de un bloque de `n` consecutivos libres."""
+    for _ in range(50):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            inicio = s.getsockname()[1]
+        try:
+            for p in range(inicio, inicio + n):
+                with socket.socket() as s:
+                    s.bind(("127.0.0.1", p))
+            return inicio
+        except OSError:
+            continue
+    sys.exit("No hay un bloque de puertos libres")
+
+
+def _admin(base: str, path: str, body: dict | None = None) -> dict:
+    req = urllib.request.Request(
+        f"{base}/_admin/{path}",
+        data=json.dumps(body).encode() if body is not None else None,
+        headers={"Content-Type": "application/json"},
+        method="POST" if body is not None else "GET",
+    )
+    with urllib.request.urlopen(req, timeout=5) as resp:
+        return json.loads(resp.read() or b"{}")
+
+
+def _esperar(base: str, proc: subprocess.Popen, timeout: float = 15.0) -> None:
+    limite = time.time() + timeout
+    while time.time() < limite:
+        if proc.poll() is not None:
+            sys.exit("El servidor simulado terminó al arrancar")
+        try:
+            urllib.request.urlopen(f"{base}/_admin/health", timeout=1)
+            return
+        except OSError:
+            time.sleep(0.1)
+    sys.exit("El servidor simulado no respondió")
+
+
+def _ms(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000, 1)
+
+
+def _seed(cryptos: int, stocks: int) -> None:
+    import models
+    from database import SessionLocal, engine
+    from services.price_service import COINGECKO_IDS
+
+    models.Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        conocidas = list(COINGECKO_IDS)[:cryptos]
+        tickers  = [(t, "crypto") for t in conocidas]
+        tickers += [(f"C{i:04d}", "crypto") for i in range(cryptos - len(conocidas))]   # vía índice
+        tickers += [(f"STK{i:03d}", "stock") for i in range(stocks)]
+        tickers += [("BADTICK", "stock")]               # no existe en ninguna fuente
+        for ticker, tipo in tickers:
+            db.add(models.Investment(
+                name=ticker, ticker=ticker, type=tipo, platform="bench",
+                quantity=1, buy_price=1, buy_date=date(2025, 1, 1),
+            ))
+        db.commit()
+
+
+def run_scenario(nombre: str, base: str, args) -> dict:
+    from database import SessionLocal
+    from services import coingecko_index, http_client, price_service, source_health, telegram_service
+    from services.currency_service import CurrencyService
+    from services.gemini_service import SYSTEM_PROMPT_PARSER, GeminiService
+
+    _admin(base, "reset", {})
+    _admin(base, "faults", ESCENARIOS[nombre])
+    http_client.reset_breakers()
+    source_health.reset()
+    coingecko_index.reset()
+
+    res = {"refresh": []}
+    for _ in range(args.runs):
+        t0      = time.perf_counter()
+        fuentes = price_service._run_sources()
+        res["refresh"].append({"total_ms": _ms(t0), "sources": fuentes})
+
+    with SessionLocal() as db:
+        t0 = time.perf_counter()
+        rate = asyncio.run(CurrencyService.get_current_rate(db))
+        res["bcrp"] = {"ms": _ms(t0), "rate": rate}
+
+    t0 = time.perf_counter()
+    ok = sum(
+        1 for i in range(args.messages)
+        if telegram_service.send_message(f"bench {i}", token="bench", chat_id="1").get("ok")
+    )
+    res["telegram"] = {"ms": _ms(t0), "ok": ok, "sent": args.messages}
+
+    gemini = GeminiService()
+    t0, ok, errores = time.perf_counter(), 0, {}
+    for i in range(args.gemini_calls):
+        try:
+            gemini.generate_text(SYSTEM_PROMPT_PARSER, f"--- TEXTO CRUDO ---\nCOMPRA {i} -25.50\n-------------------")
+            ok += 1
+        except Exception as e:
+            errores[type(e).__name__] = errores.get(type(e).__name__, 0) + 1
+    res["gemini"] = {"ms": _ms(t0), "ok": ok, "calls": args.gemini_calls, "errors": errores}
+
+    res["health"] = {**source_health.status(), "hosts": http_client.breaker_status()}
+    res["fake"]   = _admin(base, "stats")
+    return res
+
+
+def _imprimir(nombre: str, r: dict) -> None:
+    refresh = " → ".join(
+        f"{x['total_ms']:.0f}ms (" + ", ".join(f"{n} {f['status']}" for n, f in x["sources"].items()) + ")"
+        for x in r["refresh"]
+    )
+    abiertos = [s for s, v in {**r["health"]["sources"], **r["health"]["hosts"]}.items() if v["state"] != "closed"]
+    fake = r["fake"]["services"]
+    print(f"\n── {nombre}")
+    print(f"  refresh   {refresh}")
+    print(f"  bcrp      {r['bcrp']['ms']:.0f}ms (rate {r['bcrp']['rate']})")
+    print(f"  telegram  {r['telegram']['ms']:.0f}ms ({r['telegram']['ok']}/{r['telegram']['sent']} ok)")
+    print(f"  gemini    {r['gemini']['ms']:.0f}ms ({r['gemini']['ok']}/{r['gemini']['calls']} ok"
+          + (f", {r['gemini']['errors']}" if r["gemini"]["errors"] else "") + ")")
+    print(f"  circuitos abiertos: {', '.join(abiertos) or '—'} · sin datos: "
+          f"{', '.join(r['health']['unresolvable']) or '—'}")
+    print("  servidor  " + ", ".join(
+        f"{s} {v['requests']}" + (f" ({v['429']}×429)" if v.get("429") else "") + (f" ({v['503']}×503)" if v.get("503") else "")
+        for s, v in sorted(fake.items())
+    ))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scenarios",    default=",".join(ESCENARIOS), help=f"escenarios: {','.join(ESCENARIOS)}")
+    ap.add_argument("--cryptos",      type=int, default=200)
+    ap.add_argument("--stocks",       type=int, default=10)
+    ap.add_argument("--runs",         type=int, default=2, help="refresh seguidos por escenario")
+    ap.add_argument("--messages",     type=int, default=5)
+    ap.add_argument("--gemini-calls", type=int, default=3)
+    ap.add_argument("--timeout",      type=float, default=2.0, help="HTTP_TIMEOUT del cliente durante la prueba")
+    ap.add_argument("--out",          default=None, help="JSON de resultados (default benchmarks/results/integrations_<fecha>.json)")
+    args = ap.parse_args()
+
+    escenarios = [e.strip() for e in args.scenarios.split(",") if e.strip()]
+    for e in escenarios:
+        if e not in ESCENARIOS:
+            sys.exit(f"Escenario desconocido: {e} (opciones: {', '.join(ESCENARIOS)})")
+
+    from benchmarks.fake_services import SERVICES, env_for
+
+    port = _puertos_libres(len(SERVICES) + 1)
+    base = f"http://127.0.0.1:{port}"
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_services", "--port", str(port)], cwd=BACKEND_DIR,
+    )
+    try:
+        _esperar(base, fake)
+
+        # La configuración se lee al importar los servicios: se fija antes
+        tmp = tempfile.mkdtemp(prefix="finanzasos_integ_")
+        os.environ.update(env_for("127.0.0.1", port))
+        os.environ.update({
+            "DATABASE_URL":             f"sqlite:///{os.path.join(tmp, 'integ.db')}",
+            "GEMINI_API_KEY":           "bench",
+            "HTTP_TIMEOUT":             str(args.timeout),
+            "HTTP_CONNECT_TIMEOUT":     str(args.timeout),
+            "HTTP_BACKOFF_BASE":        "0.2",
+            "HTTP_BACKOFF_MAX":         "1",
+            "COINGECKO_INDEX_PATH":     os.path.join(tmp, "coingecko_index.json"),
+            "COINGECKO_MIN_INTERVAL_S": "0.5",
+        })
+        sys.path.insert(0, BACKEND_DIR)
+        _seed(args.cryptos, args.stocks)
+
+        salida = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python":    platform.python_version(),
+                "cryptos":   args.cryptos,
+                "stocks":    args.stocks,
+                "runs":      args.runs,
+                "timeout_s": args.timeout,
+            },
+            "scenarios": {},
+        }
+        for nombre in escenarios:
+            salida["scenarios"][nombre] = run_scenario(nombre, base, args)
+            _imprimir(nombre, salida["scenarios"][nombre])
+    finally:
+        fake.terminate()
+        fake.wait(timeout=10)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"integrations_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(salida, f, ensure_ascii=False, indent=2, default=str)
+    print(f"\nResultados: {out}")
+
+
+if __name__ == "__main__":
+    main()
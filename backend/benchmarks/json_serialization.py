@@ -0,0 +1,106 @@
+"""
+FinanzasOS — benchmarks/json_serialization.py
+Throughput de GET /transactions con respuestas grandes: camino estándar de
+FastAPI (objetos ORM → response_model TransactionOut → json) vs el camino
+rápido de utils/fast_json.py (tuplas → dicts → orjson).
+
+Genera una BD SQLite temporal con --rows transacciones y sirve ambas
+variantes desde la misma app con TestClient (incluye el costo HTTP/ASGI).
+Verifica además que ambos cuerpos decodifiquen al mismo JSON.
+
+Uso (desde backend/):
+    python -m benchmarks.json_serialization
+    python -m benchmarks.json_serialization --rows 50000 --n 5
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def _poblar(db, models, rows: int) -> None:
+    random.seed(7)
+    tipos = ["gasto_fijo", "gasto_variable", "deuda", "ahorro", "ingreso"]
+    db.bulk_insert_mappings(models.Transaction, [
+        {
+            "date":        f"20{random.randint(20, 26)}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}",
+            "period":      "2026-01",
+            "description": f"Movimiento de prueba {i} — café & más",
+            "amount":      round(random.uniform(-900, 900), 2),
+            "type":        random.choice(tipos),
+            "category":    random.choice(["Alimentación", "Vivienda", "Transporte", "Ocio"]),
+            "account":     random.choice(["BCP", "Interbank", "Yape"]),
+            "source":      "seed",
+        }
+        for i in range(rows)
+    ])
+    db.commit()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=50_000, help="transacciones en la BD temporal")
+    ap.add_argument("--n",    type=int, default=5,      help="requests por variante")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_json_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+    os.environ.setdefault("PDF_CACHE_DIR", os.path.join(tmp, "pdf"))
+
+    from fastapi import Depends, FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy.orm import Session
+
+    import models
+    from database import SessionLocal, engine, get_db
+    from main import TransactionOut
+    from utils import fast_json
+
+    models.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        _poblar(db, models, args.rows)
+
+    app = FastAPI()
+
+    @app.get("/estandar", response_model=list[TransactionOut])
+    def estandar(db: Session = Depends(get_db)):
+        return db.query(models.Transaction).order_by(models.Transaction.date.desc()).all()
+
+    @app.get("/rapido", response_model=list[TransactionOut])
+    def rapido(db: Session = Depends(get_db)):
+        q = db.query(*fast_json.columns(models.Transaction, TransactionOut))
+        return fast_json.FastJSONResponse(fast_json.rows_as_dicts(q.order_by(models.Transaction.date.desc())))
+
+    client = TestClient(app)
+    cuerpos, tiempos = {}, {}
+    for ruta in ("/estandar", "/rapido"):
+        client.get(ruta)                                   # calentamiento
+        ts = []
+        for _ in range(args.n):
+            t0 = time.perf_counter()
+            r  = client.get(ruta)
+            ts.append(time.perf_counter() - t0)
+        cuerpos[ruta] = r.content
+        tiempos[ruta] = ts
+
+    iguales = json.loads(cuerpos["/estandar"]) == json.loads(cuerpos["/rapido"])
+    backend = "orjson" if fast_json.orjson is not None else "json (orjson no instalado)"
+    print(f"{args.rows:,} filas · {args.n} requests por variante · serializador rápido: {backend}")
+    print(f"{'variante':<10} {'mediana':>10} {'filas/s':>12} {'bytes':>12}")
+    for ruta, ts in tiempos.items():
+        med = statistics.median(ts)
+        print(f"{ruta[1:]:<10} {med * 1000:>8.0f}ms {args.rows / med:>12,.0f} {len(cuerpos[ruta]):>12,}")
+    speedup = statistics.median(tiempos["/estandar"]) / statistics.median(tiempos["/rapido"])
+    print(f"speedup: {speedup:.1f}x · JSON equivalente: {'sí' if iguales else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
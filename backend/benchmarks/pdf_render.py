@@ -0,0 +1,132 @@
+"""
+FinanzasOS — benchmarks/pdf_render.py
+Micro-benchmark de render de PDFs (services/pdf_service.py).
+
+Mide el tiempo por PDF del resumen mensual (con sus 4 gráficos) y de los
+gráficos sueltos. Con --baseline compara contra la versión de pdf_service.py
+de otra revisión git (ej. antes de cachear estilos y plantillas).
+
+Uso (desde backend/):
+    python -m benchmarks.pdf_render
+    python -m benchmarks.pdf_render --n 50 --baseline HEAD~1
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+CONTENIDO = {
+    "semaforo":                "amarillo",
+    "resumen_ejecutivo":       "Mes con ingresos estables y gasto variable por encima de lo habitual. " * 3,
+    "tasa_ahorro_pct":         14.2,
+    "ratio_deuda_ingreso_pct": 22.5,
+    "saldo_neto":              812.40,
+    "diagnostico":             "El ahorro se mantiene positivo pero lejos de la meta del 20%. " * 4,
+    "recomendaciones":         [f"Recomendación {i}: reducir gasto en la categoría {i}." for i in range(1, 6)],
+    "top_categorias_gasto":    [
+        {"nombre": n, "monto": m, "porcentaje_ingreso": m / 60}
+        for n, m in [("Alimentación", 1450), ("Vivienda", 1200), ("Transporte", 520),
+                     ("Ocio", 410), ("Salud", 260), ("Servicios", 230)]
+    ],
+    "comparativa_mes_anterior": "El gasto variable subió 12% respecto al mes anterior.",
+    "proyeccion_anual":         "Manteniendo el ritmo actual se acumularían S/ 9,700 de ahorro.",
+    "frase_motivadora":         "Cada sol ahorrado es una decisión a tu favor.",
+    "_meta":                    {"fuente": "GEMINI"},
+}
+TOTALES = {"ingresos": 6000, "gastos_fijos": 2100, "gastos_variables": 2300, "deudas": 1350, "ahorros": 850}
+GRAFICOS = {
+    "act": TOTALES,
+    "ant": {k: v * 0.9 for k, v in TOTALES.items()},
+    "prev_period": "2026-01",
+    "kpis": [
+        {"label": "Tasa Ahorro",   "value": 14.2, "score": 71.0, "unit": "%",  "meta": "≥20%"},
+        {"label": "Control Deuda", "value": 22.5, "score": 25.0, "unit": "%",  "meta": "<30%"},
+        {"label": "Saldo Neto",    "value": 812,  "score": 100.0, "unit": "S/", "meta": ">0"},
+    ],
+    "radar": [{"label": l, "score": s} for l, s in
+              [("Ahorro", 71), ("Deuda", 25), ("Inversión", 40),
+               ("Emergencia", 88), ("Presupuesto", 62), ("Puntualidad", 100)]],
+}
+
+
+def _load(path: str, name: str):
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod  = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def _time(fn, n: int) -> float:
+    """Milisegundos promedio por llamada (tras una llamada de calentamiento)."""
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1000
+
+
+def bench(mod, n: int) -> dict:
+    g = GRAFICOS
+    return {
+        "resumen_pdf":       _time(lambda: mod.generar_pdf_resumen("2026-02", CONTENIDO, g), n),
+        "chart_kpi_bars":    _time(lambda: mod._chart_kpi_bars(g["kpis"]), n * 10),
+        "chart_radar":       _time(lambda: mod._chart_radar(g["radar"], "amarillo"), n * 10),
+        "chart_pie":         _time(lambda: mod._chart_pie(CONTENIDO["top_categorias_gasto"]), n * 10),
+        "chart_comparativa": _time(lambda: mod._chart_comparativa(g["act"], g["ant"], "2026-02", "2026-01"), n * 10),
+    }
+
+
+def _bench_in_subprocess(path: str, n: int) -> dict:
+    """Cada versión corre en su propio proceso: pdf_service ajusta rl_config global."""
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.pdf_render", "--n", str(n), "--_only", path],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n",        type=int, default=30, help="PDFs por medición")
+    ap.add_argument("--baseline", help="revisión git con la que comparar (ej. HEAD~1)")
+    ap.add_argument("--_only",    help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args._only:
+        print(json.dumps(bench(_load(args._only, "pdf_bench"), args.n)))
+        return
+
+    results = {"actual": _bench_in_subprocess(os.path.join(BACKEND_DIR, "services", "pdf_service.py"), args.n)}
+
+    if args.baseline:
+        src = subprocess.run(
+            ["git", "show", f"{args.baseline}:backend/services/pdf_service.py"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+            f.write(src)
+        try:
+            results["baseline"] = _bench_in_subprocess(f.name, args.n)
+        finally:
+            os.unlink(f.name)
+
+    cols = list(results)
+    print(f"{'ms por render':<20}" + "".join(f"{c:>12}" for c in cols) + ("   mejora" if len(cols) == 2 else ""))
+    for metric in results["actual"]:
+        vals = [results[c][metric] for c in cols]
+        line = f"{metric:<20}" + "".join(f"{v:>12.2f}" for v in vals)
+        if len(vals) == 2 and vals[0]:
+            line += f"   {vals[1] / vals[0]:.2f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,14 @@ FinanzasOS — API Backend
 FastAPI + SQLAlchemy + SQLite
 """
 import os
+import time
 from typing import Optional
 from datetime import datetime
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 import models
@@ -17,17 +20,26 @@ from routers import financial_health as financial_health_router
 from routers import reportes as reportes_router
 from routers import metas as metas_router
 from routers import flujo_caja as flujo_caja_router
-from services import price_service, telegram_service
+from routers import stream as stream_router
+from middleware import compression, profiling
+from middleware.compression import CompressionMiddleware
+from middleware.profiling import ProfilingMiddleware
+from services import price_service, telegram_service, data_version, search_service
+from services import pdf_cache, response_cache, metrics, scheduler_leader, event_bus, http_client
+from services import source_health, coingecko_index, fx_history, live_updates
 from utils.timezone_utils import now_lima, iso_lima
+from utils.period_utils import parse_period
+from utils.http_cache import etag_matches, not_modified, weak_etag
+from utils import fast_json
 
 # ─── Crear tablas al iniciar ──────────────────────────────────
 models.Base.metadata.create_all(bind=engine)
+search_service.ensure_index(engine)   # FTS5 sobre transactions (búsqueda)
 
 
-# ─── Lifespan: scheduler de precios ──────────────────────────
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Inicia schedulers al arrancar; los detiene al cerrar."""
+# ─── Lifespan: schedulers (solo en el worker líder) ──────────
+def _start_schedulers():
+    """Arranca los schedulers de precios, Telegram y el resumen de fin de mes."""
     price_service.start_scheduler()
     telegram_service.start_telegram_scheduler()
     # F-03: registrar job de resumen mensual en el scheduler de precios
@@ -39,11 +51,28 @@ async def lifespan(app: FastAPI):
         id="resumen_mensual",
         replace_existing=True,
     )
-    yield
+
+
+def _stop_schedulers():
     price_service.stop_scheduler()
     telegram_service.stop_telegram_scheduler()
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Inicia schedulers al arrancar; los detiene al cerrar. Con varios workers
+    de uvicorn solo el que tiene el lease (services/scheduler_leader.py)
+    ejecuta jobs; si muere, otro toma el relevo.
+    """
+    scheduler_leader.start(engine, _start_schedulers, _stop_schedulers)
+    yield
+    scheduler_leader.stop(_stop_schedulers)
+    reportes_router.shutdown_render_pool()
+    http_client.close()
+    await http_client.aclose()
+
+
 app = FastAPI(
     title="FinanzasOS API",
     description="Sistema de gestión financiera personal",
@@ -60,6 +89,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Compresión gzip/brotli de JSON (el nginx interno no comprime lo proxied)
+app.add_middleware(CompressionMiddleware)
+# Perfilado por request (X-Query-Count, Server-Timing, slow log) — el más externo
+profiling.instrument(engine)
+app.add_middleware(ProfilingMiddleware)
 app.include_router(patrimonio.router)
 app.include_router(ingesta.router)
 app.include_router(transferencias.router)
@@ -70,6 +104,7 @@ app.include_router(financial_health_router.router)  # G-08: Radar de Salud Finan
 app.include_router(reportes_router.router)           # F-08: Reportes PDF
 app.include_router(metas_router.router)              # F-04: Metas Financieras
 app.include_router(flujo_caja_router.router)        # F-05: Flujo de Caja Proyectado
+app.include_router(stream_router.router)             # SSE: deltas en vivo
 
 # ═══════════════════════════════════════════════════════════════
 # SCHEMAS (Pydantic)
@@ -133,6 +168,36 @@ class BulkBudget(BaseModel):
     period:  str
     budgets: dict  # {category: amount}
 
+class TransactionSearchOut(BaseModel):
+    q:      str
+    total:  int
+    limit:  int
+    offset: int
+    items:  list[TransactionOut]
+
+
+# ═══════════════════════════════════════════════════════════════
+# GET CONDICIONAL — ETag débil por versión de datos
+# ═══════════════════════════════════════════════════════════════
+
+_NO_CACHE = {"Cache-Control": "private, no-cache"}
+
+
+def _conditional(request: Request, response: Response, db: Session, scopes: list[str], *params):
+    """
+    ETag débil derivado de las versiones de `scopes` (services/data_version.py)
+    y de los parámetros de la consulta. Si el cliente ya tiene esa versión
+    (If-None-Match) retorna la respuesta 304; si no, deja el ETag en `response`
+    y retorna None para que el endpoint arme el cuerpo.
+    """
+    versions = data_version.get_versions(db, scopes)
+    etag     = weak_etag(data_version.fingerprint(versions, *params))
+    if etag_matches(request, etag):
+        return not_modified(etag, _NO_CACHE)
+    response.headers["ETag"] = etag
+    response.headers.update(_NO_CACHE)
+    return None
+
 
 # ═══════════════════════════════════════════════════════════════
 # HEALTH
@@ -143,22 +208,92 @@ def health():
     return {"status": "ok", "app": "FinanzasOS", "version": "3.0.0"}
 
 
+@app.get("/health/cache")
+def cache_stats():
+    """Métricas de los caches en proceso: respuestas de analytics, PDFs y compresión."""
+    return {"responses": response_cache.stats(), "pdf": pdf_cache.stats(), "compression": compression.stats()}
+
+
+def _cache_metrics():
+    """Collector de /metrics: contadores de los caches leídos al momento del scrape."""
+    caches = {"responses": response_cache.stats(), "pdf": pdf_cache.stats()}
+    comp   = compression.stats()["cache"]
+    if comp is not None:
+        caches["compression"] = comp
+    hits   = [({"cache": n}, c["hits"])   for n, c in caches.items()]
+    misses = [({"cache": n}, c["misses"]) for n, c in caches.items()]
+    ratio  = [
+        ({"cache": n}, c["hits"] / (c["hits"] + c["misses"]) if c["hits"] + c["misses"] else 0.0)
+        for n, c in caches.items()
+    ]
+    por_endpoint = [
+        ({"endpoint": name}, c["hit_rate"])
+        for name, c in caches["responses"]["endpoints"].items()
+    ]
+    yield "cache_hits_total",   "counter", "Aciertos de los caches en proceso.", hits
+    yield "cache_misses_total", "counter", "Fallos de los caches en proceso.",   misses
+    yield "cache_hit_ratio",    "gauge",   "Tasa de acierto desde el arranque.", ratio
+    yield "response_cache_endpoint_hit_ratio", "gauge", "Tasa de acierto del cache de respuestas por endpoint.", por_endpoint
+
+
+metrics.register_collector(_cache_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    """Métricas en formato de texto de Prometheus (scrape)."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # ═══════════════════════════════════════════════════════════════
 # TRANSACTIONS
 # ═══════════════════════════════════════════════════════════════
 
 @app.get("/transactions", response_model=list[TransactionOut])
 def list_transactions(
+    request:  Request,
+    response: Response,
     period:  Optional[str] = Query(None, description="Filtrar por período YYYY-MM"),
     type:    Optional[str] = Query(None, description="Filtrar por tipo"),
     account: Optional[str] = Query(None, description="Filtrar por cuenta"),
     db: Session = Depends(get_db)
 ):
-    q = db.query(models.Transaction)
+    scope   = f"transactions:{period}" if period else "transactions"
+    not_mod = _conditional(request, response, db, [scope], "transactions", period, type, account)
+    if not_mod:
+        return not_mod
+    # Camino rápido: tuplas → dicts → orjson, sin ORM ni validación Pydantic
+    # por fila (ver utils/fast_json.py). TransactionOut queda para OpenAPI.
+    q = db.query(*fast_json.columns(models.Transaction, TransactionOut))
     if period:  q = q.filter(models.Transaction.period == period)
     if type:    q = q.filter(models.Transaction.type == type)
     if account: q = q.filter(models.Transaction.account == account)
-    return q.order_by(models.Transaction.date.desc()).all()
+    rows = fast_json.rows_as_dicts(q.order_by(models.Transaction.date.desc()))
+    return fast_json.FastJSONResponse(rows, headers=fast_json.copy_headers(response, "etag", "cache-control"))
+
+
+@app.get("/transactions/search", response_model=TransactionSearchOut)
+def search_transactions(
+    q:      str           = Query(..., min_length=1, description="Texto a buscar (prefijos, frases, comercio:/categoria:/cuenta:)"),
+    desde:  Optional[str] = Query(None, alias="from", description="Desde YYYY-MM o YYYY-MM-DD"),
+    hasta:  Optional[str] = Query(None, alias="to",   description="Hasta YYYY-MM o YYYY-MM-DD"),
+    limit:  int           = Query(50, ge=1, le=200),
+    offset: int           = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Búsqueda de texto completo en todo el historial (FTS5 sobre descripción,
+    categoría y cuenta), ordenada por relevancia y paginada.
+    Ver services/search_service.py para la sintaxis.
+    """
+    try:
+        for p in (desde, hasta):
+            if p:
+                parse_period(p[:7])
+        total, items = search_service.search(db, q, desde, hasta, limit, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"q": q, "total": total, "limit": limit, "offset": offset, "items": items}
 
 
 @app.post("/transactions", response_model=TransactionOut, status_code=201)
@@ -241,13 +376,20 @@ def delete_transaction(tx_id: int, db: Session = Depends(get_db)):
 def delete_period(period: str, db: Session = Depends(get_db)):
     """Elimina todas las transacciones de un período (útil para re-importar)."""
     deleted = db.query(models.Transaction).filter(models.Transaction.period == period).delete()
+    # delete() masivo no pasa por el flush del ORM → versión y delta SSE manuales
+    data_version.bump(db, "transactions", f"transactions:{period}", "ahorro")
+    if deleted:
+        live_updates.transactions_changed(db, [period], deleted)
     db.commit()
     return {"deleted": deleted, "period": period}
 
 
 @app.get("/transactions/periods")
-def list_periods(db: Session = Depends(get_db)):
+def list_periods(request: Request, response: Response, db: Session = Depends(get_db)):
     """Lista todos los períodos disponibles con conteo de transacciones."""
+    not_mod = _conditional(request, response, db, ["transactions"], "periods")
+    if not_mod:
+        return not_mod
     from sqlalchemy import func as sqlfunc
     rows = (
         db.query(models.Transaction.period, sqlfunc.count(models.Transaction.id).label("count"))
@@ -263,7 +405,10 @@ def list_periods(db: Session = Depends(get_db)):
 # ═══════════════════════════════════════════════════════════════
 
 @app.get("/budgets/{period}")
-def get_budgets(period: str, db: Session = Depends(get_db)):
+def get_budgets(period: str, request: Request, response: Response, db: Session = Depends(get_db)):
+    not_mod = _conditional(request, response, db, [f"budgets:{period}"], "budgets", period)
+    if not_mod:
+        return not_mod
     rows = db.query(models.Budget).filter(models.Budget.period == period).all()
     return {r.category: r.amount for r in rows}
 
@@ -290,7 +435,7 @@ def upsert_budgets(data: BulkBudget, db: Session = Depends(get_db)):
 # ═══════════════════════════════════════════════════════════════
 
 @app.get("/profile", response_model=ProfileOut)
-def get_profile(db: Session = Depends(get_db)):
+def get_profile(request: Request, response: Response, db: Session = Depends(get_db)):
     profile = db.query(models.Profile).filter(models.Profile.id == 1).first()
     if not profile:
         # Primera ejecución — perfil vacío, el usuario lo configura desde la app
@@ -307,6 +452,9 @@ def get_profile(db: Session = Depends(get_db)):
         db.add(profile)
         db.commit()
         db.refresh(profile)
+    not_mod = _conditional(request, response, db, ["profile"], "profile")
+    if not_mod:
+        return not_mod
     return profile
 
 
@@ -456,7 +604,7 @@ class SnapshotIn(BaseModel):
 
 
 @app.get("/settings")
-def get_settings(db: Session = Depends(get_db)):
+def get_settings(request: Request, response: Response, db: Session = Depends(get_db)):
     row = db.query(models.AppSettings).filter(models.AppSettings.id == 1).first()
     if not row:
         row = models.AppSettings(
@@ -470,6 +618,9 @@ def get_settings(db: Session = Depends(get_db)):
         db.add(row)
         db.commit()
         db.refresh(row)
+    not_mod = _conditional(request, response, db, ["settings"], "settings")
+    if not_mod:
+        return not_mod
     return {
         "accounts":       row.accounts or DEFAULT_ACCOUNTS,
         "custom_rules":   row.custom_rules or [],
@@ -501,22 +652,73 @@ def save_settings(data: SettingsIn, db: Session = Depends(get_db)):
 # ═══════════════════════════════════════════════════════════════
 
 @app.get("/investments/prices/current")
-def get_current_prices(db: Session = Depends(get_db)):
+def get_current_prices(request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Devuelve todos los precios en caché actualizados por el scheduler.
     Incluye tipo de cambio USD/PEN y timestamp de última actualización.
     """
+    # El tipo de cambio no está en price_cache (sale de ExchangeRateLog): va en el ETag
+    not_mod = _conditional(request, response, db, ["prices"], "prices", price_service.get_exchange_rate(db))
+    if not_mod:
+        return not_mod
     return price_service.get_cached_prices(db)
 
 
-@app.post("/investments/prices/refresh")
+@app.post("/investments/prices/refresh", status_code=202)
 def refresh_prices():
     """
-    Dispara actualización manual inmediata de todos los precios.
-    útil para forzar sincronización sin esperar el scheduler.
+    Dispara una actualización manual de todos los precios, sin esperar el
+    scheduler. Responde de inmediato con el refresh_id; si ya había uno en
+    curso se une a ese (joined=true) en vez de lanzar otro. El avance por
+    fuente y el resultado final llegan por SSE en
+    /investments/prices/refresh/{refresh_id}/events.
     """
-    result = price_service.refresh_all_now()
-    return result
+    return price_service.request_refresh()
+
+
+@app.get("/investments/prices/refresh/{refresh_id}")
+def get_refresh_status(refresh_id: str):
+    """Estado de un refresh manual con los tiempos por fuente."""
+    estado = price_service.get_refresh(refresh_id)
+    if estado is None:
+        raise HTTPException(status_code=404, detail="Refresh no encontrado")
+    return estado
+
+
+@app.get("/investments/prices/refresh/{refresh_id}/events")
+async def refresh_events(refresh_id: str):
+    """
+    Stream SSE de un refresh: primero el estado actual (evento "state"),
+    luego un "prices.refresh" por fuente terminada y el final con
+    status done | partial | error | expired, tras el cual se cierra el stream.
+    """
+    desde  = await run_in_threadpool(event_bus.last_id)
+    estado = await run_in_threadpool(price_service.get_refresh, refresh_id)
+    if estado is None:
+        raise HTTPException(status_code=404, detail="Refresh no encontrado")
+
+    async def stream():
+        yield event_bus.sse({"id": desde, "payload": estado}, name="state")
+        if estado["status"] != "running":
+            return
+        limite = time.monotonic() + price_service.REFRESH_TTL
+        async for ev in event_bus.listen([price_service.REFRESH_TOPIC], after_id=desde):
+            if time.monotonic() > limite:
+                # Sin evento final a tiempo: el estado leído ya sale expirado si el worker murió
+                final = await run_in_threadpool(price_service.get_refresh, refresh_id)
+                if final:
+                    yield event_bus.sse({"id": ev["id"] if ev else desde, "payload": final}, name="state")
+                return
+            if ev is None:
+                yield event_bus.KEEPALIVE
+                continue
+            if ev["payload"].get("refresh_id") != refresh_id:
+                continue
+            yield event_bus.sse(ev)
+            if "source" not in ev["payload"]:
+                return
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers=event_bus.SSE_HEADERS)
 
 
 @app.get("/investments/prices/schedule")
@@ -525,8 +727,16 @@ def get_schedule_info():
     Informa el estado del scheduler y las próximas ejecuciones.
     """
     from services.price_service import _scheduler
+    leader = scheduler_leader.status()
+    # Breakers por fuente / por host, tickers en caché negativa, índice de CoinGecko y serie FX
+    health = {
+        **source_health.status(),
+        "hosts":     http_client.breaker_status(),
+        "coingecko": coingecko_index.status(),
+        "fx":        fx_history.status(),
+    }
     if not _scheduler or not _scheduler.running:
-        return {"running": False, "jobs": []}
+        return {"running": False, "jobs": [], "leader": leader, "health": health}
 
     jobs = []
     for job in _scheduler.get_jobs():
@@ -534,7 +744,7 @@ def get_schedule_info():
             "id":       job.id,
             "next_run": job.next_run_time.isoformat() if job.next_run_time else None,
         })
-    return {"running": True, "jobs": jobs}
+    return {"running": True, "jobs": jobs, "leader": leader, "health": health}
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -542,7 +752,10 @@ def get_schedule_info():
 # ═══════════════════════════════════════════════════════════════
 
 @app.get("/investments", response_model=list[InvestmentOut])
-def list_investments(db: Session = Depends(get_db)):
+def list_investments(request: Request, response: Response, db: Session = Depends(get_db)):
+    not_mod = _conditional(request, response, db, ["investments"], "investments")
+    if not_mod:
+        return not_mod
     return db.query(models.Investment).order_by(models.Investment.buy_date.desc()).all()
 
 
@@ -0,0 +1 @@
+# middleware/__init__.py
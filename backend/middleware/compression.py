@@ -0,0 +1,289 @@
+"""
+FinanzasOS — middleware/compression.py
+Compresión gzip / brotli de respuestas en el propio backend.
+
+El nginx del frontend no comprime lo que viene por proxy_pass (gzip_proxied
+está en off por defecto), así que los listados de transacciones, /export,
+el historial de patrimonio o el waterfall de flujo de caja viajaban sin
+comprimir. Este middleware ASGI:
+
+    - negocia la codificación con Accept-Encoding (br > gzip; br solo si el
+      paquete `brotli` está instalado),
+    - comprime solo tipos de contenido de la allowlist y cuerpos por encima
+      del umbral,
+    - en respuestas por streaming comprime chunk a chunk (flush cada 16 KB),
+      sin acumular el cuerpo,
+    - deja pasar intacto lo demás: PDFs y ZIPs (ya comprimidos por dentro,
+      y los PDFs por streaming / FileResponse), streams SSE, 204/304, rangos
+      y respuestas que ya traen Content-Encoding,
+    - cachea el cuerpo ya comprimido de las respuestas con ETag (su
+      representación no cambia mientras no cambie el ETag), para no
+      recomprimir en cada descarga de un mismo listado.
+
+Configuración (variables de entorno):
+    COMPRESSION_MIN_BYTES     tamaño mínimo a comprimir          (default 1024)
+    COMPRESSION_GZIP_LEVEL    nivel gzip 1–9                     (default 6)
+    COMPRESSION_BROTLI_LEVEL  nivel brotli 0–11                  (default 5)
+    COMPRESSION_TYPES         allowlist separada por comas; un
+                              valor terminado en '/' es prefijo  (default JSON, texto, JS, SVG)
+    COMPRESSION_CACHE_MB      cache de cuerpos precomprimidos    (default 32; 0 = sin cache)
+"""
+
+import gzip
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:          # dependencia opcional: sin ella solo gzip
+    brotli = None
+
+COMPRESSION_MIN_BYTES    = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL   = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_LEVEL = int(os.getenv("COMPRESSION_BROTLI_LEVEL", "5"))
+COMPRESSION_TYPES        = tuple(
+    t.strip().lower() for t in os.getenv(
+        "COMPRESSION_TYPES",
+        "application/json,text/,application/javascript,image/svg+xml",
+    ).split(",") if t.strip()
+)
+COMPRESSION_CACHE_MB     = float(os.getenv("COMPRESSION_CACHE_MB", "32"))
+
+
+# ═══════════════════════════════════════════════════════════════
+# NEGOCIACIÓN / ELEGIBILIDAD
+# ═══════════════════════════════════════════════════════════════
+
+def _accepted(header: str) -> dict[str, float]:
+    """Accept-Encoding → {codificación: q}."""
+    out = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            out[name.strip().lower()] = q
+    return out
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """'br', 'gzip' o None según lo que acepta el cliente y lo disponible."""
+    acc = _accepted(accept_encoding or "")
+    if brotli is not None and acc.get("br", 0) > 0:
+        return "br"
+    if acc.get("gzip", acc.get("*", 0)) > 0:
+        return "gzip"
+    return None
+
+
+def _allowed_type(content_type: str) -> bool:
+    base = content_type.split(";", 1)[0].strip().lower()
+    if base == "text/event-stream":
+        return False        # SSE: cada evento debe llegar al cliente apenas se emite
+    return any(base.startswith(t) if t.endswith("/") else base == t for t in COMPRESSION_TYPES)
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_LEVEL)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class _StreamCompressor:
+    """
+    Compresión incremental para respuestas por streaming. Vacía el buffer del
+    compresor cada STREAM_FLUSH_BYTES de entrada: chunks diminutos no pagan
+    un flush cada uno y el cliente igual recibe datos de forma continua.
+    """
+
+    STREAM_FLUSH_BYTES = 16 * 1024
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        self._pending = 0
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=COMPRESSION_BROTLI_LEVEL)
+        else:
+            self._c = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        self._pending += len(data)
+        flush = self._pending >= self.STREAM_FLUSH_BYTES
+        if flush:
+            self._pending = 0
+        if self.encoding == "br":
+            return self._c.process(data) + (self._c.flush() if flush else b"")
+        return self._c.compress(data) + (self._c.flush(zlib.Z_SYNC_FLUSH) if flush else b"")
+
+    def finish(self) -> bytes:
+        return self._c.finish() if self.encoding == "br" else self._c.flush()
+
+
+# ═══════════════════════════════════════════════════════════════
+# CACHE DE CUERPOS PRECOMPRIMIDOS
+# ═══════════════════════════════════════════════════════════════
+
+class _PrecompressedCache:
+    """LRU por bytes: (path+query, ETag, codificación) → cuerpo comprimido."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: tuple) -> bytes | None:
+        with self._lock:
+            body = self._data.get(key)
+            if body is None:
+                self.stats["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return body
+
+    def put(self, key: tuple, body: bytes) -> None:
+        if len(body) > self.max_bytes // 4:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._data[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, ev = self._data.popitem(last=False)
+                self._size -= len(ev)
+
+
+_cache = _PrecompressedCache(int(COMPRESSION_CACHE_MB * 1024 * 1024)) if COMPRESSION_CACHE_MB > 0 else None
+
+
+def stats() -> dict:
+    """Aciertos / fallos del cache de cuerpos precomprimidos y codificaciones disponibles."""
+    return {
+        "encodings": ["br", "gzip"] if brotli is not None else ["gzip"],
+        "cache":     dict(_cache.stats) if _cache else None,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════
+# MIDDLEWARE ASGI
+# ═══════════════════════════════════════════════════════════════
+
+class CompressionMiddleware:
+    """
+    ASGI puro (no BaseHTTPMiddleware) para no romper el streaming:
+    solo retiene el http.response.start hasta ver el primer chunk del cuerpo.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        req      = Headers(scope=scope)
+        encoding = negotiate(req.get("accept-encoding", ""))
+        if encoding is None or "range" in req:
+            await self.app(scope, receive, send)
+            return
+        key_base = (scope.get("path", ""), scope.get("query_string", b""), encoding)
+        await self.app(scope, receive, _Responder(send, encoding, key_base, scope["method"]).send)
+
+
+class _Responder:
+    def __init__(self, send, encoding: str, key_base: tuple, method: str):
+        self._send      = send
+        self.encoding   = encoding
+        self.key_base   = key_base
+        self.method     = method
+        self.start      = None      # http.response.start retenido
+        self.mode       = None      # None | "pass" | "stream"
+        self.compressor = None
+
+    def _eligible(self, headers: MutableHeaders) -> bool:
+        status = self.start["status"]
+        return (
+            200 <= status < 300 and status != 204
+            and "content-encoding" not in headers
+            and "content-range" not in headers
+            and _allowed_type(headers.get("content-type", ""))
+        )
+
+    def _mark(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # La representación comprimida no es byte a byte la original
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+    async def send(self, message) -> None:
+        if self.mode == "pass":
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+
+        if message["type"] != "http.response.body":
+            # Extensiones (ej. pathsend): no se tocan
+            self.mode = "pass"
+            await self._send(self.start)
+            await self._send(message)
+            return
+
+        body      = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.mode == "stream":
+            data = self.compressor.chunk(body) if body else b""
+            if not more_body:
+                data += self.compressor.finish()
+            if data or not more_body:
+                await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+
+        headers = MutableHeaders(scope=self.start)
+        if not self._eligible(headers) or (not more_body and len(body) < COMPRESSION_MIN_BYTES):
+            self.mode = "pass"
+            await self._send(self.start)
+            await self._send(message)
+            return
+
+        if more_body:
+            # Streaming: sin Content-Length, compresión incremental
+            self.mode       = "stream"
+            self.compressor = _StreamCompressor(self.encoding)
+            self._mark(headers)
+            del headers["content-length"]
+            await self._send(self.start)
+            await self._send({"type": "http.response.body", "body": self.compressor.chunk(body), "more_body": True})
+            return
+
+        # Cuerpo completo: usar la versión precomprimida si el ETag coincide
+        etag = headers.get("etag")
+        key  = (*self.key_base, etag) if (etag and _cache and self.method == "GET") else None
+        data = _cache.get(key) if key else None
+        if data is None:
+            data = _compress(body, self.encoding)
+            if key:
+                _cache.put(key, data)
+        self._mark(headers)
+        headers["Content-Length"] = str(len(data))
+        self.mode = "pass"
+        await self._send(self.start)
+        await self._send({"type": "http.response.body", "body": data})
@@ -0,0 +1,190 @@
+"""
+FinanzasOS — middleware/profiling.py
+Perfilado por request: tiempo total, cantidad y tiempo de consultas SQL.
+
+Los eventos before/after_cursor_execute del engine acumulan cada consulta
+en el perfil del request en curso (ContextVar: se propaga al threadpool
+donde corren los endpoints sync). Cada respuesta lleva:
+
+    X-Query-Count: 7
+    Server-Timing: db;dur=12.4;desc="7 queries", app;dur=48.1
+
+Los requests que superan los umbrales se registran en el logger
+"slow_requests" con sus sentencias y parámetros, para detectar endpoints
+lentos y regresiones N+1 (muchas consultas casi idénticas).
+
+Además alimenta services/metrics.py (GET /metrics): latencia por ruta
+(http_request_duration_seconds, también con el perfilado desactivado) y
+conteo / duración de todas las consultas SQL, incluidas las de los jobs.
+
+Configuración (variables de entorno):
+    PROFILING_ENABLED        1 = activo                              (default 1)
+    PROFILE_SLOW_MS          request lento a partir de (ms)          (default 500)
+    PROFILE_SLOW_QUERIES     request con demasiadas consultas        (default 30)
+    PROFILE_SLOW_SQL_MS      consulta individual lenta (ms)          (default 100)
+    PROFILE_MAX_STATEMENTS   sentencias guardadas por request        (default 50)
+    PROFILE_SLOW_LOG         archivo adicional para el slow log      (default: solo logging)
+"""
+
+import logging
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from services import metrics
+
+logger = logging.getLogger("slow_requests")
+
+PROFILING_ENABLED      = os.getenv("PROFILING_ENABLED", "1") == "1"
+PROFILE_SLOW_MS        = float(os.getenv("PROFILE_SLOW_MS", "500"))
+PROFILE_SLOW_QUERIES   = int(os.getenv("PROFILE_SLOW_QUERIES", "30"))
+PROFILE_SLOW_SQL_MS    = float(os.getenv("PROFILE_SLOW_SQL_MS", "100"))
+PROFILE_MAX_STATEMENTS = int(os.getenv("PROFILE_MAX_STATEMENTS", "50"))
+PROFILE_SLOW_LOG       = os.getenv("PROFILE_SLOW_LOG", "")
+
+if PROFILE_SLOW_LOG:
+    _fh = logging.FileHandler(PROFILE_SLOW_LOG, encoding="utf-8")
+    _fh.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logger.addHandler(_fh)
+
+
+@dataclass
+class RequestProfile:
+    """Métricas acumuladas de un request."""
+    queries:    int   = 0
+    sql_ms:     float = 0.0
+    statements: list  = field(default_factory=list)   # [(ms, sql, params)]
+    patrones:   Counter = field(default_factory=Counter)
+
+
+_current: ContextVar[RequestProfile | None] = ContextVar("request_profile", default=None)
+
+
+def current() -> RequestProfile | None:
+    """Perfil del request en curso (None fuera de un request HTTP)."""
+    return _current.get()
+
+
+# ═══════════════════════════════════════════════════════════════
+# EVENTOS DEL ENGINE
+# ═══════════════════════════════════════════════════════════════
+
+def instrument(engine: Engine) -> None:
+    """Registra los eventos de conteo / tiempo de consultas en `engine`."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_prof_t0", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        t0   = conn.info["_prof_t0"].pop()
+        ms   = (time.perf_counter() - t0) * 1000
+        prof = _current.get()
+        ctx  = "background" if prof is None else "request"
+        metrics.DB_QUERIES.labels(ctx).inc()
+        metrics.DB_DURATION.labels(ctx).observe(ms / 1000)
+        if prof is None:
+            return
+        prof.queries += 1
+        prof.sql_ms  += ms
+        prof.patrones[statement] += 1
+        if len(prof.statements) < PROFILE_MAX_STATEMENTS:
+            prof.statements.append((ms, statement, parameters))
+        if ms >= PROFILE_SLOW_SQL_MS:
+            logger.warning(f"[SlowSQL] {ms:.1f} ms · {_one_line(statement)} · params={_fmt_params(parameters)}")
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        # Una sentencia que falla no llega a after_cursor_execute: sacar su t0
+        # para que no se acumule en la conexión del pool ni desfase las siguientes
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("_prof_t0"):
+            conn.info["_prof_t0"].pop()
+
+
+def _one_line(sql: str, limit: int = 300) -> str:
+    sql = " ".join(sql.split())
+    return sql if len(sql) <= limit else sql[:limit] + "…"
+
+
+def _fmt_params(params, limit: int = 200) -> str:
+    txt = repr(params)
+    return txt if len(txt) <= limit else txt[:limit] + "…"
+
+
+# ═══════════════════════════════════════════════════════════════
+# MIDDLEWARE ASGI
+# ═══════════════════════════════════════════════════════════════
+
+class ProfilingMiddleware:
+    """Mide cada request HTTP y agrega X-Query-Count / Server-Timing a la respuesta."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        prof   = RequestProfile() if PROFILING_ENABLED else None
+        token  = _current.set(prof)
+        t0     = time.perf_counter()
+        status = 500
+        sse    = False
+
+        async def send_wrapper(message):
+            nonlocal status, sse
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                sse    = MutableHeaders(scope=message).get("content-type", "").startswith("text/event-stream")
+                if prof is not None:
+                    # Tiempos hasta el inicio de la respuesta (el streaming posterior no cuenta)
+                    app_ms  = (time.perf_counter() - t0) * 1000
+                    headers = MutableHeaders(scope=message)
+                    headers["X-Query-Count"] = str(prof.queries)
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={prof.sql_ms:.1f};desc="{prof.queries} queries", app;dur={app_ms:.1f}',
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            total_ms = (time.perf_counter() - t0) * 1000
+            if sse:
+                return          # stream SSE: su duración es la de la conexión, no latencia
+            metrics.HTTP_DURATION.labels(scope["method"], _route_label(scope), status).observe(total_ms / 1000)
+            if prof is not None and (total_ms >= PROFILE_SLOW_MS or prof.queries >= PROFILE_SLOW_QUERIES):
+                _log_slow(scope, prof, total_ms)
+
+
+def _route_label(scope) -> str:
+    """Plantilla de la ruta (/budgets/{period}), no el path concreto: cardinalidad acotada."""
+    route = scope.get("route")     # FastAPI la deja en el scope al despachar
+    return route.path if route is not None else "unmatched"
+
+
+def _log_slow(scope, prof: RequestProfile, total_ms: float) -> None:
+    path = scope.get("path", "")
+    qs   = scope.get("query_string", b"").decode("latin-1")
+    lines = [
+        f"[SlowRequest] {scope.get('method')} {path}{'?' + qs if qs else ''} · "
+        f"{total_ms:.1f} ms total · {prof.queries} queries · {prof.sql_ms:.1f} ms SQL"
+    ]
+    # Sentencias repetidas: el síntoma típico de un N+1
+    repetidas = [(n, sql) for sql, n in prof.patrones.most_common(3) if n > 1]
+    for n, sql in repetidas:
+        lines.append(f"  ×{n} {_one_line(sql)}")
+    for ms, sql, params in sorted(prof.statements, key=lambda s: s[0], reverse=True)[:10]:
+        lines.append(f"  {ms:7.1f} ms  {_one_line(sql)}  params={_fmt_params(params)}")
+    logger.warning("\n".join(lines))
@@ -331,3 +331,63 @@ class AppTelegramConfig(Base):
     notify_hour       = Column(Integer, default=8)           # Hora de envío (Lima)
     updated_at        = Column(DateTime(timezone=True), onupdate=func.now())
 
+
+
+# ── VERSIONADO DE DATOS (invalidación de caches) ─────────────
+
+class DataVersion(Base):
+    """
+    Contador de versión por ámbito de datos (ej. 'transactions:2026-02').
+    Se incrementa automáticamente en cada escritura ORM (services/data_version.py).
+    Los caches de PDFs y respuestas lo usan como parte de su clave.
+    """
+    __tablename__ = "data_versions"
+
+    scope      = Column(String(60), primary_key=True)               # 'transactions:YYYY-MM' | 'budgets:YYYY-MM' | 'profile' | ...
+    version    = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+# ── LIDERAZGO DEL SCHEDULER (varios workers de uvicorn) ──────
+
+class SchedulerLease(Base):
+    """
+    Lease del scheduler: solo el proceso que lo tiene vigente ejecuta jobs.
+    Se renueva periódicamente (services/scheduler_leader.py); si el líder
+    muere, el lease expira y otro worker lo toma.
+    """
+    __tablename__ = "scheduler_leases"
+
+    name       = Column(String(40), primary_key=True)               # 'scheduler'
+    holder     = Column(String(120), nullable=False)                # host:pid:token del líder
+    expires_at = Column(Float, nullable=False)                      # epoch (s)
+    renewed_at = Column(Float, nullable=False)
+
+
+# ── EVENTOS (SSE) Y REFRESH MANUAL DE PRECIOS ────────────────
+
+class EventLog(Base):
+    """
+    Bitácora corta de eventos para los streams SSE (services/event_bus.py).
+    En BD y no solo en memoria: con varios workers el evento puede
+    publicarse en un proceso y el cliente estar conectado a otro.
+    """
+    __tablename__ = "event_log"
+
+    id         = Column(Integer, primary_key=True, autoincrement=True)
+    topic      = Column(String(60), nullable=False, index=True)     # 'prices.refresh' | ...
+    payload    = Column(JSON, nullable=False)
+    created_at = Column(Float, nullable=False, index=True)          # epoch (s)
+
+
+class PriceRefresh(Base):
+    """Refresh manual de precios: estado y tiempos por fuente (POST /investments/prices/refresh)."""
+    __tablename__ = "price_refreshes"
+
+    id           = Column(String(32), primary_key=True)             # refresh_id
+    status       = Column(String(12), nullable=False, default="running")   # running | done | partial | error | expired
+    requested_at = Column(DateTime, default=datetime.utcnow)
+    finished_at  = Column(DateTime, nullable=True)
+    joined       = Column(Integer, default=0)                       # requests que se unieron a este refresh
+    sources      = Column(JSON, default={})                         # {fuente: {status, ms, error}}
+    total_ms     = Column(Float, nullable=True)
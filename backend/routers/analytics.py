@@ -3,13 +3,16 @@
 # Métricas financieras reales respetando excluir_del_analisis
 # ============================================================
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import Integer, case, cast, func
 from typing import Optional
 from collections import defaultdict
+import calendar
 from database import get_db
 from models import Transaction, Budget
+from services import response_cache
+from utils.period_utils import current_period, parse_period, period_range, shift_period
 
 router = APIRouter(prefix="/v3/analytics", tags=["Analytics v3"])
 
@@ -50,11 +53,7 @@ def _semaforo(tasa_ahorro: float, ratio_deuda: float) -> dict:
 
 # ── GET: Resumen del período ──────────────────────────────────
 
-@router.get("/resumen/{period}")
-def resumen_periodo(
-    period: str,
-    db: Session = Depends(get_db),
-):
+def _calcular_resumen(db: Session, period: str) -> dict:
     """
     Métricas completas de un período YYYY-MM.
     Excluye automáticamente movimientos internos del cálculo.
@@ -183,14 +182,38 @@ def resumen_periodo(
     }
 
 
-# ── GET: Alertas inteligentes de anomalías (F-07) ───────────
-
-@router.get("/alertas/{period}")
-def alertas_periodo(
+@router.get("/resumen/{period}")
+def resumen_periodo(
     period: str,
-    umbral_ahorro: float = Query(10.0, description="Tasa de ahorro mínima esperada (%)"),
     db: Session = Depends(get_db),
 ):
+    """
+    Métricas completas de un período YYYY-MM (ver _calcular_resumen).
+    Cacheado hasta que cambien las transacciones o presupuestos del período.
+    """
+    return response_cache.get_or_compute(
+        db, "resumen", {"period": period},
+        [f"transactions:{period}", f"budgets:{period}"],
+        lambda: _calcular_resumen(db, period),
+    )
+
+
+# ── GET: Alertas inteligentes de anomalías (F-07) ───────────
+
+def _periodos_anteriores(db: Session, period: str, n: int = 3) -> list[str]:
+    """Últimos `n` períodos con movimientos anteriores a `period` (más reciente primero)."""
+    rows = (
+        db.query(Transaction.period)
+        .filter(Transaction.period < period)
+        .distinct()
+        .order_by(Transaction.period.desc())
+        .limit(n)
+        .all()
+    )
+    return [r.period for r in rows]
+
+
+def _calcular_alertas(db: Session, period: str, umbral_ahorro: float, periodos_anteriores: list[str]) -> dict:
     """
     F-07: Alertas Inteligentes de Anomalías.
     Detecta 4 tipos de situaciones anómalas en el período:
@@ -208,17 +231,6 @@ def alertas_periodo(
         .all()
     )
 
-    # ── Períodos anteriores disponibles ──────────────────────
-    periodos_bd = (
-        db.query(Transaction.period)
-        .filter(Transaction.period < period)
-        .distinct()
-        .order_by(Transaction.period.desc())
-        .limit(3)
-        .all()
-    )
-    periodos_anteriores = [r.period for r in periodos_bd]
-
     # ── 1. TASA DE AHORRO BAJA ────────────────────────────────
     total_ingresos = sum(t.amount for t in txs_actual if t.type == "ingreso" and t.amount > 0)
     total_ahorro   = sum(abs(t.amount) for t in txs_actual if t.type == "ahorro")
@@ -368,16 +380,29 @@ def alertas_periodo(
     }
 
 
-# ── GET: Comparativa entre períodos ──────────────────────────
-
-@router.get("/comparativa")
-def comparativa_periodos(
-    periodo_actual:   str = Query(..., description="Ej: 2025-12"),
-    periodo_anterior: str = Query(..., description="Ej: 2025-11"),
+@router.get("/alertas/{period}")
+def alertas_periodo(
+    period: str,
+    umbral_ahorro: float = Query(10.0, description="Tasa de ahorro mínima esperada (%)"),
     db: Session = Depends(get_db),
 ):
-    """Compara ingresos, gastos y ahorro entre dos períodos."""
+    """
+    F-07: Alertas inteligentes del período (ver _calcular_alertas).
+    Dependen del período y de los 3 anteriores con datos: la clave incluye
+    esos períodos y sus versiones.
+    """
+    periodos_anteriores = _periodos_anteriores(db, period)
+    return response_cache.get_or_compute(
+        db, "alertas",
+        {"period": period, "umbral_ahorro": umbral_ahorro, "base": periodos_anteriores},
+        [f"transactions:{p}" for p in [period, *periodos_anteriores]],
+        lambda: _calcular_alertas(db, period, umbral_ahorro, periodos_anteriores),
+    )
 
+
+# ── GET: Comparativa entre períodos ──────────────────────────
+
+def _calcular_comparativa(db: Session, periodo_actual: str, periodo_anterior: str) -> dict:
     def _totales(period: str):
         txs = _txs_activas(db, period)
         return {
@@ -403,3 +428,298 @@ def comparativa_periodos(
             "ahorro_pct":   _variacion(actual["ahorro"],   anterior["ahorro"]),
         },
     }
+
+
+@router.get("/comparativa")
+def comparativa_periodos(
+    periodo_actual:   str = Query(..., description="Ej: 2025-12"),
+    periodo_anterior: str = Query(..., description="Ej: 2025-11"),
+    db: Session = Depends(get_db),
+):
+    """Compara ingresos, gastos y ahorro entre dos períodos (cacheado por versión)."""
+    return response_cache.get_or_compute(
+        db, "comparativa",
+        {"actual": periodo_actual, "anterior": periodo_anterior},
+        [f"transactions:{periodo_actual}", f"transactions:{periodo_anterior}"],
+        lambda: _calcular_comparativa(db, periodo_actual, periodo_anterior),
+    )
+
+
+# ── GET: Tendencia multi-período ─────────────────────────────
+
+_TIPOS_TENDENCIA = {
+    "ingreso":        "ingresos",
+    "gasto_fijo":     "gastos_fijos",
+    "gasto_variable": "gastos_variables",
+    "deuda":          "deudas",
+    "ahorro":         "ahorros",
+}
+_MAX_PERIODOS_TENDENCIA = 120
+
+
+@router.get("/tendencia")
+def tendencia(
+    desde: Optional[str] = Query(None, alias="from", description="Período inicial YYYY-MM"),
+    hasta: Optional[str] = Query(None, alias="to",   description="Período final YYYY-MM"),
+    meses: Optional[int] = Query(None, ge=1, le=_MAX_PERIODOS_TENDENCIA,
+                                 description="Modo rolling: últimos N meses hasta 'to' (default: mes actual)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Totales mensuales por tipo para un rango de períodos, en una sola consulta
+    GROUP BY period, type. Reemplaza la descarga de todas las transacciones de
+    cada mes para graficar la evolución mensual.
+
+    Modos:
+      ?from=2025-09&to=2026-02   rango explícito
+      ?meses=6[&to=2026-02]      últimos N meses hasta 'to' (o el mes actual)
+
+    Ingresos = suma con signo (igual que calcMetrics del frontend); el resto
+    en valor absoluto. Excluye movimientos internos. Los meses sin datos
+    aparecen con totales en 0.
+    """
+    try:
+        if meses:
+            hasta   = hasta or current_period()
+            desde   = shift_period(hasta, -(meses - 1))
+        elif not (desde and hasta):
+            raise HTTPException(status_code=400, detail="Indica 'from' y 'to', o 'meses'.")
+        periodos = period_range(desde, hasta)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not periodos:
+        raise HTTPException(status_code=400, detail="'from' debe ser anterior o igual a 'to'.")
+    if len(periodos) > _MAX_PERIODOS_TENDENCIA:
+        raise HTTPException(status_code=400, detail=f"Máximo {_MAX_PERIODOS_TENDENCIA} períodos por consulta.")
+
+    monto = case(
+        (Transaction.type == "ingreso", Transaction.amount),
+        else_=func.abs(Transaction.amount),
+    )
+    rows = (
+        db.query(
+            Transaction.period,
+            Transaction.type,
+            func.sum(monto).label("total"),
+            func.count(Transaction.id).label("n"),
+        )
+        .filter(
+            Transaction.period.between(desde, hasta),
+            Transaction.excluir_del_analisis == False,
+        )
+        .group_by(Transaction.period, Transaction.type)
+        .all()
+    )
+
+    data = {
+        p: {"period": p, **{k: 0.0 for k in _TIPOS_TENDENCIA.values()}, "movimientos": 0}
+        for p in periodos
+    }
+    for r in rows:
+        fila = data.get(r.period)
+        if fila is None:
+            continue
+        fila["movimientos"] += r.n
+        key = _TIPOS_TENDENCIA.get(r.type)
+        if key:
+            fila[key] = round(float(r.total or 0), 2)
+
+    return {"desde": desde, "hasta": hasta, "periodos": list(data.values())}
+
+
+# ── GET: Heatmap semanal (G-05) ──────────────────────────────
+
+# Día de la semana Lun=0 … Dom=6 (strftime %w usa Dom=0) y semana del mes 0–4
+_DIA_SQL    = (cast(func.strftime("%w", Transaction.date), Integer) + 6) % 7
+_SEMANA_SQL = (cast(func.strftime("%d", Transaction.date), Integer) - 1) // 7
+
+
+def _filtro_gastos(period: str) -> tuple:
+    """Gastos del período que afectan el análisis (sin ingresos ni internos)."""
+    return (
+        Transaction.period == period,
+        Transaction.type != "ingreso",
+        Transaction.excluir_del_analisis == False,
+    )
+
+
+def _filtro_heatmap(period: str) -> tuple:
+    """_filtro_gastos + fecha con forma YYYY-MM-DD (strftime da NULL con "" u otros formatos)."""
+    return _filtro_gastos(period) + (
+        Transaction.date.op("GLOB")("[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*"),
+    )
+
+
+def _validar_periodo(period: str) -> tuple[int, int]:
+    try:
+        return parse_period(period)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _calcular_heatmap(db: Session, period: str) -> dict:
+    y, m    = _validar_periodo(period)
+    ult_dia = calendar.monthrange(y, m)[1]
+    semanas = [
+        {"idx": s, "desde": s * 7 + 1, "hasta": min(s * 7 + 7, ult_dia),
+         "label": f"Sem {s + 1} ({s * 7 + 1}–{min(s * 7 + 7, ult_dia)})"}
+        for s in range(5) if s * 7 + 1 <= ult_dia
+    ]
+
+    dia, sem = _DIA_SQL.label("dia"), _SEMANA_SQL.label("sem")
+    rows = (
+        db.query(
+            dia, sem,
+            func.sum(func.abs(Transaction.amount)).label("monto"),
+            func.count(Transaction.id).label("cantidad"),
+        )
+        .filter(*_filtro_heatmap(period))
+        .group_by(dia, sem)
+        .all()
+    )
+
+    # Top 3 movimientos por celda (tooltip), vía ROW_NUMBER por celda
+    rn  = func.row_number().over(
+        partition_by=(_SEMANA_SQL, _DIA_SQL),
+        order_by=func.abs(Transaction.amount).desc(),
+    )
+    sub = (
+        db.query(dia, sem, Transaction.description, Transaction.amount, rn.label("rn"))
+        .filter(*_filtro_heatmap(period))
+        .subquery()
+    )
+    top = defaultdict(list)
+    for r in db.query(sub).filter(sub.c.rn <= 3).order_by(sub.c.rn).all():
+        top[(r.sem, r.dia)].append({
+            "description": r.description,
+            "amount":      round(abs(r.amount), 2),
+        })
+
+    celdas         = []
+    totales_dia    = [0.0] * 7
+    totales_semana = [0.0] * len(semanas)
+    for r in rows:
+        # Fechas con forma válida pero inexistentes (ej. 2025-13-01) también dan NULL
+        if r.dia is None or r.sem is None:
+            continue
+        monto = round(float(r.monto or 0), 2)
+        celdas.append({
+            "sem": r.sem, "dia": r.dia, "monto": monto, "cantidad": r.cantidad,
+            "top": top.get((r.sem, r.dia), []),
+        })
+        totales_dia[r.dia] += monto
+        if r.sem < len(totales_semana):
+            totales_semana[r.sem] += monto
+
+    return {
+        "period":         period,
+        "semanas":        semanas,
+        "celdas":         sorted(celdas, key=lambda c: (c["sem"], c["dia"])),
+        "totales_dia":    [round(v, 2) for v in totales_dia],
+        "totales_semana": [round(v, 2) for v in totales_semana],
+        "max_monto":      max((c["monto"] for c in celdas), default=0),
+        "max_cantidad":   max((c["cantidad"] for c in celdas), default=0),
+    }
+
+
+@router.get("/heatmap/{period}")
+def heatmap_semanal(
+    period: str,
+    db: Session = Depends(get_db),
+):
+    """
+    Intensidad de gastos por día de la semana × semana del mes (G-05),
+    agregada en SQL. Solo viajan las celdas con movimientos (máx. 35) y el
+    top 3 de cada una para el tooltip, en lugar de todas las transacciones.
+    """
+    _validar_periodo(period)
+    return response_cache.get_or_compute(
+        db, "heatmap", {"period": period}, [f"transactions:{period}"],
+        lambda: _calcular_heatmap(db, period),
+    )
+
+
+# ── GET: Treemap de gastos (G-01) ────────────────────────────
+
+def _calcular_treemap(db: Session, period: str, comercios: int) -> dict:
+    comercio = func.trim(Transaction.description).label("comercio")
+    rows = (
+        db.query(
+            Transaction.category,
+            Transaction.type,
+            comercio,
+            func.sum(func.abs(Transaction.amount)).label("monto"),
+            func.count(Transaction.id).label("cantidad"),
+        )
+        .filter(*_filtro_gastos(period))
+        .group_by(Transaction.category, Transaction.type, comercio)
+        .all()
+    )
+
+    cats = {}
+    for r in rows:
+        c = cats.setdefault(r.category, {"por_tipo": defaultdict(float), "comercios": defaultdict(lambda: [0.0, 0])})
+        c["por_tipo"][r.type]        += float(r.monto or 0)
+        c["comercios"][r.comercio][0] += float(r.monto or 0)
+        c["comercios"][r.comercio][1] += r.cantidad
+
+    total = sum(sum(c["por_tipo"].values()) for c in cats.values())
+    pct   = lambda v: round(v / total * 100, 1) if total > 0 else 0.0
+
+    categorias = []
+    tipos      = defaultdict(float)
+    for nombre, c in cats.items():
+        valor = sum(c["por_tipo"].values())
+        if valor <= 0:
+            continue
+        # Tipo dominante de la categoría (una categoría puede aparecer en varios tipos)
+        tipo = max(c["por_tipo"].items(), key=lambda kv: kv[1])[0]
+        for t, v in c["por_tipo"].items():
+            tipos[t] += v
+
+        ordenados = sorted(c["comercios"].items(), key=lambda kv: kv[1][0], reverse=True)
+        children  = [
+            {"name": n, "value": round(v, 2), "cantidad": k, "pct": pct(v)}
+            for n, (v, k) in ordenados[:comercios]
+        ]
+        resto = ordenados[comercios:]
+        if resto:
+            v = sum(x[1][0] for x in resto)
+            children.append({
+                "name": f"Otros ({len(resto)})", "value": round(v, 2),
+                "cantidad": sum(x[1][1] for x in resto), "pct": pct(v),
+            })
+
+        categorias.append({
+            "name":     nombre,
+            "type":     tipo,
+            "value":    round(valor, 2),
+            "pct":      pct(valor),
+            "children": children,
+        })
+
+    categorias.sort(key=lambda c: c["value"], reverse=True)
+    return {
+        "period":     period,
+        "total":      round(total, 2),
+        "tipos":      [{"type": t, "value": round(v, 2)} for t, v in sorted(tipos.items(), key=lambda kv: -kv[1])],
+        "categorias": categorias,
+    }
+
+
+@router.get("/treemap/{period}")
+def treemap_gastos(
+    period: str,
+    comercios: int = Query(8, ge=1, le=50, description="Comercios por categoría; el resto se agrupa en 'Otros'"),
+    db: Session = Depends(get_db),
+):
+    """
+    Jerarquía categoría → comercio (descripción) de los gastos del período
+    (G-01), agregada en SQL. Incluye totales por tipo para la leyenda.
+    """
+    _validar_periodo(period)
+    return response_cache.get_or_compute(
+        db, "treemap", {"period": period, "comercios": comercios}, [f"transactions:{period}"],
+        lambda: _calcular_treemap(db, period, comercios),
+    )
@@ -16,6 +16,7 @@ from datetime import date
 
 import models
 from database import get_db
+from services import response_cache
 
 router = APIRouter()
 
@@ -55,6 +56,16 @@ def get_financial_health(
         today = date.today()
         period = f"{today.year}-{today.month:02d}"
 
+    # Cacheado hasta que cambien las transacciones / presupuestos del período
+    # o el ahorro histórico (fondo de emergencia)
+    return response_cache.get_or_compute(
+        db, "financial_health", {"period": period},
+        [f"transactions:{period}", f"budgets:{period}", "ahorro"],
+        lambda: _calcular_financial_health(db, period),
+    )
+
+
+def _calcular_financial_health(db: Session, period: str) -> dict:
     # Extraer año y mes para etiqueta
     try:
         y, m = int(period[:4]), int(period[5:7])
@@ -14,6 +14,8 @@ import calendar
 
 from database import get_db
 import models
+from services import response_cache
+from utils.period_utils import parse_period, shift_period
 from utils.timezone_utils import now_lima
 
 router = APIRouter(prefix="/v3/flujo-caja", tags=["Flujo de Caja"])
@@ -150,12 +152,27 @@ def get_flujo_caja(
     """
     # Parsear período
     try:
-        year, month = int(period[:4]), int(period[5:7])
-    except (ValueError, IndexError):
+        year, month = parse_period(period)
+    except ValueError:
         return {"error": f"Período inválido: {period}"}
 
     today = now_lima().date()
 
+    # Un mes cerrado ya no depende de la fecha de hoy (todas sus semanas son
+    # "real"); el mes en curso y los futuros se recalculan cada día.
+    prev_periods = [shift_period(period, -1), shift_period(period, -2)]
+    cerrado      = period < today.strftime("%Y-%m")
+    data = response_cache.get_or_compute(
+        db, "flujo_caja",
+        {"period": period, "saldo_inicial": saldo_inicial, "hoy": None if cerrado else today.isoformat()},
+        [f"transactions:{p}" for p in [period, *prev_periods]] + ["profile"],
+        lambda: _calcular_flujo_caja(db, period, year, month, saldo_inicial, today, prev_periods),
+    )
+    return {**data, "today": today.isoformat()}
+
+
+def _calcular_flujo_caja(db: Session, period: str, year: int, month: int,
+                         saldo_inicial: float, today: date, prev_periods: list[str]) -> dict:
     # ── Obtener transacciones del mes ────────────────────────
     txs = (
         db.query(models.Transaction)
@@ -167,15 +184,6 @@ def get_flujo_caja(
     )
 
     # ── Promedios históricos (2 meses anteriores) ─────────────
-    prev_periods = []
-    for delta in [1, 2]:
-        m = month - delta
-        y = year
-        if m <= 0:
-            m += 12
-            y -= 1
-        prev_periods.append(f"{y:04d}-{m:02d}")
-
     hist_txs = (
         db.query(models.Transaction)
         .filter(
@@ -5,12 +5,15 @@
 # en ⚙️ Configuración, aquí aparecen automáticamente.
 # ============================================================
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from typing import Optional
 from database import get_db
 from models import Asset, AssetBalanceSnapshot, AssetGoal, ExchangeRateLog, AppSettings
+from services import fx_history, networth_series
 from services.currency_service import CurrencyService
+from utils.timezone_utils import today_lima
 
 router = APIRouter(prefix="/v3/patrimonio", tags=["Patrimonio v3"])
 
@@ -200,13 +203,21 @@ async def registrar_snapshot(
     asset_id: int,
     balance:  float,
     source:   str = "MANUAL",
+    snapshot_date: Optional[date] = None,
     db: Session = Depends(get_db),
 ):
+    """
+    Registra un saldo. Con `snapshot_date` (carga de saldos pasados) se usa
+    el tipo de cambio de esa fecha; sin ella, el actual.
+    """
     asset = db.query(Asset).filter(Asset.id == asset_id).first()
     if not asset:
         raise HTTPException(status_code=404, detail="Activo no encontrado")
 
-    rate        = await CurrencyService.get_current_rate(db)
+    if snapshot_date and snapshot_date < today_lima():
+        rate = fx_history.rate_on(db, snapshot_date)
+    else:
+        rate = await CurrencyService.get_current_rate(db)
     balance_pen = CurrencyService.convert_to_pen(balance, asset.currency, rate)
 
     snapshot = AssetBalanceSnapshot(
@@ -216,6 +227,8 @@ async def registrar_snapshot(
         exchange_rate = rate if asset.currency == "USD" else None,
         source        = source,
     )
+    if snapshot_date:
+        snapshot.snapshot_date = datetime.combine(snapshot_date, datetime.min.time()) + timedelta(hours=12)
     db.add(snapshot)
     db.commit()
     db.refresh(snapshot)
@@ -276,20 +289,38 @@ def eliminar_snapshot(
 # ── GET: Historial de patrimonio neto ────────────────────────
 
 @router.get("/historial")
-async def get_historial_patrimonio(db: Session = Depends(get_db)):
-    from sqlalchemy import func
+def get_historial_patrimonio(
+    desde:      Optional[date] = Query(None, alias="from", description="Desde YYYY-MM-DD"),
+    hasta:      Optional[date] = Query(None, alias="to",   description="Hasta YYYY-MM-DD"),
+    resolution: str            = Query("day", description="day | week | month"),
+    max_points: Optional[int]  = Query(None, ge=3, le=5000, description="Reducir con LTTB a N puntos"),
+    db: Session = Depends(get_db),
+):
+    """
+    Patrimonio neto diario con el último saldo de cada cuenta arrastrado y
+    el portafolio de inversiones, en soles al tipo de cambio de cada día.
+    Solo cuentas activas, como /consolidado. Ver services/networth_series.py.
+    """
+    _sync_assets_from_settings(db)
+    try:
+        return networth_series.series(db, desde, hasta, resolution, max_points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    snapshots = (
-        db.query(
-            func.date(AssetBalanceSnapshot.snapshot_date).label("fecha"),
-            func.sum(AssetBalanceSnapshot.balance_pen).label("total_pen"),
-        )
-        .group_by(func.date(AssetBalanceSnapshot.snapshot_date))
-        .order_by(func.date(AssetBalanceSnapshot.snapshot_date).asc())
-        .all()
-    )
 
-    return [
-        {"fecha": str(s.fecha), "patrimonio_pen": round(s.total_pen, 2)}
-        for s in snapshots
-    ]
+# ── GET: Patrimonio a una fecha pasada ───────────────────────
+
+@router.get("/as-of/{fecha}")
+def get_patrimonio_as_of(fecha: date, db: Session = Depends(get_db)):
+    """
+    Patrimonio neto al cierre de `fecha` (YYYY-MM-DD): último snapshot ≤ fecha
+    de cada cuenta y del portafolio, convertido con el tipo de cambio de ese
+    día. Solo cuentas activas, como /consolidado. Se resuelve sobre la serie
+    en memoria (services/networth_series.py).
+    """
+    _sync_assets_from_settings(db)
+    resultado = networth_series.as_of(db, fecha)
+    nombres   = {a.id: (a.name, a.institution) for a in db.query(Asset.id, Asset.name, Asset.institution)}
+    for item in resultado["assets"]:
+        item["name"], item["institution"] = nombres.get(item["asset_id"], (None, None))
+    return resultado
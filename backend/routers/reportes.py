@@ -3,20 +3,47 @@ FinanzasOS — routers/reportes.py
 F-08: Exportación y Reportes PDF
 
 Rutas:
-  GET /v3/reportes/resumen/{period}  — Descarga PDF del resumen mensual con gráficos
+  GET /v3/reportes/resumen/{period}        — Descarga PDF del resumen mensual con gráficos
+  GET /v3/reportes/estado-cuenta/{period}  — Descarga PDF del estado de cuenta
+  GET /v3/reportes/estado-cuenta/{desde}/{hasta}
+                                           — Estado de cuenta de un rango (modo streaming)
+  GET /v3/reportes/anual/{year}            — ZIP con los 12 resúmenes + estado de cuenta anual
+
+Los PDFs se cachean en disco (services/pdf_cache.py) con clave = versión del
+render (PDF_RENDER_VERSION) + versión de los datos de los que dependen; la clave
+se expone como ETag (304 si no cambió).
 """
 
+import io
 import json
 import logging
-
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import Response
+import multiprocessing
+import os
+import tempfile
+import threading
+import zipfile
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
-from sqlalchemy import func as sqlfunc
+from sqlalchemy import and_, case, func as sqlfunc
 
-from database import get_db
+from database import SessionLocal, get_db
 import models
-from services.pdf_service import generar_pdf_resumen, generar_pdf_estado_cuenta
+from services.pdf_service import (
+    PDF_RENDER_VERSION,
+    generar_pdf_resumen,
+    generar_pdf_estado_cuenta,
+    generar_pdf_estado_cuenta_stream,
+)
+from services import data_version, pdf_cache
+from utils.http_cache import etag_matches, not_modified
+from utils.period_utils import period_range, shift_period
 
 logger = logging.getLogger("router.reportes")
 
@@ -27,37 +54,139 @@ router = APIRouter(prefix="/v3/reportes", tags=["F-08: Reportes PDF"])
 # HELPER — Datos para los 4 gráficos del PDF
 # ═══════════════════════════════════════════════════════════════
 
-def _get_totales(period: str, db: Session) -> dict:
-    """Agrega totales por tipo de transacción de un período."""
-    q = (
-        db.query(models.Transaction)
+_TIPOS_TOTALES = {
+    "ingreso":        "ingresos",
+    "gasto_fijo":     "gastos_fijos",
+    "gasto_variable": "gastos_variables",
+    "deuda":          "deudas",
+    "ahorro":         "ahorros",
+}
+_CATS_INVERSION = ["Inversión", "Ahorro programado"]
+
+
+def _prev_period(period: str) -> str:
+    """Calcula el período anterior en formato YYYY-MM."""
+    return shift_period(period, -1)
+
+
+def _period_range(desde: str, hasta: str) -> list[str]:
+    """Períodos YYYY-MM de `desde` a `hasta`, ambos inclusive."""
+    try:
+        return period_range(desde, hasta)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de período inválido (YYYY-MM).")
+
+
+def _totales_por_periodo(periods: list[str], db: Session) -> tuple[dict, dict]:
+    """
+    Totales por tipo e inversión activa de varios períodos en una sola consulta.
+    Retorna (totales, inversion): {period: {ingresos, gastos_fijos, ...}}, {period: float}.
+    """
+    T   = models.Transaction
+    amt = sqlfunc.abs(T.amount)
+    rows = (
+        db.query(
+            T.period,
+            T.type,
+            sqlfunc.coalesce(sqlfunc.sum(amt), 0).label("total"),
+            sqlfunc.coalesce(sqlfunc.sum(
+                case((T.category.in_(_CATS_INVERSION), amt), else_=0)
+            ), 0).label("inversion"),
+        )
         .filter(
-            models.Transaction.period == period,
-            models.Transaction.excluir_del_analisis == False,  # noqa: E712
+            T.period.in_(periods),
+            T.excluir_del_analisis == False,  # noqa: E712
         )
+        .group_by(T.period, T.type)
+        .all()
     )
+    totales   = {p: {k: 0.0 for k in _TIPOS_TOTALES.values()} for p in periods}
+    inversion = {p: 0.0 for p in periods}
+    for r in rows:
+        key = _TIPOS_TOTALES.get(r.type)
+        if key:
+            totales[r.period][key] = float(r.total or 0)
+        if r.type == "ahorro":
+            inversion[r.period] = float(r.inversion or 0)
+    return totales, inversion
+
+
+def _get_totales(period: str, db: Session) -> dict:
+    """Agrega totales por tipo de transacción de un período."""
+    return _totales_por_periodo([period], db)[0][period]
 
-    def total(tipo: str) -> float:
-        r = (
-            q.filter(models.Transaction.type == tipo)
-            .with_entities(sqlfunc.coalesce(sqlfunc.sum(sqlfunc.abs(models.Transaction.amount)), 0))
-            .scalar()
-        )
-        return float(r or 0)
 
+def _cumplimiento_por_periodo(periods: list[str], db: Session) -> dict:
+    """
+    % de presupuestos respetados por período: una sola consulta agrupada por
+    presupuesto (período + categoría) con LEFT JOIN a las transacciones.
+    Períodos sin presupuestos → 0.0.
+    """
+    T, B  = models.Transaction, models.Budget
+    spent = sqlfunc.coalesce(sqlfunc.sum(sqlfunc.abs(T.amount)), 0)
+    rows = (
+        db.query(B.period, B.amount, spent.label("spent"))
+        .outerjoin(T, and_(
+            T.period   == B.period,
+            T.category == B.category,
+            T.excluir_del_analisis == False,  # noqa: E712
+        ))
+        .filter(B.period.in_(periods))
+        .group_by(B.id, B.period, B.amount)
+        .all()
+    )
+    conteo: dict[str, list[int]] = {}
+    for r in rows:
+        c = conteo.setdefault(r.period, [0, 0])
+        c[1] += 1
+        if float(r.spent or 0) <= r.amount:
+            c[0] += 1
     return {
-        "ingresos":         total("ingreso"),
-        "gastos_fijos":     total("gasto_fijo"),
-        "gastos_variables": total("gasto_variable"),
-        "deudas":           total("deuda"),
-        "ahorros":          total("ahorro"),
+        p: round(conteo[p][0] / conteo[p][1] * 100, 1) if p in conteo else 0.0
+        for p in periods
     }
 
 
-def _prev_period(period: str) -> str:
-    """Calcula el período anterior en formato YYYY-MM."""
-    y, m = int(period[:4]), int(period[5:7])
-    return f"{y - 1}-12" if m == 1 else f"{y}-{str(m - 1).zfill(2)}"
+# ─── Ahorro acumulado (total corrido) ────────────────────────
+# Ahorro por período, recalculado sólo cuando cambia la versión del ámbito
+# 'ahorro' (services/data_version.py). El acumulado a un período es la suma
+# corrida hasta ese período inclusive.
+_ahorro_cache: dict = {"version": None, "periods": [], "running": []}
+_ahorro_lock  = threading.Lock()
+
+
+def _ahorro_acumulado(periods: list[str], db: Session) -> dict:
+    """Ahorro histórico acumulado hasta cada período (inclusive)."""
+    version = data_version.get_versions(db, ["ahorro"])["ahorro"]
+    with _ahorro_lock:
+        if _ahorro_cache["version"] != version:
+            rows = (
+                db.query(
+                    models.Transaction.period,
+                    sqlfunc.coalesce(sqlfunc.sum(sqlfunc.abs(models.Transaction.amount)), 0),
+                )
+                .filter(
+                    models.Transaction.type == "ahorro",
+                    models.Transaction.excluir_del_analisis == False,  # noqa: E712
+                )
+                .group_by(models.Transaction.period)
+                .order_by(models.Transaction.period)
+                .all()
+            )
+            running, acc = [], 0.0
+            for _, total in rows:
+                acc += float(total or 0)
+                running.append(acc)
+            _ahorro_cache.update(
+                version=version, periods=[r[0] for r in rows], running=running,
+            )
+        ps, running = _ahorro_cache["periods"], _ahorro_cache["running"]
+
+    result = {}
+    for p in periods:
+        i = bisect_right(ps, p)
+        result[p] = running[i - 1] if i else 0.0
+    return result
 
 
 def _compute_chart_data(period: str, db: Session) -> dict:
@@ -67,10 +196,40 @@ def _compute_chart_data(period: str, db: Session) -> dict:
       2. radar    → spider chart de 6 dimensiones
       3. act/ant  → barras comparativas mes actual vs anterior
     """
-    act        = _get_totales(period, db)
-    prev       = _prev_period(period)
-    ant        = _get_totales(prev, db)
+    return _compute_chart_data_range([period], db)[period]
+
+
+def _compute_chart_data_range(periods: list[str], db: Session) -> dict:
+    """
+    Igual que _compute_chart_data pero para varios períodos a la vez, con un
+    número fijo de consultas (totales, presupuestos, ahorro acumulado)
+    independiente de cuántos períodos o presupuestos haya.
+    Retorna {period: datos_graficos}.
+    """
+    prevs     = {p: _prev_period(p) for p in periods}
+    todos     = sorted(set(periods) | set(prevs.values()))
+    totales, inversiones = _totales_por_periodo(todos, db)
+    cumplimientos        = _cumplimiento_por_periodo(list(periods), db)
+    acumulados           = _ahorro_acumulado(list(periods), db)
+
+    return {
+        p: _chart_data_from(
+            act          = totales[p],
+            ant          = totales[prevs[p]],
+            prev         = prevs[p],
+            inversion    = inversiones[p],
+            ahorro_acum  = acumulados[p],
+            cumplimiento = cumplimientos[p],
+        )
+        for p in periods
+    }
 
+
+def _chart_data_from(
+    act: dict, ant: dict, prev: str,
+    inversion: float, ahorro_acum: float, cumplimiento: float,
+) -> dict:
+    """Arma KPIs y radar de un período a partir de sus agregados ya calculados."""
     # Ingresos de referencia (evitar div/0)
     ing = act["ingresos"] or 1
 
@@ -87,52 +246,15 @@ def _compute_chart_data(period: str, db: Session) -> dict:
     # ─── Radar: 6 dimensiones ────────────────────────────────
 
     # Dim 3: Inversión activa (sub-categorías de ahorro)
-    inversion = float(
-        db.query(sqlfunc.coalesce(sqlfunc.sum(sqlfunc.abs(models.Transaction.amount)), 0))
-        .filter(
-            models.Transaction.period == period,
-            models.Transaction.type == "ahorro",
-            models.Transaction.category.in_(["Inversión", "Ahorro programado"]),
-            models.Transaction.excluir_del_analisis == False,  # noqa: E712
-        )
-        .scalar() or 0
-    )
     pct_inversion = inversion / ing * 100
     score_inv = round(min(100.0, pct_inversion / 10 * 100), 1)
 
-    # Dim 4: Fondo de emergencia (ahorro acumulado histórico / gasto mensual)
-    ahorro_acum = float(
-        db.query(sqlfunc.coalesce(sqlfunc.sum(sqlfunc.abs(models.Transaction.amount)), 0))
-        .filter(
-            models.Transaction.type == "ahorro",
-            models.Transaction.excluir_del_analisis == False,  # noqa: E712
-        )
-        .scalar() or 0
-    )
+    # Dim 4: Fondo de emergencia (ahorro acumulado al período / gasto mensual)
     gasto_ref     = gasto_tot or 1
     meses_cub     = ahorro_acum / gasto_ref
     score_emerg   = round(min(100.0, meses_cub / 3 * 100), 1)
 
     # Dim 5: Cumplimiento de presupuesto
-    budgets = db.query(models.Budget).filter(models.Budget.period == period).all()
-    if budgets:
-        within = 0
-        for b in budgets:
-            spent = float(
-                db.query(sqlfunc.coalesce(sqlfunc.sum(sqlfunc.abs(models.Transaction.amount)), 0))
-                .filter(
-                    models.Transaction.period == period,
-                    models.Transaction.category == b.category,
-                    models.Transaction.excluir_del_analisis == False,  # noqa: E712
-                )
-                .scalar() or 0
-            )
-            if spent <= b.amount:
-                within += 1
-        cumplimiento = round(within / len(budgets) * 100, 1)
-    else:
-        cumplimiento = 0.0
-
     score_pres = round(min(100.0, cumplimiento / 80 * 100), 1)
 
     # ─── Resultado ───────────────────────────────────────────
@@ -175,12 +297,53 @@ def _compute_chart_data(period: str, db: Session) -> dict:
     }
 
 
+# ═══════════════════════════════════════════════════════════════
+# HELPER — Cache de PDFs por versión de datos
+# ═══════════════════════════════════════════════════════════════
+
+def _pdf_key(kind: str, period: str, scopes: list, db: Session, extra: str = "") -> str:
+    """Clave de cache/ETag: tipo + período + versión del render + versiones de los datos usados."""
+    versions = data_version.get_versions(db, scopes)
+    return data_version.fingerprint(kind, period, extra, PDF_RENDER_VERSION, versions)
+
+
+def _resumen_key(period: str, db: Session) -> str:
+    # El PDF depende del resumen, las tx del período y del anterior,
+    # los presupuestos del período y el ahorro acumulado (fondo de emergencia)
+    return _pdf_key("resumen", period, [
+        f"resumen:{period}",
+        f"transactions:{period}",
+        f"transactions:{_prev_period(period)}",
+        f"budgets:{period}",
+        "ahorro",
+    ], db)
+
+
+def _estado_cuenta_rango_key(desde: str, hasta: str, account: str | None, db: Session) -> str:
+    periods = _period_range(desde, hasta)
+    return _pdf_key("estado_cuenta_rango", f"{desde}:{hasta}",
+                    [f"transactions:{p}" for p in periods] + ["profile"],
+                    db, extra=account or "")
+
+
+def _pdf_response(pdf_bytes: bytes, filename: str, key: str | None) -> Response:
+    """key=None: PDF degradado (no cacheado), sin ETag para que no se revalide como 304."""
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Content-Length":       str(len(pdf_bytes)),
+        "Cache-Control":        "private, no-cache",
+    }
+    if key is not None:
+        headers["ETag"] = f'"{key}"'
+    return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
+
+
 # ═══════════════════════════════════════════════════════════════
 # ENDPOINT
 # ═══════════════════════════════════════════════════════════════
 
 @router.get("/resumen/{period}")
-def descargar_resumen_pdf(period: str, db: Session = Depends(get_db)):
+def descargar_resumen_pdf(period: str, request: Request, db: Session = Depends(get_db)):
     """
     Genera y descarga el resumen mensual en PDF con 4 gráficos:
       1. Barras horizontales de KPIs con semáforo
@@ -189,6 +352,7 @@ def descargar_resumen_pdf(period: str, db: Session = Depends(get_db)):
       4. Barras comparativas mes actual vs mes anterior
 
     Requiere que el resumen IA (F-03) haya sido generado previamente.
+    Descargas repetidas sin cambios en los datos se sirven desde el cache.
 
     Parámetros:
         period: formato YYYY-MM (ej. 2026-02)
@@ -209,6 +373,14 @@ def descargar_resumen_pdf(period: str, db: Session = Depends(get_db)):
             ),
         )
 
+    filename = f"FinanzasOS_Resumen_{period}.pdf"
+    key      = _resumen_key(period, db)
+    if etag_matches(request, f'"{key}"'):
+        return not_modified(f'"{key}"')
+    cached = pdf_cache.get(key)
+    if cached is not None:
+        return _pdf_response(cached, filename, key)
+
     # Parsear contenido JSON
     try:
         contenido = json.loads(resumen.contenido_json)
@@ -236,17 +408,13 @@ def descargar_resumen_pdf(period: str, db: Session = Depends(get_db)):
             detail=f"Error generando el PDF: {str(e)}",
         )
 
-    filename = f"FinanzasOS_Resumen_{period}.pdf"
     logger.info(f"[Reportes] PDF generado: {filename} ({len(pdf_bytes):,} bytes)")
 
-    return Response(
-        content    = pdf_bytes,
-        media_type = "application/pdf",
-        headers    = {
-            "Content-Disposition": f'attachment; filename="{filename}"',
-            "Content-Length":       str(len(pdf_bytes)),
-        },
-    )
+    # Sólo se cachea (y lleva ETag) el PDF completo, con gráficos
+    if not datos_graficos:
+        return _pdf_response(pdf_bytes, filename, None)
+    pdf_cache.put(key, pdf_bytes)
+    return _pdf_response(pdf_bytes, filename, key)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -256,6 +424,7 @@ def descargar_resumen_pdf(period: str, db: Session = Depends(get_db)):
 @router.get("/estado-cuenta/{period}")
 def descargar_estado_cuenta_pdf(
     period: str,
+    request: Request,
     account: str | None = None,
     db: Session = Depends(get_db),
 ):
@@ -272,6 +441,16 @@ def descargar_estado_cuenta_pdf(
         account: nombre de cuenta para filtrar (opcional)
                  ej. ?account=iO+Crédito
     """
+    suffix   = f"_{account.replace(' ', '_')}" if account else ""
+    filename = f"FinanzasOS_EstadoCuenta_{period}{suffix}.pdf"
+    key = _pdf_key("estado_cuenta", period,
+                   [f"transactions:{period}", "profile"], db, extra=account or "")
+    if etag_matches(request, f'"{key}"'):
+        return not_modified(f'"{key}"')
+    cached = pdf_cache.get(key)
+    if cached is not None:
+        return _pdf_response(cached, filename, key)
+
     # Consultar transacciones del período
     q = db.query(models.Transaction).filter(
         models.Transaction.period == period
@@ -307,14 +486,7 @@ def descargar_estado_cuenta_pdf(
     ]
 
     # Obtener perfil del usuario
-    profile_obj = db.query(models.Profile).filter(models.Profile.id == 1).first()
-    profile_dict = None
-    if profile_obj:
-        profile_dict = {
-            "name":    profile_obj.name,
-            "income":  profile_obj.income,
-            "pay_day": profile_obj.pay_day,
-        }
+    profile_dict = _profile_dict(db)
 
     # Generar PDF
     try:
@@ -331,15 +503,418 @@ def descargar_estado_cuenta_pdf(
             detail=f"Error generando el PDF: {str(e)}",
         )
 
-    suffix   = f"_{account.replace(' ', '_')}" if account else ""
-    filename = f"FinanzasOS_EstadoCuenta_{period}{suffix}.pdf"
     logger.info(f"[Reportes] Estado de cuenta generado: {filename} ({len(pdf_bytes):,} bytes)")
 
-    return Response(
-        content    = pdf_bytes,
-        media_type = "application/pdf",
-        headers    = {
-            "Content-Disposition": f'attachment; filename="{filename}"',
-            "Content-Length":       str(len(pdf_bytes)),
-        },
+    pdf_cache.put(key, pdf_bytes)
+    return _pdf_response(pdf_bytes, filename, key)
+
+
+# ═══════════════════════════════════════════════════════════════
+# ENDPOINT — Estado de cuenta por rango (streaming)
+# ═══════════════════════════════════════════════════════════════
+
+def _iter_movimientos(q, internos: bool):
+    """Cursor paginado (yield_per) de movimientos como mappings, por fecha ascendente."""
+    T = models.Transaction
+    rows = (
+        q.filter(T.excluir_del_analisis == internos)
+        .with_entities(T.date, T.description, T.account, T.category, T.type, T.amount)
+        .order_by(T.date, T.id)
+        .yield_per(500)
+    )
+    for r in rows:
+        yield r._mapping
+
+
+def _resumen_rango(q) -> dict:
+    """Totales por tipo y por cuenta del rango con una consulta agregada."""
+    T = models.Transaction
+    rows = (
+        q.filter(T.excluir_del_analisis == False)  # noqa: E712
+        .with_entities(
+            T.account, T.type,
+            sqlfunc.count(T.id),
+            sqlfunc.coalesce(sqlfunc.sum(sqlfunc.abs(T.amount)), 0),
+        )
+        .group_by(T.account, T.type)
+        .all()
+    )
+    por_tipo, por_cuenta, n = {}, {}, 0
+    for acc, tp, count, total in rows:
+        total = float(total or 0)
+        n    += count
+        tt    = por_tipo.setdefault(tp, {"count": 0, "total": 0.0})
+        tt["count"] += count
+        tt["total"] += total
+        c = por_cuenta.setdefault(acc or "Sin cuenta", {"count": 0, "ingresos": 0.0, "egresos": 0.0})
+        c["count"] += count
+        c["ingresos" if tp == "ingreso" else "egresos"] += total
+    return {"por_tipo": por_tipo, "por_cuenta": por_cuenta, "movimientos": n}
+
+
+def _pdf_tmp() -> Path:
+    """Archivo temporal para renderizar a disco (dentro del cache si está activo)."""
+    if pdf_cache.enabled():
+        return pdf_cache.temp_path()
+    fd, name = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    return Path(name)
+
+
+def _profile_dict(db: Session) -> dict | None:
+    profile_obj = db.query(models.Profile).filter(models.Profile.id == 1).first()
+    if not profile_obj:
+        return None
+    return {
+        "name":    profile_obj.name,
+        "income":  profile_obj.income,
+        "pay_day": profile_obj.pay_day,
+    }
+
+
+def _render_estado_cuenta_rango(
+    db: Session, desde: str, hasta: str, account: str | None, out_path: Path,
+) -> int:
+    """
+    Renderiza en modo streaming el estado de cuenta del rango a `out_path`.
+    Retorna la cantidad de movimientos; 0 = no hay datos y no se escribió nada.
+    """
+    T = models.Transaction
+    q = db.query(T).filter(T.period.between(desde, hasta))
+    if account:
+        q = q.filter(T.account == account)
+
+    resumen = _resumen_rango(q)
+    if not resumen["movimientos"]:
+        return 0
+
+    generar_pdf_estado_cuenta_stream(
+        out_path       = str(out_path),
+        desde          = desde,
+        hasta          = hasta,
+        resumen        = resumen,
+        movimientos    = _iter_movimientos(q, internos=False),
+        internos       = _iter_movimientos(q, internos=True),
+        profile        = _profile_dict(db),
+        account_filter = account,
+    )
+    return resumen["movimientos"]
+
+
+@router.get("/estado-cuenta/{desde}/{hasta}")
+def descargar_estado_cuenta_rango_pdf(
+    desde: str,
+    hasta: str,
+    request: Request,
+    account: str | None = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Estado de Cuenta de un rango de períodos (ej. 2016-01 → 2025-12).
+
+    Pensado para rangos de varios años: los movimientos se leen del cursor en
+    páginas y se dibujan en bloques de LongTable directamente a un archivo, sin
+    cargar el rango completo en memoria. Se sirve como FileResponse.
+
+    Parámetros:
+        desde, hasta: formato YYYY-MM, ambos inclusive
+        account:      nombre de cuenta para filtrar (opcional)
+    """
+    periods = _period_range(desde, hasta)
+    if not periods:
+        raise HTTPException(status_code=400, detail="'desde' debe ser anterior o igual a 'hasta'.")
+
+    suffix   = f"_{account.replace(' ', '_')}" if account else ""
+    filename = f"FinanzasOS_EstadoCuenta_{desde}_{hasta}{suffix}.pdf"
+    key     = _estado_cuenta_rango_key(desde, hasta, account, db)
+    etag    = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    cached = pdf_cache.pin(key)
+    if cached is not None:
+        return FileResponse(cached, media_type="application/pdf", filename=filename, headers=headers,
+                            background=BackgroundTask(cached.unlink, missing_ok=True))
+
+    tmp = _pdf_tmp()
+    try:
+        n = _render_estado_cuenta_rango(db, desde, hasta, account, tmp)
+    except Exception as e:
+        tmp.unlink(missing_ok=True)
+        logger.error(f"[Reportes] Error generando estado de cuenta {desde}→{hasta}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generando el PDF: {str(e)}",
+        )
+    if not n:
+        tmp.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=404,
+            detail=(
+                f"No hay movimientos registrados entre {desde} y {hasta}"
+                + (f" en la cuenta '{account}'" if account else "") + "."
+            ),
+        )
+
+    logger.info(f"[Reportes] Estado de cuenta generado: {filename} ({tmp.stat().st_size:,} bytes)")
+
+    served = pdf_cache.put_file(key, tmp) if pdf_cache.enabled() else tmp
+    return FileResponse(served, media_type="application/pdf", filename=filename, headers=headers,
+                        background=BackgroundTask(served.unlink, missing_ok=True))
+
+
+# ═══════════════════════════════════════════════════════════════
+# ENDPOINT — Paquete anual (ZIP en streaming)
+# ═══════════════════════════════════════════════════════════════
+
+# Procesos para renderizar resúmenes en paralelo (ReportLab es CPU-bound).
+# 'spawn' evita heredar locks de los hilos del scheduler al hacer fork.
+REPORTES_WORKERS = int(os.getenv("REPORTES_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_render_pool      = None
+_render_pool_lock = threading.Lock()
+
+# Hilos para el estado de cuenta anual (necesita DB, no va al pool de procesos)
+_thread_pool: ThreadPoolExecutor | None = None
+
+
+def _submit_render(fn, *args):
+    """Envía una tarea al pool de procesos; si el pool quedó roto, lo recrea una vez."""
+    global _render_pool
+    for intento in (1, 2):
+        with _render_pool_lock:
+            if _render_pool is None:
+                _render_pool = ProcessPoolExecutor(
+                    max_workers = max(1, REPORTES_WORKERS),
+                    mp_context  = multiprocessing.get_context("spawn"),
+                )
+            pool = _render_pool
+        try:
+            return pool.submit(fn, *args)
+        except BrokenProcessPool:
+            logger.warning("[Reportes] Pool de render roto, recreando...")
+            with _render_pool_lock:
+                if _render_pool is pool:
+                    _render_pool = None
+            if intento == 2:
+                raise
+
+
+def _submit_thread(fn, *args):
+    """Envía una tarea al pool de hilos compartido (se crea al primer uso)."""
+    global _thread_pool
+    with _render_pool_lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(
+                max_workers        = max(1, REPORTES_WORKERS),
+                thread_name_prefix = "reporte_anual",
+            )
+        pool = _thread_pool
+    return pool.submit(fn, *args)
+
+
+def shutdown_render_pool() -> None:
+    """Detiene los pools de render (llamado desde el lifespan al cerrar la app)."""
+    global _render_pool, _thread_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+            _render_pool = None
+        if _thread_pool is not None:
+            _thread_pool.shutdown(wait=False, cancel_futures=True)
+            _thread_pool = None
+
+
+class _ZipSink(io.RawIOBase):
+    """
+    Destino no-seekable para zipfile: acumula lo escrito hasta que el generador
+    lo entrega al cliente. zipfile detecta que no hay seek() y usa data descriptors.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _render_estado_cuenta_anual(year: int, key: str) -> Path:
+    """
+    Tarea en hilo: sesión propia (la del request se cierra al empezar el streaming).
+    Retorna un archivo temporal que el llamador borra.
+    """
+    db  = SessionLocal()
+    tmp = _pdf_tmp()
+    try:
+        if not _render_estado_cuenta_rango(db, f"{year}-01", f"{year}-12", None, tmp):
+            raise ValueError(f"sin movimientos en {year}")
+    except Exception:
+        tmp.unlink(missing_ok=True)
+        raise
+    finally:
+        db.close()
+    return pdf_cache.put_file(key, tmp) if pdf_cache.enabled() else tmp
+
+
+def _borrar_temporal(fut) -> None:
+    """Borra el archivo temporal de un render que terminó sin llegar al ZIP."""
+    if not fut.cancelled() and fut.exception() is None and isinstance(fut.result(), Path):
+        fut.result().unlink(missing_ok=True)
+
+
+def _stream_zip_anual(listos: list, pendientes: dict, cache_keys: dict):
+    """
+    Genera el ZIP a medida que terminan los PDFs.
+      listos:     [(nombre, bytes | Path)] ya disponibles (cache)
+      pendientes: {future: nombre} — el resultado es bytes o Path de un archivo
+      cache_keys: {nombre: clave} para guardar en cache los resúmenes renderizados
+    Los Path son temporales (pdf_cache.pin() / put_file()) y se borran al
+    agregarlos al ZIP o al cortarse la descarga.
+    """
+    sink    = _ZipSink()
+    errores = []
+    try:
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+            for name, data in listos:
+                if isinstance(data, Path):
+                    zf.write(data, name)
+                    data.unlink(missing_ok=True)
+                else:
+                    zf.writestr(name, data)
+                yield sink.drain()
+
+            for fut in as_completed(pendientes):
+                name = pendientes[fut]
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    logger.error(f"[Reportes] Anual: error generando {name}: {e}")
+                    errores.append(f"{name}: {e}")
+                    continue
+
+                if isinstance(result, Path):
+                    zf.write(result, name)
+                    result.unlink(missing_ok=True)
+                else:
+                    zf.writestr(name, result)
+                    if name in cache_keys:
+                        pdf_cache.put(cache_keys[name], result)
+                yield sink.drain()
+
+            if errores:
+                zf.writestr("ERRORES.txt", "\n".join(errores) + "\n")
+        yield sink.drain()
+    finally:
+        for name, data in listos:
+            if isinstance(data, Path):
+                data.unlink(missing_ok=True)
+        for fut in pendientes:
+            if not fut.cancel():
+                fut.add_done_callback(_borrar_temporal)
+
+
+@router.get("/anual/{year}")
+def descargar_paquete_anual(year: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Paquete de cierre de año en un ZIP:
+      - FinanzasOS_Resumen_YYYY-MM.pdf por cada mes con resumen IA generado
+      - FinanzasOS_EstadoCuenta_YYYY-01_YYYY-12.pdf con todos los movimientos del año
+
+    Los datos de gráficos de los 12 meses se calculan juntos
+    (_compute_chart_data_range), los PDFs se renderizan en paralelo y el ZIP se
+    transmite a medida que cada archivo está listo. Los PDFs ya cacheados por
+    los endpoints mensuales se reutilizan.
+
+    Los headers salen antes de saber si algún render falla (ERRORES.txt), así
+    que el ETag solo se envía cuando todo el paquete sale del cache.
+    """
+    periods   = [f"{year}-{str(m).zfill(2)}" for m in range(1, 13)]
+    resumenes = {
+        r.periodo: r
+        for r in db.query(models.ResumenMensual)
+        .filter(models.ResumenMensual.periodo.in_(periods))
+        .all()
+    }
+    desde, hasta = periods[0], periods[-1]
+    n_movs = (
+        db.query(sqlfunc.count(models.Transaction.id))
+        .filter(models.Transaction.period.between(desde, hasta))
+        .scalar()
+    )
+    if not resumenes and not n_movs:
+        raise HTTPException(status_code=404, detail=f"No hay datos registrados para {year}.")
+
+    # Claves por archivo; el ETag del paquete se deriva de todas ellas
+    keys = {f"FinanzasOS_Resumen_{p}.pdf": _resumen_key(p, db) for p in sorted(resumenes)}
+    ec_name = f"FinanzasOS_EstadoCuenta_{desde}_{hasta}.pdf"
+    if n_movs:
+        keys[ec_name] = _estado_cuenta_rango_key(desde, hasta, None, db)
+    etag = f'"{data_version.fingerprint("anual", year, keys)}"'
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    # Resúmenes: cache o render en el pool de procesos
+    listos, a_renderizar = [], []
+    for p in sorted(resumenes):
+        name   = f"FinanzasOS_Resumen_{p}.pdf"
+        cached = pdf_cache.get(keys[name])
+        if cached is not None:
+            listos.append((name, cached))
+        else:
+            a_renderizar.append(p)
+
+    graficos = {}
+    if a_renderizar:
+        try:
+            graficos = _compute_chart_data_range(a_renderizar, db)
+        except Exception as e:
+            logger.warning(f"[Reportes] Anual: sin datos de gráficos ({e}).")
+
+    pendientes, cache_keys = {}, {}
+    omitidos = 0
+    for p in a_renderizar:
+        name = f"FinanzasOS_Resumen_{p}.pdf"
+        try:
+            contenido = json.loads(resumenes[p].contenido_json)
+        except (json.JSONDecodeError, TypeError) as e:
+            logger.error(f"[Reportes] Anual: resumen {p} ilegible: {e}")
+            omitidos += 1
+            continue
+        fut = _submit_render(generar_pdf_resumen, p, contenido, graficos.get(p, {}))
+        pendientes[fut] = name
+        if p in graficos:
+            cache_keys[name] = keys[name]
+
+    # Estado de cuenta anual: cache o render streaming en un hilo (necesita DB)
+    if n_movs:
+        cached = pdf_cache.pin(keys[ec_name])
+        if cached is not None:
+            listos.append((ec_name, cached))
+        else:
+            pendientes[_submit_thread(_render_estado_cuenta_anual, year, keys[ec_name])] = ec_name
+
+    logger.info(
+        f"[Reportes] Anual {year}: {len(listos)} desde cache, "
+        f"{len(pendientes)} en render ({REPORTES_WORKERS} workers)"
+    )
+    headers = {
+        "Content-Disposition": f'attachment; filename="FinanzasOS_Anual_{year}.zip"',
+        "Cache-Control":       "private, no-cache",
+    }
+    # Con renders en curso el paquete puede salir incompleto: sin ETag no se revalida como 304
+    if not pendientes and not omitidos:
+        headers["ETag"] = etag
+    return StreamingResponse(
+        _stream_zip_anual(listos, pendientes, cache_keys),
+        media_type = "application/zip",
+        headers    = headers,
     )
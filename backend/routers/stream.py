@@ -0,0 +1,75 @@
+"""
+FinanzasOS — routers/stream.py
+GET /v3/stream: Server-Sent Events con deltas de precios, snapshots de
+patrimonio y movimientos (services/live_updates.py), para que el frontend
+deje de sondear /investments/prices/current y /v3/patrimonio/consolidado.
+
+    - Cada evento lleva `id:` (id del bus de eventos). EventSource lo reenvía
+      como Last-Event-ID al reconectarse y el stream retoma desde ahí.
+    - Si ese id ya fue purgado del bus, se emite "resync": el cliente debe
+      recargar todo en vez de aplicar deltas.
+    - Keep-alive cada EVENT_HEARTBEAT_S sin eventos.
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from services import event_bus, live_updates
+
+router = APIRouter(prefix="/v3", tags=["Stream"])
+
+RETRY_MS = 3000     # espera sugerida al navegador antes de reconectar
+
+
+def _resume_id(request: Request, last_event_id: Optional[int]) -> Optional[int]:
+    header = request.headers.get("last-event-id")
+    if header:
+        try:
+            return int(header)
+        except ValueError:
+            return None
+    return last_event_id
+
+
+@router.get("/stream")
+async def stream(
+    request: Request,
+    topics: Optional[str] = Query(None, description="Tópicos separados por coma: prices,snapshots,transactions"),
+    period: Optional[str] = Query(None, description="Período activo YYYY-MM: filtra los eventos de movimientos"),
+    last_event_id: Optional[int] = Query(None, description="Alternativa al header Last-Event-ID"),
+):
+    """Stream SSE de cambios en vivo (precios, snapshots y movimientos del período activo)."""
+    elegidos = [t.strip() for t in (topics or ",".join(live_updates.TOPICS)).split(",") if t.strip()]
+    invalidos = [t for t in elegidos if t not in live_updates.TOPICS]
+    if invalidos:
+        raise HTTPException(status_code=400, detail=f"Tópicos desconocidos: {', '.join(invalidos)}")
+
+    desde  = _resume_id(request, last_event_id)
+    actual = await run_in_threadpool(event_bus.last_id)
+    resync = False
+    if desde is not None:
+        if desde > actual:
+            desde, resync = actual, True        # id de otra BD / bus reiniciado
+        elif desde < actual:
+            mas_viejo = await run_in_threadpool(event_bus.oldest_id)
+            if desde < mas_viejo - 1:
+                desde, resync = actual, True    # eventos intermedios ya purgados
+    else:
+        desde = actual
+
+    async def eventos():
+        yield f"retry: {RETRY_MS}\n\n"
+        if resync:
+            yield event_bus.sse({"id": desde, "payload": {"reason": "eventos anteriores no disponibles"}}, name="resync")
+        async for ev in event_bus.listen(elegidos, after_id=desde):
+            if ev is None:
+                yield event_bus.KEEPALIVE
+                continue
+            if period and ev["topic"] == "transactions" and period not in ev["payload"].get("periods", []):
+                continue
+            yield event_bus.sse(ev)
+
+    return StreamingResponse(eventos(), media_type="text/event-stream", headers=event_bus.SSE_HEADERS)
@@ -0,0 +1,140 @@
+"""
+FinanzasOS — services/circuit_breaker.py
+Circuit breaker en memoria (por proceso) para dependencias externas.
+
+Estados:
+    closed     las llamadas pasan; `failure_threshold` fallos seguidos → open
+    open       las llamadas se rechazan sin tocar la red durante `reset_timeout`
+    half_open  vencido el plazo se deja pasar UNA llamada de prueba:
+               éxito → closed; fallo → open otra vez (con plazo duplicado,
+               hasta `max_reset_timeout`)
+
+Uso:
+    cb = CircuitBreaker("api.coingecko.com")
+    if not cb.allow():
+        raise CircuitOpenError(cb.name, cb.retry_in())
+    try:
+        ...
+        cb.record_success()
+    except Exception:
+        cb.record_failure()
+        raise
+"""
+
+import threading
+import time
+from typing import Optional
+
+CLOSED    = "closed"
+OPEN      = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """La llamada se rechazó porque el breaker de `name` está abierto."""
+
+    def __init__(self, name: str, retry_in: float = 0.0):
+        self.name     = name
+        self.retry_in = retry_in
+        super().__init__(f"Circuito abierto para {name} (reintento en {retry_in:.0f}s)")
+
+
+class CircuitBreaker:
+
+    def __init__(
+        self,
+        name:              str,
+        failure_threshold: int   = 5,
+        reset_timeout:     float = 60.0,
+        max_reset_timeout: float = 900.0,
+    ):
+        self.name              = name
+        self.failure_threshold = failure_threshold
+        self.base_timeout      = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self._lock             = threading.Lock()
+        self._state            = CLOSED
+        self._failures         = 0
+        self._opened_at        = 0.0
+        self._timeout          = reset_timeout
+        self._probe_en_curso   = False
+        self._last_error: Optional[str] = None
+        self.opened_total      = 0
+
+    # ── Consulta ─────────────────────────────────────────────
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._estado()
+
+    def _estado(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self._timeout:
+            return HALF_OPEN
+        return self._state
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self._timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """True si la llamada puede salir. En half_open solo pasa una sonda a la vez."""
+        with self._lock:
+            estado = self._estado()
+            if estado == CLOSED:
+                return True
+            if estado == HALF_OPEN and not self._probe_en_curso:
+                self._probe_en_curso = True
+                return True
+            return False
+
+    # ── Resultado de la llamada ──────────────────────────────
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state          = CLOSED
+            self._failures       = 0
+            self._timeout        = self.base_timeout
+            self._probe_en_curso = False
+
+    def record_failure(self, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._last_error = error
+            if self._probe_en_curso:
+                # Falló la sonda: reabrir con backoff
+                self._probe_en_curso = False
+                self._timeout        = min(self._timeout * 2, self.max_reset_timeout)
+                self._abrir()
+                return
+            self._failures += 1
+            if self._state == CLOSED and self._failures >= self.failure_threshold:
+                self._abrir()
+
+    def release(self) -> None:
+        """
+        La llamada terminó sin resultado atribuible al destino (ej. cancelada):
+        libera la sonda de half_open sin contar éxito ni fallo.
+        """
+        with self._lock:
+            self._probe_en_curso = False
+
+    def _abrir(self) -> None:
+        self._state       = OPEN
+        self._opened_at   = time.monotonic()
+        self.opened_total += 1
+
+    def reset(self) -> None:
+        self.record_success()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            estado = self._estado()
+            retry  = max(0.0, self._timeout - (time.monotonic() - self._opened_at)) if self._state == OPEN else 0.0
+            return {
+                "state":      estado,
+                "failures":   self._failures,
+                "retry_in_s": round(retry, 1),
+                "last_error": self._last_error,
+            }
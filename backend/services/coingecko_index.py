@@ -0,0 +1,267 @@
+"""
+FinanzasOS — services/coingecko_index.py
+Índice símbolo → id de CoinGecko y consultas de precio por lotes.
+
+Antes solo se cotizaban los tickers del mapa fijo COINGECKO_IDS
+(services/price_service.py); el resto se descartaba con un warning. Aquí:
+
+    - El índice se arma con GET /coins/list (todas las monedas: id,
+      símbolo, nombre) y se guarda en COINGECKO_INDEX_PATH. Se recarga
+      cuando tiene más de COINGECKO_INDEX_TTL_S (una semana); si la
+      descarga falla se sigue usando el índice viejo.
+    - Un símbolo con varios ids (ETH: ethereum, bridged-ether, …) se
+      resuelve por capitalización de mercado con GET /coins/markets
+      sobre los candidatos. La elección queda guardada en el índice
+      hasta la próxima recarga.
+    - El mapa fijo COINGECKO_IDS manda sobre el índice (correcciones
+      manuales).
+    - /simple/price se consulta en lotes `ids=` lo más grandes posible sin
+      pasar COINGECKO_MAX_URL caracteres ni COINGECKO_MAX_IDS ids, con al
+      menos COINGECKO_MIN_INTERVAL_S entre llamadas (el plan gratuito
+      limita las llamadas por minuto; los 429 los reintenta
+      services/http_client.py respetando Retry-After).
+
+Con esto cientos de posiciones crypto se actualizan en una o dos llamadas.
+
+Configuración (variables de entorno):
+    COINGECKO_INDEX_PATH       archivo del índice           (default ./data/cache/coingecko_index.json)
+    COINGECKO_INDEX_TTL_S      vigencia del índice          (default 604800 = 7 días)
+    COINGECKO_MAX_URL          largo máximo de cada URL     (default 4000)
+    COINGECKO_MAX_IDS          ids máximos por llamada      (default 250)
+    COINGECKO_MIN_INTERVAL_S   pausa mínima entre llamadas  (default 2.5)
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+from urllib.parse import quote
+
+from services import http_client
+
+logger = logging.getLogger("coingecko_index")
+
+COINGECKO_INDEX_PATH     = Path(os.getenv("COINGECKO_INDEX_PATH", "./data/cache/coingecko_index.json"))
+COINGECKO_INDEX_TTL_S    = float(os.getenv("COINGECKO_INDEX_TTL_S", str(7 * 86400)))
+COINGECKO_MAX_URL        = int(os.getenv("COINGECKO_MAX_URL", "4000"))
+COINGECKO_MAX_IDS        = int(os.getenv("COINGECKO_MAX_IDS", "250"))
+COINGECKO_MIN_INTERVAL_S = float(os.getenv("COINGECKO_MIN_INTERVAL_S", "2.5"))
+
+_lock      = threading.Lock()         # índice
+_call_lock = threading.Lock()         # ritmo de llamadas
+_index: Optional[dict] = None         # {"fetched_at", "symbols": {SYM: [ids]}, "resolved": {SYM: id}}
+_last_call = 0.0
+
+
+# ═══════════════════════════════════════════════════════════════
+# LLAMADAS A COINGECKO
+# ═══════════════════════════════════════════════════════════════
+
+def _throttle() -> None:
+    """Respeta COINGECKO_MIN_INTERVAL_S entre llamadas de este proceso."""
+    global _last_call
+    with _call_lock:
+        espera = _last_call + COINGECKO_MIN_INTERVAL_S - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+        _last_call = time.monotonic()
+
+
+def _get(url: str):
+    _throttle()
+    resp = http_client.get(url)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def chunk_ids(ids: Iterable[str], base_url: str) -> list[list[str]]:
+    """
+    Parte `ids` en lotes lo más grandes posible tales que `base_url` + los
+    ids separados por coma no pase COINGECKO_MAX_URL caracteres ni el lote
+    COINGECKO_MAX_IDS ids.
+    """
+    lotes: list[list[str]] = []
+    actual: list[str] = []
+    largo = len(base_url)
+    for gid in ids:
+        extra = len(quote(gid, safe="-_.")) + (1 if actual else 0)
+        if actual and (largo + extra > COINGECKO_MAX_URL or len(actual) >= COINGECKO_MAX_IDS):
+            lotes.append(actual)
+            actual, largo, extra = [], len(base_url), extra - 1
+        actual.append(gid)
+        largo += extra
+    if actual:
+        lotes.append(actual)
+    return lotes
+
+
+def _ids_param(ids: list[str]) -> str:
+    return ",".join(quote(gid, safe="-_.") for gid in ids)
+
+
+# ═══════════════════════════════════════════════════════════════
+# ÍNDICE SÍMBOLO → IDS
+# ═══════════════════════════════════════════════════════════════
+
+def _load_file() -> Optional[dict]:
+    try:
+        with open(COINGECKO_INDEX_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data.get("symbols"), dict):
+            data.setdefault("resolved", {})
+            return data
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"[CoinGecko] Índice ilegible ({COINGECKO_INDEX_PATH}): {e}")
+    return None
+
+
+def _save_file(data: dict) -> None:
+    """Escritura atómica: otros workers pueden estar leyendo el archivo."""
+    try:
+        COINGECKO_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=COINGECKO_INDEX_PATH.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, COINGECKO_INDEX_PATH)
+    except Exception as e:
+        logger.warning(f"[CoinGecko] No se pudo guardar el índice: {e}")
+
+
+def _download(base_url: str) -> dict:
+    monedas = _get(f"{base_url}/coins/list")
+    simbolos: dict[str, list[str]] = {}
+    for m in monedas:
+        sym, gid = (m.get("symbol") or "").upper(), m.get("id")
+        if sym and gid:
+            simbolos.setdefault(sym, []).append(gid)
+    logger.info(f"[CoinGecko] Índice descargado: {len(monedas)} monedas, {len(simbolos)} símbolos")
+    return {"fetched_at": time.time(), "symbols": simbolos, "resolved": {}}
+
+
+def _ensure_index(base_url: str) -> Optional[dict]:
+    """Índice vigente (memoria → archivo → descarga). None si nunca se pudo obtener."""
+    global _index
+    with _lock:
+        if _index is None:
+            _index = _load_file()
+        index = _index
+    if index is not None and time.time() - index.get("fetched_at", 0) <= COINGECKO_INDEX_TTL_S:
+        return index
+
+    # Otro worker pudo haberlo renovado
+    en_disco = _load_file()
+    if en_disco and time.time() - en_disco.get("fetched_at", 0) <= COINGECKO_INDEX_TTL_S:
+        nuevo = en_disco
+    else:
+        try:
+            nuevo = _download(base_url)
+        except Exception as e:
+            logger.warning(f"[CoinGecko] No se pudo renovar el índice ({e}); se usa el anterior")
+            return index
+        _save_file(nuevo)
+    with _lock:
+        _index = nuevo
+    return nuevo
+
+
+def _resolve_ambiguous(base_url: str, simbolos: dict[str, list[str]]) -> dict[str, str]:
+    """{SYM: [ids candidatos]} → {SYM: id de mayor capitalización}."""
+    candidatos = sorted({gid for ids in simbolos.values() for gid in ids})
+    base = f"{base_url}/coins/markets?vs_currency=usd&per_page=250&ids="
+    market_cap: dict[str, float] = {}
+    for lote in chunk_ids(candidatos, base):
+        for m in _get(base + _ids_param(lote)):
+            market_cap[m["id"]] = m.get("market_cap") or 0
+    # Sin capitalización conocida gana el primero en orden alfabético (estable)
+    return {
+        sym: sorted(ids, key=lambda g: (-market_cap.get(g, 0), g))[0]
+        for sym, ids in simbolos.items()
+    }
+
+
+def resolve(tickers: Iterable[str], base_url: str, overrides: dict[str, str]) -> tuple[dict[str, str], list[str]]:
+    """
+    Retorna ({TICKER: coingecko_id}, [tickers sin id]).
+    Orden de prioridad: `overrides` (mapa fijo) → elección guardada → índice.
+    """
+    tickers = sorted({t.upper() for t in tickers})
+    mapeo   = {t: overrides[t] for t in tickers if t in overrides}
+    faltan  = [t for t in tickers if t not in mapeo]
+    if not faltan:
+        return mapeo, []
+
+    index = _ensure_index(base_url)
+    if index is None:
+        return mapeo, faltan
+
+    with _lock:
+        resueltos = dict(index["resolved"])
+    simbolos = index["symbols"]
+    ambiguos = {}
+    for t in faltan:
+        ids = simbolos.get(t) or []
+        if t in resueltos:
+            mapeo[t] = resueltos[t]
+        elif len(ids) == 1:
+            mapeo[t] = ids[0]
+        elif ids:
+            ambiguos[t] = ids
+
+    if ambiguos:
+        try:
+            elegidos = _resolve_ambiguous(base_url, ambiguos)
+        except Exception as e:
+            logger.warning(f"[CoinGecko] No se pudo desambiguar {sorted(ambiguos)}: {e}")
+        else:
+            mapeo.update(elegidos)
+            with _lock:
+                index["resolved"].update(elegidos)
+                copia = {**index, "resolved": dict(index["resolved"])}
+            _save_file(copia)
+            logger.info(f"[CoinGecko] Símbolos ambiguos resueltos: {elegidos}")
+
+    return mapeo, [t for t in faltan if t not in mapeo]
+
+
+# ═══════════════════════════════════════════════════════════════
+# PRECIOS POR LOTES
+# ═══════════════════════════════════════════════════════════════
+
+def fetch_prices(ids: Iterable[str], base_url: str) -> dict[str, float]:
+    """{coingecko_id: precio USD} consultando /simple/price en lotes."""
+    base = f"{base_url}/simple/price?vs_currencies=usd&ids="
+    precios: dict[str, float] = {}
+    lotes = chunk_ids(sorted(set(ids)), base)
+    for lote in lotes:
+        data = _get(base + _ids_param(lote))
+        for gid, v in data.items():
+            if (v or {}).get("usd"):
+                precios[gid] = v["usd"]
+    logger.info(f"[CoinGecko] {len(precios)} precios en {len(lotes)} llamada(s)")
+    return precios
+
+
+def status() -> dict:
+    with _lock:
+        index = _index
+    if index is None:
+        return {"loaded": False}
+    return {
+        "loaded":   True,
+        "symbols":  len(index["symbols"]),
+        "resolved": dict(index["resolved"]),
+        "age_s":    round(time.time() - index.get("fetched_at", 0)),
+    }
+
+
+def reset() -> None:
+    """Olvida el índice en memoria y el ritmo de llamadas (benchmarks / pruebas)."""
+    global _index, _last_call
+    with _lock, _call_lock:
+        _index, _last_call = None, 0.0
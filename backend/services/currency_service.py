@@ -3,14 +3,18 @@
 # Conversión USD/PEN con fallback al último rate conocido en BD
 # ============================================================
 
-import httpx
+import os
+
 from sqlalchemy.orm import Session
 from models import ExchangeRateLog
 from datetime import datetime
+from services import http_client
 
-# API pública del Banco Central de Reserva del Perú
-BCRP_API_URL = (
-    "https://estadisticas.bcrp.gob.pe/estadisticas/series/api/PD04640PD/json"
+# API pública del Banco Central de Reserva del Perú (BCRP_API_URL en el entorno
+# para apuntarla a benchmarks/fake_services.py)
+BCRP_API_URL = os.getenv(
+    "BCRP_API_URL",
+    "https://estadisticas.bcrp.gob.pe/estadisticas/series/api/PD04640PD/json",
 )
 
 FALLBACK_RATE = 3.70  # Tasa conservadora de respaldo
@@ -26,17 +30,16 @@ class CurrencyService:
         Nunca bloquea la respuesta ante un fallo de red.
         """
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.get(BCRP_API_URL)
-                resp.raise_for_status()
-                data = resp.json()
-                rate = float(data["periods"][-1]["values"][0])
+            resp = await http_client.aget(BCRP_API_URL, timeout=5.0)
+            resp.raise_for_status()
+            data = resp.json()
+            rate = float(data["periods"][-1]["values"][0])
 
-                # Guardar en BD para auditoría
-                log = ExchangeRateLog(usd_to_pen=rate, source="BCRP_API")
-                db.add(log)
-                db.commit()
-                return rate
+            # Guardar en BD para auditoría
+            log = ExchangeRateLog(usd_to_pen=rate, source="BCRP_API")
+            db.add(log)
+            db.commit()
+            return rate
 
         except Exception:
             # Fallback 1: último rate registrado manualmente o por API anterior
@@ -0,0 +1,149 @@
+"""
+FinanzasOS — services/data_version.py
+Versionado de datos por ámbito para invalidar caches.
+
+Cada escritura ORM sobre las tablas rastreadas incrementa la versión de los
+ámbitos afectados (ej. 'transactions:2026-02', 'budgets:2026-02', 'profile',
+'settings', 'investments', 'prices', 'fx', 'balances',
+'portfolio_snapshots').
+Los caches incluyen esas versiones en su clave: si nada cambió, la clave es
+la misma y el resultado cacheado sigue siendo válido.
+
+El contador vive en la tabla data_versions, por lo que es compartido entre
+procesos y se revierte junto con la transacción si hay rollback.
+
+Uso:
+    from services import data_version
+    v = data_version.get_versions(db, ["transactions:2026-02", "budgets:2026-02"])
+    data_version.bump(db, "transactions:2026-02")   # escrituras masivas fuera del ORM
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+
+logger = logging.getLogger("data_version")
+
+
+# ═══════════════════════════════════════════════════════════════
+# ÁMBITOS POR MODELO
+# ═══════════════════════════════════════════════════════════════
+
+def _old_and_new(obj, attr: str) -> set:
+    """Valores actual y anterior (si cambió en este flush) de un atributo."""
+    hist   = inspect(obj).attrs[attr].history
+    values = set(hist.added) | set(hist.deleted) | set(hist.unchanged)
+    if not values:
+        values = {getattr(obj, attr, None)}
+    return {v for v in values if v is not None}
+
+
+def _scopes_transaction(obj) -> set[str]:
+    scopes = {"transactions"}
+    for p in _old_and_new(obj, "period"):
+        scopes.add(f"transactions:{p}")
+    # El ahorro acumulado histórico depende de todas las tx de tipo ahorro
+    if "ahorro" in _old_and_new(obj, "type"):
+        scopes.add("ahorro")
+    return scopes
+
+
+def _scopes_budget(obj) -> set[str]:
+    return {"budgets"} | {f"budgets:{p}" for p in _old_and_new(obj, "period")}
+
+
+def _scopes_resumen(obj) -> set[str]:
+    return {f"resumen:{p}" for p in _old_and_new(obj, "periodo")}
+
+
+_SCOPE_RULES = {
+    models.Transaction:          _scopes_transaction,
+    models.Budget:               _scopes_budget,
+    models.ResumenMensual:       _scopes_resumen,
+    models.Profile:              lambda obj: {"profile"},
+    models.AppSettings:          lambda obj: {"settings"},
+    models.Investment:           lambda obj: {"investments"},
+    models.PriceCache:           lambda obj: {"prices"},
+    models.ExchangeRateLog:      lambda obj: {"fx"},
+    models.Asset:                lambda obj: {"balances"},
+    models.AssetBalanceSnapshot: lambda obj: {"balances"},
+    models.PortfolioSnapshot:    lambda obj: {"portfolio_snapshots"},
+}
+
+
+def scopes_for(obj) -> set[str]:
+    """Ámbitos afectados por escribir `obj` (vacío si el modelo no se rastrea)."""
+    rule = _SCOPE_RULES.get(type(obj))
+    return rule(obj) if rule else set()
+
+
+# ═══════════════════════════════════════════════════════════════
+# LECTURA / ESCRITURA DE VERSIONES
+# ═══════════════════════════════════════════════════════════════
+
+def _bump_on_connection(conn, scopes) -> None:
+    """Incrementa (o crea en 1) la versión de cada ámbito en la conexión dada."""
+    table = models.DataVersion.__table__
+    now   = datetime.utcnow()
+    for scope in sorted(scopes):
+        res = conn.execute(
+            table.update()
+            .where(table.c.scope == scope)
+            .values(version=table.c.version + 1, updated_at=now)
+        )
+        if res.rowcount == 0:
+            conn.execute(table.insert().values(scope=scope, version=1, updated_at=now))
+
+
+def bump(db: Session, *scopes: str) -> None:
+    """
+    Incrementa manualmente la versión de uno o más ámbitos.
+    Necesario tras escrituras que no pasan por el flush del ORM
+    (ej. query(...).delete() masivo). Se confirma con el commit del llamador.
+    """
+    if scopes:
+        _bump_on_connection(db.connection(), set(scopes))
+
+
+def get_versions(db: Session, scopes) -> dict[str, int]:
+    """Versión actual de cada ámbito solicitado (0 si nunca se escribió)."""
+    scopes = list(dict.fromkeys(scopes))
+    rows = (
+        db.query(models.DataVersion.scope, models.DataVersion.version)
+        .filter(models.DataVersion.scope.in_(scopes))
+        .all()
+    )
+    found = {r.scope: r.version for r in rows}
+    return {s: found.get(s, 0) for s in scopes}
+
+
+def fingerprint(*parts) -> str:
+    """Hash estable (hex, 32 chars) de versiones + parámetros para claves de cache."""
+    raw = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+# ═══════════════════════════════════════════════════════════════
+# HOOK ORM — incrementa versiones en cada flush
+# ═══════════════════════════════════════════════════════════════
+
+@event.listens_for(SessionLocal, "after_flush")
+def _after_flush(session: Session, flush_context) -> None:
+    scopes: set[str] = set()
+    for obj in session.new:
+        scopes |= scopes_for(obj)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            scopes |= scopes_for(obj)
+    for obj in session.deleted:
+        scopes |= scopes_for(obj)
+
+    if scopes:
+        _bump_on_connection(session.connection(), scopes)
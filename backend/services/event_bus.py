@@ -0,0 +1,156 @@
+"""
+FinanzasOS — services/event_bus.py
+Bus de eventos para Server-Sent Events.
+
+Los eventos se guardan en la tabla event_log (id creciente) y los streams
+SSE leen los posteriores al último id que entregaron. Así funciona con
+varios workers de uvicorn: el refresh de precios puede correr en un proceso
+y el navegador estar conectado a otro.
+
+    - publish(topic, payload) inserta el evento y despierta de inmediato a
+      los streams del mismo proceso.
+    - Los streams de otros procesos lo ven en su siguiente sondeo
+      (EVENT_POLL_S).
+    - Los eventos viejos se purgan: solo sirven para reconexiones
+      (Last-Event-ID) y clientes lentos.
+
+Configuración (variables de entorno):
+    EVENT_POLL_S         sondeo de la BD por stream, en segundos      (default 1.0)
+    EVENT_RETENTION_S    antigüedad máxima de un evento guardado       (default 3600)
+    EVENT_HEARTBEAT_S    comentario keep-alive si no hay eventos       (default 15)
+
+Uso:
+    event_bus.publish("prices.refresh", {"refresh_id": "...", "status": "done"})
+
+    async for ev in event_bus.listen(["prices.refresh"], after_id=desde):
+        yield event_bus.sse(ev) if ev else event_bus.KEEPALIVE
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import delete, func, insert, select
+
+import models
+from database import engine
+
+logger = logging.getLogger("event_bus")
+
+EVENT_POLL_S      = float(os.getenv("EVENT_POLL_S", "1.0"))
+EVENT_RETENTION_S = float(os.getenv("EVENT_RETENTION_S", "3600"))
+EVENT_HEARTBEAT_S = float(os.getenv("EVENT_HEARTBEAT_S", "15"))
+
+KEEPALIVE = ": keepalive\n\n"
+SSE_HEADERS = {
+    "Cache-Control":     "no-cache",
+    "X-Accel-Buffering": "no",      # nginx: no bufferizar el stream
+}
+
+_log = models.EventLog.__table__
+
+# Streams del proceso esperando eventos: (loop, asyncio.Event)
+_waiters: set = set()
+_waiters_lock = threading.Lock()
+_publicados   = 0
+
+
+# ═══════════════════════════════════════════════════════════════
+# PUBLICACIÓN
+# ═══════════════════════════════════════════════════════════════
+
+def publish(topic: str, payload: dict) -> int:
+    """Guarda el evento y despierta a los streams locales. Retorna su id."""
+    global _publicados
+    now = time.time()
+    with engine.begin() as conn:
+        event_id = conn.execute(
+            insert(_log).values(topic=topic, payload=payload, created_at=now)
+        ).inserted_primary_key[0]
+        _publicados += 1
+        if _publicados % 100 == 0:
+            conn.execute(delete(_log).where(_log.c.created_at < now - EVENT_RETENTION_S))
+    _wake()
+    return event_id
+
+
+def _wake() -> None:
+    with _waiters_lock:
+        waiters = list(_waiters)
+    for loop, ev in waiters:
+        try:
+            loop.call_soon_threadsafe(ev.set)
+        except RuntimeError:
+            pass            # loop ya cerrado
+
+
+# ═══════════════════════════════════════════════════════════════
+# LECTURA
+# ═══════════════════════════════════════════════════════════════
+
+def last_id() -> int:
+    """Id del último evento guardado (0 si no hay)."""
+    with engine.connect() as conn:
+        return conn.execute(select(func.max(_log.c.id))).scalar() or 0
+
+
+def oldest_id() -> int:
+    """Id del evento más antiguo aún guardado (0 si no hay)."""
+    with engine.connect() as conn:
+        return conn.execute(select(func.min(_log.c.id))).scalar() or 0
+
+
+def fetch(after_id: int, topics: Optional[list[str]] = None, limit: int = 200) -> list[dict]:
+    """Eventos con id > after_id (opcionalmente filtrados por tópico), en orden."""
+    q = select(_log).where(_log.c.id > after_id).order_by(_log.c.id).limit(limit)
+    if topics:
+        q = q.where(_log.c.topic.in_(topics))
+    with engine.connect() as conn:
+        return [
+            {"id": r["id"], "topic": r["topic"], "payload": r["payload"], "created_at": r["created_at"]}
+            for r in conn.execute(q).mappings()
+        ]
+
+
+async def listen(topics: Optional[list[str]] = None, after_id: Optional[int] = None) -> AsyncIterator[Optional[dict]]:
+    """
+    Generador de eventos para un stream SSE. Entrega None cada
+    EVENT_HEARTBEAT_S sin eventos (para enviar un keep-alive).
+    """
+    loop   = asyncio.get_running_loop()
+    signal = asyncio.Event()
+    waiter = (loop, signal)
+    with _waiters_lock:
+        _waiters.add(waiter)
+    try:
+        cursor = after_id if after_id is not None else await asyncio.to_thread(last_id)
+        ultimo = time.monotonic()
+        while True:
+            signal.clear()      # antes de leer: un publish posterior no se pierde
+            eventos = await asyncio.to_thread(fetch, cursor, topics)
+            for ev in eventos:
+                cursor = ev["id"]
+                yield ev
+            if eventos:
+                ultimo = time.monotonic()
+                continue
+            if time.monotonic() - ultimo >= EVENT_HEARTBEAT_S:
+                ultimo = time.monotonic()
+                yield None
+            try:
+                await asyncio.wait_for(signal.wait(), timeout=EVENT_POLL_S)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        with _waiters_lock:
+            _waiters.discard(waiter)
+
+
+def sse(event: dict, name: Optional[str] = None) -> str:
+    """Formatea un evento como mensaje SSE (id / event / data)."""
+    data = json.dumps(event["payload"], ensure_ascii=False, default=str)
+    return f"id: {event['id']}\nevent: {name or event['topic']}\ndata: {data}\n\n"
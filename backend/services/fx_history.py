@@ -0,0 +1,318 @@
+"""
+FinanzasOS — services/fx_history.py
+Serie diaria USD/PEN y conversión "as-of" (al tipo de cambio de cada fecha).
+
+CurrencyService.convert_to_pen recibe una sola tasa y los llamadores pasaban
+la de hoy: un saldo en USD del año pasado se revaluaba al tipo de cambio
+actual en /v3/patrimonio/historial y en los snapshots. Aquí:
+
+    - Las observaciones salen de ExchangeRateLog (registros manuales, BCRP,
+      open.er-api.com) — la última de cada día manda.
+    - backfill() completa los huecos de más de FX_GAP_DAYS días entre la
+      primera fecha con saldos (o FX_HISTORY_DAYS atrás) y hoy con la serie
+      histórica del BCRP (BCRP_API_URL/{inicio}/{fin}), guardándola en
+      ExchangeRateLog con source "BCRP_HIST". Corre como job del scheduler.
+    - En memoria la serie es densa: un día por posición desde la primera
+      observación hasta hoy, con la última tasa conocida arrastrada sobre
+      fines de semana y feriados. La búsqueda es un bisect sobre el arreglo
+      ordenado de días.
+    - Cada escritura de ExchangeRateLog sube la versión "fx"
+      (services/data_version.py); al ver una versión nueva se leen las filas
+      nuevas y las del último día observado (record() actualiza la fila de
+      hoy en el lugar, con el mismo id), así todos los workers ven la misma
+      serie.
+
+Uso:
+    from services import fx_history
+    fx_history.rate_on(db, date(2025, 3, 31))
+    fx_history.convert_many(db, [100, 2500], ["USD", "PEN"], [d1, d2])   # → montos en PEN
+
+Configuración (variables de entorno):
+    FX_HISTORY_DAYS   días hacia atrás a cubrir si no hay saldos  (default 365)
+    FX_GAP_DAYS       hueco mínimo que dispara el backfill        (default 5)
+"""
+
+import logging
+import os
+import threading
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional, Sequence
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+import models
+from services import data_version, http_client
+from services.currency_service import BCRP_API_URL, FALLBACK_RATE
+from utils.timezone_utils import today_lima
+
+logger = logging.getLogger("fx_history")
+
+FX_HISTORY_DAYS = int(os.getenv("FX_HISTORY_DAYS", "365"))
+FX_GAP_DAYS     = int(os.getenv("FX_GAP_DAYS", "5"))
+
+SCOPE = "fx"
+
+_MESES_BCRP = {
+    "ene": 1, "feb": 2, "mar": 3, "abr": 4, "may": 5, "jun": 6,
+    "jul": 7, "ago": 8, "set": 9, "sep": 9, "oct": 10, "nov": 11, "dic": 12,
+}
+
+_lock = threading.Lock()
+_obs: dict[int, tuple[datetime, int, float]] = {}   # ordinal → (fecha, id, tasa) de la última fila del día
+_max_id  = 0
+_version = -1
+_days:  list[int]   = []        # ordinales consecutivos (densa)
+_rates: list[float] = []
+
+
+# ═══════════════════════════════════════════════════════════════
+# SERIE EN MEMORIA
+# ═══════════════════════════════════════════════════════════════
+
+def _ordinal(d) -> int:
+    if isinstance(d, datetime):
+        return d.date().toordinal()
+    if isinstance(d, date):
+        return d.toordinal()
+    return date.fromisoformat(str(d)[:10]).toordinal()
+
+
+def _rebuild() -> None:
+    """Arma la serie densa desde las observaciones (bajo _lock)."""
+    global _days, _rates
+    if not _obs:
+        _days, _rates = [], []
+        return
+    inicio = min(_obs)
+    fin    = max(max(_obs), today_lima().toordinal())
+    dias, tasas, ultima = [], [], None
+    for o in range(inicio, fin + 1):
+        if o in _obs:
+            ultima = _obs[o][2]
+        dias.append(o)
+        tasas.append(ultima)
+    _days, _rates = dias, tasas
+
+
+def _refresh(db: Session) -> None:
+    """
+    Si la versión "fx" cambió, incorpora las filas nuevas de ExchangeRateLog
+    y vuelve a leer las del último día observado (pueden haberse actualizado).
+    """
+    global _max_id, _version
+    version = data_version.get_versions(db, [SCOPE])[SCOPE]
+    with _lock:
+        if version == _version and _days and _days[-1] >= today_lima().toordinal():
+            return
+        completa = version < _version or not _obs
+        desde    = 0 if completa else _max_id
+        ultimo   = None if completa else datetime.combine(date.fromordinal(max(_obs)), datetime.min.time())
+    ERL = models.ExchangeRateLog
+    q   = db.query(ERL.id, ERL.date, ERL.usd_to_pen).filter(ERL.usd_to_pen > 0)
+    if ultimo is not None:
+        q = q.filter(or_(ERL.id > desde, ERL.date >= ultimo))
+    rows = q.all()
+    with _lock:
+        if completa:
+            _obs.clear()
+            _max_id = 0
+        for r in rows:
+            if r.date is None:
+                continue
+            o   = r.date.toordinal()
+            act = _obs.get(o)
+            if act is None or (r.date, r.id) >= act[:2]:
+                _obs[o] = (r.date, r.id, r.usd_to_pen)
+            _max_id = max(_max_id, r.id)
+        _version = version
+        _rebuild()
+
+
+def _lookup(o: int) -> float:
+    """Tasa del día `o` (ordinal). Antes de la serie: la primera; sin serie: FALLBACK_RATE."""
+    dias, tasas = _days, _rates
+    if not dias:
+        return FALLBACK_RATE
+    i = bisect_right(dias, o) - 1
+    return tasas[max(i, 0)]
+
+
+def rate_on(db: Session, d) -> float:
+    """Tipo de cambio USD/PEN vigente en la fecha `d` (date, datetime o 'YYYY-MM-DD')."""
+    _refresh(db)
+    return _lookup(_ordinal(d))
+
+
+def latest_rate(db: Session) -> float:
+    """Última tasa observada (la "actual" para precios); FALLBACK_RATE sin serie."""
+    _refresh(db)
+    tasas = _rates
+    return tasas[-1] if tasas else FALLBACK_RATE
+
+
+def rates_on(db: Session, dates: Iterable) -> list[float]:
+    """Tasas para varias fechas, en el mismo orden."""
+    _refresh(db)
+    cache: dict[int, float] = {}
+    out = []
+    for d in dates:
+        o = _ordinal(d)
+        if o not in cache:
+            cache[o] = _lookup(o)
+        out.append(cache[o])
+    return out
+
+
+def convert_many(
+    db: Session,
+    amounts: Sequence[float],
+    currencies: Sequence[str],
+    dates: Sequence,
+    to: str = "PEN",
+) -> list[float]:
+    """
+    Convierte cada monto de su moneda a `to` (PEN o USD) con el tipo de
+    cambio de su fecha, en una pasada. Monedas desconocidas quedan igual,
+    como en CurrencyService.
+    """
+    tasas = rates_on(db, dates)
+    out   = []
+    for amount, currency, rate in zip(amounts, currencies, tasas):
+        if amount is None:
+            out.append(0.0)
+        elif currency == to or currency not in ("USD", "PEN"):
+            out.append(amount)
+        elif to == "PEN":
+            out.append(amount * rate)
+        else:
+            out.append(amount / rate if rate else amount)
+    return out
+
+
+def record(db: Session, rate: float, source: str, when: Optional[datetime] = None) -> None:
+    """
+    Registra la tasa del día para `source`: actualiza la fila de hoy de esa
+    fuente o crea una (un registro por día y fuente, no uno por consulta).
+    Se confirma con el commit del llamador.
+    """
+    when = when or datetime.utcnow()
+    dia  = when.date()
+    fila = (
+        db.query(models.ExchangeRateLog)
+        .filter(
+            models.ExchangeRateLog.source == source,
+            models.ExchangeRateLog.date >= datetime.combine(dia, datetime.min.time()),
+            models.ExchangeRateLog.date < datetime.combine(dia + timedelta(days=1), datetime.min.time()),
+        )
+        .first()
+    )
+    if fila:
+        if fila.usd_to_pen != rate:
+            fila.usd_to_pen, fila.date = rate, when
+    else:
+        db.add(models.ExchangeRateLog(date=when, usd_to_pen=rate, source=source))
+
+
+# ═══════════════════════════════════════════════════════════════
+# BACKFILL DESDE EL BCRP
+# ═══════════════════════════════════════════════════════════════
+
+def _parse_bcrp_period(nombre: str) -> Optional[date]:
+    """'02.Ene.24' → date(2024, 1, 2)."""
+    try:
+        dia, mes, anio = nombre.split(".")
+        return date(2000 + int(anio), _MESES_BCRP[mes.strip().lower()[:3]], int(dia))
+    except (ValueError, KeyError):
+        return None
+
+
+def fetch_bcrp_range(inicio: date, fin: date) -> dict[date, float]:
+    """Serie diaria del BCRP entre dos fechas (solo días hábiles con dato)."""
+    resp = http_client.get(f"{BCRP_API_URL.rstrip('/')}/{inicio.isoformat()}/{fin.isoformat()}")
+    resp.raise_for_status()
+    serie = {}
+    for p in resp.json().get("periods", []):
+        d = _parse_bcrp_period(p.get("name", ""))
+        try:
+            valor = float((p.get("values") or [""])[0])
+        except ValueError:          # "n.d."
+            continue
+        if d and valor > 0:
+            serie[d] = valor
+    return serie
+
+
+def _inicio_requerido(db: Session) -> date:
+    candidatos = [today_lima() - timedelta(days=FX_HISTORY_DAYS)]
+    primero = db.query(func.min(models.AssetBalanceSnapshot.snapshot_date)).scalar()
+    if primero:
+        candidatos.append(primero.date())
+    primero = db.query(func.min(models.PortfolioSnapshot.date)).scalar()
+    if primero:
+        candidatos.append(date.fromisoformat(primero[:10]))
+    return min(candidatos)
+
+
+def _huecos(observados: list[int], inicio: int, fin: int) -> list[tuple[int, int]]:
+    """Rangos [a, b] sin observaciones de más de FX_GAP_DAYS días dentro de [inicio, fin]."""
+    huecos, prev = [], inicio - 1
+    for o in [x for x in observados if inicio <= x <= fin] + [fin + 1]:
+        if o - prev - 1 > FX_GAP_DAYS:
+            huecos.append((prev + 1, o - 1))
+        prev = o
+    return huecos
+
+
+def backfill(db: Session) -> int:
+    """
+    Rellena con el BCRP los huecos de la serie entre la fecha más antigua
+    que hace falta y hoy. Retorna cuántos días se agregaron.
+    """
+    _refresh(db)
+    inicio = _inicio_requerido(db).toordinal()
+    hoy    = today_lima().toordinal()
+    with _lock:
+        observados = sorted(_obs)
+    agregados = 0
+    for a, b in _huecos(observados, inicio, hoy):
+        # El BCRP responde rangos largos sin problema; se parte por año por prolijidad
+        for y in range(date.fromordinal(a).year, date.fromordinal(b).year + 1):
+            desde = max(date.fromordinal(a), date(y, 1, 1))
+            hasta = min(date.fromordinal(b), date(y, 12, 31))
+            serie = fetch_bcrp_range(desde, hasta)
+            for d, valor in sorted(serie.items()):
+                db.add(models.ExchangeRateLog(
+                    date=datetime.combine(d, datetime.min.time()) + timedelta(hours=12),
+                    usd_to_pen=valor, source="BCRP_HIST",
+                ))
+            agregados += len(serie)
+    if agregados:
+        db.commit()
+        _refresh(db)
+        logger.info(f"[FX] Backfill BCRP: {agregados} días agregados")
+    return agregados
+
+
+def status() -> dict:
+    with _lock:
+        dias, tasas = _days, _rates
+        observados  = len(_obs)
+    if not dias:
+        return {"days": 0, "observations": 0}
+    return {
+        "days":         len(dias),
+        "observations": observados,
+        "from":         date.fromordinal(dias[0]).isoformat(),
+        "to":           date.fromordinal(dias[-1]).isoformat(),
+        "latest":       tasas[-1],
+    }
+
+
+def reset() -> None:
+    """Olvida la serie en memoria (benchmarks / pruebas)."""
+    global _max_id, _version, _days, _rates
+    with _lock:
+        _obs.clear()
+        _max_id, _version, _days, _rates = 0, -1, [], []
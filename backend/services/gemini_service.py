@@ -7,12 +7,15 @@
 import json
 import os
 import re
+import time
 from datetime import datetime, timedelta
 from google import genai
 from google.genai import types
 from google.genai.errors import ClientError
 from sqlalchemy.orm import Session
 
+from services import metrics, http_client
+
 MODEL_NAME = "gemini-2.5-flash-lite"
 
 # ── SYSTEM PROMPT ────────────────────────────────────────────
@@ -261,6 +264,17 @@ class GeminiError(Exception):
     pass
 
 
+def _registrar_tokens(label: str, response) -> None:
+    """Tokens de entrada / salida según usage_metadata (si el SDK lo trae)."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    for kind, attr in (("prompt", "prompt_token_count"), ("output", "candidates_token_count")):
+        n = getattr(usage, attr, None)
+        if n:
+            metrics.GEMINI_TOKENS.labels(label, kind).inc(n)
+
+
 class GeminiService:
 
     def __init__(self):
@@ -273,9 +287,18 @@ class GeminiService:
         self._key_primary = api_key
         self._key_alt     = api_key_alt
 
-        # Clientes separados por key — se crean una vez y se reutilizan
-        self._client_primary = genai.Client(api_key=api_key)
-        self._client_alt     = genai.Client(api_key=api_key_alt) if api_key_alt else None
+        # Clientes separados por key — se crean una vez y se reutilizan.
+        # Ambos van sobre el pool compartido (services/http_client.py); el SDK
+        # cierra su cliente al destruirse, por eso sdk_client() y no get_client().
+        # GEMINI_BASE_URL permite apuntarlos a benchmarks/fake_services.py.
+        http_options = types.HttpOptions(
+            httpx_client=http_client.sdk_client(),
+            base_url=os.environ.get("GEMINI_BASE_URL") or None,
+        )
+        self._client_primary = genai.Client(api_key=api_key, http_options=http_options)
+        self._client_alt     = (
+            genai.Client(api_key=api_key_alt, http_options=http_options) if api_key_alt else None
+        )
 
         import logging as _logging
         self._log = _logging.getLogger("gemini_service")
@@ -299,6 +322,7 @@ class GeminiService:
         last_error = None
 
         for label, client in keys:
+            t0 = time.perf_counter()
             try:
                 self._log.info(f"[Gemini] Llamada con key {label}")
                 response = client.models.generate_content(
@@ -309,6 +333,8 @@ class GeminiService:
                     ),
                 )
                 self._log.info(f"[Gemini] Respuesta OK con key {label}")
+                metrics.GEMINI_DURATION.labels(label, "ok").observe(time.perf_counter() - t0)
+                _registrar_tokens(label, response)
                 return response.text.strip(), label
 
             except ClientError as e:
@@ -318,6 +344,9 @@ class GeminiService:
                     or "RESOURCE_EXHAUSTED" in str(e)
                     or "429" in str(e)
                 )
+                metrics.GEMINI_DURATION.labels(label, "quota" if is_quota else "error").observe(
+                    time.perf_counter() - t0
+                )
                 if is_quota:
                     self._log.warning(
                         f"[Gemini] Cuota agotada en key {label}."
@@ -330,6 +359,7 @@ class GeminiService:
                     raise GeminiError(str(e)) from e
 
             except Exception as e:
+                metrics.GEMINI_DURATION.labels(label, "error").observe(time.perf_counter() - t0)
                 self._log.error(f"[Gemini] Error inesperado con key {label}: {e}")
                 raise GeminiError(str(e)) from e
 
@@ -399,6 +429,7 @@ TRANSACCIONES EXISTENTES (para detección de duplicados):
         except GeminiQuotaExceeded as e:
             import logging
             logging.warning(f"[Gemini] {e} - Usando parser local de fallback.")
+            metrics.GEMINI_FALLBACKS.labels("parse_extracto", "quota").inc()
             result = _local_parse(raw_text, period)
             result["_warning"] = (
                 "Cuota de Gemini agotada en todas las keys - resultado generado por el "
@@ -409,11 +440,13 @@ TRANSACCIONES EXISTENTES (para detección de duplicados):
         except GeminiError as e:
             import logging
             logging.error(f"[Gemini] Error no recuperable: {e}")
+            metrics.GEMINI_FALLBACKS.labels("parse_extracto", "error").inc()
             result = _local_parse(raw_text, period)
             result["_warning"] = f"Error de Gemini: {e}. Se uso el parser local."
             return result
 
         except json.JSONDecodeError:
+            metrics.GEMINI_FALLBACKS.labels("parse_extracto", "invalid_json").inc()
             result = _local_parse(raw_text, period)
             result["_warning"] = "Gemini devolvio respuesta invalida. Se uso el parser local."
             return result
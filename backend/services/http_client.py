@@ -0,0 +1,386 @@
+"""
+FinanzasOS — services/http_client.py
+Cliente HTTP compartido para todas las integraciones salientes
+(CoinGecko, Yahoo, Stooq, open.er-api, BCRP, Telegram, Gemini).
+
+    - Un httpx.Client (y un AsyncClient por event loop) por proceso: el pool
+      conserva conexiones keep-alive por origen, así que los jobs reutilizan
+      la sesión TLS en vez de abrir una nueva en cada llamada.
+    - HTTP/2 si el paquete `h2` está instalado (dependencia opcional).
+    - Circuit breaker por host (services/circuit_breaker.py) en el transporte:
+      errores de red y respuestas 5xx lo abren; mientras está abierto la
+      llamada falla al instante con CircuitOpenError. Un 429 no lo abre (suele
+      ser cuota por API key, no caída del host).
+    - request()/get()/post() reintentan con backoff exponencial con jitter
+      ante errores de red, 429 y 502/503/504 (respetando Retry-After). Por
+      defecto solo los métodos idempotentes: un POST (ej. Telegram) no se
+      repite salvo que se pida con retries=N. Un timeout de lectura no se
+      reintenta: ya costó HTTP_TIMEOUT y, si el host no responde, el breaker
+      lo corta.
+
+Configuración (variables de entorno):
+    HTTP_TIMEOUT            timeout total por intento, en segundos       (default 10)
+    HTTP_CONNECT_TIMEOUT    timeout de conexión, en segundos             (default 5)
+    HTTP_RETRIES            reintentos de métodos idempotentes           (default 2)
+    HTTP_BACKOFF_BASE       base del backoff exponencial, en segundos    (default 0.5)
+    HTTP_BACKOFF_MAX        tope de cada espera, en segundos             (default 8)
+    HTTP_POOL_MAX           conexiones simultáneas por cliente           (default 50)
+    HTTP_POOL_KEEPALIVE     conexiones ociosas conservadas               (default 20)
+    HTTP_KEEPALIVE_S        vida de una conexión ociosa, en segundos     (default 60)
+    HTTP_HTTP2              1 = negociar HTTP/2 si `h2` está instalado    (default 1)
+    HTTP_BREAKER_FAILURES   fallos seguidos que abren el circuito        (default 5)
+    HTTP_BREAKER_RESET_S    espera antes de la sonda half-open           (default 60)
+
+Uso:
+    from services import http_client
+
+    resp = http_client.get("https://api.coingecko.com/api/v3/ping", timeout=15)
+    resp = await http_client.aget(BCRP_API_URL, timeout=5.0)
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+from services import metrics
+from services.circuit_breaker import CLOSED, HALF_OPEN, CircuitBreaker, CircuitOpenError
+
+logger = logging.getLogger("http_client")
+
+HTTP_TIMEOUT          = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT  = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_RETRIES          = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_BASE     = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX      = float(os.getenv("HTTP_BACKOFF_MAX", "8"))
+HTTP_POOL_MAX         = int(os.getenv("HTTP_POOL_MAX", "50"))
+HTTP_POOL_KEEPALIVE   = int(os.getenv("HTTP_POOL_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_S      = float(os.getenv("HTTP_KEEPALIVE_S", "60"))
+HTTP_BREAKER_FAILURES = int(os.getenv("HTTP_BREAKER_FAILURES", "5"))
+HTTP_BREAKER_RESET_S  = float(os.getenv("HTTP_BREAKER_RESET_S", "60"))
+
+# HTTP/2 solo si la dependencia opcional está instalada (httpx lo exige)
+HTTP2 = os.getenv("HTTP_HTTP2", "1") == "1" and importlib.util.find_spec("h2") is not None
+
+USER_AGENT   = "FinanzasOS/3.1 (+httpx)"
+RETRY_STATUS = frozenset({429, 502, 503, 504})
+IDEMPOTENT   = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# Host colgado: reintentar solo multiplica la espera
+NO_RETRY_ERRORS = (httpx.ReadTimeout, httpx.WriteTimeout, httpx.PoolTimeout)
+
+
+# ═══════════════════════════════════════════════════════════════
+# CIRCUIT BREAKERS POR HOST
+# ═══════════════════════════════════════════════════════════════
+
+_breakers:      dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(host: str) -> CircuitBreaker:
+    with _breakers_lock:
+        cb = _breakers.get(host)
+        if cb is None:
+            cb = _breakers[host] = CircuitBreaker(
+                host, failure_threshold=HTTP_BREAKER_FAILURES, reset_timeout=HTTP_BREAKER_RESET_S,
+            )
+        return cb
+
+
+def _host(url: httpx.URL) -> str:
+    """Clave del breaker: host, más el puerto si no es el por defecto."""
+    return f"{url.host}:{url.port}" if url.port else url.host
+
+
+def breaker_status() -> dict:
+    """Estado del circuito de cada host contactado desde el arranque."""
+    with _breakers_lock:
+        hosts = dict(_breakers)
+    return {host: cb.snapshot() for host, cb in sorted(hosts.items())}
+
+
+def reset_breakers() -> None:
+    """Olvida el estado de todos los circuitos (benchmarks / pruebas)."""
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def _outcome(status: int) -> str:
+    return f"{status // 100}xx"
+
+
+def _antes(request: httpx.Request) -> tuple[CircuitBreaker, float]:
+    host = _host(request.url)
+    cb   = breaker(host)
+    if not cb.allow():
+        metrics.OUTBOUND_DURATION.labels(host, "circuit_open").observe(0.0)
+        raise CircuitOpenError(host, cb.retry_in())
+    return cb, time.perf_counter()
+
+
+def _despues(request: httpx.Request, cb: CircuitBreaker, t0: float,
+             response: Optional[httpx.Response], error: Optional[Exception]) -> None:
+    host = _host(request.url)
+    if error is not None:
+        cb.record_failure(type(error).__name__)
+        metrics.OUTBOUND_DURATION.labels(host, "error").observe(time.perf_counter() - t0)
+        return
+    if response.status_code >= 500:
+        cb.record_failure(f"HTTP {response.status_code}")
+    else:
+        cb.record_success()
+    metrics.OUTBOUND_DURATION.labels(host, _outcome(response.status_code)).observe(time.perf_counter() - t0)
+
+
+def _fallo(request: httpx.Request, cb: CircuitBreaker, t0: float, error: BaseException) -> None:
+    """
+    Toda excepción del transporte se registra (o al menos libera la sonda):
+    una sonda de half_open sin resultado dejaría el circuito abierto para
+    siempre. Las cancelaciones (CancelledError, KeyboardInterrupt…) no son
+    culpa del host y no cuentan como fallo.
+    """
+    if isinstance(error, Exception):
+        _despues(request, cb, t0, None, error)
+    else:
+        cb.release()
+
+
+class _BreakerTransport(httpx.BaseTransport):
+    """Transporte que pasa por el breaker del host y mide la latencia hasta los headers."""
+
+    def __init__(self, inner: httpx.BaseTransport):
+        self._inner = inner
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        cb, t0 = _antes(request)
+        try:
+            response = self._inner.handle_request(request)
+        except BaseException as e:
+            _fallo(request, cb, t0, e)
+            raise
+        _despues(request, cb, t0, response, None)
+        return response
+
+    def close(self) -> None:
+        self._inner.close()
+
+
+class _AsyncBreakerTransport(httpx.AsyncBaseTransport):
+
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self._inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        cb, t0 = _antes(request)
+        try:
+            response = await self._inner.handle_async_request(request)
+        except BaseException as e:
+            _fallo(request, cb, t0, e)
+            raise
+        _despues(request, cb, t0, response, None)
+        return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+class _SharedTransport(httpx.BaseTransport):
+    """Delegado al transporte del proceso cuyo close() no cierra el pool."""
+
+    def __init__(self, inner: httpx.BaseTransport):
+        self._inner = inner
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self._inner.handle_request(request)
+
+    def close(self) -> None:
+        pass
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLIENTES COMPARTIDOS
+# ═══════════════════════════════════════════════════════════════
+
+_client: Optional[httpx.Client] = None
+_transport: Optional[httpx.BaseTransport] = None
+_client_lock = threading.Lock()
+# AsyncClient atado a un event loop: uno por loop (uvicorn usa uno solo)
+_async_clients: dict[int, httpx.AsyncClient] = {}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_POOL_MAX,
+        max_keepalive_connections=HTTP_POOL_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_S,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+
+
+def get_client() -> httpx.Client:
+    """httpx.Client compartido del proceso (thread-safe; se crea al primer uso)."""
+    global _client, _transport
+    if _client is None or _client.is_closed:
+        with _client_lock:
+            if _client is None or _client.is_closed:
+                _transport = _BreakerTransport(httpx.HTTPTransport(http2=HTTP2, limits=_limits()))
+                _client = httpx.Client(
+                    transport=_transport, timeout=_timeout(), follow_redirects=True,
+                    headers={"User-Agent": USER_AGENT},
+                )
+    return _client
+
+
+def sdk_client() -> httpx.Client:
+    """
+    Cliente para SDKs de terceros (google-genai) que cierran el httpx.Client
+    recibido al destruirse: usa el mismo pool y breakers que get_client(),
+    pero su close() no afecta a los demás.
+    """
+    get_client()
+    return httpx.Client(
+        transport=_SharedTransport(_transport), timeout=_timeout(), follow_redirects=True,
+        headers={"User-Agent": USER_AGENT},
+    )
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """httpx.AsyncClient compartido del event loop actual."""
+    loop   = asyncio.get_running_loop()
+    client = _async_clients.get(id(loop))
+    if client is None or client.is_closed:
+        transport = _AsyncBreakerTransport(httpx.AsyncHTTPTransport(http2=HTTP2, limits=_limits()))
+        client = _async_clients[id(loop)] = httpx.AsyncClient(
+            transport=transport, timeout=_timeout(), follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+        )
+    return client
+
+
+def close() -> None:
+    """Cierra el cliente síncrono (al apagar la app)."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+async def aclose() -> None:
+    """Cierra el AsyncClient del loop actual (al apagar la app)."""
+    client = _async_clients.pop(id(asyncio.get_running_loop()), None)
+    if client is not None:
+        await client.aclose()
+
+
+# ═══════════════════════════════════════════════════════════════
+# REINTENTOS CON BACKOFF
+# ═══════════════════════════════════════════════════════════════
+
+def _backoff(intento: int) -> float:
+    """Full jitter: espera uniforme en [0, min(max, base·2^intento)]."""
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** intento)))
+
+
+def _retry_after(resp: httpx.Response) -> Optional[float]:
+    valor = resp.headers.get("retry-after")
+    if not valor:
+        return None
+    try:
+        return min(HTTP_BACKOFF_MAX, max(0.0, float(valor)))
+    except ValueError:
+        return None         # formato fecha HTTP: se usa el backoff normal
+
+
+def _intentos(method: str, retries: Optional[int]) -> int:
+    if retries is not None:
+        return retries
+    return HTTP_RETRIES if method.upper() in IDEMPOTENT else 0
+
+
+def _siguiente_espera(url, intento: int, resp: Optional[httpx.Response]) -> float:
+    metrics.OUTBOUND_RETRIES.labels(_host(httpx.URL(url))).inc()
+    espera = _retry_after(resp) if resp is not None else None
+    return espera if espera is not None else _backoff(intento)
+
+
+def request(method: str, url, *, retries: Optional[int] = None, **kwargs) -> httpx.Response:
+    """
+    Request con el cliente compartido y reintentos. Retorna la última
+    respuesta (aunque sea de error); lanza httpx.TransportError si la red
+    falló en todos los intentos o CircuitOpenError si el host está en corte.
+    """
+    client   = get_client()
+    intentos = _intentos(method, retries)
+    for intento in range(intentos + 1):
+        try:
+            resp = client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            if intento >= intentos or isinstance(e, NO_RETRY_ERRORS):
+                raise
+            resp = None
+        else:
+            if resp.status_code not in RETRY_STATUS or intento >= intentos:
+                return resp
+            resp.close()
+        time.sleep(_siguiente_espera(url, intento, resp))
+
+
+async def arequest(method: str, url, *, retries: Optional[int] = None, **kwargs) -> httpx.Response:
+    """Versión async de request() sobre el AsyncClient del loop actual."""
+    client   = get_async_client()
+    intentos = _intentos(method, retries)
+    for intento in range(intentos + 1):
+        try:
+            resp = await client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            if intento >= intentos or isinstance(e, NO_RETRY_ERRORS):
+                raise
+            resp = None
+        else:
+            if resp.status_code not in RETRY_STATUS or intento >= intentos:
+                return resp
+            await resp.aclose()
+        await asyncio.sleep(_siguiente_espera(url, intento, resp))
+
+
+def get(url, **kwargs) -> httpx.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs) -> httpx.Response:
+    return request("POST", url, **kwargs)
+
+
+async def aget(url, **kwargs) -> httpx.Response:
+    return await arequest("GET", url, **kwargs)
+
+
+async def apost(url, **kwargs) -> httpx.Response:
+    return await arequest("POST", url, **kwargs)
+
+
+# ── Métricas ────────────────────────────────────────────────
+
+_ESTADO_NUM = {CLOSED: 0, HALF_OPEN: 1}
+
+
+def _metrics():
+    estados = breaker_status()
+    yield (
+        "http_client_circuit_state", "gauge",
+        "Estado del circuit breaker por host (0 closed, 1 half_open, 2 open).",
+        [({"host": h}, _ESTADO_NUM.get(s["state"], 2)) for h, s in estados.items()],
+    )
+
+
+metrics.register_collector(_metrics)
@@ -0,0 +1,121 @@
+"""
+FinanzasOS — services/live_updates.py
+Deltas en vivo para GET /v3/stream (SSE).
+
+Hooks del ORM sobre SessionLocal: al confirmarse una transacción de BD que
+escribió precios, snapshots o movimientos se publica en el bus de eventos
+(services/event_bus.py) un delta compacto. Nada se publica si hay rollback.
+Las escrituras masivas (query(...).delete()) no pasan por el flush: se anotan
+con transactions_changed(), igual que data_version.bump().
+
+Tópicos y payloads:
+    prices        {"prices": {"BTC": {"price_usd": 64210.5, "source": "coingecko"}}}
+                  {"exchange_rate": 3.742}            (job de tipo de cambio)
+    snapshots     {"assets": [{"asset_id": 3, "balance": 1200.0, "balance_pen": 1200.0,
+                               "date": "2026-10-19T08:00:00"}]}
+                  {"portfolio": {"date": "2026-10-31 23:00", "total_usd": ..., "total_pen": ...}}
+    transactions  {"periods": ["2026-10"], "changed": 3}
+"""
+
+import logging
+from datetime import date, datetime
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+from services import event_bus
+
+logger = logging.getLogger("live_updates")
+
+TOPICS = ("prices", "snapshots", "transactions")
+
+_PENDING = "_live_updates"
+
+
+def _iso(v):
+    return v.isoformat() if isinstance(v, (date, datetime)) else v
+
+
+def _pending(session: Session) -> dict:
+    return session.info.setdefault(_PENDING, {"prices": {}, "assets": [], "portfolio": None, "periods": set(), "tx": 0})
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _after_flush(session: Session, flush_context) -> None:
+    modificados = [o for o in session.dirty if session.is_modified(o, include_collections=False)]
+    cambios     = list(session.new) + modificados
+    for obj in cambios + list(session.deleted):
+        if isinstance(obj, models.Transaction):
+            p = _pending(session)
+            p["tx"] += 1
+            if obj.period:
+                p["periods"].add(obj.period)
+            # Movimiento cambiado de período: avisar también al período anterior
+            p["periods"].update(v for v in inspect(obj).attrs.period.history.deleted if v)
+    for obj in cambios:
+        if isinstance(obj, models.PriceCache):
+            _pending(session)["prices"][obj.ticker] = {"price_usd": obj.price_usd, "source": obj.source}
+        elif isinstance(obj, models.AssetBalanceSnapshot):
+            _pending(session)["assets"].append({
+                "asset_id":    obj.asset_id,
+                "balance":     obj.balance,
+                "balance_pen": obj.balance_pen,
+                "date":        _iso(obj.snapshot_date),
+            })
+        elif isinstance(obj, models.PortfolioSnapshot):
+            _pending(session)["portfolio"] = {
+                "date": obj.date, "total_usd": obj.total_usd, "total_pen": obj.total_pen,
+            }
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _after_commit(session: Session) -> None:
+    p = session.info.pop(_PENDING, None)
+    if not p:
+        return
+    try:
+        if p["prices"]:
+            event_bus.publish("prices", {"prices": p["prices"]})
+        if p["assets"] or p["portfolio"]:
+            delta = {}
+            if p["assets"]:
+                delta["assets"] = p["assets"]
+            if p["portfolio"]:
+                delta["portfolio"] = p["portfolio"]
+            event_bus.publish("snapshots", delta)
+        if p["periods"]:
+            event_bus.publish("transactions", {"periods": sorted(p["periods"]), "changed": p["tx"]})
+    except Exception as e:
+        # El dato ya está confirmado: un fallo del bus no debe romper la escritura
+        logger.warning(f"[Live] No se pudo publicar el delta: {e}")
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+def transactions_changed(session: Session, periods, changed: int) -> None:
+    """
+    Anota movimientos escritos sin pasar por el flush del ORM (ej. delete()
+    masivo). Se publica con el commit del llamador, como los del hook.
+    """
+    p = _pending(session)
+    p["tx"] += changed
+    p["periods"].update(per for per in periods if per)
+
+
+def publish_exchange_rate(rate: float) -> None:
+    """
+    Lo llama el job de tipo de cambio (solo en el líder) al ver una tasa
+    nueva. La tasa se guarda en ExchangeRateLog con fx_history.record() y
+    los workers la leen con price_service.get_exchange_rate(db). El aviso se
+    publica aquí y no desde el hook porque ExchangeRateLog no es uno de los
+    modelos que el hook traduce a deltas.
+    """
+    try:
+        event_bus.publish("prices", {"exchange_rate": rate})
+    except Exception as e:
+        logger.warning(f"[Live] No se pudo publicar el tipo de cambio: {e}")
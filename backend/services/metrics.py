@@ -0,0 +1,352 @@
+"""
+FinanzasOS — services/metrics.py
+Métricas en formato de exposición de texto de Prometheus (0.0.4), sin
+dependencias externas: un registro en proceso con Counter / Gauge /
+Histogram etiquetados, que GET /metrics serializa en cada scrape.
+
+Qué se mide:
+    http_request_duration_seconds   latencia por método / ruta / status
+                                    (ruta = plantilla, ej. /budgets/{period})
+    db_queries_total, db_query_duration_seconds
+                                    consultas SQL (dentro y fuera de requests)
+    scheduler_job_*                 duración, fallos y último éxito de los
+                                    jobs de price_service / telegram_service
+    gemini_*                        latencia, tokens y fallbacks al parser /
+                                    resumen local
+    http_client_*                   llamadas salientes (services/http_client.py):
+                                    latencia por host, reintentos y estado del
+                                    circuit breaker
+    cache_*                         aciertos / fallos / ratio de los caches en
+                                    proceso (se leen al momento del scrape)
+
+Uso:
+    from services import metrics
+
+    REQUESTS = metrics.counter("x_total", "Descripción", ["label"])
+    REQUESTS.labels("valor").inc()
+
+    @metrics.track_job("exchange_rate")
+    def job(): ...
+"""
+
+import functools
+import math
+import threading
+import time
+from typing import Callable, Iterable
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Buckets por defecto del cliente oficial (segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS      = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SLOW_BUCKETS    = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_lock       = threading.Lock()
+_metrics:    dict[str, "_Metric"] = {}
+_collectors: list[Callable[[], Iterable[tuple]]] = []
+
+
+# ═══════════════════════════════════════════════════════════════
+# TIPOS DE MÉTRICA
+# ═══════════════════════════════════════════════════════════════
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labelnames: Iterable[str] = ()):
+        self.name       = name
+        self.doc        = doc
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+
+    def labels(self, *values):
+        """Serie hija para la combinación de etiquetas (en el orden de labelnames)."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name}: se esperaban {len(self.labelnames)} etiquetas")
+        key = tuple(str(v) for v in values)
+        with _lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+            return child
+
+    def _default(self):
+        return self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> list[tuple[str, dict, float]]:
+        raise NotImplementedError
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with _lock:
+            self.value += amount
+
+    def set(self, value: float) -> None:
+        with _lock:
+            self.value = float(value)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def _samples(self):
+        return [
+            (self.name, dict(zip(self.labelnames, key)), child.value)
+            for key, child in self._children.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts  = [0] * len(buckets)
+        self.sum     = 0.0
+        self.count   = 0
+
+    def observe(self, value: float) -> None:
+        with _lock:
+            self.sum   += value
+            self.count += 1
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    self.counts[i] += 1
+                    break
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames: Iterable[str] = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def _samples(self):
+        out = []
+        for key, child in self._children.items():
+            base = dict(zip(self.labelnames, key))
+            acumulado = 0
+            for upper, n in zip(child.buckets, child.counts):
+                acumulado += n
+                out.append((f"{self.name}_bucket", {**base, "le": _fmt(upper)}, acumulado))
+            out.append((f"{self.name}_bucket", {**base, "le": "+Inf"}, child.count))
+            out.append((f"{self.name}_sum",   base, child.sum))
+            out.append((f"{self.name}_count", base, child.count))
+        return out
+
+
+def _register(metric: _Metric) -> _Metric:
+    with _lock:
+        existing = _metrics.get(metric.name)
+        if existing is not None:
+            return existing          # re-import del módulo: misma serie
+        _metrics[metric.name] = metric
+        return metric
+
+
+def counter(name: str, doc: str, labelnames: Iterable[str] = ()) -> Counter:
+    return _register(Counter(name, doc, labelnames))
+
+
+def gauge(name: str, doc: str, labelnames: Iterable[str] = ()) -> Gauge:
+    return _register(Gauge(name, doc, labelnames))
+
+
+def histogram(name: str, doc: str, labelnames: Iterable[str] = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram(name, doc, labelnames, buckets))
+
+
+def register_collector(fn: Callable[[], Iterable[tuple]]) -> None:
+    """
+    Registra una función que se evalúa en cada scrape y devuelve tuplas
+    (nombre, tipo, ayuda, [(etiquetas, valor), ...]). Para métricas que ya
+    viven en otro módulo (contadores de los caches) sin duplicar estado.
+    """
+    _collectors.append(fn)
+
+
+# ═══════════════════════════════════════════════════════════════
+# SERIALIZACIÓN (text format 0.0.4)
+# ═══════════════════════════════════════════════════════════════
+
+def _fmt(value) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _line(name: str, labels: dict, value: float) -> str:
+    if labels:
+        inner = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+        return f"{name}{{{inner}}} {_fmt(value)}"
+    return f"{name} {_fmt(value)}"
+
+
+def render() -> str:
+    """Todas las métricas registradas + collectors, en formato de texto de Prometheus."""
+    lines = []
+    with _lock:
+        snapshot = [(m.name, m.kind, m.doc, m._samples()) for m in _metrics.values()]
+    for name, kind, doc, samples in snapshot:
+        lines.append(f"# HELP {name} {doc}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(_line(n, labels, v) for n, labels, v in samples)
+
+    for fn in _collectors:
+        for name, kind, doc, samples in fn():
+            lines.append(f"# HELP {name} {doc}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(_line(name, labels, v) for labels, v in samples)
+    return "\n".join(lines) + "\n"
+
+
+# ═══════════════════════════════════════════════════════════════
+# MÉTRICAS DE LA APLICACIÓN
+# ═══════════════════════════════════════════════════════════════
+
+HTTP_DURATION = histogram(
+    "http_request_duration_seconds",
+    "Latencia de los requests HTTP por ruta (plantilla) y status.",
+    ["method", "route", "status"],
+)
+DB_QUERIES = counter(
+    "db_queries_total",
+    "Consultas SQL ejecutadas.",
+    ["context"],
+)
+DB_DURATION = histogram(
+    "db_query_duration_seconds",
+    "Duración de las consultas SQL.",
+    ["context"],
+    buckets=DB_BUCKETS,
+)
+
+JOB_DURATION = histogram(
+    "scheduler_job_duration_seconds",
+    "Duración de cada ejecución de los jobs del scheduler.",
+    ["job"],
+    buckets=SLOW_BUCKETS,
+)
+JOB_RUNS = counter(
+    "scheduler_job_runs_total",
+    "Ejecuciones de los jobs del scheduler por resultado.",
+    ["job", "result"],
+)
+JOB_LAST_SUCCESS = gauge(
+    "scheduler_job_last_success_timestamp_seconds",
+    "Unix timestamp de la última ejecución exitosa de cada job.",
+    ["job"],
+)
+
+GEMINI_DURATION = histogram(
+    "gemini_request_duration_seconds",
+    "Latencia de las llamadas a Gemini por key y resultado.",
+    ["key", "result"],
+    buckets=SLOW_BUCKETS,
+)
+GEMINI_TOKENS = counter(
+    "gemini_tokens_total",
+    "Tokens consumidos en Gemini (según usage_metadata).",
+    ["key", "kind"],
+)
+GEMINI_FALLBACKS = counter(
+    "gemini_fallback_local_total",
+    "Veces que se usó el procesamiento local en vez de Gemini.",
+    ["caller", "reason"],
+)
+
+OUTBOUND_DURATION = histogram(
+    "http_client_request_duration_seconds",
+    "Latencia de las llamadas HTTP salientes por host y resultado (2xx, 5xx, error, circuit_open).",
+    ["host", "outcome"],
+)
+OUTBOUND_RETRIES = counter(
+    "http_client_retries_total",
+    "Reintentos de llamadas HTTP salientes por host.",
+    ["host"],
+)
+
+
+# ═══════════════════════════════════════════════════════════════
+# JOBS DEL SCHEDULER
+# ═══════════════════════════════════════════════════════════════
+
+# Los jobs atrapan sus propias excepciones (solo loguean), así que el evento
+# EVENT_JOB_ERROR de APScheduler nunca se dispara: el job marca el fallo
+# explícitamente con job_failed() y track_job lo toma al terminar.
+_job_state = threading.local()
+
+
+def job_failed() -> None:
+    """Marca como fallida la ejecución en curso del job (llamar desde su except)."""
+    _job_state.failed = True
+
+
+def last_job_failed() -> bool:
+    """Resultado de la última ejecución de un job con track_job en este hilo."""
+    return getattr(_job_state, "last_failed", False)
+
+
+def track_job(job_id: str):
+    """Decorador: duración, resultado y último éxito del job `job_id`."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            previo = getattr(_job_state, "failed", False)
+            _job_state.failed = False
+            t0 = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                _job_state.failed = True
+                raise
+            finally:
+                JOB_DURATION.labels(job_id).observe(time.perf_counter() - t0)
+                if _job_state.failed:
+                    JOB_RUNS.labels(job_id, "failure").inc()
+                else:
+                    JOB_RUNS.labels(job_id, "success").inc()
+                    JOB_LAST_SUCCESS.labels(job_id).set(time.time())
+                _job_state.last_failed = _job_state.failed
+                _job_state.failed      = previo
+            return result
+        return wrapper
+    return deco
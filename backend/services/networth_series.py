@@ -0,0 +1,489 @@
+"""
+FinanzasOS — services/networth_series.py
+Serie diaria de patrimonio neto con saldos arrastrados, consultas por rango
+y reducción de puntos para gráficos.
+
+/v3/patrimonio/historial agrupaba los AssetBalanceSnapshot por día y sumaba
+solo los días con snapshot: una cuenta actualizada en marzo "desaparecía"
+del total de abril si en abril solo se actualizó otra. Aquí cada componente
+(una cuenta de Asset, o el portafolio de PortfolioSnapshot) conserva su
+último saldo hasta el siguiente snapshot, y el patrimonio de cada día es la
+suma de esos saldos:
+
+    - La serie vive en memoria como tres columnas densas (un valor por día,
+      de la primera fecha con datos hasta hoy): saldos nativos en PEN,
+      saldos nativos en USD y portafolio en USD. Los USD se pasan a soles
+      al consultar, con el tipo de cambio de cada día (services/fx_history.py).
+    - Las tarjetas de crédito (CREDITO) restan su saldo, como en /consolidado.
+    - Solo cuentan las cuentas activas (Asset.is_active), como en
+      /consolidado: una cuenta quitada en ⚙️ Configuración sale de toda la
+      serie (no se sabe desde cuándo dejó de existir) en vez de arrastrar su
+      último saldo hasta hoy. Activarla o desactivarla reconstruye la serie.
+    - Un snapshot nuevo solo toca el tramo entre su fecha y el siguiente
+      snapshot del mismo componente: se suma la diferencia contra el saldo
+      que se arrastraba. Si hay varios el mismo día, manda el último.
+    - Las escrituras suben las versiones "balances" y "portfolio_snapshots"
+      (services/data_version.py). Al ver una versión nueva se aplican solo
+      las filas nuevas; si además cambió el conteo o la suma de la tabla
+      (borrado o edición) o los datos de las cuentas, se reconstruye todo.
+
+Consultas:
+    as_of(d)       patrimonio a una fecha: último snapshot ≤ d de cada cuenta
+                   y del portafolio, al tipo de cambio de ese día
+    series(...)    serie por rango, con:
+        desde / hasta   rango de fechas (default: toda la serie)
+        resolution      day | week | month — en week/month cada punto es el
+                        último día del período dentro del rango (saldo de cierre)
+        max_points      si hay más puntos, se reduce con LTTB (Largest Triangle
+                        Three Buckets): conserva la forma del gráfico, incluidos
+                        picos y valles, con muchos menos puntos
+"""
+
+import logging
+import threading
+from bisect import bisect_right, insort
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import Integer, cast, func
+from sqlalchemy.orm import Session
+
+import models
+from services import data_version, fx_history
+from utils.timezone_utils import today_lima
+
+logger = logging.getLogger("networth_series")
+
+SCOPES      = ("balances", "portfolio_snapshots")
+RESOLUTIONS = ("day", "week", "month")
+
+PORTFOLIO = ("portfolio",)             # clave del componente portafolio
+
+
+class _Componente:
+    """Saldos de una cuenta (o del portafolio): último valor de cada día."""
+
+    __slots__ = ("col", "credito", "dias", "valores")
+
+    def __init__(self, col: str, credito: bool = False):
+        self.col     = col             # "pen" | "usd" | "port"
+        self.credito = credito
+        self.dias: list[int] = []      # ordinales con snapshot, ordenados
+        self.valores: dict[int, tuple] = {}   # ordinal → (orden, saldo)
+
+    def aporte(self, saldo: float) -> float:
+        return -abs(saldo) if self.credito else saldo
+
+    def vigente(self, o: int) -> float:
+        """Saldo arrastrado al día `o` (0 antes del primer snapshot)."""
+        i = bisect_right(self.dias, o) - 1
+        return self.valores[self.dias[i]][1] if i >= 0 else 0.0
+
+    def ultimo_hasta(self, o: int) -> Optional[tuple]:
+        """(orden, saldo) del último snapshot con fecha ≤ `o`, o None."""
+        i = bisect_right(self.dias, o) - 1
+        return self.valores[self.dias[i]] if i >= 0 else None
+
+
+_lock = threading.Lock()
+_state: dict = {}
+
+
+def _reset_state() -> None:
+    _state.clear()
+    _state.update({
+        "start":    None,          # ordinal del primer día de las columnas
+        "cols":     {"pen": [], "usd": [], "port": []},
+        "comps":    {},            # clave → _Componente
+        "assets":   {},            # asset_id → (currency, asset_type)
+        "max_id":   {"balances": 0, "portfolio": 0},
+        "check":    {"balances": (0, 0), "portfolio": (0, 0)},       # (conteo, céntimos) aplicados
+        "versions": None,
+    })
+
+
+_reset_state()
+
+
+# ═══════════════════════════════════════════════════════════════
+# COLUMNAS DENSAS
+# ═══════════════════════════════════════════════════════════════
+
+def _cubrir(o_min: int, o_max: int) -> None:
+    """Extiende las columnas para que cubran [o_min, o_max] (bajo _lock)."""
+    cols = _state["cols"]
+    if _state["start"] is None:
+        _state["start"] = o_min
+        for c in cols.values():
+            c.extend([0.0] * (o_max - o_min + 1))
+        return
+    start = _state["start"]
+    if o_min < start:
+        for c in cols.values():
+            c[:0] = [0.0] * (start - o_min)
+        _state["start"] = start = o_min
+    faltan = o_max - (start + len(cols["pen"]) - 1)
+    if faltan > 0:
+        for c in cols.values():
+            c.extend([c[-1] if c else 0.0] * faltan)   # arrastre del último día
+
+
+def _aplicar(comp: _Componente, o: int, orden: tuple, saldo: float) -> None:
+    """Incorpora un snapshot: suma la diferencia desde `o` hasta el siguiente del componente."""
+    actual = comp.valores.get(o)
+    if actual is not None and actual[0] > orden:
+        return                                   # ya hay uno posterior ese mismo día
+    anterior = comp.vigente(o)
+    if actual is None:
+        insort(comp.dias, o)
+    comp.valores[o] = (orden, saldo)
+
+    _cubrir(o, today_lima().toordinal())
+    delta = comp.aporte(saldo) - comp.aporte(anterior)
+    if not delta:
+        return
+    i     = comp.dias.index(o)
+    fin   = comp.dias[i + 1] if i + 1 < len(comp.dias) else _state["start"] + len(_state["cols"]["pen"])
+    col   = _state["cols"][comp.col]
+    start = _state["start"]
+    for k in range(o - start, fin - start):
+        col[k] += delta
+
+
+def _componente_asset(asset_id: int) -> _Componente:
+    comps = _state["comps"]
+    comp  = comps.get(asset_id)
+    if comp is None:
+        currency, asset_type = _state["assets"].get(asset_id, ("PEN", None))
+        comp = comps[asset_id] = _Componente(
+            "usd" if currency == "USD" else "pen", credito=(asset_type == "CREDITO"),
+        )
+    return comp
+
+
+def _componente_portafolio() -> _Componente:
+    comp = _state["comps"].get(PORTFOLIO)
+    if comp is None:
+        comp = _state["comps"][PORTFOLIO] = _Componente("port")
+    return comp
+
+
+# ═══════════════════════════════════════════════════════════════
+# SINCRONIZACIÓN CON LA BD
+# ═══════════════════════════════════════════════════════════════
+
+def _assets_meta(db: Session) -> dict:
+    """{id: (moneda, tipo)} de las cuentas activas."""
+    return {a.id: (a.currency, a.asset_type) for a in db.query(
+        models.Asset.id, models.Asset.currency, models.Asset.asset_type,
+    ).filter(models.Asset.is_active == True)}  # noqa: E712
+
+
+def _checks(db: Session) -> dict:
+    """(conteo, suma en céntimos) de cada tabla: en enteros la comparación es exacta."""
+    b = db.query(
+        func.count(models.AssetBalanceSnapshot.id),
+        func.coalesce(func.sum(cast(models.AssetBalanceSnapshot.balance * 100, Integer)), 0),
+    ).one()
+    p = db.query(
+        func.count(models.PortfolioSnapshot.id),
+        func.coalesce(func.sum(cast(models.PortfolioSnapshot.total_usd * 100, Integer)), 0),
+    ).one()
+    return {"balances": (b[0], int(b[1])), "portfolio": (p[0], int(p[1]))}
+
+
+def _centimos(v) -> int:
+    return int((v or 0.0) * 100)          # trunca, igual que CAST(... AS INTEGER)
+
+
+def _filas_balances(db: Session, desde_id: int):
+    return (
+        db.query(
+            models.AssetBalanceSnapshot.id,
+            models.AssetBalanceSnapshot.asset_id,
+            models.AssetBalanceSnapshot.snapshot_date,
+            models.AssetBalanceSnapshot.balance,
+        )
+        .filter(models.AssetBalanceSnapshot.id > desde_id)
+        .order_by(models.AssetBalanceSnapshot.id)
+        .all()
+    )
+
+
+def _filas_portafolio(db: Session, desde_id: int):
+    return (
+        db.query(models.PortfolioSnapshot.id, models.PortfolioSnapshot.date, models.PortfolioSnapshot.total_usd)
+        .filter(models.PortfolioSnapshot.id > desde_id)
+        .order_by(models.PortfolioSnapshot.id)
+        .all()
+    )
+
+
+def _incorporar(balances, portafolio) -> None:
+    """Aplica filas nuevas (bajo _lock) y actualiza máximos y sumas de control."""
+    for r in balances:
+        if r.snapshot_date is not None and r.asset_id in _state["assets"]:
+            _aplicar(_componente_asset(r.asset_id), r.snapshot_date.toordinal(),
+                     (r.snapshot_date, r.id), r.balance or 0.0)
+        _state["max_id"]["balances"] = max(_state["max_id"]["balances"], r.id)
+        n, s = _state["check"]["balances"]
+        _state["check"]["balances"] = (n + 1, s + _centimos(r.balance))
+    for r in portafolio:
+        try:
+            o = date.fromisoformat(r.date[:10]).toordinal()
+        except (TypeError, ValueError):
+            o = None
+        if o is not None:
+            _aplicar(_componente_portafolio(), o, (r.date, r.id), r.total_usd or 0.0)
+        _state["max_id"]["portfolio"] = max(_state["max_id"]["portfolio"], r.id)
+        n, s = _state["check"]["portfolio"]
+        _state["check"]["portfolio"] = (n + 1, s + _centimos(r.total_usd))
+
+
+def _rebuild(db: Session, versions: dict) -> None:
+    """Reconstrucción completa: último saldo de cada día por componente y luego un barrido por tramos."""
+    assets     = _assets_meta(db)
+    balances   = _filas_balances(db, 0)
+    portafolio = _filas_portafolio(db, 0)
+    with _lock:
+        _reset_state()
+        _state["assets"] = assets
+        # Armar primero los saldos diarios: el barrido evita O(snapshots × días)
+        for r in balances:
+            if r.snapshot_date is None or r.asset_id not in assets:
+                continue
+            comp, o = _componente_asset(r.asset_id), r.snapshot_date.toordinal()
+            act = comp.valores.get(o)
+            if act is None or act[0] < (r.snapshot_date, r.id):
+                comp.valores[o] = ((r.snapshot_date, r.id), r.balance or 0.0)
+        for r in portafolio:
+            try:
+                o = date.fromisoformat(r.date[:10]).toordinal()
+            except (TypeError, ValueError):
+                continue
+            comp = _componente_portafolio()
+            act  = comp.valores.get(o)
+            if act is None or act[0] < (r.date, r.id):
+                comp.valores[o] = ((r.date, r.id), r.total_usd or 0.0)
+
+        comps = _state["comps"]
+        todos = [o for c in comps.values() for o in c.valores]
+        if todos:
+            _cubrir(min(todos), today_lima().toordinal())
+            start, n = _state["start"], len(_state["cols"]["pen"])
+            for comp in comps.values():
+                comp.dias = sorted(comp.valores)
+                col = _state["cols"][comp.col]
+                for j, o in enumerate(comp.dias):
+                    fin    = comp.dias[j + 1] if j + 1 < len(comp.dias) else start + n
+                    aporte = comp.aporte(comp.valores[o][1])
+                    for k in range(o - start, fin - start):
+                        col[k] += aporte
+
+        _state["max_id"]["balances"]  = max((r.id for r in balances), default=0)
+        _state["max_id"]["portfolio"] = max((r.id for r in portafolio), default=0)
+        _state["check"] = {
+            "balances":  (len(balances), sum(_centimos(r.balance) for r in balances)),
+            "portfolio": (len(portafolio), sum(_centimos(r.total_usd) for r in portafolio)),
+        }
+        _state["versions"] = versions
+    logger.info(f"[Patrimonio] Serie reconstruida: {len(balances)} saldos, {len(portafolio)} snapshots de portafolio")
+
+
+def sync(db: Session) -> None:
+    """Pone la serie al día con la BD (incremental si solo hubo inserciones)."""
+    versions = data_version.get_versions(db, SCOPES)
+    with _lock:
+        if versions == _state["versions"]:
+            if _state["start"] is not None:
+                _cubrir(_state["start"], today_lima().toordinal())   # arrastre hasta hoy
+            return
+        primera = _state["versions"] is None
+        max_id  = dict(_state["max_id"])
+        assets  = dict(_state["assets"])
+    if primera or _assets_meta(db) != assets:
+        _rebuild(db, versions)
+        return
+
+    balances   = _filas_balances(db, max_id["balances"])
+    portafolio = _filas_portafolio(db, max_id["portfolio"])
+    checks     = _checks(db)
+    with _lock:
+        _incorporar(balances, portafolio)
+        ok = _state["check"] == checks
+        if ok:
+            _state["versions"] = versions
+    if not ok:
+        # Hubo borrados o ediciones: no se pueden aplicar como diferencias
+        _rebuild(db, versions)
+
+
+# ═══════════════════════════════════════════════════════════════
+# CONSULTAS
+# ═══════════════════════════════════════════════════════════════
+
+def _fin_de_periodo(d: date, resolution: str) -> date:
+    if resolution == "week":
+        return d + timedelta(days=6 - d.weekday())
+    if resolution == "month":
+        siguiente = date(d.year + d.month // 12, d.month % 12 + 1, 1)
+        return siguiente - timedelta(days=1)
+    return d
+
+
+def lttb(puntos: list[dict], max_points: int, key: str = "patrimonio_pen") -> list[dict]:
+    """
+    Largest Triangle Three Buckets: elige `max_points` puntos que conservan
+    la forma de la serie. Siempre incluye el primero y el último.
+    """
+    n = len(puntos)
+    if max_points >= n:
+        return puntos
+    if max_points < 3:
+        return [puntos[0], puntos[-1]]
+
+    elegidos = [puntos[0]]
+    ancho    = (n - 2) / (max_points - 2)
+    a        = 0                                    # índice del último punto elegido
+    for i in range(max_points - 2):
+        ini = int(i * ancho) + 1
+        fin = int((i + 1) * ancho) + 1
+        # Promedio del bucket siguiente (el último bucket usa el punto final)
+        sig_ini = fin
+        sig_fin = min(int((i + 2) * ancho) + 1, n)
+        if sig_ini >= sig_fin:
+            sig_ini, sig_fin = n - 1, n
+        x_prom = (sig_ini + sig_fin - 1) / 2
+        y_prom = sum(puntos[j][key] for j in range(sig_ini, sig_fin)) / (sig_fin - sig_ini)
+
+        ya, mejor, area_max = puntos[a][key], ini, -1.0
+        for j in range(ini, min(fin, n - 1)):
+            area = abs((a - x_prom) * (puntos[j][key] - ya) - (a - j) * (y_prom - ya))
+            if area > area_max:
+                area_max, mejor = area, j
+        elegidos.append(puntos[mejor])
+        a = mejor
+    elegidos.append(puntos[-1])
+    return elegidos
+
+
+def series(
+    db: Session,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    resolution: str = "day",
+    max_points: Optional[int] = None,
+) -> list[dict]:
+    """
+    Patrimonio neto por día (o cierre de semana / mes) en [desde, hasta]:
+    [{fecha, cuentas_pen, portafolio_pen, patrimonio_pen}].
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"resolution debe ser una de: {', '.join(RESOLUTIONS)}")
+    sync(db)
+    with _lock:
+        start = _state["start"]
+        if start is None:
+            return []
+        fin_serie = start + len(_state["cols"]["pen"]) - 1
+        o_ini = max(start, desde.toordinal() if desde else start)
+        o_fin = min(fin_serie, hasta.toordinal() if hasta else fin_serie)
+        if o_ini > o_fin:
+            return []
+        cols = {k: v[o_ini - start:o_fin - start + 1] for k, v in _state["cols"].items()}
+
+    dias = [date.fromordinal(o) for o in range(o_ini, o_fin + 1)]
+    if resolution != "day":
+        # Último día de cada período dentro del rango
+        idx = [i for i, d in enumerate(dias)
+               if i == len(dias) - 1 or _fin_de_periodo(d, resolution) == d]
+    else:
+        idx = range(len(dias))
+
+    tasas  = fx_history.rates_on(db, [dias[i] for i in idx])
+    puntos = []
+    for i, tc in zip(idx, tasas):
+        cuentas    = cols["pen"][i] + cols["usd"][i] * tc
+        portafolio = cols["port"][i] * tc
+        puntos.append({
+            "fecha":          dias[i].isoformat(),
+            "cuentas_pen":    round(cuentas, 2),
+            "portafolio_pen": round(portafolio, 2),
+            "patrimonio_pen": round(cuentas + portafolio, 2),
+        })
+    if max_points:
+        puntos = lttb(puntos, max_points)
+    return puntos
+
+
+def as_of(db: Session, d: date) -> dict:
+    """
+    Patrimonio al día `d`: último snapshot ≤ `d` de cada cuenta y del
+    portafolio (bisect sobre los arreglos ordenados de cada componente) y
+    el tipo de cambio vigente ese día. Sin consultas por activo.
+    """
+    sync(db)
+    o = d.toordinal()
+    with _lock:
+        cuentas = {
+            k: (c.col, c.credito, c.ultimo_hasta(o))
+            for k, c in _state["comps"].items() if k != PORTFOLIO
+        }
+        port = _state["comps"].get(PORTFOLIO)
+        port = port.ultimo_hasta(o) if port else None
+        meta = dict(_state["assets"])
+    tc = fx_history.rate_on(db, d)
+
+    detalle, activos, pasivos = [], 0.0, 0.0
+    for asset_id, (col, credito, ultimo) in sorted(cuentas.items()):
+        if ultimo is None:
+            continue
+        (fecha, _), saldo = ultimo
+        saldo_pen = saldo * tc if col == "usd" else saldo
+        if credito:
+            pasivos += abs(saldo_pen)
+        else:
+            activos += saldo_pen
+        currency, asset_type = meta.get(asset_id, ("PEN", None))
+        detalle.append({
+            "asset_id":      asset_id,
+            "asset_type":    asset_type,
+            "currency":      currency,
+            "balance":       saldo,
+            "balance_pen":   round(saldo_pen, 2),
+            "snapshot_date": fecha,
+        })
+
+    portafolio, port_pen = None, 0.0
+    if port:
+        (fecha, _), total_usd = port
+        port_pen   = total_usd * tc
+        portafolio = {"date": fecha, "total_usd": total_usd, "total_pen": round(port_pen, 2)}
+
+    return {
+        "fecha":               d.isoformat(),
+        "exchange_rate":       tc,
+        "total_activos_pen":   round(activos, 2),
+        "total_pasivos_pen":   round(pasivos, 2),
+        "portafolio_pen":      round(port_pen, 2),
+        "patrimonio_neto_pen": round(activos - pasivos + port_pen, 2),
+        "assets":              detalle,
+        "portfolio":           portafolio,
+    }
+
+
+def status() -> dict:
+    with _lock:
+        start = _state["start"]
+        return {
+            "from":       date.fromordinal(start).isoformat() if start else None,
+            "days":       len(_state["cols"]["pen"]),
+            "components": len(_state["comps"]),
+            "snapshots":  _state["check"]["balances"][0] + _state["check"]["portfolio"][0],
+        }
+
+
+def reset() -> None:
+    """Olvida la serie en memoria (benchmarks / pruebas)."""
+    with _lock:
+        _reset_state()
@@ -0,0 +1,170 @@
+"""
+FinanzasOS — services/pdf_cache.py
+Cache en disco de PDFs renderizados (F-08), con desalojo LRU por tamaño.
+
+La clave se deriva del tipo de reporte, el período y las versiones de datos
+(services/data_version.py) de las que depende el PDF. Si los datos no cambian,
+la clave no cambia y la descarga se sirve desde disco sin recalcular ni
+re-renderizar. La misma clave se usa como ETag.
+
+Los PDFs que se sirven desde disco se entregan como enlaces temporales
+(pin() / put_file()): el desalojo LRU de otro request no puede borrarlos
+mientras se leen.
+
+Configuración (variables de entorno):
+    PDF_CACHE_DIR     directorio del cache     (default ./data/cache/pdf)
+    PDF_CACHE_MAX_MB  tamaño máximo en MB      (default 200; 0 = deshabilitado)
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger("pdf_cache")
+
+PDF_CACHE_DIR    = Path(os.getenv("PDF_CACHE_DIR", "./data/cache/pdf"))
+PDF_CACHE_MAX_MB = float(os.getenv("PDF_CACHE_MAX_MB", "200"))
+
+_lock  = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def enabled() -> bool:
+    """False si PDF_CACHE_MAX_MB = 0 (cache deshabilitado)."""
+    return PDF_CACHE_MAX_MB > 0
+
+
+def _path(key: str) -> Path:
+    return PDF_CACHE_DIR / f"{key}.pdf"
+
+
+def _count(stat: str) -> None:
+    with _lock:
+        _stats[stat] += 1
+
+
+def get(key: str) -> Optional[bytes]:
+    """Devuelve el PDF cacheado o None. Un acierto renueva su posición LRU (mtime)."""
+    if not enabled():
+        return None
+    path = _path(key)
+    try:
+        data = path.read_bytes()
+        os.utime(path)
+    except OSError:
+        _count("misses")
+        return None
+    _count("hits")
+    return data
+
+
+def _link(path: Path) -> Path:
+    """
+    Enlace duro temporal a `path` (copia si el sistema de archivos no los
+    admite). Un desalojo posterior borra solo el nombre del cache: el enlace
+    sigue apuntando a los mismos datos hasta que el llamador lo borra.
+    """
+    fd, tmp = tempfile.mkstemp(dir=PDF_CACHE_DIR, suffix=".tmp")
+    os.close(fd)
+    os.unlink(tmp)
+    try:
+        os.link(path, tmp)
+    except OSError:
+        shutil.copyfile(path, tmp)     # si `path` no existe, también falla
+    return Path(tmp)
+
+
+def pin(key: str) -> Optional[Path]:
+    """
+    Como get() pero sin leer el PDF a memoria (para FileResponse / zipfile):
+    devuelve un enlace temporal al PDF cacheado que un put() concurrente no
+    puede desalojar. El llamador lo borra al terminar de leerlo.
+    """
+    if not enabled():
+        return None
+    path = _path(key)
+    try:
+        pinned = _link(path)
+        os.utime(path)
+    except OSError:
+        _count("misses")
+        return None
+    _count("hits")
+    return pinned
+
+
+def temp_path() -> Path:
+    """
+    Archivo temporal donde renderizar un PDF grande directamente a disco.
+    Vive en PDF_CACHE_DIR para que put_file() sea un rename atómico.
+    """
+    PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=PDF_CACHE_DIR, suffix=".tmp")
+    os.close(fd)
+    return Path(tmp)
+
+
+def put(key: str, data: bytes) -> None:
+    """Guarda el PDF de forma atómica y desaloja los más antiguos si se excede el límite."""
+    if not enabled():
+        return
+    try:
+        PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=PDF_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, _path(key))
+    except OSError as e:
+        logger.warning(f"[PDFCache] No se pudo guardar {key}: {e}")
+        return
+    _evict()
+
+
+def put_file(key: str, tmp: Path) -> Path:
+    """
+    Incorpora al cache un PDF ya escrito en temp_path(). Retorna un enlace
+    temporal al PDF (como pin()) que el llamador borra después de servirlo.
+    """
+    pinned = _link(tmp)
+    path   = _path(key)
+    os.replace(tmp, path)
+    _evict(keep=path)
+    return pinned
+
+
+def _evict(keep: Optional[Path] = None) -> None:
+    """Elimina PDFs por orden de último acceso hasta quedar bajo PDF_CACHE_MAX_MB."""
+    limit = PDF_CACHE_MAX_MB * 1024 * 1024
+    with _lock:
+        entries = []
+        for p in PDF_CACHE_DIR.glob("*.pdf"):
+            if p == keep:
+                continue
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+
+        total = sum(size for _, size, _ in entries)
+        if keep is not None and keep.exists():
+            total += keep.stat().st_size
+        for _, size, p in sorted(entries):
+            if total <= limit:
+                break
+            try:
+                p.unlink()
+                total -= size
+                _stats["evictions"] += 1
+            except OSError:
+                pass
+
+
+def stats() -> dict:
+    """Contadores de aciertos / fallos / desalojos desde el arranque."""
+    with _lock:
+        return dict(_stats)
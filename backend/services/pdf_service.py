@@ -12,12 +12,18 @@ Incluye 4 gráficos nativos ReportLab intercalados en cada sección:
 Uso:
     from services.pdf_service import generar_pdf_resumen
     pdf_bytes = generar_pdf_resumen(period, contenido, datos_graficos)
+
+El estado de cuenta tiene además un modo streaming para rangos largos
+(generar_pdf_estado_cuenta_stream), que pagina desde un cursor y escribe a archivo.
 """
 
 import io
 import logging
 import math
 from datetime import datetime
+from functools import lru_cache
+from itertools import chain, islice
+from typing import Iterable, Iterator
 
 from reportlab.graphics.charts.barcharts import VerticalBarChart
 from reportlab.graphics.charts.piecharts import Pie
@@ -29,7 +35,10 @@ from reportlab.graphics.shapes import (
     String,
     Circle,
     Group,
+    Polygon,
+    PolyLine,
 )
+from reportlab import rl_config
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from reportlab.lib.pagesizes import A4
@@ -39,6 +48,7 @@ from reportlab.platypus import (
     BaseDocTemplate,
     Frame,
     HRFlowable,
+    LongTable,
     PageTemplate,
     Paragraph,
     Spacer,
@@ -48,6 +58,15 @@ from reportlab.platypus import (
 
 logger = logging.getLogger("pdf_service")
 
+# Versión del render: forma parte de la clave de cache/ETag de los PDFs
+# (routers/reportes.py). Subirla cada vez que cambie la salida de este módulo
+# para que no se sirvan PDFs cacheados con el formato anterior.
+PDF_RENDER_VERSION = 2
+
+# Streams de página en binario (zlib) sin la capa ASCII85: PDFs más chicos y
+# ~10% menos de tiempo de render. Los PDFs se sirven siempre como binario.
+rl_config.useA85 = 0
+
 # Tipos de transacción con sus etiquetas
 TYPE_LABELS = {
     "ingreso":        "💰 Ingresos",
@@ -68,6 +87,10 @@ C_MUTED     = colors.HexColor("#6b7280")
 C_LINE      = colors.HexColor("#e5e5ea")
 C_CARD_BG   = colors.HexColor("#f8f8fc")
 C_HEADER_BG = colors.HexColor("#1e1b4b")
+C_GRID      = colors.HexColor("#d1d5db")   # grilla / ejes de gráficos
+C_META      = colors.HexColor("#9ca3af")   # línea y zona meta
+C_BAR_BG    = colors.HexColor("#e9ecef")
+C_AXIS_GRID = colors.HexColor("#e5e7eb")
 
 # Paleta para torta (categorías)
 PALETTE = [
@@ -129,6 +152,7 @@ def _period_short(period: str) -> str:
 # ═══════════════════════════════════════════════════════════════
 
 def _build_styles() -> dict:
+    """Hoja de estilos base. Se construye una vez al importar (STYLES)."""
     return {
         "section": ParagraphStyle("section", fontName="Helvetica-Bold", fontSize=10,
                                   textColor=C_MUTED, leading=13, letterSpacing=1),
@@ -153,10 +177,58 @@ def _build_styles() -> dict:
     }
 
 
+STYLES = _build_styles()
+
+
+@lru_cache(maxsize=None)
+def _ps(font: str, size: float, color: colors.Color,
+        align: int = TA_LEFT, leading: float = 12) -> ParagraphStyle:
+    """
+    ParagraphStyle ad-hoc cacheado por sus parámetros. Reemplaza los
+    ParagraphStyle(...) creados en cada fila/celda; los estilos son de sólo
+    lectura durante el render, así que se comparten entre documentos.
+    """
+    return ParagraphStyle(f"ps_{font}_{size}_{align}", fontName=font, fontSize=size,
+                          textColor=color, alignment=align, leading=leading)
+
+
 # ═══════════════════════════════════════════════════════════════
 # GRÁFICO 1 — Barras horizontales KPIs con semáforo
 # ═══════════════════════════════════════════════════════════════
 
+_KPI_BAR_H    = 16
+_KPI_GAP      = 14
+_KPI_LABEL_W  = 95
+_KPI_VAL_W    = 52
+_KPI_BAR_AREA = W_DRAW - _KPI_LABEL_W - _KPI_VAL_W - 10
+
+
+def _kpi_y0(i: int, height: float) -> float:
+    """Coordenada y de la barra i (desde arriba hacia abajo)."""
+    return height - _KPI_GAP - 12 - i * (_KPI_BAR_H + _KPI_GAP)
+
+
+@lru_cache(maxsize=8)
+def _kpi_template(n: int) -> tuple[float, Group]:
+    """Parte estática del gráfico para n KPIs: línea de meta y fondos de barra."""
+    height = n * (_KPI_BAR_H + _KPI_GAP) + _KPI_GAP + 20
+    g      = Group()
+
+    # Línea de meta (70%) — trazada una sola vez sobre todas las barras
+    meta_x = _KPI_LABEL_W + _KPI_BAR_AREA * 0.70
+    g.add(Line(meta_x, _KPI_GAP - 4, meta_x, height - 10,
+               strokeColor=C_META, strokeWidth=0.8, strokeDashArray=[3, 3]))
+    g.add(String(meta_x + 2, height - 8, "meta",
+                 fontName="Helvetica", fontSize=6.5,
+                 fillColor=C_META, textAnchor="start"))
+
+    # Fondos de barra
+    for i in range(n):
+        g.add(Rect(_KPI_LABEL_W, _kpi_y0(i, height), _KPI_BAR_AREA, _KPI_BAR_H,
+                   fillColor=C_BAR_BG, strokeColor=None))
+    return height, g
+
+
 def _chart_kpi_bars(kpis: list) -> Drawing:
     """
     Barras horizontales para cada KPI (score 0-100) con:
@@ -165,56 +237,36 @@ def _chart_kpi_bars(kpis: list) -> Drawing:
     - Línea de meta a 70 puntos
     - Etiqueta de valor real y score
     """
-    bar_h     = 16
-    gap       = 14
-    label_w   = 95
-    val_w     = 52
-    bar_area  = W_DRAW - label_w - val_w - 10
-    n         = len(kpis)
-    height    = n * (bar_h + gap) + gap + 20
-    d         = Drawing(W_DRAW, height)
-
-    # Línea de meta (70%) — trazada una sola vez sobre todas las barras
-    meta_x = label_w + bar_area * 0.70
-    d.add(Line(meta_x, gap - 4, meta_x, height - 10,
-               strokeColor=colors.HexColor("#9ca3af"),
-               strokeWidth=0.8, strokeDashArray=[3, 3]))
-    d.add(String(meta_x + 2, height - 8, "meta",
-                 fontName="Helvetica", fontSize=6.5,
-                 fillColor=colors.HexColor("#9ca3af"), textAnchor="start"))
+    height, template = _kpi_template(len(kpis))
+    d = Drawing(W_DRAW, height)
+    d.add(template)
 
     for i, kpi in enumerate(kpis):
-        # Coordenada y desde arriba hacia abajo
-        y0 = height - gap - 12 - i * (bar_h + gap)
-
+        y0    = _kpi_y0(i, height)
         score = float(kpi.get("score", 0))
         color = _score_color(score)
 
         # Etiqueta del KPI
-        d.add(String(0, y0 + bar_h * 0.3, kpi.get("label", ""),
+        d.add(String(0, y0 + _KPI_BAR_H * 0.3, kpi.get("label", ""),
                      fontName="Helvetica", fontSize=8.5,
                      fillColor=C_TEXT, textAnchor="start"))
 
-        # Fondo de barra
-        d.add(Rect(label_w, y0, bar_area, bar_h,
-                   fillColor=colors.HexColor("#e9ecef"),
-                   strokeColor=None))
-
         # Barra de score
-        filled = bar_area * score / 100
+        filled = _KPI_BAR_AREA * score / 100
         if filled > 0:
-            d.add(Rect(label_w, y0, filled, bar_h,
+            d.add(Rect(_KPI_LABEL_W, y0, filled, _KPI_BAR_H,
                        fillColor=color, strokeColor=None,
                        rx=2, ry=2))
 
         # Valor y score a la derecha
+        val_x    = _KPI_LABEL_W + _KPI_BAR_AREA + 8
         val_str  = f"{kpi.get('value', 0)}{kpi.get('unit', '%')}"
         scr_str  = f"({score:.0f}/100)"
-        d.add(String(label_w + bar_area + 8, y0 + bar_h * 0.55,
+        d.add(String(val_x, y0 + _KPI_BAR_H * 0.55,
                      val_str,
                      fontName="Helvetica-Bold", fontSize=8,
                      fillColor=color, textAnchor="start"))
-        d.add(String(label_w + bar_area + 8, y0 + bar_h * 0.1,
+        d.add(String(val_x, y0 + _KPI_BAR_H * 0.1,
                      scr_str,
                      fontName="Helvetica", fontSize=7,
                      fillColor=C_MUTED, textAnchor="start"))
@@ -227,72 +279,83 @@ def _chart_kpi_bars(kpis: list) -> Drawing:
 # Sin depender de SpiderChart — implementado con polígonos y trig.
 # ═══════════════════════════════════════════════════════════════
 
-def _chart_radar(radar_data: list, semaforo: str) -> Drawing:
-    """
-    Radar/Spider chart manual con 6 dimensiones de salud financiera.
-    Dibuja grillas, ejes, zona meta y zona score con primitivas Drawing.
-    radar_data: list de dicts con 'label' y 'score' (0-100)
-    """
-    from reportlab.graphics.shapes import Polygon, PolyLine
-
-    draw_h  = 240
-    d       = Drawing(W_DRAW, draw_h)
+_RADAR_H      = 240
+_RADAR_CX     = W_DRAW * 0.38                            # centro X
+_RADAR_CY     = _RADAR_H / 2 - 5                         # centro Y
+_RADAR_R      = min(W_DRAW * 0.30, _RADAR_H * 0.42)      # radio máximo
+_RADAR_LEVELS = 5                                        # anillos de grilla
+_RADAR_LEG_X  = int(W_DRAW * 0.76)
+_RADAR_LEG_Y  = _RADAR_H - 22
 
-    n        = len(radar_data)
-    cx       = W_DRAW * 0.38          # centro X
-    cy       = draw_h / 2 - 5         # centro Y
-    R        = min(W_DRAW * 0.30, draw_h * 0.42)  # radio máximo
-    LEVELS   = 5                       # anillos de grilla
-    fill_col = _sem_color(semaforo)
 
+@lru_cache(maxsize=8)
+def _radar_template(n: int) -> tuple[list, Group]:
+    """
+    Geometría estática del radar de n ejes: direcciones unitarias de cada eje
+    y un Group con grilla, ejes, zona meta (70%) y la entrada fija de leyenda.
+    """
     # Ángulo inicial: arriba (90°), sentido anti-horario
-    def angle(i: int) -> float:
-        return math.pi / 2 + 2 * math.pi * i / n
-
-    def pt(i: int, r: float):
-        """Punto en el eje i a radio r."""
-        a = angle(i)
-        return cx + r * math.cos(a), cy + r * math.sin(a)
+    dirs = [
+        (math.cos(math.pi / 2 + 2 * math.pi * i / n), math.sin(math.pi / 2 + 2 * math.pi * i / n))
+        for i in range(n)
+    ]
+    cx, cy, R = _RADAR_CX, _RADAR_CY, _RADAR_R
+    g = Group()
 
     # ── Grilla (polígonos concéntricos) ──────────────────────
-    for lv in range(1, LEVELS + 1):
-        r_lv = R * lv / LEVELS
+    for lv in range(1, _RADAR_LEVELS + 1):
+        r_lv = R * lv / _RADAR_LEVELS
         pts  = []
-        for i in range(n):
-            x, y = pt(i, r_lv)
-            pts.extend([x, y])
+        for dx, dy in dirs:
+            pts.extend([cx + r_lv * dx, cy + r_lv * dy])
         pts.extend(pts[:2])   # cerrar
-        d.add(PolyLine(
-            pts,
-            strokeColor = colors.HexColor("#d1d5db"),
-            strokeWidth = 0.4,
-        ))
+        g.add(PolyLine(pts, strokeColor=C_GRID, strokeWidth=0.4))
 
     # ── Ejes radiales ─────────────────────────────────────────
-    for i in range(n):
-        x1, y1 = pt(i, R)
-        d.add(Line(cx, cy, x1, y1,
-                   strokeColor=colors.HexColor("#d1d5db"),
-                   strokeWidth=0.5))
+    for dx, dy in dirs:
+        g.add(Line(cx, cy, cx + R * dx, cy + R * dy,
+                   strokeColor=C_GRID, strokeWidth=0.5))
 
     # ── Zona meta (70%) — polígono gris ───────────────────────
     meta_pts = []
-    for i in range(n):
-        x, y = pt(i, R * 0.70)
-        meta_pts.extend([x, y])
-    d.add(Polygon(
+    for dx, dy in dirs:
+        meta_pts.extend([cx + R * 0.70 * dx, cy + R * 0.70 * dy])
+    g.add(Polygon(
         meta_pts,
         fillColor   = colors.Color(0.88, 0.90, 0.92, alpha=0.30),
-        strokeColor = colors.HexColor("#9ca3af"),
+        strokeColor = C_META,
         strokeWidth = 0.8,
     ))
 
+    # ── Leyenda: entrada fija "Meta" (la de score depende del semáforo) ──
+    ly = _RADAR_LEG_Y - 18
+    g.add(Rect(_RADAR_LEG_X, ly - 5, 12, 10,
+               fillColor=C_META, strokeColor=None, rx=2, ry=2))
+    g.add(String(_RADAR_LEG_X + 16, ly - 1, "Meta (70 pts)",
+                 fontName="Helvetica", fontSize=8,
+                 fillColor=C_TEXT, textAnchor="start"))
+    return dirs, g
+
+
+def _chart_radar(radar_data: list, semaforo: str) -> Drawing:
+    """
+    Radar/Spider chart manual con 6 dimensiones de salud financiera.
+    Grillas, ejes y zona meta salen de _radar_template; aquí sólo se agregan
+    la zona score, vértices, etiquetas y leyenda dependientes de los datos.
+    radar_data: list de dicts con 'label' y 'score' (0-100)
+    """
+    dirs, template = _radar_template(len(radar_data))
+    cx, cy, R      = _RADAR_CX, _RADAR_CY, _RADAR_R
+    fill_col       = _sem_color(semaforo)
+
+    d = Drawing(W_DRAW, _RADAR_H)
+    d.add(template)
+
     # ── Zona score real — polígono semáforo ───────────────────
     score_pts = []
-    for i, item in enumerate(radar_data):
-        r_s  = R * float(item.get("score", 0)) / 100
-        x, y = pt(i, r_s)
-        score_pts.extend([x, y])
+    for (dx, dy), item in zip(dirs, radar_data):
+        r_s = R * float(item.get("score", 0)) / 100
+        score_pts.extend([cx + r_s * dx, cy + r_s * dy])
     d.add(Polygon(
         score_pts,
         fillColor   = colors.Color(fill_col.red, fill_col.green, fill_col.blue, alpha=0.20),
@@ -301,19 +364,16 @@ def _chart_radar(radar_data: list, semaforo: str) -> Drawing:
     ))
 
     # Puntos en cada vértice del score
-    for i, item in enumerate(radar_data):
-        r_s  = R * float(item.get("score", 0)) / 100
-        x, y = pt(i, r_s)
-        d.add(Circle(x, y, 3.5,
+    for j in range(0, len(score_pts), 2):
+        d.add(Circle(score_pts[j], score_pts[j + 1], 3.5,
                      fillColor=fill_col, strokeColor=colors.white,
                      strokeWidth=0.8))
 
     # ── Etiquetas de los ejes (fuera del radar) ───────────────
     label_offset = 14
-    for i, item in enumerate(radar_data):
-        a    = angle(i)
-        lx   = cx + (R + label_offset) * math.cos(a)
-        ly   = cy + (R + label_offset) * math.sin(a)
+    for (dx, dy), item in zip(dirs, radar_data):
+        lx   = cx + (R + label_offset) * dx
+        ly   = cy + (R + label_offset) * dy
         sc   = float(item.get("score", 0))
         lbl  = item.get("label", "")
 
@@ -329,20 +389,13 @@ def _chart_radar(radar_data: list, semaforo: str) -> Drawing:
                      fontName="Helvetica", fontSize=7,
                      fillColor=_score_color(sc), textAnchor=anchor))
 
-    # ── Leyenda lateral ───────────────────────────────────────
-    leg_x = int(W_DRAW * 0.76)
-    leg_y = draw_h - 22
-    items = [
-        (fill_col, "Tu score"),
-        (colors.HexColor("#9ca3af"), "Meta (70 pts)"),
-    ]
-    for j, (col, lbl) in enumerate(items):
-        ly = leg_y - j * 18
-        d.add(Rect(leg_x, ly - 5, 12, 10,
-                   fillColor=col, strokeColor=None, rx=2, ry=2))
-        d.add(String(leg_x + 16, ly - 1, lbl,
-                     fontName="Helvetica", fontSize=8,
-                     fillColor=C_TEXT, textAnchor="start"))
+    # ── Leyenda lateral (entrada "Tu score") ──────────────────
+    leg_x, leg_y = _RADAR_LEG_X, _RADAR_LEG_Y
+    d.add(Rect(leg_x, leg_y - 5, 12, 10,
+               fillColor=fill_col, strokeColor=None, rx=2, ry=2))
+    d.add(String(leg_x + 16, leg_y - 1, "Tu score",
+                 fontName="Helvetica", fontSize=8,
+                 fillColor=C_TEXT, textAnchor="start"))
 
     # Mini tabla de scores
     for j, item in enumerate(radar_data):
@@ -363,6 +416,25 @@ def _chart_radar(radar_data: list, semaforo: str) -> Drawing:
 # GRÁFICO 3 — Torta de distribución de gastos
 # ═══════════════════════════════════════════════════════════════
 
+_PIE_H     = 210
+_PIE_SIZE  = 140
+_PIE_X     = 30
+_PIE_Y     = (_PIE_H - _PIE_SIZE) // 2
+_PIE_LEG_X = _PIE_X + _PIE_SIZE + 24
+
+
+@lru_cache(maxsize=16)
+def _pie_legend_template(n: int) -> Group:
+    """Cuadros de color de la leyenda para n categorías."""
+    g = Group()
+    for i in range(n):
+        ly = _PIE_H - 20 - i * 22
+        g.add(Rect(_PIE_LEG_X, ly - 7, 12, 12,
+                   fillColor=PALETTE[i % len(PALETTE)],
+                   strokeColor=None, rx=2, ry=2))
+    return g
+
+
 def _chart_pie(top_cats: list) -> Drawing:
     """
     Pie chart de top categorías de gasto con leyenda lateral.
@@ -371,52 +443,41 @@ def _chart_pie(top_cats: list) -> Drawing:
     if not top_cats:
         return Drawing(W_DRAW, 10)
 
-    draw_h   = 210
-    pie_size = 140
-    pie_x    = 30
-    pie_y    = (draw_h - pie_size) // 2
-    d        = Drawing(W_DRAW, draw_h)
+    d = Drawing(W_DRAW, _PIE_H)
 
     chart         = Pie()
-    chart.x       = pie_x
-    chart.y       = pie_y
-    chart.width   = pie_size
-    chart.height  = pie_size
+    chart.x       = _PIE_X
+    chart.y       = _PIE_Y
+    chart.width   = _PIE_SIZE
+    chart.height  = _PIE_SIZE
     chart.data    = [float(c.get("monto", 0)) for c in top_cats]
     chart.labels  = [""] * len(top_cats)   # etiquetas en leyenda lateral
     chart.slices.strokeWidth = 0.6
     chart.slices.strokeColor = colors.white
+    chart.slices.labelRadius = 1.15
+    chart.slices.fontSize    = 0            # sin etiqueta en el slice
 
     total = sum(chart.data) or 1
 
     for i in range(len(top_cats)):
-        chart.slices[i].fillColor  = PALETTE[i % len(PALETTE)]
-        chart.slices[i].labelRadius = 1.15
-        chart.slices[i].fontSize   = 0   # sin etiqueta en el slice
+        chart.slices[i].fillColor = PALETTE[i % len(PALETTE)]
 
     d.add(chart)
 
     # Leyenda derecha
-    leg_x  = pie_x + pie_size + 24
-    leg_y0 = draw_h - 20
-
+    d.add(_pie_legend_template(len(top_cats)))
     for i, cat in enumerate(top_cats):
-        ly  = leg_y0 - i * 22
+        ly  = _PIE_H - 20 - i * 22
         pct = cat.get("monto", 0) / total * 100
 
-        # Cuadro de color
-        d.add(Rect(leg_x, ly - 7, 12, 12,
-                   fillColor=PALETTE[i % len(PALETTE)],
-                   strokeColor=None, rx=2, ry=2))
-
         # Nombre
         nombre = str(cat.get("nombre", ""))[:22]
-        d.add(String(leg_x + 16, ly - 3, nombre,
+        d.add(String(_PIE_LEG_X + 16, ly - 3, nombre,
                      fontName="Helvetica", fontSize=8,
                      fillColor=C_TEXT, textAnchor="start"))
 
         # Monto y porcentaje
-        d.add(String(leg_x + 16, ly - 12,
+        d.add(String(_PIE_LEG_X + 16, ly - 12,
                      f"{_fmt_pen(cat.get('monto', 0))}  ({pct:.1f}%)",
                      fontName="Helvetica", fontSize=7.5,
                      fillColor=C_MUTED, textAnchor="start"))
@@ -428,6 +489,26 @@ def _chart_pie(top_cats: list) -> Drawing:
 # GRÁFICO 4 — Barras comparativas mes actual vs anterior
 # ═══════════════════════════════════════════════════════════════
 
+_COMP_H      = 210
+_COMP_CATS   = ["Ingresos", "Gts. Fijos", "Gts. Var.", "Deudas", "Ahorros"]
+_COMP_KEYS   = ["ingresos", "gastos_fijos", "gastos_variables", "deudas", "ahorros"]
+_COMP_X      = 55
+
+
+def _fmt_eje_pen(v: float) -> str:
+    return f"S/{v/1000:.0f}k" if v >= 1000 else f"S/{v:.0f}"
+
+
+@lru_cache(maxsize=1)
+def _comparativa_legend_template() -> Group:
+    """Cuadros de color de la leyenda (los textos dependen de los períodos)."""
+    g = Group()
+    for i, col in enumerate((C_BRAND, C_BRAND2)):
+        g.add(Rect(_COMP_X + i * 100, 10, 14, 10,
+                   fillColor=col, strokeColor=None, rx=2, ry=2))
+    return g
+
+
 def _chart_comparativa(act: dict, ant: dict,
                         period: str, prev_period: str) -> Drawing:
     """
@@ -435,13 +516,11 @@ def _chart_comparativa(act: dict, ant: dict,
     Ingresos · Gastos fijos · Gastos variables · Deudas · Ahorros
     entre el mes actual y el mes anterior.
     """
-    draw_h = 210
+    draw_h = _COMP_H
     d      = Drawing(W_DRAW, draw_h)
 
-    categorias  = ["Ingresos", "Gts. Fijos", "Gts. Var.", "Deudas", "Ahorros"]
-    keys        = ["ingresos", "gastos_fijos", "gastos_variables", "deudas", "ahorros"]
-    data_actual = [float(act.get(k, 0)) for k in keys]
-    data_ant    = [float(ant.get(k, 0)) for k in keys]
+    data_actual = [float(act.get(k, 0)) for k in _COMP_KEYS]
+    data_ant    = [float(ant.get(k, 0)) for k in _COMP_KEYS]
 
     # Evitar gráfico vacío
     if max(data_actual + data_ant) == 0:
@@ -452,7 +531,7 @@ def _chart_comparativa(act: dict, ant: dict,
         return d
 
     chart = VerticalBarChart()
-    chart.x       = 55
+    chart.x       = _COMP_X
     chart.y       = 38
     chart.width   = W_DRAW - 80
     chart.height  = draw_h - 70
@@ -465,7 +544,7 @@ def _chart_comparativa(act: dict, ant: dict,
     chart.bars[0].fillColor = C_BRAND
     chart.bars[1].fillColor = C_BRAND2
 
-    chart.categoryAxis.categoryNames = categorias
+    chart.categoryAxis.categoryNames = _COMP_CATS
     chart.categoryAxis.labels.fontName  = "Helvetica"
     chart.categoryAxis.labels.fontSize  = 7.5
     chart.categoryAxis.labels.fillColor = C_TEXT
@@ -475,25 +554,18 @@ def _chart_comparativa(act: dict, ant: dict,
     chart.valueAxis.labels.fontSize   = 7
     chart.valueAxis.labels.fillColor  = C_MUTED
     chart.valueAxis.forceZero         = True
-    chart.valueAxis.labelTextFormat   = lambda v: f"S/{v/1000:.0f}k" if v >= 1000 else f"S/{v:.0f}"
+    chart.valueAxis.labelTextFormat   = _fmt_eje_pen
 
-    chart.valueAxis.gridStrokeColor   = colors.HexColor("#e5e7eb")
+    chart.valueAxis.gridStrokeColor   = C_AXIS_GRID
     chart.valueAxis.gridStrokeWidth   = 0.4
     chart.valueAxis.visibleGrid       = True
 
     d.add(chart)
 
     # Leyenda
-    leg_items = [
-        (C_BRAND,  _period_short(period)),
-        (C_BRAND2, _period_short(prev_period)),
-    ]
-    leg_x = chart.x
-    for i, (col, lbl) in enumerate(leg_items):
-        lx = leg_x + i * 100
-        d.add(Rect(lx, 10, 14, 10,
-                   fillColor=col, strokeColor=None, rx=2, ry=2))
-        d.add(String(lx + 18, 14, lbl,
+    d.add(_comparativa_legend_template())
+    for i, lbl in enumerate((_period_short(period), _period_short(prev_period))):
+        d.add(String(_COMP_X + i * 100 + 18, 14, lbl,
                      fontName="Helvetica", fontSize=8,
                      fillColor=C_TEXT, textAnchor="start"))
 
@@ -579,7 +651,7 @@ def generar_pdf_resumen(period: str, contenido: dict,
         bytes del PDF generado
     """
     buf          = io.BytesIO()
-    st           = _build_styles()
+    st           = STYLES
     period_label = _period_label(period)
     semaforo     = contenido.get("semaforo", "amarillo")
     sem_color    = _sem_color(semaforo)
@@ -640,8 +712,7 @@ def generar_pdf_resumen(period: str, contenido: dict,
     sp(3)
 
     story.append(Paragraph(f"Resumen Mensual · {period_label}",
-                            ParagraphStyle("mt", fontName="Helvetica-Bold",
-                                           fontSize=18, textColor=C_TEXT, leading=22)))
+                            _ps("Helvetica-Bold", 18, C_TEXT, TA_LEFT, 22)))
     sp(2)
 
     resumen_ej = contenido.get("resumen_ejecutivo", "")
@@ -668,9 +739,7 @@ def generar_pdf_resumen(period: str, contenido: dict,
     def kpi_cell(lbl, val, meta, col):
         return [
             Paragraph(lbl, st["kpi_label"]),
-            Paragraph(val, ParagraphStyle("kv", fontName="Helvetica-Bold",
-                                          fontSize=18, textColor=col,
-                                          alignment=TA_CENTER, leading=22)),
+            Paragraph(val, _ps("Helvetica-Bold", 18, col, TA_CENTER, 22)),
             Paragraph(meta, st["kpi_meta"]),
         ]
 
@@ -760,11 +829,9 @@ def generar_pdf_resumen(period: str, contenido: dict,
             cat_rows.append([
                 Paragraph(str(cat.get("nombre", "")), st["body"]),
                 Paragraph(_fmt_pen(cat.get("monto", 0)),
-                          ParagraphStyle("cm", fontName="Helvetica-Bold", fontSize=10,
-                                         textColor=C_RED, alignment=TA_RIGHT, leading=13)),
+                          _ps("Helvetica-Bold", 10, C_RED, TA_RIGHT, 13)),
                 Paragraph(_fmt_pct(cat.get("porcentaje_ingreso", 0)),
-                          ParagraphStyle("cp", fontName="Helvetica", fontSize=9,
-                                         textColor=C_MUTED, alignment=TA_CENTER, leading=13)),
+                          _ps("Helvetica", 9, C_MUTED, TA_CENTER, 13)),
             ])
 
         cat_tbl = Table(cat_rows,
@@ -830,9 +897,7 @@ def generar_pdf_resumen(period: str, contenido: dict,
         story.append(Paragraph(f'"{frase}"', st["quote"]))
         sp(2)
         story.append(Paragraph("— FinanzasOS · Victor Hugo · 2026",
-                                ParagraphStyle("attr", fontName="Helvetica", fontSize=8,
-                                               textColor=colors.HexColor("#ccccdd"),
-                                               alignment=TA_CENTER, leading=11)))
+                                _ps("Helvetica", 8, colors.HexColor("#ccccdd"), TA_CENTER, 11)))
 
     # ── METADATA FINAL ────────────────────────────────────────
     meta   = contenido.get("_meta", {})
@@ -861,100 +926,197 @@ def generar_pdf_resumen(period: str, contenido: dict,
 # Listado detallado de movimientos con subtotales y resumen por cuenta
 # ═══════════════════════════════════════════════════════════════
 
-def generar_pdf_estado_cuenta(
-    period: str,
-    transactions: list,
-    profile: dict | None = None,
-    account_filter: str | None = None,
-) -> bytes:
-    """
-    Genera el Estado de Cuenta mensual en PDF.
+TYPE_SHORT = {
+    "ingreso":        "Ingreso",
+    "gasto_fijo":     "Fijo",
+    "gasto_variable": "Variable",
+    "deuda":          "Deuda",
+    "ahorro":         "Ahorro",
+}
 
-    Args:
-        period:         Período 'YYYY-MM'
-        transactions:   Lista de dicts con los movimientos del período
-        profile:        Dict con datos del perfil (name, income, etc.)
-        account_filter: Si se filtra por cuenta específica, su nombre
+# Filas por tabla del detalle en modo streaming: cada bloque es una LongTable
+# independiente que ReportLab puede descartar una vez dibujada.
+EC_CHUNK_ROWS = 250
+
+_EC_TX_WIDTHS = [
+    W_DRAW * 0.14,   # Fecha  (ampliado: YYYY-MM-DD cabe sin salto)
+    W_DRAW * 0.29,   # Descripción (reducida para compensar)
+    W_DRAW * 0.17,   # Cuenta
+    W_DRAW * 0.18,   # Categoría
+    W_DRAW * 0.09,   # Tipo
+    W_DRAW * 0.13,   # Monto
+]
+_EC_TX_STYLE = [
+    ("BACKGROUND",    (0, 0), (-1, 0),  C_CARD_BG),
+    ("BOX",           (0, 0), (-1, -1), 0.5, C_LINE),
+    ("INNERGRID",     (0, 0), (-1, -1), 0.3, C_LINE),
+    ("TOPPADDING",    (0, 0), (-1, -1), 5),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 5),
+    ("LEFTPADDING",   (0, 0), (-1, -1), 6),
+    ("RIGHTPADDING",  (0, 0), (-1, -1), 6),
+    ("VALIGN",        (0, 0), (-1, -1), "MIDDLE"),
+    ("ROWBACKGROUNDS",(0, 1), (-1, -1),  [colors.white, C_CARD_BG]),
+]
+_EC_INT_WIDTHS = [W_DRAW * 0.12, W_DRAW * 0.46, W_DRAW * 0.22, W_DRAW * 0.20]
+_EC_INT_STYLE = [
+    ("BACKGROUND",    (0, 0), (-1, 0),  colors.HexColor("#f0f8ff")),
+    ("BOX",           (0, 0), (-1, -1), 0.5, colors.HexColor("#bae6fd")),
+    ("INNERGRID",     (0, 0), (-1, -1), 0.3, colors.HexColor("#e0f2fe")),
+    ("TOPPADDING",    (0, 0), (-1, -1), 5),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 5),
+    ("LEFTPADDING",   (0, 0), (-1, -1), 6),
+    ("RIGHTPADDING",  (0, 0), (-1, -1), 6),
+    ("VALIGN",        (0, 0), (-1, -1), "MIDDLE"),
+    ("ROWBACKGROUNDS",(0, 1), (-1, -1), [colors.white, colors.HexColor("#f8fcff")]),
+]
 
-    Returns:
-        bytes del PDF generado
+
+def resumen_estado_cuenta(transactions: Iterable) -> dict:
     """
-    buf          = io.BytesIO()
-    st           = _build_styles()
-    period_label = _period_label(period)
+    Agregados del estado de cuenta a partir de una lista de movimientos:
+      por_tipo:    {tipo: {"count", "total"}}                   (sin internos)
+      por_cuenta:  {cuenta: {"count", "ingresos", "egresos"}}   (sin internos)
+      movimientos: cantidad de movimientos normales
+    El modo streaming arma el mismo dict con una consulta agregada.
+    """
+    por_tipo, por_cuenta, n = {}, {}, 0
+    for t in transactions:
+        if t.get("excluir_del_analisis", False):
+            continue
+        n  += 1
+        tp  = t.get("type", "gasto_variable")
+        amt = abs(float(t.get("amount", 0)))
+        acc = t.get("account", "Sin cuenta")
+        tt  = por_tipo.setdefault(tp, {"count": 0, "total": 0.0})
+        tt["count"] += 1
+        tt["total"] += amt
+        c = por_cuenta.setdefault(acc, {"count": 0, "ingresos": 0.0, "egresos": 0.0})
+        c["count"] += 1
+        c["ingresos" if tp == "ingreso" else "egresos"] += amt
+    return {"por_tipo": por_tipo, "por_cuenta": por_cuenta, "movimientos": n}
+
+
+# Estilos de celda del detalle (compartidos por todas las filas y documentos)
+_EC_ROW_STYLES = {
+    "td":    _ps("Helvetica", 9, C_MUTED, TA_LEFT, 12),
+    "tdesc": _ps("Helvetica", 9, C_TEXT, TA_LEFT, 12),
+    "tsm":   _ps("Helvetica", 8.5, C_MUTED, TA_LEFT, 12),
+    "ttype": _ps("Helvetica", 8.5, C_BRAND, TA_CENTER, 12),
+    "tpos":  _ps("Helvetica-Bold", 9.5, C_GREEN, TA_RIGHT, 12),
+    "tneg":  _ps("Helvetica-Bold", 9.5, C_RED, TA_RIGHT, 12),
+    "idesc": _ps("Helvetica", 9, colors.HexColor("#888899"), TA_LEFT, 12),
+    "iamt":  _ps("Helvetica-Bold", 9, colors.HexColor("#38bdf8"), TA_RIGHT, 12),
+}
 
-    try:
-        from utils.timezone_utils import now_lima
-        generated_at = now_lima().strftime("%d/%m/%Y %H:%M")
-    except Exception:
-        generated_at = datetime.utcnow().strftime("%d/%m/%Y %H:%M")
 
-    subtitle = f"Estado de Cuenta · {period_label}"
-    if account_filter:
-        subtitle += f" · {account_filter}"
+def _ec_tx_row(t, rs: dict) -> list:
+    monto = float(t.get("amount", 0))
+    tp    = t.get("type", "gasto_variable")
+    sign  = "+" if monto > 0 else "-"
+    desc  = str(t.get("description", ""))
+    if len(desc) > 42:
+        desc = desc[:41] + "…"
+    cat = str(t.get("category", ""))
+    if len(cat) > 18:
+        cat = cat[:17] + "…"
+    return [
+        Paragraph(str(t.get("date", "")), rs["td"]),
+        Paragraph(desc, rs["tdesc"]),
+        Paragraph(str(t.get("account", "—")), rs["tsm"]),
+        Paragraph(cat, rs["tsm"]),
+        Paragraph(TYPE_SHORT.get(tp, tp), rs["ttype"]),
+        Paragraph(f"{sign}{_fmt_pen(abs(monto))}", rs["tpos"] if monto > 0 else rs["tneg"]),
+    ]
 
-    doc = _DocWithHeaderFooter(
-        buf,
-        period_label = subtitle,
-        generated_at = generated_at,
-        pagesize     = A4,
-        leftMargin   = 1.8 * cm,
-        rightMargin  = 1.8 * cm,
-        topMargin    = 3.2 * cm,
-        bottomMargin = 1.8 * cm,
-        title        = f"FinanzasOS — Estado de Cuenta {period_label}",
-        author       = "Victor Hugo Capillo",
-    )
 
-    story = []
+def _ec_int_row(t, rs: dict) -> list:
+    monto = float(t.get("amount", 0))
+    sign  = "+" if monto > 0 else "-"
+    return [
+        Paragraph(str(t.get("date", "")), rs["td"]),
+        Paragraph(str(t.get("description", ""))[:50], rs["idesc"]),
+        Paragraph(str(t.get("account", "—")), rs["tsm"]),
+        Paragraph(f"{sign}{_fmt_pen(abs(monto))}", rs["iamt"]),
+    ]
+
+
+def _ec_tables(rows: Iterator, header: list, widths: list, style: list,
+               chunk_rows: int | None) -> Iterator[LongTable]:
+    """
+    Agrupa filas en LongTables de a `chunk_rows` (None = una sola tabla).
+    Cada bloque repite la cabecera y se construye sólo cuando se necesita.
+    """
+    while True:
+        block = list(islice(rows, chunk_rows)) if chunk_rows else list(rows)
+        if not block:
+            return
+        tbl = LongTable([header] + block, colWidths=widths, repeatRows=1)
+        tbl.setStyle(TableStyle(style))
+        yield tbl
+        if not chunk_rows:
+            return
+
+
+def _iter_story_estado_cuenta(
+    period_label: str,
+    resumen: dict,
+    movimientos: Iterable,
+    internos: Iterable,
+    profile: dict | None,
+    account_filter: str | None,
+    chunk_rows: int | None,
+) -> Iterator:
+    """
+    Genera los flowables del estado de cuenta en orden. `movimientos` (normales,
+    por fecha ascendente) e `internos` se consumen perezosamente, por lo que
+    pueden ser cursores de base de datos.
+    """
+    st = STYLES
+    rs = _EC_ROW_STYLES
 
     def sp(h_mm=4):
-        story.append(Spacer(1, h_mm * mm))
+        return Spacer(1, h_mm * mm)
 
     def hr(color=C_LINE, thickness=0.5):
-        story.append(HRFlowable(width="100%", thickness=thickness,
-                                color=color, spaceAfter=3 * mm))
+        return HRFlowable(width="100%", thickness=thickness,
+                          color=color, spaceAfter=3 * mm)
 
-    def section_title(text: str, color=C_BRAND):
-        sp(5)
-        story.append(Paragraph(text.upper(), st["section"]))
-        story.append(HRFlowable(width="100%", thickness=0.4,
-                                color=C_LINE, spaceBefore=1 * mm, spaceAfter=3 * mm))
+    def section_title(text: str):
+        yield sp(5)
+        yield Paragraph(text.upper(), st["section"])
+        yield HRFlowable(width="100%", thickness=0.4,
+                         color=C_LINE, spaceBefore=1 * mm, spaceAfter=3 * mm)
 
-    # Separar movimientos normales e internos
-    normales    = [t for t in transactions if not t.get("excluir_del_analisis", False)]
-    internos    = [t for t in transactions if t.get("excluir_del_analisis", False)]
+    n_movs = resumen["movimientos"]
 
     # ── 1. ENCABEZADO / PERFIL ────────────────────────────────
-    sp(2)
+    yield sp(2)
 
     nombre  = (profile or {}).get("name", "Victor Hugo Capillo")
     ingreso = float((profile or {}).get("income", 0) or 0)
 
-    story.append(Paragraph(
+    yield Paragraph(
         f"Estado de Cuenta · {period_label}",
-        ParagraphStyle("ec_title", fontName="Helvetica-Bold",
-                       fontSize=18, textColor=C_TEXT, leading=22),
-    ))
-    sp(2)
+        _ps("Helvetica-Bold", 18, C_TEXT, TA_LEFT, 22),
+    )
+    yield sp(2)
 
     if account_filter:
-        story.append(Paragraph(
+        yield Paragraph(
             f"Cuenta: {account_filter}",
-            ParagraphStyle("ec_acc", fontName="Helvetica-Bold",
-                           fontSize=12, textColor=C_BRAND, leading=16),
-        ))
-        sp(2)
+            _ps("Helvetica-Bold", 12, C_BRAND, TA_LEFT, 16),
+        )
+        yield sp(2)
 
     # Tabla de datos del titular
     perfil_data = [
         [Paragraph("TITULAR",  st["kpi_label"]), Paragraph("INGRESO MENSUAL", st["kpi_label"]),
          Paragraph("PERÍODO",   st["kpi_label"]), Paragraph("MOVIMIENTOS",     st["kpi_label"])],
-        [Paragraph(nombre, ParagraphStyle("pv", fontName="Helvetica-Bold", fontSize=11, textColor=C_TEXT, leading=14, alignment=TA_CENTER)),
+        [Paragraph(nombre, _ps("Helvetica-Bold", 11, C_TEXT, TA_CENTER, 14)),
          Paragraph(_fmt_pen(ingreso) if ingreso else "—",
-                   ParagraphStyle("pv", fontName="Helvetica-Bold", fontSize=11, textColor=C_BRAND2, leading=14, alignment=TA_CENTER)),
-         Paragraph(period_label, ParagraphStyle("pv", fontName="Helvetica-Bold", fontSize=11, textColor=C_TEXT, leading=14, alignment=TA_CENTER)),
-         Paragraph(str(len(normales)), ParagraphStyle("pv", fontName="Helvetica-Bold", fontSize=11, textColor=C_TEXT, leading=14, alignment=TA_CENTER))],
+                   _ps("Helvetica-Bold", 11, C_BRAND2, TA_CENTER, 14)),
+         Paragraph(period_label, _ps("Helvetica-Bold", 11, C_TEXT, TA_CENTER, 14)),
+         Paragraph(str(n_movs), _ps("Helvetica-Bold", 11, C_TEXT, TA_CENTER, 14))],
     ]
     cw = (W_DRAW - 3 * mm) / 4
     p_tbl = Table(perfil_data, colWidths=[cw] * 4)
@@ -968,21 +1130,16 @@ def generar_pdf_estado_cuenta(
         ("ALIGN",         (0, 0), (-1, -1), "CENTER"),
         ("VALIGN",        (0, 0), (-1, -1), "MIDDLE"),
     ]))
-    story.append(p_tbl)
-    sp(4)
-    hr(C_BRAND, 1)
+    yield p_tbl
+    yield sp(4)
+    yield hr(C_BRAND, 1)
 
     # ── 2. RESUMEN POR TIPO ───────────────────────────────────
-    section_title("Resumen por Tipo de Movimiento")
+    yield from section_title("Resumen por Tipo de Movimiento")
 
-    totales_tipo = {}
-    for t in normales:
-        tp  = t.get("type", "gasto_variable")
-        amt = abs(float(t.get("amount", 0)))
-        totales_tipo[tp] = totales_tipo.get(tp, 0) + amt
-
-    total_ingresos = totales_tipo.get("ingreso", 0)
-    total_egresos  = sum(v for k, v in totales_tipo.items() if k != "ingreso")
+    por_tipo       = resumen["por_tipo"]
+    total_ingresos = por_tipo.get("ingreso", {}).get("total", 0)
+    total_egresos  = sum(v["total"] for k, v in por_tipo.items() if k != "ingreso")
     saldo_neto     = total_ingresos - total_egresos
 
     tipo_header = [
@@ -994,35 +1151,30 @@ def generar_pdf_estado_cuenta(
     tipo_rows = [tipo_header]
     order = ["ingreso", "gasto_fijo", "gasto_variable", "deuda", "ahorro"]
     for tp in order:
-        if tp not in totales_tipo:
+        if tp not in por_tipo:
             continue
-        count = sum(1 for t in normales if t.get("type") == tp)
-        monto = totales_tipo[tp]
+        count = por_tipo[tp]["count"]
+        monto = por_tipo[tp]["total"]
         pct   = monto / total_ingresos * 100 if total_ingresos else 0
         col   = C_GREEN if tp == "ingreso" else (C_BRAND if tp == "ahorro" else C_RED)
         tipo_rows.append([
             Paragraph(TYPE_LABELS.get(tp, tp), st["body"]),
             Paragraph(str(count),
-                      ParagraphStyle("tc", fontName="Helvetica", fontSize=10,
-                                     textColor=C_MUTED, alignment=TA_CENTER, leading=13)),
+                      _ps("Helvetica", 10, C_MUTED, TA_CENTER, 13)),
             Paragraph(_fmt_pen(monto),
-                      ParagraphStyle("tv", fontName="Helvetica-Bold", fontSize=10,
-                                     textColor=col, alignment=TA_RIGHT, leading=13)),
+                      _ps("Helvetica-Bold", 10, col, TA_RIGHT, 13)),
             Paragraph(_fmt_pct(pct) if tp != "ingreso" else "—",
-                      ParagraphStyle("tp", fontName="Helvetica", fontSize=9,
-                                     textColor=C_MUTED, alignment=TA_CENTER, leading=13)),
+                      _ps("Helvetica", 9, C_MUTED, TA_CENTER, 13)),
         ])
 
     # Fila de saldo neto
     c_saldo = C_GREEN if saldo_neto >= 0 else C_RED
     tipo_rows.append([
         Paragraph("SALDO NETO",
-                  ParagraphStyle("sn", fontName="Helvetica-Bold", fontSize=10,
-                                 textColor=c_saldo, leading=13)),
+                  _ps("Helvetica-Bold", 10, c_saldo, TA_LEFT, 13)),
         Paragraph("", st["body"]),
         Paragraph(_fmt_pen(saldo_neto),
-                  ParagraphStyle("sv", fontName="Helvetica-Bold", fontSize=11,
-                                 textColor=c_saldo, alignment=TA_RIGHT, leading=14)),
+                  _ps("Helvetica-Bold", 11, c_saldo, TA_RIGHT, 14)),
         Paragraph("", st["body"]),
     ])
 
@@ -1043,24 +1195,12 @@ def generar_pdf_estado_cuenta(
         ("VALIGN",         (0, 0), (-1, -1),  "MIDDLE"),
         ("ROWBACKGROUNDS", (0, 1), (-1, -2),  [colors.white, C_CARD_BG]),
     ]))
-    story.append(tipo_tbl)
-    sp(4)
+    yield tipo_tbl
+    yield sp(4)
 
     # ── 3. RESUMEN POR CUENTA ─────────────────────────────────
     if not account_filter:
-        section_title("Resumen por Cuenta")
-
-        cuentas = {}
-        for t in normales:
-            acc = t.get("account", "Sin cuenta")
-            if acc not in cuentas:
-                cuentas[acc] = {"ingresos": 0, "egresos": 0, "count": 0}
-            cuentas[acc]["count"] += 1
-            amt = float(t.get("amount", 0))
-            if t.get("type") == "ingreso":
-                cuentas[acc]["ingresos"] += abs(amt)
-            else:
-                cuentas[acc]["egresos"] += abs(amt)
+        yield from section_title("Resumen por Cuenta")
 
         acc_header = [
             Paragraph("CUENTA",    st["section"]),
@@ -1070,23 +1210,19 @@ def generar_pdf_estado_cuenta(
             Paragraph("BALANCE",   st["section"]),
         ]
         acc_rows = [acc_header]
-        for acc, data in sorted(cuentas.items()):
+        for acc, data in sorted(resumen["por_cuenta"].items()):
             bal = data["ingresos"] - data["egresos"]
             c   = C_GREEN if bal >= 0 else C_RED
             acc_rows.append([
                 Paragraph(acc, st["body"]),
                 Paragraph(str(data["count"]),
-                          ParagraphStyle("ac", fontName="Helvetica", fontSize=10,
-                                         textColor=C_MUTED, alignment=TA_CENTER, leading=13)),
+                          _ps("Helvetica", 10, C_MUTED, TA_CENTER, 13)),
                 Paragraph(_fmt_pen(data["ingresos"]),
-                          ParagraphStyle("ai", fontName="Helvetica-Bold", fontSize=10,
-                                         textColor=C_GREEN, alignment=TA_RIGHT, leading=13)),
+                          _ps("Helvetica-Bold", 10, C_GREEN, TA_RIGHT, 13)),
                 Paragraph(_fmt_pen(data["egresos"]),
-                          ParagraphStyle("ae", fontName="Helvetica", fontSize=10,
-                                         textColor=C_RED, alignment=TA_RIGHT, leading=13)),
+                          _ps("Helvetica", 10, C_RED, TA_RIGHT, 13)),
                 Paragraph(_fmt_pen(bal),
-                          ParagraphStyle("ab", fontName="Helvetica-Bold", fontSize=10,
-                                         textColor=c, alignment=TA_RIGHT, leading=13)),
+                          _ps("Helvetica-Bold", 10, c, TA_RIGHT, 13)),
             ])
 
         acc_tbl = Table(
@@ -1105,11 +1241,11 @@ def generar_pdf_estado_cuenta(
             ("VALIGN",        (0, 0), (-1, -1), "MIDDLE"),
             ("ROWBACKGROUNDS",(0, 1), (-1, -1),  [colors.white, C_CARD_BG]),
         ]))
-        story.append(acc_tbl)
-        sp(4)
+        yield acc_tbl
+        yield sp(4)
 
     # ── 4. LISTADO COMPLETO DE MOVIMIENTOS ────────────────────
-    section_title("Detalle de Movimientos")
+    yield from section_title("Detalle de Movimientos")
 
     tx_header = [
         Paragraph("FECHA",       st["section"]),
@@ -1119,81 +1255,17 @@ def generar_pdf_estado_cuenta(
         Paragraph("TIPO",        st["section"]),
         Paragraph("MONTO",       st["section"]),
     ]
-    tx_rows = [tx_header]
-
-    # Ordenar por fecha ascendente
-    sorted_txs = sorted(normales, key=lambda t: t.get("date", ""))
-
-    TYPE_SHORT = {
-        "ingreso":        "Ingreso",
-        "gasto_fijo":     "Fijo",
-        "gasto_variable": "Variable",
-        "deuda":          "Deuda",
-        "ahorro":         "Ahorro",
-    }
-
-    for t in sorted_txs:
-        monto = float(t.get("amount", 0))
-        tp    = t.get("type", "gasto_variable")
-        c_amt = C_GREEN if monto > 0 else C_RED
-        sign  = "+" if monto > 0 else "-"
-        desc  = str(t.get("description", ""))
-        if len(desc) > 42:
-            desc = desc[:41] + "…"
-        cat = str(t.get("category", ""))
-        if len(cat) > 18:
-            cat = cat[:17] + "…"
-
-        tx_rows.append([
-            Paragraph(str(t.get("date", "")),
-                      ParagraphStyle("td", fontName="Helvetica", fontSize=9,
-                                     textColor=C_MUTED, leading=12)),
-            Paragraph(desc,
-                      ParagraphStyle("tdesc", fontName="Helvetica", fontSize=9,
-                                     textColor=C_TEXT, leading=12)),
-            Paragraph(str(t.get("account", "—")),
-                      ParagraphStyle("tacc", fontName="Helvetica", fontSize=8.5,
-                                     textColor=C_MUTED, leading=12)),
-            Paragraph(cat,
-                      ParagraphStyle("tcat", fontName="Helvetica", fontSize=8.5,
-                                     textColor=C_MUTED, leading=12)),
-            Paragraph(TYPE_SHORT.get(tp, tp),
-                      ParagraphStyle("ttype", fontName="Helvetica", fontSize=8.5,
-                                     textColor=C_BRAND, alignment=TA_CENTER, leading=12)),
-            Paragraph(f"{sign}{_fmt_pen(abs(monto))}",
-                      ParagraphStyle("tamt", fontName="Helvetica-Bold", fontSize=9.5,
-                                     textColor=c_amt, alignment=TA_RIGHT, leading=12)),
-        ])
-
-    tx_tbl = Table(
-        tx_rows,
-        colWidths=[
-            W_DRAW * 0.14,   # Fecha  (ampliado: YYYY-MM-DD cabe sin salto)
-            W_DRAW * 0.29,   # Descripción (reducida para compensar)
-            W_DRAW * 0.17,   # Cuenta
-            W_DRAW * 0.18,   # Categoría
-            W_DRAW * 0.09,   # Tipo
-            W_DRAW * 0.13,   # Monto
-        ],
-        repeatRows=1,   # cabecera repetida en cada página
+    yield from _ec_tables(
+        (_ec_tx_row(t, rs) for t in movimientos),
+        tx_header, _EC_TX_WIDTHS, _EC_TX_STYLE, chunk_rows,
     )
-    tx_tbl.setStyle(TableStyle([
-        ("BACKGROUND",    (0, 0), (-1, 0),  C_CARD_BG),
-        ("BOX",           (0, 0), (-1, -1), 0.5, C_LINE),
-        ("INNERGRID",     (0, 0), (-1, -1), 0.3, C_LINE),
-        ("TOPPADDING",    (0, 0), (-1, -1), 5),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 5),
-        ("LEFTPADDING",   (0, 0), (-1, -1), 6),
-        ("RIGHTPADDING",  (0, 0), (-1, -1), 6),
-        ("VALIGN",        (0, 0), (-1, -1), "MIDDLE"),
-        ("ROWBACKGROUNDS",(0, 1), (-1, -1),  [colors.white, C_CARD_BG]),
-    ]))
-    story.append(tx_tbl)
-    sp(4)
+    yield sp(4)
 
     # ── 5. TRANSFERENCIAS INTERNAS (si existen) ───────────────
-    if internos:
-        section_title("Transferencias Internas (excluidas del análisis)")
+    internos = iter(internos)
+    primero  = next(internos, None)
+    if primero is not None:
+        yield from section_title("Transferencias Internas (excluidas del análisis)")
 
         int_header = [
             Paragraph("FECHA",       st["section"]),
@@ -1201,55 +1273,130 @@ def generar_pdf_estado_cuenta(
             Paragraph("CUENTA",      st["section"]),
             Paragraph("MONTO",       st["section"]),
         ]
-        int_rows = [int_header]
-        for t in sorted(internos, key=lambda x: x.get("date", "")):
-            monto = float(t.get("amount", 0))
-            sign  = "+" if monto > 0 else "-"
-            int_rows.append([
-                Paragraph(str(t.get("date", "")),
-                          ParagraphStyle("id", fontName="Helvetica", fontSize=9,
-                                         textColor=C_MUTED, leading=12)),
-                Paragraph(str(t.get("description", ""))[:50],
-                          ParagraphStyle("idesc", fontName="Helvetica", fontSize=9,
-                                         textColor=colors.HexColor("#888899"), leading=12)),
-                Paragraph(str(t.get("account", "—")),
-                          ParagraphStyle("iacc", fontName="Helvetica", fontSize=8.5,
-                                         textColor=C_MUTED, leading=12)),
-                Paragraph(f"{sign}{_fmt_pen(abs(monto))}",
-                          ParagraphStyle("iamt", fontName="Helvetica-Bold", fontSize=9,
-                                         textColor=colors.HexColor("#38bdf8"),
-                                         alignment=TA_RIGHT, leading=12)),
-            ])
-
-        int_tbl = Table(
-            int_rows,
-            colWidths=[W_DRAW * 0.12, W_DRAW * 0.46, W_DRAW * 0.22, W_DRAW * 0.20],
+        yield from _ec_tables(
+            (_ec_int_row(t, rs) for t in chain([primero], internos)),
+            int_header, _EC_INT_WIDTHS, _EC_INT_STYLE, chunk_rows,
         )
-        int_tbl.setStyle(TableStyle([
-            ("BACKGROUND",    (0, 0), (-1, 0),  colors.HexColor("#f0f8ff")),
-            ("BOX",           (0, 0), (-1, -1), 0.5, colors.HexColor("#bae6fd")),
-            ("INNERGRID",     (0, 0), (-1, -1), 0.3, colors.HexColor("#e0f2fe")),
-            ("TOPPADDING",    (0, 0), (-1, -1), 5),
-            ("BOTTOMPADDING", (0, 0), (-1, -1), 5),
-            ("LEFTPADDING",   (0, 0), (-1, -1), 6),
-            ("RIGHTPADDING",  (0, 0), (-1, -1), 6),
-            ("VALIGN",        (0, 0), (-1, -1), "MIDDLE"),
-            ("ROWBACKGROUNDS",(0, 1), (-1, -1), [colors.white, colors.HexColor("#f8fcff")]),
-        ]))
-        story.append(int_tbl)
-        sp(2)
-        story.append(Paragraph(
+        yield sp(2)
+        yield Paragraph(
             "🔒 Las transferencias internas entre cuentas propias no afectan los totales del análisis financiero.",
             st["chart_note"],
-        ))
-        sp(4)
+        )
+        yield sp(4)
 
     # ── 6. FOOTER ─────────────────────────────────────────────
-    sp(6)
-    hr(C_LINE, 0.5)
-    story.append(Paragraph(
-        f"Período: {period_label}  •  {len(normales)} movimientos  •  finanzas.alias.nom.pe",
+    yield sp(6)
+    yield hr(C_LINE, 0.5)
+    yield Paragraph(
+        f"Período: {period_label}  •  {n_movs} movimientos  •  finanzas.alias.nom.pe",
         st["footer"],
+    )
+
+
+class _LazyStory:
+    """
+    Lista perezosa de flowables para BaseDocTemplate.build().
+
+    ReportLab consume la historia desde el frente (flowables[0], del, insert);
+    esta clase implementa ese subconjunto de la API de list sobre un iterador,
+    materializando sólo una ventana pequeña. Así los bloques del detalle se
+    crean justo antes de dibujarse y se liberan después.
+    """
+
+    LOOKAHEAD = 8   # suficiente para las cadenas keepWithNext de los títulos
+
+    def __init__(self, flowables: Iterable):
+        self._it  = iter(flowables)
+        self._buf = []
+
+    def _fill(self, n: int) -> None:
+        while self._it is not None and len(self._buf) < n:
+            try:
+                self._buf.append(next(self._it))
+            except StopIteration:
+                self._it = None
+
+    def _need(self, idx) -> int:
+        if isinstance(idx, slice):
+            return idx.stop if idx.stop is not None and idx.stop >= 0 else len(self._buf)
+        return idx + 1 if idx >= 0 else len(self._buf)
+
+    def __len__(self) -> int:
+        self._fill(self.LOOKAHEAD)
+        return len(self._buf)
+
+    def __getitem__(self, idx):
+        self._fill(self._need(idx))
+        return self._buf[idx]
+
+    def __setitem__(self, idx, value):
+        self._fill(self._need(idx))
+        self._buf[idx] = value
+
+    def __delitem__(self, idx):
+        self._fill(self._need(idx))
+        del self._buf[idx]
+
+    def insert(self, idx: int, value) -> None:
+        self._buf.insert(idx, value)
+
+
+def _doc_estado_cuenta(out, period_label: str, account_filter: str | None) -> BaseDocTemplate:
+    try:
+        from utils.timezone_utils import now_lima
+        generated_at = now_lima().strftime("%d/%m/%Y %H:%M")
+    except Exception:
+        generated_at = datetime.utcnow().strftime("%d/%m/%Y %H:%M")
+
+    subtitle = f"Estado de Cuenta · {period_label}"
+    if account_filter:
+        subtitle += f" · {account_filter}"
+
+    return _DocWithHeaderFooter(
+        out,
+        period_label = subtitle,
+        generated_at = generated_at,
+        pagesize     = A4,
+        leftMargin   = 1.8 * cm,
+        rightMargin  = 1.8 * cm,
+        topMargin    = 3.2 * cm,
+        bottomMargin = 1.8 * cm,
+        title        = f"FinanzasOS — Estado de Cuenta {period_label}",
+        author       = "Victor Hugo Capillo",
+    )
+
+
+def generar_pdf_estado_cuenta(
+    period: str,
+    transactions: list,
+    profile: dict | None = None,
+    account_filter: str | None = None,
+) -> bytes:
+    """
+    Genera el Estado de Cuenta mensual en PDF.
+
+    Args:
+        period:         Período 'YYYY-MM'
+        transactions:   Lista de dicts con los movimientos del período
+        profile:        Dict con datos del perfil (name, income, etc.)
+        account_filter: Si se filtra por cuenta específica, su nombre
+
+    Returns:
+        bytes del PDF generado
+    """
+    buf          = io.BytesIO()
+    period_label = _period_label(period)
+    doc          = _doc_estado_cuenta(buf, period_label, account_filter)
+
+    # Separar movimientos normales e internos (ordenados por fecha ascendente)
+    normales = sorted((t for t in transactions if not t.get("excluir_del_analisis", False)),
+                      key=lambda t: t.get("date", ""))
+    internos = sorted((t for t in transactions if t.get("excluir_del_analisis", False)),
+                      key=lambda t: t.get("date", ""))
+
+    story = list(_iter_story_estado_cuenta(
+        period_label, resumen_estado_cuenta(transactions), normales, internos,
+        profile, account_filter, chunk_rows=None,
     ))
 
     try:
@@ -1258,3 +1405,37 @@ def generar_pdf_estado_cuenta(
     except Exception as e:
         logger.error(f"[PDF] Error generando estado de cuenta: {e}", exc_info=True)
         raise
+
+
+def generar_pdf_estado_cuenta_stream(
+    out_path: str,
+    desde: str,
+    hasta: str,
+    resumen: dict,
+    movimientos: Iterable,
+    internos: Iterable,
+    profile: dict | None = None,
+    account_filter: str | None = None,
+    chunk_rows: int = EC_CHUNK_ROWS,
+) -> None:
+    """
+    Estado de Cuenta en modo streaming, para rangos largos (ej. varios años).
+
+    A diferencia de generar_pdf_estado_cuenta no recibe la lista completa:
+    `movimientos` e `internos` son iterables (típicamente cursores con
+    yield_per) que se consumen a medida que se dibujan las páginas, en bloques
+    de `chunk_rows` filas. Los totales vienen precalculados en `resumen`
+    (mismo formato que resumen_estado_cuenta). El PDF se escribe en `out_path`.
+    """
+    period_label = _period_label(desde)
+    if hasta != desde:
+        period_label += f" – {_period_label(hasta)}"
+    doc = _doc_estado_cuenta(out_path, period_label, account_filter)
+    try:
+        doc.build(_LazyStory(_iter_story_estado_cuenta(
+            period_label, resumen, movimientos, internos,
+            profile, account_filter, chunk_rows=chunk_rows,
+        )))
+    except Exception as e:
+        logger.error(f"[PDF] Error generando estado de cuenta (stream): {e}", exc_info=True)
+        raise
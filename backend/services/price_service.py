@@ -6,18 +6,40 @@ Scheduler APScheduler que:
   · Cada 4 horas → actualiza precios crypto (CoinGecko)
   · Cada 6 horas → actualiza precios acciones (Yahoo Finance / yfinance)
   · Cada hora    → actualiza tipo de cambio USD/PEN (open.er-api.com)
+  · Cada día     → completa la serie histórica USD/PEN desde el BCRP
   · Fin de mes   → genera snapshot automático del portafolio
 
 El precio actualizado se guarda en la tabla PriceCache (un registro por ticker).
+
+Configuración (variables de entorno):
+    COINGECKO_API_URL     base de la API de CoinGecko     (default https://api.coingecko.com/api/v3)
+    ER_API_URL            base de open.er-api.com         (default https://open.er-api.com/v6)
+    YAHOO_FINANCE_URL     página que entrega la cookie    (default https://finance.yahoo.com)
+    YAHOO_QUERY_URLS      hosts de la API chart, por coma (default query2 y query1.finance.yahoo.com)
+    STOOQ_URL             base de Stooq                   (default https://stooq.com)
+    PRICE_STOCK_SOURCES   capas de acciones a usar, en orden, por coma
+                          (default yf_fast_info,yf_history,yahoo_http,stooq)
+    PRICE_REFRESH_TTL     tope de duración de un refresh manual, en segundos (default 120)
+El índice símbolo → id de CoinGecko y el tamaño de los lotes se configuran
+en services/coingecko_index.py. Los timeouts y reintentos son los del
+cliente compartido (HTTP_TIMEOUT…, services/http_client.py).
+
+Las URLs permiten apuntar todo a los servicios simulados de
+benchmarks/fake_services.py (yfinance no admite otra base: se excluye con
+PRICE_STOCK_SOURCES=yahoo_http,stooq).
 """
 
 import logging
 import calendar
-from datetime import datetime, timezone
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from utils.timezone_utils import now_lima, now_lima_naive, today_lima
 
-import requests
 import yfinance as yf
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
@@ -25,7 +47,8 @@ from apscheduler.triggers.cron import CronTrigger
 from sqlalchemy.orm import Session
 
 import models
-from database import SessionLocal
+from database import SessionLocal, engine
+from services import metrics, event_bus, scheduler_leader, live_updates, http_client, source_health, coingecko_index, fx_history
 
 logger = logging.getLogger("price_service")
 
@@ -34,7 +57,16 @@ logger = logging.getLogger("price_service")
 logging.getLogger("yfinance").setLevel(logging.CRITICAL)
 logging.getLogger("peewee").setLevel(logging.CRITICAL)
 
-# ─── Mapa ticker → CoinGecko id (se puede ampliar desde aquí) ─
+# ─── Endpoints externos (configurables para pruebas sin red) ──
+COINGECKO_API_URL = os.getenv("COINGECKO_API_URL", "https://api.coingecko.com/api/v3").rstrip("/")
+ER_API_URL        = os.getenv("ER_API_URL", "https://open.er-api.com/v6").rstrip("/")
+YAHOO_FINANCE_URL = os.getenv("YAHOO_FINANCE_URL", "https://finance.yahoo.com").rstrip("/")
+YAHOO_QUERY_URLS  = [u.strip().rstrip("/") for u in os.getenv(
+    "YAHOO_QUERY_URLS", "https://query2.finance.yahoo.com,https://query1.finance.yahoo.com",
+).split(",") if u.strip()]
+STOOQ_URL         = os.getenv("STOOQ_URL", "https://stooq.com").rstrip("/")
+
+# ─── Mapa ticker → CoinGecko id (manda sobre el índice de coingecko_index) ─
 COINGECKO_IDS: dict[str, str] = {
     "BTC":  "bitcoin",
     "ETH":  "ethereum",
@@ -54,7 +86,8 @@ COINGECKO_IDS: dict[str, str] = {
     "USDC": "usd-coin",
 }
 
-# Tipo de cambio en memoria (también persistido en BD para snapshots)
+# Último tipo de cambio que consultó este proceso. Solo el líder corre el job;
+# los lectores usan get_exchange_rate(db), que lee la serie en BD (fx_history).
 _exchange_rate: float = 3.72
 _last_refresh: Optional[datetime] = None
 
@@ -94,23 +127,34 @@ def _get_active_tickers(db: Session) -> dict[str, list[str]]:
 # JOBS DE ACTUALIZACIÓN
 # ═══════════════════════════════════════════════════════════════
 
+@metrics.track_job("exchange_rate")
 def job_update_exchange_rate() -> None:
     """Actualiza tipo de cambio USD→PEN cada hora."""
     global _exchange_rate
     try:
-        resp = requests.get("https://open.er-api.com/v6/latest/USD", timeout=10)
+        resp = http_client.get(f"{ER_API_URL}/latest/USD")
         data = resp.json()
         if data.get("rates", {}).get("PEN"):
+            anterior       = _exchange_rate
             _exchange_rate = data["rates"]["PEN"]
             logger.info(f"[TC] Tipo de cambio actualizado: S/ {_exchange_rate:.3f}")
+            if _exchange_rate != anterior:
+                live_updates.publish_exchange_rate(_exchange_rate)
+            # Una fila por día en ExchangeRateLog: alimenta la serie histórica
+            with SessionLocal() as db:
+                fx_history.record(db, _exchange_rate, "ER_API")
+                db.commit()
     except Exception as e:
         logger.warning(f"[TC] No se pudo actualizar tipo de cambio: {e}")
+        metrics.job_failed()
 
 
+@metrics.track_job("crypto_prices")
 def job_update_crypto_prices() -> None:
     """
     Actualiza precios de criptomonedas desde CoinGecko cada 4 horas.
-    Solo actualiza los tickers que existen en la tabla investments.
+    Solo actualiza los tickers que existen en la tabla investments; el id
+    de CoinGecko sale de COINGECKO_IDS o del índice de services/coingecko_index.py.
     """
     global _last_refresh
     db = SessionLocal()
@@ -120,24 +164,19 @@ def job_update_crypto_prices() -> None:
             logger.info("[Crypto] Sin activos crypto registrados, saltando.")
             return
 
-        gecko_ids = [COINGECKO_IDS[t] for t in tickers if t in COINGECKO_IDS]
-        unknown   = [t for t in tickers if t not in COINGECKO_IDS]
+        ids, unknown = coingecko_index.resolve(tickers, COINGECKO_API_URL, COINGECKO_IDS)
         if unknown:
-            logger.warning(f"[Crypto] Tickers sin mapeo CoinGecko: {unknown}")
+            logger.warning(f"[Crypto] Tickers sin id en CoinGecko: {unknown}")
 
-        if not gecko_ids:
+        if not ids:
             return
 
-        url = f"https://api.coingecko.com/api/v3/simple/price?ids={','.join(gecko_ids)}&vs_currencies=usd"
-        resp = requests.get(url, timeout=15)
-        data = resp.json()
+        data = coingecko_index.fetch_prices(ids.values(), COINGECKO_API_URL)
 
         updated = 0
-        for ticker in tickers:
-            gecko_id = COINGECKO_IDS.get(ticker)
-            if gecko_id and data.get(gecko_id, {}).get("usd"):
-                price = data[gecko_id]["usd"]
-                _upsert_price(db, ticker, price, "coingecko")
+        for ticker, gecko_id in ids.items():
+            if data.get(gecko_id):
+                _upsert_price(db, ticker, data[gecko_id], "coingecko")
                 updated += 1
 
         _last_refresh = now_lima()   # Lima UTC-5
@@ -145,142 +184,176 @@ def job_update_crypto_prices() -> None:
 
     except Exception as e:
         logger.error(f"[Crypto] Error actualizando precios: {e}")
+        metrics.job_failed()
     finally:
         db.close()
 
 
-# ─── Sesión compartida con cookie/crumb para Yahoo Finance ───
-_yahoo_session: Optional[requests.Session] = None
-_yahoo_crumb:   Optional[str]              = None
+# ─── Cookie/crumb para Yahoo Finance ─────────────────────────
+# Las cookies de Yahoo quedan en el cliente compartido (services/http_client.py);
+# aquí solo se guarda el crumb asociado.
+_yahoo_crumb: Optional[str] = None
 
+_YAHOO_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+}
 
-def _get_yahoo_session() -> tuple[Optional[requests.Session], Optional[str]]:
+
+def _get_yahoo_crumb(renovar: bool = False) -> Optional[str]:
     """
-    Obtiene (o reutiliza) una sesión autenticada con Yahoo Finance.
+    Obtiene (o reutiliza) el crumb de Yahoo Finance.
     Yahoo Finance requiere desde 2024: cookie YF_session + crumb para su API.
     """
-    global _yahoo_session, _yahoo_crumb
-    if _yahoo_session and _yahoo_crumb:
-        return _yahoo_session, _yahoo_crumb
-
-    session = requests.Session()
-    session.headers.update({
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36"
-        ),
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Accept-Encoding": "gzip, deflate, br",
-        "Connection": "keep-alive",
-    })
+    global _yahoo_crumb
+    if _yahoo_crumb and not renovar:
+        return _yahoo_crumb
+    _yahoo_crumb = None
 
     try:
         # Paso 1: obtener cookie de consentimiento
-        session.get("https://finance.yahoo.com", timeout=10)
+        http_client.get(YAHOO_FINANCE_URL, headers=_YAHOO_HEADERS)
 
         # Paso 2: obtener crumb (requerido por la API v1)
-        crumb_resp = session.get(
-            "https://query2.finance.yahoo.com/v1/test/getcrumb",
-            timeout=10
+        crumb_resp = http_client.get(
+            f"{YAHOO_QUERY_URLS[0]}/v1/test/getcrumb",
+            headers=_YAHOO_HEADERS,
         )
         crumb = crumb_resp.text.strip()
         if crumb and len(crumb) > 3:  # crumb válido tiene ~11 chars
-            _yahoo_session = session
-            _yahoo_crumb   = crumb
+            _yahoo_crumb = crumb
             logger.info(f"[Yahoo] Sesión autenticada. Crumb: {crumb[:6]}...")
-            return session, crumb
+            return crumb
         else:
             logger.warning(f"[Yahoo] Crumb inválido: '{crumb}'")
-            return session, None
+            return None
     except Exception as e:
         logger.warning(f"[Yahoo] No se pudo iniciar sesión: {e}")
-        return session, None
+        return None
+
+
+def _fetch_stock_price_yf_fast(ticker: str) -> tuple[Optional[float], str]:
+    """Capa 1: yfinance fast_info (acceso por atributo, no .get())."""
+    fast  = yf.Ticker(ticker).fast_info
+    price = getattr(fast, "last_price", None) or getattr(fast, "previous_close", None)
+    if price and price > 0:
+        return float(price), source_health.OK
+    # yfinance se traga el error HTTP: sin precio no distingue ticker inválido de bloqueo
+    return None, source_health.ERROR
 
 
-def _fetch_stock_price_http(ticker: str) -> Optional[float]:
+def _fetch_stock_price_yf_history(ticker: str) -> tuple[Optional[float], str]:
+    """Capa 2: yfinance history(period='5d')."""
+    hist = yf.Ticker(ticker).history(period="5d")
+    if hist.empty:
+        return None, source_health.ERROR     # idem: vacío también cuando Yahoo bloquea
+    return float(hist["Close"].iloc[-1]), source_health.OK
+
+
+def _fetch_stock_price_http(ticker: str) -> tuple[Optional[float], str]:
     """
-    Fallback HTTP directo a Yahoo Finance con autenticación cookie+crumb.
+    Capa 3: HTTP directo a Yahoo Finance con autenticación cookie+crumb.
     Funciona desde Docker donde yfinance es bloqueado por Yahoo.
+    404 o "sin resultado" = el símbolo no existe (miss); 401/403/429/5xx = bloqueo.
     """
-    global _yahoo_session, _yahoo_crumb
-    session, crumb = _get_yahoo_session()
+    crumb = _get_yahoo_crumb()
 
     # Construir URL con crumb si está disponible
     params = {"interval": "1d", "range": "5d"}
     if crumb:
         params["crumb"] = crumb
 
-    for host in ["query2.finance.yahoo.com", "query1.finance.yahoo.com"]:
+    resultado = source_health.ERROR
+    for host in YAHOO_QUERY_URLS:
         try:
-            url  = f"https://{host}/v8/finance/chart/{ticker}"
-            resp = session.get(url, params=params, timeout=15)
+            url  = f"{host}/v8/finance/chart/{ticker}"
+            resp = http_client.get(url, params=params, headers=_YAHOO_HEADERS)
 
             if resp.status_code == 401:
                 # Crumb expirado — forzar renovación
-                _yahoo_session = None
-                _yahoo_crumb   = None
-                session, crumb = _get_yahoo_session()
+                crumb = _get_yahoo_crumb(renovar=True)
                 if crumb:
                     params["crumb"] = crumb
-                resp = session.get(url, params=params, timeout=15)
+                resp = http_client.get(url, params=params, headers=_YAHOO_HEADERS)
 
+            if resp.status_code == 404:
+                return None, source_health.MISS
             if resp.status_code != 200:
                 logger.debug(f"[Stocks-HTTP] {host} retornó {resp.status_code} para {ticker}")
                 continue
 
-            data  = resp.json()
-            meta  = data["chart"]["result"][0]["meta"]
+            chart = resp.json().get("chart") or {}
+            if not chart.get("result"):
+                return None, source_health.MISS
+            meta  = chart["result"][0]["meta"]
             price = (meta.get("regularMarketPrice")
                   or meta.get("previousClose")
                   or meta.get("chartPreviousClose"))
             if price and float(price) > 0:
-                return float(price)
+                return float(price), source_health.OK
+            resultado = source_health.MISS
 
         except Exception as e:
-            logger.debug(f"[Stocks-HTTP] {host}/{ticker} falló: {e}")
+            logger.debug(f"[Stocks-HTTP] {host}/{ticker} falló: {e}")
             continue
 
-    return None
+    return None, resultado
 
 
-def _fetch_stock_price_stooq(ticker: str) -> Optional[float]:
+def _fetch_stock_price_stooq(ticker: str) -> tuple[Optional[float], str]:
     """
-    Fallback usando Stooq (stooq.com) — no requiere auth, soporta ETFs/acciones US.
+    Capa 4: Stooq (stooq.com) — no requiere auth, soporta ETFs/acciones US.
     Formato URL: https://stooq.com/q/l/?s=SCHD.US&f=sd2t2ohlcv&h&e=csv
     Respuesta CSV: Symbol,Date,Time,Open,High,Low,Close,Volume
     """
-    try:
-        url = f"https://stooq.com/q/l/?s={ticker.lower()}.us&f=sd2t2ohlcv&h&e=csv"
-        resp = requests.get(url, timeout=15, headers={"User-Agent": "Mozilla/5.0"})
-        if resp.status_code != 200:
-            logger.debug(f"[Stooq] {ticker} retornó HTTP {resp.status_code}")
-            return None
-        lines = resp.text.strip().splitlines()
-        if len(lines) < 2:
-            logger.debug(f"[Stooq] {ticker} sin datos en CSV")
-            return None
-        # Fila de datos: Symbol,Date,Time,Open,High,Low,Close,Volume
-        parts = lines[1].split(",")
-        if len(parts) >= 7 and parts[6] not in ("", "N/D"):
-            price = float(parts[6])  # columna Close
-            if price > 0:
-                logger.info(f"[Stooq] {ticker} = ${price:.4f}")
-                return price
-    except Exception as e:
-        logger.debug(f"[Stooq] {ticker} falló: {e}")
-    return None
+    url = f"{STOOQ_URL}/q/l/?s={ticker.lower()}.us&f=sd2t2ohlcv&h&e=csv"
+    resp = http_client.get(url, headers={"User-Agent": "Mozilla/5.0"})
+    if resp.status_code != 200:
+        logger.debug(f"[Stooq] {ticker} retornó HTTP {resp.status_code}")
+        return None, source_health.ERROR
+    lines = resp.text.strip().splitlines()
+    if len(lines) < 2:
+        logger.debug(f"[Stooq] {ticker} sin datos en CSV")
+        return None, source_health.MISS
+    # Fila de datos: Symbol,Date,Time,Open,High,Low,Close,Volume
+    parts = lines[1].split(",")
+    if len(parts) >= 7 and parts[6] not in ("", "N/D"):
+        price = float(parts[6])  # columna Close
+        if price > 0:
+            logger.info(f"[Stooq] {ticker} = ${price:.4f}")
+            return price, source_health.OK
+    return None, source_health.MISS
+
+
+# Capas en orden de preferencia: (fuente, función, etiqueta para PriceCache.source)
+_STOCK_LAYERS = {
+    "yf_fast_info": (_fetch_stock_price_yf_fast,    "yahoo_fast_info"),
+    "yf_history":   (_fetch_stock_price_yf_history, "yahoo_history"),
+    "yahoo_http":   (_fetch_stock_price_http,       "yahoo_http_directo"),
+    "stooq":        (_fetch_stock_price_stooq,      "stooq"),
+}
+_STOCK_SOURCES = tuple(
+    (nombre, *_STOCK_LAYERS[nombre])
+    for nombre in (n.strip() for n in os.getenv("PRICE_STOCK_SOURCES", ",".join(_STOCK_LAYERS)).split(","))
+    if nombre in _STOCK_LAYERS
+)
 
 
+@metrics.track_job("stock_prices")
 def job_update_stock_prices() -> None:
     """
     Actualiza precios de acciones y ETFs desde Yahoo Finance cada 6 horas.
-    Estrategia en 4 capas para máxima robustez:
+    Estrategia en 4 capas para máxima robustez (_STOCK_SOURCES):
       1. yfinance fast_info (atributo, no .get())
       2. yfinance history(period='5d')
       3. HTTP directo a Yahoo Finance (resistente a bloqueos Docker)
       4. Stooq CSV (fallback sin auth — ideal para ETFs como SCHD, VT)
+    Fuentes caídas y tickers sin datos se saltan (services/source_health.py).
     """
     db = SessionLocal()
     try:
@@ -289,54 +362,33 @@ def job_update_stock_prices() -> None:
             logger.info("[Stocks] Sin activos de bolsa/ETF registrados, saltando.")
             return
 
-        updated = 0
+        updated  = 0
+        omitidos = [t for t in tickers if source_health.is_unresolvable(t)]
+        if omitidos:
+            logger.info(f"[Stocks] Omitidos (sin datos en ninguna fuente): {omitidos}")
         for ticker in tickers:
-            price = None
-            method = "ninguno"
+            if ticker in omitidos:
+                continue
             try:
-                # Capa 1: yfinance fast_info (acceso por atributo)
-                try:
-                    fast  = yf.Ticker(ticker).fast_info
-                    price = getattr(fast, "last_price", None) \
-                         or getattr(fast, "previous_close", None)
+                # Cada capa pasa por el breaker de su fuente: una fuente en
+                # corte se salta sin pagar su timeout
+                price, resultados = None, {}
+                for source, fetch, source_tag in _STOCK_SOURCES:
+                    price, resultados[source] = source_health.run(source, fetch, ticker)
                     if price and price > 0:
-                        method = "fast_info"
-                except Exception as e:
-                    logger.debug(f"[Stocks] {ticker} fast_info falló: {e}")
-
-                # Capa 2: yfinance history
-                if not price or price <= 0:
-                    try:
-                        hist = yf.Ticker(ticker).history(period="5d")
-                        if not hist.empty:
-                            price  = float(hist["Close"].iloc[-1])
-                            method = "history"
-                    except Exception as e:
-                        logger.debug(f"[Stocks] {ticker} history falló: {e}")
-
-                # Capa 3: HTTP directo (bypass yfinance — mejor en Docker)
-                if not price or price <= 0:
-                    price = _fetch_stock_price_http(ticker)
-                    if price:
-                        method = "http_directo"
-
-                # Capa 4: Stooq CSV (mejor fallback para ETFs desde Docker)
-                if not price or price <= 0:
-                    price = _fetch_stock_price_stooq(ticker)
-                    if price:
-                        method = "stooq"
+                        break
 
                 # Guardar resultado
                 if price and price > 0:
-                    source_tag = "stooq" if method == "stooq" else f"yahoo_{method}"
                     _upsert_price(db, ticker, float(price), source_tag)
                     updated += 1
-                    logger.info(f"[Stocks] {ticker} = ${price:.4f} (via {method})")
+                    logger.info(f"[Stocks] {ticker} = ${price:.4f} (via {source})")
                 else:
                     logger.warning(
-                        f"[Stocks] {ticker}: sin precio tras 4 intentos — "
-                        "posible bloqueo de red o ticker inválido"
+                        f"[Stocks] {ticker}: sin precio — "
+                        + ", ".join(f"{s}={r}" for s, r in resultados.items())
                     )
+                    source_health.record_outcome(ticker, resultados)
 
             except Exception as e:
                 logger.warning(f"[Stocks] Error inesperado con {ticker}: {e}")
@@ -345,10 +397,23 @@ def job_update_stock_prices() -> None:
 
     except Exception as e:
         logger.error(f"[Stocks] Error crítico en job_update_stock_prices: {e}")
+        metrics.job_failed()
     finally:
         db.close()
 
 
+@metrics.track_job("fx_backfill")
+def job_backfill_fx() -> None:
+    """Completa la serie diaria USD/PEN con el histórico del BCRP (services/fx_history.py)."""
+    try:
+        with SessionLocal() as db:
+            fx_history.backfill(db)
+    except Exception as e:
+        logger.warning(f"[FX] No se pudo completar la serie histórica: {e}")
+        metrics.job_failed()
+
+
+@metrics.track_job("auto_snapshot")
 def job_auto_snapshot() -> None:
     """
     Genera snapshot automático del portafolio al cierre de cada mes.
@@ -398,12 +463,14 @@ def job_auto_snapshot() -> None:
                 "value_usd": round(value, 2),
             })
 
-        total_pen = round(total_usd * _exchange_rate, 2)
+        # Tasa del día según la serie histórica (no el global, que arranca en 3.72)
+        rate      = fx_history.rate_on(db, now.date())
+        total_pen = round(total_usd * rate, 2)
         snap = models.PortfolioSnapshot(
             date          = f"{date_str} 23:00",
             total_usd     = round(total_usd, 2),
             total_pen     = total_pen,
-            exchange_rate = _exchange_rate,
+            exchange_rate = rate,
             detail        = detail,
         )
         db.add(snap)
@@ -415,6 +482,7 @@ def job_auto_snapshot() -> None:
 
     except Exception as e:
         logger.error(f"[AutoSnapshot] Error generando snapshot automático: {e}")
+        metrics.job_failed()
     finally:
         db.close()
 
@@ -444,7 +512,7 @@ def get_cached_prices(db: Session) -> dict:
 
     return {
         "prices":        prices,
-        "exchange_rate": _exchange_rate,
+        "exchange_rate": get_exchange_rate(db),
         "last_updated":  oldest.isoformat() if oldest else None,
         "count":         len(prices),
     }
@@ -452,17 +520,167 @@ def get_cached_prices(db: Session) -> dict:
 
 def refresh_all_now() -> dict:
     """
-    Actualización manual inmediata de todos los precios.
-    Llamado por POST /investments/prices/refresh
+    Actualización inmediata y síncrona de todos los precios (las tres fuentes
+    en paralelo). El endpoint usa request_refresh(), que no bloquea.
     """
-    job_update_exchange_rate()
-    job_update_crypto_prices()
-    job_update_stock_prices()
+    _run_sources()
     return {"message": "Actualización completada", "timestamp": now_lima().isoformat()}
 
 
-def get_exchange_rate() -> float:
-    return _exchange_rate
+# ═══════════════════════════════════════════════════════════════
+# REFRESH MANUAL: COALESCIDO Y EN SEGUNDO PLANO
+# ═══════════════════════════════════════════════════════════════
+# POST /investments/prices/refresh responde de inmediato con un refresh_id.
+# Si ya hay uno en curso (en cualquier worker: el lock es un lease en la BD)
+# el request se une a ese en vez de lanzar otro. Las tres fuentes corren en
+# paralelo y cada avance se publica en el bus de eventos (tópico
+# "prices.refresh"), que los clientes siguen por SSE.
+# Si el proceso que lo corría murió, la fila queda en "running": al leerla
+# pasado REFRESH_TTL se marca "expired" y se publica el evento final.
+
+REFRESH_LEASE = "price_refresh"
+REFRESH_TTL   = float(os.getenv("PRICE_REFRESH_TTL", "120"))   # tope de duración de un refresh (s)
+REFRESH_TOPIC = "prices.refresh"
+
+_FUENTES = {
+    "exchange_rate": job_update_exchange_rate,
+    "crypto":        job_update_crypto_prices,
+    "stocks":        job_update_stock_prices,
+}
+
+
+def _run_source(nombre: str, fn, refresh_id: Optional[str]) -> dict:
+    t0 = time.perf_counter()
+    error = None
+    try:
+        fn()
+        status = "error" if metrics.last_job_failed() else "ok"
+    except Exception as e:       # los jobs ya atrapan sus errores; por si acaso
+        status, error = "error", str(e)
+    res = {"status": status, "ms": round((time.perf_counter() - t0) * 1000, 1), "error": error}
+    if refresh_id:
+        event_bus.publish(REFRESH_TOPIC, {"refresh_id": refresh_id, "source": nombre, **res})
+    return res
+
+
+def _run_sources(refresh_id: Optional[str] = None) -> dict:
+    """Ejecuta las tres fuentes en paralelo. Retorna {fuente: {status, ms, error}}."""
+    with ThreadPoolExecutor(max_workers=len(_FUENTES), thread_name_prefix="price_refresh") as pool:
+        futuros = {n: pool.submit(_run_source, n, fn, refresh_id) for n, fn in _FUENTES.items()}
+        return {n: f.result() for n, f in futuros.items()}
+
+
+def _refresh_worker(refresh_id: str) -> None:
+    t0 = time.perf_counter()
+    fuentes, status = {}, "error"
+    try:
+        fuentes = _run_sources(refresh_id)
+        status  = "done" if all(f["status"] == "ok" for f in fuentes.values()) else "partial"
+    except Exception as e:
+        logger.error(f"[Refresh] {refresh_id} falló: {e}", exc_info=True)
+    total_ms = round((time.perf_counter() - t0) * 1000, 1)
+    try:
+        db = SessionLocal()
+        try:
+            row = db.get(models.PriceRefresh, refresh_id)
+            if row:
+                row.status      = status
+                row.sources     = fuentes
+                row.total_ms    = total_ms
+                row.finished_at = datetime.utcnow()
+                db.commit()
+        finally:
+            db.close()
+        event_bus.publish(REFRESH_TOPIC, {
+            "refresh_id": refresh_id, "status": status, "sources": fuentes, "total_ms": total_ms,
+        })
+    finally:
+        scheduler_leader.release(engine, REFRESH_LEASE, refresh_id)
+    logger.info(f"[Refresh] {refresh_id} {status} en {total_ms:.0f} ms · " +
+                ", ".join(f"{n} {f['ms']:.0f} ms" for n, f in fuentes.items()))
+
+
+def request_refresh() -> dict:
+    """Inicia un refresh en segundo plano o se une al que está en curso."""
+    refresh_id = uuid.uuid4().hex[:12]
+    if scheduler_leader.acquire(engine, REFRESH_LEASE, refresh_id, REFRESH_TTL):
+        db = SessionLocal()
+        try:
+            db.add(models.PriceRefresh(id=refresh_id, status="running", sources={}))
+            db.commit()
+        finally:
+            db.close()
+        threading.Thread(target=_refresh_worker, args=(refresh_id,), name=f"refresh-{refresh_id}", daemon=True).start()
+        return {"refresh_id": refresh_id, "status": "running", "joined": False}
+
+    actual = scheduler_leader.current_holder(engine, REFRESH_LEASE)
+    if actual is None:                       # terminó justo entre ambas consultas
+        return request_refresh()
+    en_curso = actual["holder"]
+    db = SessionLocal()
+    try:
+        row = db.get(models.PriceRefresh, en_curso)
+        if row:
+            row.joined = (row.joined or 0) + 1
+            db.commit()
+    finally:
+        db.close()
+    return {"refresh_id": en_curso, "status": "running", "joined": True}
+
+
+def _expirar_refresh(db: Session, row: models.PriceRefresh) -> None:
+    """
+    Marca "expired" un refresh que sigue en "running" pasado REFRESH_TTL (su
+    worker murió sin escribir el resultado) y publica el evento final. El
+    UPDATE condicional hace que lo publique un solo lector.
+    """
+    if row.status != "running" or row.requested_at is None:
+        return
+    if datetime.utcnow() - row.requested_at <= timedelta(seconds=REFRESH_TTL):
+        return
+    ahora = datetime.utcnow()
+    n = (
+        db.query(models.PriceRefresh)
+        .filter(models.PriceRefresh.id == row.id, models.PriceRefresh.status == "running")
+        .update({"status": "expired", "finished_at": ahora}, synchronize_session=False)
+    )
+    db.commit()
+    db.refresh(row)
+    if n:
+        logger.warning(f"[Refresh] {row.id} sin resultado tras {REFRESH_TTL:.0f} s: expirado")
+        event_bus.publish(REFRESH_TOPIC, {
+            "refresh_id": row.id, "status": "expired", "sources": row.sources or {}, "total_ms": None,
+        })
+
+
+def get_refresh(refresh_id: str) -> Optional[dict]:
+    """Estado de un refresh (None si no existe)."""
+    db = SessionLocal()
+    try:
+        row = db.get(models.PriceRefresh, refresh_id)
+        if row is None:
+            return None
+        _expirar_refresh(db, row)
+        return {
+            "refresh_id":   row.id,
+            "status":       row.status,
+            "requested_at": row.requested_at.isoformat() if row.requested_at else None,
+            "finished_at":  row.finished_at.isoformat() if row.finished_at else None,
+            "joined":       row.joined or 0,
+            "sources":      row.sources or {},
+            "total_ms":     row.total_ms,
+        }
+    finally:
+        db.close()
+
+
+def get_exchange_rate(db: Session) -> float:
+    """
+    Tipo de cambio USD→PEN vigente, leído de ExchangeRateLog: con elección de
+    líder los demás workers nunca corren job_update_exchange_rate y su
+    _exchange_rate se quedaría en el valor inicial.
+    """
+    return fx_history.latest_rate(db)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -506,6 +724,15 @@ def start_scheduler() -> None:
         next_run_time=datetime.now(),   # ejecutar inmediatamente al arrancar
     )
 
+    # Serie histórica USD/PEN: huecos rellenados desde el BCRP, una vez al día
+    _scheduler.add_job(
+        job_backfill_fx,
+        trigger=CronTrigger(hour=6, minute=0),
+        id="fx_backfill",
+        replace_existing=True,
+        next_run_time=datetime.now(),   # ejecutar inmediatamente al arrancar
+    )
+
     # Snapshot automático: todos los días a las 23:00
     _scheduler.add_job(
         job_auto_snapshot,
@@ -515,7 +742,7 @@ def start_scheduler() -> None:
     )
 
     _scheduler.start()
-    logger.info("✅ Price Scheduler iniciado — crypto/4h · stocks/6h · TC/1h · snapshot/fin-mes")
+    logger.info("✅ Price Scheduler iniciado — crypto/4h · stocks/6h · TC/1h · FX/1d · snapshot/fin-mes")
 
 
 def stop_scheduler() -> None:
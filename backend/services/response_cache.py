@@ -0,0 +1,108 @@
+"""
+FinanzasOS — services/response_cache.py
+Cache en memoria (LRU) de respuestas JSON de analytics, invalidado por versión.
+
+Igual que pdf_cache, la clave incluye las versiones de datos
+(services/data_version.py) de los ámbitos de los que depende la respuesta:
+cualquier escritura sobre esos ámbitos cambia la clave y la entrada vieja
+simplemente deja de usarse hasta que el LRU la desaloja. No hace falta
+invalidar explícitamente.
+
+Los valores cacheados se comparten entre requests: el llamador NO debe
+mutarlos.
+
+Configuración (variables de entorno):
+    RESPONSE_CACHE_MAX  número máximo de entradas  (default 512; 0 = deshabilitado)
+
+Uso:
+    from services import response_cache
+    data = response_cache.get_or_compute(
+        db, "heatmap", {"period": period}, [f"transactions:{period}"],
+        lambda: _calcular_heatmap(db, period),
+    )
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Iterable
+
+from sqlalchemy.orm import Session
+
+from services import data_version
+
+logger = logging.getLogger("response_cache")
+
+RESPONSE_CACHE_MAX = int(os.getenv("RESPONSE_CACHE_MAX", "512"))
+
+_lock    = threading.Lock()
+_entries: "OrderedDict[str, Any]" = OrderedDict()
+_stats   = {"hits": 0, "misses": 0, "evictions": 0}
+_por_endpoint: dict[str, dict] = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+
+def enabled() -> bool:
+    """False si RESPONSE_CACHE_MAX = 0 (cache deshabilitado)."""
+    return RESPONSE_CACHE_MAX > 0
+
+
+def key_for(db: Session, name: str, params: dict, scopes: Iterable[str]) -> str:
+    """Clave del endpoint `name` con sus parámetros y las versiones actuales de `scopes`."""
+    versions = data_version.get_versions(db, scopes)
+    return f"{name}:{data_version.fingerprint(name, params, versions)}"
+
+
+def get_or_compute(
+    db: Session,
+    name: str,
+    params: dict,
+    scopes: Iterable[str],
+    compute: Callable[[], Any],
+) -> Any:
+    """
+    Devuelve la respuesta cacheada para (name, params, versiones de scopes)
+    o la calcula con compute() y la guarda.
+    """
+    if not enabled():
+        return compute()
+
+    key = key_for(db, name, params, scopes)
+    with _lock:
+        if key in _entries:
+            _entries.move_to_end(key)
+            _stats["hits"] += 1
+            _por_endpoint[name]["hits"] += 1
+            return _entries[key]
+        _stats["misses"] += 1
+        _por_endpoint[name]["misses"] += 1
+
+    value = compute()
+
+    with _lock:
+        _entries[key] = value
+        _entries.move_to_end(key)
+        while len(_entries) > RESPONSE_CACHE_MAX:
+            _entries.popitem(last=False)
+            _stats["evictions"] += 1
+    return value
+
+
+def _hit_rate(c: dict) -> float:
+    total = c["hits"] + c["misses"]
+    return round(c["hits"] / total, 3) if total else 0.0
+
+
+def stats() -> dict:
+    """Aciertos / fallos / desalojos, tasa de acierto (global y por endpoint) y tamaño."""
+    with _lock:
+        return {
+            **_stats,
+            "hit_rate":    _hit_rate(_stats),
+            "entries":     len(_entries),
+            "max_entries": RESPONSE_CACHE_MAX,
+            "endpoints":   {
+                name: {**c, "hit_rate": _hit_rate(c)}
+                for name, c in sorted(_por_endpoint.items())
+            },
+        }
@@ -16,6 +16,7 @@ from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 
 from services.gemini_service import GeminiService, GeminiQuotaExceeded, GeminiError
+from services import metrics
 from utils.timezone_utils import now_lima
 
 logger = logging.getLogger("resumen_service")
@@ -324,10 +325,12 @@ INGRESO MENSUAL CONFIGURADO: S/ {income_configured:,.2f}
 
     except GeminiQuotaExceeded as e:
         logger.warning(f"[Resumen] Cuota agotada: {e}. Generando resumen local.")
+        metrics.GEMINI_FALLBACKS.labels("resumen", "quota").inc()
         return _generar_resumen_local(period, datos, datos_anterior, db)
 
     except (GeminiError, json.JSONDecodeError) as e:
         logger.error(f"[Resumen] Error Gemini/JSON: {e}. Generando resumen local.")
+        metrics.GEMINI_FALLBACKS.labels("resumen", "error").inc()
         return _generar_resumen_local(period, datos, datos_anterior, db)
 
     except Exception as e:
@@ -0,0 +1,233 @@
+"""
+FinanzasOS — services/scheduler_leader.py
+Elección de líder para los schedulers cuando uvicorn corre con varios workers.
+
+Con `--workers N` cada proceso ejecuta el lifespan: sin coordinación, los
+jobs de precios, el snapshot automático, el resumen de fin de mes y la
+notificación de Telegram correrían N veces (y las escrituras en SQLite
+competirían). Aquí los procesos compiten por un lease en la tabla
+scheduler_leases:
+
+    - Un hilo por proceso intenta tomar / renovar el lease cada
+      SCHEDULER_LEASE_RENEW segundos. La toma es un UPDATE condicional
+      (libre, vencido o ya mío), atómico en la BD.
+    - Quien lo obtiene arranca los schedulers (on_elected); el resto solo
+      atiende HTTP.
+    - Si el líder no puede renovar (otro proceso lo tomó, o la BD no respondió
+      hasta vencer el lease) detiene sus schedulers (on_demoted).
+    - Si el líder muere, el lease vence a los SCHEDULER_LEASE_TTL segundos y
+      otro worker lo toma. Al apagarse de forma ordenada lo libera de
+      inmediato.
+
+Configuración (variables de entorno):
+    SCHEDULER_LEADER_ELECTION  1 = activo; 0 = cada proceso corre sus jobs   (default 1)
+    SCHEDULER_LEASE_TTL        vigencia del lease en segundos                 (default 30)
+    SCHEDULER_LEASE_RENEW      intervalo de renovación en segundos            (default 10)
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+from sqlalchemy import insert, or_, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+import models
+from services import metrics
+
+logger = logging.getLogger("scheduler_leader")
+
+SCHEDULER_LEADER_ELECTION = os.getenv("SCHEDULER_LEADER_ELECTION", "1") == "1"
+SCHEDULER_LEASE_TTL       = float(os.getenv("SCHEDULER_LEASE_TTL", "30"))
+SCHEDULER_LEASE_RENEW     = float(os.getenv("SCHEDULER_LEASE_RENEW", "10"))
+
+LEASE_NAME = "scheduler"
+_lease     = models.SchedulerLease.__table__
+
+
+# ═══════════════════════════════════════════════════════════════
+# LEASES CON NOMBRE
+# ═══════════════════════════════════════════════════════════════
+# También sirven como lock entre workers para operaciones puntuales
+# (ej. el refresh manual de precios: services/price_service.py).
+
+def acquire(engine: Engine, name: str, holder: str, ttl: float) -> bool:
+    """Toma o renueva el lease `name` para `holder` (libre, vencido o ya suyo)."""
+    now = time.time()
+    with engine.begin() as conn:
+        res = conn.execute(
+            update(_lease)
+            .where(_lease.c.name == name)
+            .where(or_(_lease.c.holder == holder, _lease.c.expires_at < now))
+            .values(holder=holder, expires_at=now + ttl, renewed_at=now)
+        )
+        if res.rowcount:
+            return True
+    # Primera vez: la fila aún no existe
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(_lease).values(
+                name=name, holder=holder, expires_at=now + ttl, renewed_at=now,
+            ))
+        return True
+    except IntegrityError:
+        return False        # otro proceso la creó primero
+
+
+def release(engine: Engine, name: str, holder: str) -> None:
+    """Libera el lease `name` si lo tiene `holder`."""
+    with engine.begin() as conn:
+        conn.execute(
+            update(_lease)
+            .where(_lease.c.name == name, _lease.c.holder == holder)
+            .values(expires_at=0.0)
+        )
+
+
+def current_holder(engine: Engine, name: str) -> Optional[dict]:
+    """Titular vigente del lease `name` ({holder, expires_in_s}) o None si está libre."""
+    with engine.connect() as conn:
+        row = conn.execute(_lease.select().where(_lease.c.name == name)).mappings().first()
+    now = time.time()
+    if row and row["expires_at"] > now:
+        return {"holder": row["holder"], "expires_in_s": round(row["expires_at"] - now, 1)}
+    return None
+
+
+class LeaderElector:
+    """Hilo de elección/renovación de un lease con nombre."""
+
+    def __init__(
+        self,
+        engine:      Engine,
+        on_elected:  Callable[[], None],
+        on_demoted:  Callable[[], None],
+        name:        str   = LEASE_NAME,
+        ttl:         float = SCHEDULER_LEASE_TTL,
+        renew_every: float = SCHEDULER_LEASE_RENEW,
+    ):
+        self.engine      = engine
+        self.on_elected  = on_elected
+        self.on_demoted  = on_demoted
+        self.name        = name
+        self.ttl         = ttl
+        self.renew_every = renew_every
+        self.holder      = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader   = False
+        self._stop       = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ── Operaciones sobre el lease ───────────────────────────
+
+    def try_acquire(self) -> bool:
+        """Toma o renueva el lease. True si este proceso queda como líder."""
+        return acquire(self.engine, self.name, self.holder, self.ttl)
+
+    def release(self) -> None:
+        """Libera el lease (si es mío) para que otro worker lo tome sin esperar el TTL."""
+        release(self.engine, self.name, self.holder)
+
+    # ── Bucle ─────────────────────────────────────────────────
+
+    def _tick(self, ultimo_ok: float) -> float:
+        try:
+            ganado = self.try_acquire()
+            ultimo_ok = time.time()
+        except Exception as e:
+            logger.warning(f"[Leader] Error renovando el lease: {e}")
+            # Sin BD no se sabe si otro tomó el lease: conservarlo solo mientras no venza
+            ganado = self.is_leader and (time.time() - ultimo_ok) < self.ttl
+
+        if ganado and not self.is_leader:
+            self.is_leader = True
+            logger.info(f"[Leader] {self.holder} es líder del scheduler")
+            self._safe(self.on_elected)
+        elif not ganado and self.is_leader:
+            self.is_leader = False
+            logger.warning(f"[Leader] {self.holder} perdió el lease — deteniendo jobs")
+            self._safe(self.on_demoted)
+        return ultimo_ok
+
+    def _run(self) -> None:
+        ultimo_ok = time.time()
+        while not self._stop.is_set():
+            ultimo_ok = self._tick(ultimo_ok)
+            self._stop.wait(self.renew_every)
+
+    def _safe(self, fn: Callable[[], None]) -> None:
+        try:
+            fn()
+        except Exception as e:
+            logger.error(f"[Leader] Error en callback {getattr(fn, '__name__', fn)}: {e}", exc_info=True)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        # Primer intento síncrono: con un solo worker los jobs arrancan junto con la app
+        self._tick(time.time())
+        self._thread = threading.Thread(target=self._run, name="scheduler-leader", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.renew_every + 1)
+        if self.is_leader:
+            self.is_leader = False
+            self._safe(self.on_demoted)
+            try:
+                self.release()
+            except Exception as e:
+                logger.warning(f"[Leader] No se pudo liberar el lease: {e}")
+
+
+# ═══════════════════════════════════════════════════════════════
+# API DEL MÓDULO (usada por main.lifespan)
+# ═══════════════════════════════════════════════════════════════
+
+_elector: Optional[LeaderElector] = None
+
+
+def start(engine: Engine, on_elected: Callable[[], None], on_demoted: Callable[[], None]) -> None:
+    """Arranca la elección; sin SCHEDULER_LEADER_ELECTION ejecuta on_elected directamente."""
+    global _elector
+    if not SCHEDULER_LEADER_ELECTION:
+        on_elected()
+        return
+    _elector = LeaderElector(engine, on_elected, on_demoted)
+    _elector.start()
+
+
+def stop(on_demoted: Callable[[], None]) -> None:
+    global _elector
+    if _elector is None:
+        on_demoted()
+        return
+    _elector.stop()
+    _elector = None
+
+
+def status() -> dict:
+    """Estado de liderazgo de este proceso y el titular actual del lease."""
+    if _elector is None:
+        return {"election": SCHEDULER_LEADER_ELECTION, "leader": not SCHEDULER_LEADER_ELECTION, "holder": None}
+    out = {"election": True, "leader": _elector.is_leader, "holder": _elector.holder, "lease": None}
+    try:
+        out["lease"] = current_holder(_elector.engine, _elector.name)
+    except Exception as e:
+        logger.warning(f"[Leader] No se pudo leer el lease: {e}")
+    return out
+
+
+def _metrics():
+    leader = 1 if (_elector.is_leader if _elector else not SCHEDULER_LEADER_ELECTION) else 0
+    yield "scheduler_is_leader", "gauge", "1 si este proceso ejecuta los jobs del scheduler.", [({}, leader)]
+
+
+metrics.register_collector(_metrics)
@@ -0,0 +1,196 @@
+"""
+FinanzasOS — services/search_service.py
+Búsqueda de texto completo sobre transacciones con SQLite FTS5.
+
+La tabla virtual transactions_fts indexa description, category y account
+como "external content" de transactions (no duplica el texto) y se mantiene
+sincronizada con triggers AFTER INSERT / UPDATE / DELETE. Al ser triggers
+de la base, también cubren los DELETE masivos y las escrituras fuera del ORM.
+
+Sintaxis de búsqueda (la entrada del usuario nunca llega cruda a MATCH):
+    tambo                 prefijo en cualquier columna (tambo, tambo+, …)
+    izi*rappi             comercio compuesto: tokens consecutivos ("izi rappi"*)
+    "pago luz"            frase exacta
+    comercio:rappi        solo en la descripción   (alias: desc, descripcion)
+    categoria:comida      solo en la categoría     (alias: cat)
+    cuenta:bcp            solo en la cuenta
+Los términos se combinan con AND. Acentos y mayúsculas se ignoran.
+
+Si la base no es SQLite o no tiene FTS5, search() cae a LIKE (más lento
+pero equivalente para el usuario).
+"""
+
+import logging
+import re
+
+from sqlalchemy import column, literal_column, or_, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+import models
+
+logger = logging.getLogger("search_service")
+
+FTS_TABLE = "transactions_fts"
+
+# Peso BM25 por columna (description, category, account)
+_BM25 = "bm25(transactions_fts, 10.0, 3.0, 1.0)"
+
+_COLUMNAS = {
+    "comercio":    "description",
+    "desc":        "description",
+    "descripcion": "description",
+    "categoria":   "category",
+    "cat":         "category",
+    "cuenta":      "account",
+}
+
+_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        description, category, account,
+        content='transactions', content_rowid='id',
+        tokenize="unicode61 remove_diacritics 2",
+        prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_ai AFTER INSERT ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, description, category, account)
+        VALUES (new.id, new.description, new.category, new.account);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_ad AFTER DELETE ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description, category, account)
+        VALUES ('delete', old.id, old.description, old.category, old.account);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_au AFTER UPDATE OF description, category, account ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description, category, account)
+        VALUES ('delete', old.id, old.description, old.category, old.account);
+        INSERT INTO {FTS_TABLE}(rowid, description, category, account)
+        VALUES (new.id, new.description, new.category, new.account);
+    END""",
+]
+
+_fts_ok = False
+
+
+# ═══════════════════════════════════════════════════════════════
+# ÍNDICE
+# ═══════════════════════════════════════════════════════════════
+
+def ensure_index(engine: Engine) -> bool:
+    """
+    Crea la tabla FTS5 y sus triggers si no existen. La primera vez indexa
+    el historial existente ('rebuild'). Retorna False si FTS5 no está disponible.
+    """
+    global _fts_ok
+    if engine.dialect.name != "sqlite":
+        logger.info("[Search] Base no SQLite — búsqueda por LIKE")
+        return False
+    try:
+        with engine.begin() as conn:
+            existia = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:n"),
+                {"n": FTS_TABLE},
+            ).first() is not None
+            for ddl in _DDL:
+                conn.execute(text(ddl))
+            if not existia:
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+                logger.info("[Search] Índice FTS5 creado e indexado")
+    except Exception as e:
+        logger.warning(f"[Search] FTS5 no disponible ({e}) — búsqueda por LIKE")
+        return False
+    _fts_ok = True
+    return True
+
+
+# ═══════════════════════════════════════════════════════════════
+# CONSULTA
+# ═══════════════════════════════════════════════════════════════
+
+_TERMINO = re.compile(r'(?:(\w+):)?(?:"([^"]*)"|(\S+))')
+
+
+def parse_query(q: str) -> list[tuple[str | None, list[str], bool]]:
+    """
+    Descompone la búsqueda en términos (columna | None, tokens, es_prefijo).
+    Los tokens son solo caracteres de palabra: nada de sintaxis FTS5 del usuario.
+    """
+    terminos = []
+    for m in _TERMINO.finditer(q or ""):
+        campo, frase, palabra = m.group(1), m.group(2), m.group(3)
+        col = _COLUMNAS.get(campo.lower()) if campo else None
+        if campo and col is None:
+            # "x:y" con campo desconocido → se busca el texto completo
+            palabra = f"{campo} {palabra or frase or ''}"
+            frase   = None
+        tokens = re.findall(r"\w+", frase if frase is not None else palabra or "")
+        if tokens:
+            terminos.append((col, tokens, frase is None))
+    return terminos
+
+
+def _fts_expr(terminos) -> str:
+    partes = []
+    for col, tokens, prefijo in terminos:
+        frase = '"' + " ".join(tokens) + '"' + ("*" if prefijo else "")
+        partes.append(f"{col} : {frase}" if col else frase)
+    return " AND ".join(partes)
+
+
+def _like_filter(terminos):
+    conds = []
+    for col, tokens, _ in terminos:
+        patron = "%" + "%".join(tokens) + "%"
+        cols   = [getattr(models.Transaction, col)] if col else [
+            models.Transaction.description, models.Transaction.category, models.Transaction.account,
+        ]
+        conds.append(or_(*(c.ilike(patron) for c in cols)))
+    return conds
+
+
+def search(
+    db: Session,
+    q: str,
+    desde: str | None = None,
+    hasta: str | None = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> tuple[int, list]:
+    """
+    Transacciones que coinciden con `q`, ordenadas por relevancia (BM25) y
+    luego por fecha descendente. desde/hasta aceptan YYYY-MM o YYYY-MM-DD.
+    Retorna (total, página de models.Transaction). ValueError si q no tiene términos.
+    """
+    terminos = parse_query(q)
+    if not terminos:
+        raise ValueError("La búsqueda no contiene términos válidos.")
+
+    T     = models.Transaction
+    query = db.query(T)
+    if _fts_ok:
+        fts   = table(FTS_TABLE, column("rowid"))
+        query = (
+            query.join(fts, fts.c.rowid == T.id)
+            .filter(text(f"{FTS_TABLE} MATCH :match"))
+            .params(match=_fts_expr(terminos))
+        )
+        orden = [literal_column(_BM25), T.date.desc(), T.id.desc()]
+    else:
+        query = query.filter(*_like_filter(terminos))
+        orden = [T.date.desc(), T.id.desc()]
+
+    if desde:
+        query = query.filter(T.date >= desde)
+    if hasta:
+        # 'YYYY-MM' incluye todo el mes
+        query = query.filter(T.date <= hasta if len(hasta) > 7 else T.period <= hasta)
+
+    if _fts_ok and not (desde or hasta):
+        # Sin filtro de fechas el total sale del índice, sin tocar transactions
+        total = db.execute(
+            text(f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"),
+            {"match": _fts_expr(terminos)},
+        ).scalar()
+    else:
+        total = query.order_by(None).count()
+    items = query.order_by(*orden).limit(limit).offset(offset).all()
+    return total, items
@@ -0,0 +1,183 @@
+"""
+FinanzasOS — services/source_health.py
+Salud de las fuentes de precios: circuit breaker por fuente y caché
+negativa por ticker.
+
+Cuando Yahoo bloquea el contenedor, cada ticker pagaba de nuevo los
+timeouts de yfinance, del HTTP directo y de Stooq. Aquí:
+
+    - Cada fuente (yf_fast_info, yf_history, yahoo_http, stooq) tiene su
+      breaker (services/circuit_breaker.py). PRICE_SOURCE_FAILURES errores
+      seguidos lo abren y la fuente se salta sin tocar la red. Vencido el
+      plazo, una sola consulta hace de sonda (half-open).
+    - Una fuente que responde "no hay datos para ese símbolo" NO cuenta
+      como fallo: está viva, el problema es el ticker.
+    - Un ticker al que PRICE_NEGATIVE_MIN_MISSES fuentes respondieron "sin datos"
+      (y ninguna dio precio) queda en caché negativa PRICE_NEGATIVE_TTL_S y no se
+      vuelve a consultar hasta que venza.
+
+Cada función de fuente retorna (precio, resultado) con resultado:
+    "ok"     precio obtenido
+    "miss"   la fuente respondió, pero sin precio para ese ticker
+    "error"  timeout, bloqueo, 401/403/429/5xx… (cuenta para el breaker)
+
+Configuración (variables de entorno):
+    PRICE_SOURCE_FAILURES      errores seguidos que abren una fuente     (default 3)
+    PRICE_SOURCE_RESET_S       espera antes de la sonda half-open        (default 300)
+    PRICE_SOURCE_RESET_MAX_S   tope del backoff de la sonda              (default 21600)
+    PRICE_NEGATIVE_TTL_S       vigencia de la caché negativa por ticker  (default 86400)
+    PRICE_NEGATIVE_MIN_MISSES  fuentes con "sin datos" para cachear      (default 2)
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from services import metrics
+from services.circuit_breaker import CLOSED, HALF_OPEN, CircuitBreaker, CircuitOpenError
+
+logger = logging.getLogger("source_health")
+
+PRICE_SOURCE_FAILURES     = int(os.getenv("PRICE_SOURCE_FAILURES", "3"))
+PRICE_SOURCE_RESET_S      = float(os.getenv("PRICE_SOURCE_RESET_S", "300"))
+PRICE_SOURCE_RESET_MAX_S  = float(os.getenv("PRICE_SOURCE_RESET_MAX_S", "21600"))
+PRICE_NEGATIVE_TTL_S      = float(os.getenv("PRICE_NEGATIVE_TTL_S", "86400"))
+PRICE_NEGATIVE_MIN_MISSES = int(os.getenv("PRICE_NEGATIVE_MIN_MISSES", "2"))
+
+OK, MISS, ERROR, SKIPPED = "ok", "miss", "error", "skipped"
+
+
+# ═══════════════════════════════════════════════════════════════
+# BREAKERS POR FUENTE
+# ═══════════════════════════════════════════════════════════════
+
+_breakers: dict[str, CircuitBreaker] = {}
+_lock = threading.Lock()
+
+
+def breaker(source: str) -> CircuitBreaker:
+    with _lock:
+        cb = _breakers.get(source)
+        if cb is None:
+            cb = _breakers[source] = CircuitBreaker(
+                source,
+                failure_threshold=PRICE_SOURCE_FAILURES,
+                reset_timeout=PRICE_SOURCE_RESET_S,
+                max_reset_timeout=PRICE_SOURCE_RESET_MAX_S,
+            )
+        return cb
+
+
+def run(source: str, fn: Callable[[str], tuple[Optional[float], str]], ticker: str) -> tuple[Optional[float], str]:
+    """Consulta `ticker` en `source` pasando por su breaker. Retorna (precio, resultado)."""
+    cb = breaker(source)
+    if not cb.allow():
+        return None, SKIPPED
+    try:
+        price, resultado = fn(ticker)
+    except CircuitOpenError as e:
+        # El host de la fuente está en corte (services/http_client.py)
+        price, resultado = None, ERROR
+        cb.record_failure(str(e))
+    except Exception as e:
+        logger.debug(f"[Fuentes] {source}/{ticker} falló: {e}")
+        price, resultado = None, ERROR
+        cb.record_failure(f"{type(e).__name__}: {str(e)[:120]}")
+    else:
+        if resultado == ERROR:
+            cb.record_failure(f"sin respuesta útil para {ticker}")
+        else:
+            cb.record_success()
+    if resultado == ERROR and cb.state != CLOSED:
+        logger.warning(f"[Fuentes] {source} en corte — se salta por {cb.retry_in():.0f}s")
+    return price, resultado
+
+
+# ═══════════════════════════════════════════════════════════════
+# CACHÉ NEGATIVA POR TICKER
+# ═══════════════════════════════════════════════════════════════
+
+# ticker → {"until": epoch, "since": epoch, "sources": [...]}
+_negative: dict[str, dict] = {}
+
+
+def is_unresolvable(ticker: str) -> bool:
+    with _lock:
+        entry = _negative.get(ticker)
+        if entry and entry["until"] <= time.time():
+            del _negative[ticker]
+            entry = None
+    return entry is not None
+
+
+def record_outcome(ticker: str, resultados: dict[str, str]) -> None:
+    """
+    Registra el resultado de todas las fuentes para `ticker` tras una
+    pasada sin precio: si bastantes dijeron "sin datos", va a caché negativa.
+    """
+    misses = [s for s, r in resultados.items() if r == MISS]
+    if len(misses) < PRICE_NEGATIVE_MIN_MISSES:
+        return
+    now = time.time()
+    with _lock:
+        _negative[ticker] = {"until": now + PRICE_NEGATIVE_TTL_S, "since": now, "sources": misses}
+    logger.warning(
+        f"[Fuentes] {ticker} sin datos en {', '.join(misses)} — "
+        f"se omite por {PRICE_NEGATIVE_TTL_S / 3600:.0f}h"
+    )
+
+
+def forget(ticker: Optional[str] = None) -> None:
+    """Saca `ticker` (o todos) de la caché negativa."""
+    with _lock:
+        if ticker is None:
+            _negative.clear()
+        else:
+            _negative.pop(ticker, None)
+
+
+def reset() -> None:
+    """Breakers cerrados y caché negativa vacía (benchmarks / pruebas)."""
+    with _lock:
+        _breakers.clear()
+        _negative.clear()
+
+
+# ═══════════════════════════════════════════════════════════════
+# ESTADO (GET /investments/prices/schedule)
+# ═══════════════════════════════════════════════════════════════
+
+def status() -> dict:
+    with _lock:
+        fuentes = dict(_breakers)
+        negativos = {t: dict(e) for t, e in _negative.items()}
+    now = time.time()
+    return {
+        "sources": {s: cb.snapshot() for s, cb in sorted(fuentes.items())},
+        "unresolvable": {
+            t: {"retry_in_s": round(e["until"] - now), "sources": e["sources"]}
+            for t, e in sorted(negativos.items()) if e["until"] > now
+        },
+    }
+
+
+_ESTADO_NUM = {CLOSED: 0, HALF_OPEN: 1}
+
+
+def _metrics():
+    st = status()
+    yield (
+        "price_source_circuit_state", "gauge",
+        "Estado del breaker por fuente de precios (0 closed, 1 half_open, 2 open).",
+        [({"source": s}, _ESTADO_NUM.get(v["state"], 2)) for s, v in st["sources"].items()],
+    )
+    yield (
+        "price_unresolvable_tickers", "gauge",
+        "Tickers en caché negativa (ninguna fuente tiene datos).",
+        [({}, len(st["unresolvable"]))],
+    )
+
+
+metrics.register_collector(_metrics)
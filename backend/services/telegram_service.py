@@ -3,7 +3,7 @@ FinanzasOS — services/telegram_service.py
 F-01: Bot de Notificaciones Telegram
 
 Responsabilidades:
-  - Enviar mensajes via Telegram Bot API (httpx, sin dependencias extra)
+  - Enviar mensajes via Telegram Bot API (cliente compartido de services/http_client.py)
   - Job diario (APScheduler) que revisa eventos y envía alertas a las 8:00 AM Lima
   - Notificaciones de: vencimientos de tarjeta, servicios recurrentes, tasa de ahorro baja
 """
@@ -13,16 +13,19 @@ from datetime import datetime, date, timedelta
 from typing import Optional
 from utils.timezone_utils import now_lima, today_lima
 
-import httpx
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 
+from services import metrics, http_client
+
 logger = logging.getLogger("telegram_service")
 
 # ─── Scheduler dedicado ───────────────────────────────────────
 _scheduler: Optional[BackgroundScheduler] = None
 
-TELEGRAM_API = "https://api.telegram.org/bot{token}/sendMessage"
+# Base configurable (TELEGRAM_API_URL) para pruebas con benchmarks/fake_services.py
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
+TELEGRAM_API     = TELEGRAM_API_URL + "/bot{token}/sendMessage"
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -43,11 +46,12 @@ def send_message(text: str, token: str = None, chat_id: str = None,
 
     url = TELEGRAM_API.format(token=tok)
     try:
-        resp = httpx.post(url, json={
+        # POST sin reintentos: un reintento tras timeout podría duplicar el mensaje
+        resp = http_client.post(url, json={
             "chat_id":    cid,
             "text":       text,
             "parse_mode": parse_mode,
-        }, timeout=10)
+        })
         data = resp.json()
         if not data.get("ok"):
             logger.warning("Telegram API error: %s", data)
@@ -197,6 +201,7 @@ def build_low_savings_alert(period: str, tasa_ahorro: float, threshold: float =
 # 3. JOB DEL SCHEDULER — corre cada día a las 8:00 AM Lima
 # ═══════════════════════════════════════════════════════════════
 
+@metrics.track_job("telegram_daily")
 def _daily_notification_job():
     """
     Job principal del scheduler Telegram.
@@ -249,6 +254,7 @@ def _daily_notification_job():
 
     except Exception as e:
         logger.error("Error en job Telegram: %s", e, exc_info=True)
+        metrics.job_failed()
 
 
 # ═══════════════════════════════════════════════════════════════
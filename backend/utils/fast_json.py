@@ -0,0 +1,74 @@
+"""
+FinanzasOS — utils/fast_json.py
+Camino rápido (opt-in) de serialización JSON para respuestas grandes.
+
+FastAPI por defecto valida cada objeto ORM contra el response_model
+(Pydantic) y luego serializa con json. Para listados de miles de filas
+salidos directo de la BD (datos confiables, ya con los tipos correctos)
+ese trabajo se puede saltar:
+
+    1. rows_as_dicts(query): consulta solo columnas → tuplas → dicts, sin
+       instanciar objetos ORM ni modelos Pydantic.
+    2. FastJSONResponse: serializa con orjson (fallback a json si no está
+       instalado). Al devolver una Response directamente, FastAPI no aplica
+       la validación del response_model, que sigue sirviendo para OpenAPI.
+
+Uso:
+    from utils import fast_json
+
+    @app.get("/x", response_model=list[XOut])
+    def listar(db: Session = Depends(get_db)):
+        q = db.query(*fast_json.columns(models.X, XOut))
+        return fast_json.FastJSONResponse(fast_json.rows_as_dicts(q))
+"""
+
+import json
+from typing import Any
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+from sqlalchemy.orm import Query
+
+try:
+    import orjson
+except ImportError:          # dependencia opcional
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """JSON compacto en bytes. datetime/date → ISO 8601 con ambos backends."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_iso).encode("utf-8")
+
+
+def _iso(obj):
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    raise TypeError(f"{type(obj).__name__} no es serializable a JSON")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def columns(model, schema: type[BaseModel]) -> list:
+    """Columnas de `model` en el orden de los campos de `schema` (mismo JSON que el response_model)."""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def rows_as_dicts(query: Query) -> list[dict]:
+    """Ejecuta una consulta de columnas y devuelve cada fila como dict {columna: valor}."""
+    keys = [c["name"] for c in query.column_descriptions]
+    return [dict(zip(keys, row)) for row in query]
+
+
+def copy_headers(source: Response, *names: str) -> dict:
+    """
+    Cabeceras de la Response inyectada en el endpoint (ej. ETag) para pasarlas
+    a una Response devuelta directamente, que FastAPI no fusiona por sí solo.
+    """
+    return {n: source.headers[n] for n in names if n in source.headers}
@@ -0,0 +1,43 @@
+"""
+FinanzasOS — utils/http_cache.py
+Helpers de HTTP condicional: ETag + If-None-Match → 304 Not Modified.
+
+Uso:
+    from utils.http_cache import etag_matches, not_modified
+
+    etag = f'"{clave}"'
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+Para listados JSON (representación equivalente, no byte a byte) usar
+weak_etag(clave) → W/"clave".
+"""
+from fastapi import Request
+from fastapi.responses import Response
+
+
+def _opaque(tag: str) -> str:
+    """Quita el prefijo débil W/ para comparar (comparación débil, RFC 9110)."""
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True si el cliente ya tiene la representación identificada por `etag`."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = _opaque(etag)
+    return any(_opaque(t) == wanted for t in header.split(","))
+
+
+def not_modified(etag: str, headers: dict | None = None) -> Response:
+    """Respuesta 304 sin cuerpo, conservando el ETag."""
+    return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
+
+
+def weak_etag(key: str) -> str:
+    """ETag débil (W/) para representaciones semánticamente equivalentes."""
+    return f'W/"{key}"'
@@ -0,0 +1,42 @@
+"""
+FinanzasOS — utils/period_utils.py
+Aritmética de períodos contables en formato 'YYYY-MM'.
+
+Uso:
+    from utils.period_utils import shift_period, period_range, current_period
+
+    shift_period("2026-01", -1)            # '2025-12'
+    period_range("2025-11", "2026-01")     # ['2025-11', '2025-12', '2026-01']
+    current_period()                       # período actual según hora de Lima
+"""
+from utils.timezone_utils import now_lima
+
+
+def parse_period(period: str) -> tuple[int, int]:
+    """'YYYY-MM' → (año, mes). ValueError si el formato no es válido."""
+    if len(period) != 7 or period[4] != "-":
+        raise ValueError(f"Período inválido: {period!r} (formato YYYY-MM)")
+    y, m = int(period[:4]), int(period[5:7])
+    if not 1 <= m <= 12:
+        raise ValueError(f"Mes inválido en período {period!r}")
+    return y, m
+
+
+def shift_period(period: str, months: int) -> str:
+    """Desplaza un período `months` meses (negativo = hacia atrás)."""
+    y, m  = parse_period(period)
+    total = y * 12 + (m - 1) + months
+    return f"{total // 12}-{str(total % 12 + 1).zfill(2)}"
+
+
+def period_range(desde: str, hasta: str) -> list[str]:
+    """Períodos de `desde` a `hasta`, ambos inclusive (vacío si desde > hasta)."""
+    y, m   = parse_period(desde)
+    ye, me = parse_period(hasta)
+    n = (ye * 12 + me) - (y * 12 + m)
+    return [shift_period(desde, i) for i in range(n + 1)]
+
+
+def current_period() -> str:
+    """Período 'YYYY-MM' de hoy en America/Lima."""
+    return now_lima().strftime("%Y-%m")
@@ -83,6 +83,8 @@ export default function App({ onLogout }) {
   const [toast,             setToast]              = useState("");
   const [filterType,        setFilterType]         = useState("all");
   const [searchQ,           setSearchQ]            = useState("");
+  const [searchAll,         setSearchAll]          = useState(false);  // búsqueda en todo el historial (FTS5)
+  const [searchResults,     setSearchResults]      = useState([]);
   const [movTab,            setMovTab]             = useState("lista");
   const [showForm,          setShowForm]           = useState(false);
   const [showSettingsPanel, setShowSettingsPanel]  = useState(false);
@@ -102,6 +104,18 @@ export default function App({ onLogout }) {
 
   const showToast = (msg) => { setToast(msg); setTimeout(()=>setToast(""), 2800); };
 
+  // ── Búsqueda en todo el historial (debounce 250 ms) ────────
+  useEffect(()=>{
+    if (!searchAll || !searchQ.trim()) { setSearchResults([]); return; }
+    let vigente = true;
+    const timer = setTimeout(()=>{
+      api.searchTransactions({ q:searchQ, limit:200 })
+        .then(r=>{ if (vigente) setSearchResults(r.items); })
+        .catch(()=>{ if (vigente) setSearchResults([]); });
+    }, 250);
+    return ()=>{ vigente = false; clearTimeout(timer); };
+  }, [searchAll, searchQ, transactions]);
+
   // ── Derivados de settings ──────────────────────────────────
   const activeAccounts = settings
     ? settings.accounts.filter(a=>a.active).map(a=>a.name)
@@ -143,17 +157,17 @@ export default function App({ onLogout }) {
           setSnapshots(snaps);
         } catch(_) {}
 
-        const trendPeriods = availPeriods.slice(0,6).reverse();
         try {
-          const results = await Promise.all(
-            trendPeriods.map(p => api.getTransactions(p).then(txList => {
-              const m = calcMetrics(txList, prof?.income||0);
-              return { period:p, label:PERIOD_LABEL(p),
-                ingresos:m.ingresos, gastosFijos:m.gastosFijos,
-                gastosVariables:m.gastosVariables, deudas:m.deudas,
-                ahorros:m.ahorros, saldoNeto:m.saldoNeto };
-            }))
-          );
+          // Totales por mes agregados en el backend (un solo request, sin filas)
+          const tend = await api.getTendencia({ meses:6, to:availPeriods[0] });
+          const results = tend.periodos.map(t => {
+            const ingresos = t.ingresos || prof?.income || 0;
+            return { period:t.period, label:PERIOD_LABEL(t.period),
+              ingresos, gastosFijos:t.gastos_fijos,
+              gastosVariables:t.gastos_variables, deudas:t.deudas,
+              ahorros:t.ahorros,
+              saldoNeto: ingresos - (t.gastos_fijos + t.gastos_variables + t.deudas + t.ahorros) };
+          });
           setTrendData(results.filter(d=>d.ingresos>0||d.gastosFijos>0||d.gastosVariables>0));
         } catch(_) {}
 
@@ -173,6 +187,16 @@ export default function App({ onLogout }) {
     } catch(e) { showToast("Error cargando período: "+e.message); }
   }, []);
 
+  // ── Movimientos del período activo cambiados en otra pestaña / import (SSE) ──
+  useEffect(()=>{
+    if (!period) return;
+    const recargar = () => api.getTransactions(period).then(setTransactions).catch(()=>{});
+    return api.openStream({ topics:["transactions"], period }, {
+      transactions: recargar,
+      resync:       recargar,
+    });
+  }, [period]);
+
   // ── CRUD Transacciones ─────────────────────────────────────
   const addTx = async () => {
     if (!newTx.description || !newTx.amount) return;
@@ -284,11 +308,13 @@ export default function App({ onLogout }) {
     const actual=catMap[cat]?.amount||0; return bud>0&&actual/bud>=0.85;
   }).map(([cat,bud])=>({cat,pct:Math.round((catMap[cat]?.amount||0)/bud*100)}));
 
-  const filteredTxs = transactions
+  // Con "Todo el historial" los resultados vienen del backend ya ordenados por relevancia
+  const globalSearch = searchAll && !!searchQ.trim();
+  const filteredTxs = (globalSearch ? searchResults : transactions)
     .filter(t=>filterType==="all"||t.type===filterType)
     .filter(t=>filterAccount==="all"||t.account===filterAccount)  // OBS-07
-    .filter(t=>!searchQ||t.description.toLowerCase().includes(searchQ.toLowerCase()))
-    .sort((a,b)=>b.date.localeCompare(a.date));
+    .filter(t=>globalSearch||!searchQ||t.description.toLowerCase().includes(searchQ.toLowerCase()))
+    .sort((a,b)=>globalSearch?0:b.date.localeCompare(a.date));
 
   // ── Loading / Error ────────────────────────────────────────
   if (loading) return (
@@ -452,7 +478,7 @@ export default function App({ onLogout }) {
             {catData.length > 0 && (
               <div style={s.card}>
                 <p style={{color:"#555",fontSize:11,fontWeight:600,margin:"0 0 14px",letterSpacing:"0.5px"}}>MAPA DE GASTOS · {PERIOD_LABEL(period)}</p>
-                <GastoTreemap catData={catData} />
+                <GastoTreemap period={period} refreshKey={transactions} />
               </div>
             )}
 
@@ -560,7 +586,7 @@ export default function App({ onLogout }) {
               ))}
             </div>
             {movTab==="transferencias"&&<TransferenciasPanel currentPeriod={period} onTransferCreated={async()=>{const f=await api.getTransactions(period);setTransactions(f);}}/>}
-            {movTab==="heatmap"&&<HeatmapSemanal transactions={transactions} period={period}/>}
+            {movTab==="heatmap"&&<HeatmapSemanal period={period} refreshKey={transactions}/>}
             {movTab==="lista"&&<>
               {/* OBS-08: Formulario unificado para agregar Y editar movimientos */}
               {(showForm||editingTxId!==null)&&(()=>{
@@ -611,6 +637,11 @@ export default function App({ onLogout }) {
                   <Search size={13} color="#444" style={{position:"absolute",left:10,top:"50%",transform:"translateY(-50%)"}}/> 
                   <input placeholder="Buscar..." value={searchQ} onChange={e=>setSearchQ(e.target.value)} style={{...s.input,paddingLeft:30}}/>
                 </div>
+                <button onClick={()=>setSearchAll(v=>!v)} title="Buscar en todos los períodos"
+                  style={{...s.btn,padding:"5px 10px",fontSize:11,background:searchAll?"rgba(56,189,248,0.12)":"#0a0a0c",
+                    color:searchAll?"#38bdf8":"#555",border:`1px solid ${searchAll?"rgba(56,189,248,0.3)":"#1a1a20"}`}}>
+                  Todo el historial
+                </button>
                 <div style={{display:"flex",gap:5,flexWrap:"wrap"}}>
                   {["all",...Object.keys(TYPE_CONFIG)].map(f=>(
                     <button key={f} onClick={()=>setFilterType(f)}
@@ -30,6 +30,14 @@ export const api = {
   getTransactions: (period) =>
     request("GET", `/transactions${period ? `?period=${period}` : ""}`),
 
+  // GET /transactions/search?q=X&from=&to=&limit=&offset= — FTS en todo el historial
+  searchTransactions: ({ q, from, to, limit = 50, offset = 0 }) => {
+    const params = new URLSearchParams({ q, limit, offset });
+    if (from) params.append("from", from);
+    if (to)   params.append("to", to);
+    return request("GET", `/transactions/search?${params.toString()}`);
+  },
+
   // GET /transactions/periods
   getPeriods: () =>
     request("GET", "/transactions/periods"),
@@ -112,9 +120,20 @@ export const api = {
   getPatrimonioConsolidado: () =>
     request("GET", "/v3/patrimonio/consolidado"),
 
-  // GET /v3/patrimonio/historial
-  getHistorialPatrimonio: () =>
-    request("GET", "/v3/patrimonio/historial"),
+  // GET /v3/patrimonio/historial?from=&to=&resolution=day|week|month&max_points=
+  getHistorialPatrimonio: ({ from, to, resolution, maxPoints } = {}) => {
+    const params = new URLSearchParams();
+    if (from)       params.append("from", from);
+    if (to)         params.append("to", to);
+    if (resolution) params.append("resolution", resolution);
+    if (maxPoints)  params.append("max_points", maxPoints);
+    const qs = params.toString();
+    return request("GET", `/v3/patrimonio/historial${qs ? `?${qs}` : ""}`);
+  },
+
+  // GET /v3/patrimonio/as-of/YYYY-MM-DD — patrimonio a una fecha pasada
+  getPatrimonioAsOf: (fecha) =>
+    request("GET", `/v3/patrimonio/as-of/${fecha}`),
 
   // GET /v3/patrimonio/tasa-cambio
   getTasaCambio: () =>
@@ -178,9 +197,41 @@ export const api = {
 
   // F-02: Precios automáticos — caché del scheduler
   getCurrentPrices:  () => request("GET",  "/investments/prices/current"),
+  // POST responde al instante con { refresh_id, joined }; el avance llega por SSE
   refreshPrices:     () => request("POST", "/investments/prices/refresh"),
   getScheduleInfo:   () => request("GET",  "/investments/prices/schedule"),
 
+  // SSE del refresh: onSource(evento) por cada fuente; resuelve con el resultado final
+  watchPriceRefresh: (refreshId, onSource = () => {}) =>
+    new Promise((resolve, reject) => {
+      const es = new EventSource(`${BASE}/investments/prices/refresh/${refreshId}/events`);
+      const done = (data) => { es.close(); resolve(data); };
+      es.addEventListener("state", (e) => {
+        const data = JSON.parse(e.data);
+        if (data.status !== "running") done(data);
+      });
+      es.addEventListener("prices.refresh", (e) => {
+        const data = JSON.parse(e.data);
+        if (data.source) onSource(data);
+        else done(data);
+      });
+      es.onerror = () => { es.close(); reject(new Error("Conexión SSE interrumpida")); };
+    }),
+
+  // GET /v3/stream?topics=prices,snapshots,transactions&period=YYYY-MM
+  // Deltas en vivo (SSE). handlers: { prices, snapshots, transactions, resync }
+  // EventSource reconecta solo y reenvía Last-Event-ID; devuelve una función para cerrar.
+  openStream: ({ topics, period } = {}, handlers = {}) => {
+    const qs = new URLSearchParams();
+    if (topics?.length) qs.set("topics", topics.join(","));
+    if (period)         qs.set("period", period);
+    const es = new EventSource(`${BASE}/v3/stream${qs.toString() ? `?${qs}` : ""}`);
+    Object.entries(handlers).forEach(([name, fn]) =>
+      es.addEventListener(name, (e) => fn(JSON.parse(e.data)))
+    );
+    return () => es.close();
+  },
+
   // ─── F-07: Alertas inteligentes de anomalías ─────────────
   // GET /v3/analytics/alertas/{period}?umbral_ahorro=10
   getAlertas: (period, umbralAhorro = 10) =>
@@ -194,6 +245,24 @@ export const api = {
   getComparativaAnalytics: (actual, anterior) =>
     request("GET", `/v3/analytics/comparativa?periodo_actual=${actual}&periodo_anterior=${anterior}`),
 
+  // GET /v3/analytics/tendencia?from=X&to=Y  ó  ?meses=N[&to=Y]
+  // Totales mensuales por tipo calculados en el backend (sin descargar transacciones)
+  getTendencia: ({ from, to, meses } = {}) => {
+    const params = new URLSearchParams();
+    if (from)  params.append("from", from);
+    if (to)    params.append("to", to);
+    if (meses) params.append("meses", meses);
+    return request("GET", `/v3/analytics/tendencia?${params.toString()}`);
+  },
+
+  // GET /v3/analytics/heatmap/{period} — celdas día × semana agregadas en el backend
+  getHeatmap: (period) =>
+    request("GET", `/v3/analytics/heatmap/${period}`),
+
+  // GET /v3/analytics/treemap/{period}?comercios=N — jerarquía categoría → comercio
+  getTreemap: (period, comercios = 8) =>
+    request("GET", `/v3/analytics/treemap/${period}?comercios=${comercios}`),
+
   // ─── F-03: Resumen Mensual con IA ───────────────────────────────────────────
   // POST /v3/resumen/{period} — genera (o regenera) el resumen con Gemini
   generarResumen: (period) =>
@@ -2,9 +2,14 @@
  * FinanzasOS v3.1 — GastoTreemap.jsx
  * G-01: Mapa de calor jerárquico de gastos por categoría y tipo.
  * Usa recharts Treemap con celdas personalizadas en tema oscuro.
+ * La jerarquía categoría → comercio se agrega en el backend
+ * (GET /v3/analytics/treemap/{period}).
  */
+import { useEffect, useState } from "react";
 import { Treemap, ResponsiveContainer, Tooltip } from "recharts";
+import { api } from "../../api.js";
 import { fmt } from "../../utils/format.js";
+import { getCatColor } from "../../constants/types.js";
 
 // ── Tooltip personalizado ─────────────────────────────────────
 const CustomTooltip = ({ active, payload }) => {
@@ -24,6 +29,11 @@ const CustomTooltip = ({ active, payload }) => {
       {d.typeName && (
         <p style={{ color: "#555", marginTop: 2, fontSize: 10 }}>{d.typeName}</p>
       )}
+      {d.comercios?.slice(0, 3).map((c, i) => (
+        <p key={i} style={{ color: "#888", marginTop: 2, fontSize: 10 }}>
+          {c.name} · {fmt(c.value)}
+        </p>
+      ))}
     </div>
   );
 };
@@ -91,10 +101,21 @@ const TYPE_NAME = {
 };
 
 // ── Componente principal ──────────────────────────────────────
-export default function GastoTreemap({ catData = [] }) {
-  // Filtrar solo categorías con monto > 0 (excluir ingresos)
-  const filtered = catData.filter(d => d.amount > 0);
-  if (filtered.length === 0) {
+// refreshKey: cualquier valor que cambie cuando cambian las transacciones del período
+export default function GastoTreemap({ period, refreshKey }) {
+  const [treemap, setTreemap] = useState(null);
+
+  useEffect(() => {
+    if (!period) return;
+    let vigente = true;
+    api.getTreemap(period)
+      .then(d => { if (vigente) setTreemap(d); })
+      .catch(() => { if (vigente) setTreemap(null); });
+    return () => { vigente = false; };
+  }, [period, refreshKey]);
+
+  const categorias = treemap?.categorias || [];
+  if (categorias.length === 0) {
     return (
       <div style={{ textAlign: "center", color: "#333", padding: "32px 0", fontSize: 13 }}>
         Sin datos de gastos para este período.
@@ -102,22 +123,21 @@ export default function GastoTreemap({ catData = [] }) {
     );
   }
 
-  const total = filtered.reduce((s, d) => s + d.amount, 0);
-
-  // Armar datos para recharts Treemap
-  const data = filtered.map(d => ({
-    name:     d.cat,
-    value:    d.amount,
-    color:    d.color,
-    pct:      total > 0 ? ((d.amount / total) * 100).toFixed(1) : "0",
-    typeName: TYPE_NAME[d.type] || d.type,
+  // Armar datos para recharts Treemap (los comercios van al tooltip)
+  const data = categorias.map(d => ({
+    name:      d.name,
+    value:     d.value,
+    color:     getCatColor(d.name, d.type),
+    pct:       d.pct.toFixed(1),
+    typeName:  TYPE_NAME[d.type] || d.type,
+    comercios: d.children,
   }));
 
-  // Resumen por tipo (leyenda inferior)
+  // Resumen por tipo (leyenda inferior), con el color de su primera categoría
   const byType = {};
-  filtered.forEach(d => {
-    if (!byType[d.type]) byType[d.type] = { amount: 0, color: d.color };
-    byType[d.type].amount += d.amount;
+  treemap.tipos.forEach(({ type, value }) => {
+    const cat = data.find((_, i) => categorias[i].type === type);
+    byType[type] = { amount: value, color: cat?.color || "#888" };
   });
 
   return (
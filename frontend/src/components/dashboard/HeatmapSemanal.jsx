@@ -1,24 +1,17 @@
 /**
  * FinanzasOS v3.1 — HeatmapSemanal.jsx
  * G-05: Intensidad de gastos por día de la semana y semana del mes.
+ * La grilla se agrega en el backend (GET /v3/analytics/heatmap/{period}).
  * Tema oscuro coherente con el sistema.
  */
-import { useMemo, useState } from "react";
+import { useEffect, useMemo, useState } from "react";
+import { api } from "../../api.js";
 import { fmt } from "../../utils/format.js";
 import { s } from "../../components/ui/shared.jsx";
 
 const DIAS   = ["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"];
 const DIAS_L = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"];
 
-// Día JS (0=Dom) → índice Lun-first (0=Lun)
-const jsToLun = (d) => (d + 6) % 7;
-
-// Semana del mes (0-indexed) a partir de la fecha
-const weekOfMonth = (dateStr) => {
-  const d = new Date(dateStr + "T12:00:00");
-  return Math.floor((d.getDate() - 1) / 7);
-};
-
 // Paleta de calor oscura: de apagado a rojo intenso
 const heatColor = (ratio) => {
   if (ratio <= 0) return { bg: "#0f0f12", border: "#1a1a20" };
@@ -37,71 +30,43 @@ const textColor = (ratio) => {
   return "#f0f0f2";
 };
 
-export default function HeatmapSemanal({ transactions = [], period }) {
+// refreshKey: cualquier valor que cambie cuando cambian las transacciones del período
+export default function HeatmapSemanal({ period, refreshKey }) {
   const [tooltip, setTooltip] = useState(null); // { week, day, x, y }
   const [modeView, setModeView] = useState("monto"); // "monto" | "cantidad"
+  const [data, setData] = useState(null);
+
+  useEffect(() => {
+    if (!period) return;
+    let vigente = true;
+    api.getHeatmap(period)
+      .then(d => { if (vigente) setData(d); })
+      .catch(() => { if (vigente) setData(null); });
+    return () => { vigente = false; };
+  }, [period, refreshKey]);
 
   // ── Construcción de la grilla ─────────────────────────────
   const { grid, semanas, maxVal, totalesDia, totalesSem } = useMemo(() => {
-    // Filtrar gastos del período (excluir ingresos e internos)
-    const gastos = transactions.filter(
-      t => t.type !== "ingreso" && !t.excluir_del_analisis && t.date
-    );
-
-    // grid[semana][dia] = { monto, cantidad, txs[] }
+    // grid[semana][dia] = { monto, cantidad, top[] }
     const g = Array.from({ length: 5 }, () =>
-      Array.from({ length: 7 }, () => ({ monto: 0, cantidad: 0, txs: [] }))
+      Array.from({ length: 7 }, () => ({ monto: 0, cantidad: 0, top: [] }))
     );
+    (data?.celdas || []).forEach(c => { g[c.sem][c.dia] = c; });
 
-    let maxSem = 0;
-    gastos.forEach(t => {
-      const d   = new Date(t.date + "T12:00:00");
-      const dia = jsToLun(d.getDay());
-      const sem = Math.min(weekOfMonth(t.date), 4);
-      const amt = Math.abs(t.amount);
-      g[sem][dia].monto    += amt;
-      g[sem][dia].cantidad += 1;
-      g[sem][dia].txs.push(t);
-      if (sem > maxSem) maxSem = sem;
-    });
-
-    const numSems = maxSem + 1;
-
-    // Determinar cuántas semanas tiene el mes del período
-    let semsLabel = [];
-    if (period) {
-      const [y, m] = period.split("-").map(Number);
-      const firstDay = new Date(y, m - 1, 1);
-      const lastDay  = new Date(y, m, 0).getDate();
-      for (let s = 0; s < 5; s++) {
-        const start = s * 7 + 1;
-        if (start > lastDay) break;
-        const end = Math.min(start + 6, lastDay);
-        semsLabel.push(`Sem ${s + 1} (${start}–${end})`);
-      }
-    } else {
-      semsLabel = ["Sem 1","Sem 2","Sem 3","Sem 4","Sem 5"].slice(0, numSems);
-    }
-
-    // Máximo valor para normalización
-    let maxV = 0;
-    const td = Array(7).fill(0);
-    const ts = Array(5).fill(0);
-    g.forEach((sem, si) => sem.forEach((cell, di) => {
-      const val = modeView === "monto" ? cell.monto : cell.cantidad;
-      if (val > maxV) maxV = val;
-      td[di] += cell.monto;
-      ts[si] += cell.monto;
-    }));
-
-    return { grid: g, semanas: semsLabel, maxVal: maxV, totalesDia: td, totalesSem: ts };
-  }, [transactions, period, modeView]);
+    return {
+      grid:       g,
+      semanas:    (data?.semanas || []).map(sm => sm.label),
+      maxVal:     modeView === "monto" ? (data?.max_monto || 0) : (data?.max_cantidad || 0),
+      totalesDia: data?.totales_dia    || Array(7).fill(0),
+      totalesSem: data?.totales_semana || Array(5).fill(0),
+    };
+  }, [data, modeView]);
 
   const numSems = semanas.length || 1;
 
   // ── Celda del heatmap ─────────────────────────────────────
   const Cell = ({ sem, dia }) => {
-    const cell  = grid[sem]?.[dia] || { monto: 0, cantidad: 0, txs: [] };
+    const cell  = grid[sem]?.[dia] || { monto: 0, cantidad: 0, top: [] };
     const val   = modeView === "monto" ? cell.monto : cell.cantidad;
     const ratio = maxVal > 0 ? val / maxVal : 0;
     const { bg, border } = heatColor(ratio);
@@ -150,9 +115,7 @@ export default function HeatmapSemanal({ transactions = [], period }) {
   const TooltipBox = () => {
     if (!tooltip || !tooltip.cell) return null;
     const { sem, dia, cell } = tooltip;
-    const top3 = [...cell.txs]
-      .sort((a, b) => Math.abs(b.amount) - Math.abs(a.amount))
-      .slice(0, 3);
+    const top3 = cell.top || [];
     return (
       <div style={{
         position: "fixed",
@@ -216,7 +179,7 @@ export default function HeatmapSemanal({ transactions = [], period }) {
     </div>
   );
 
-  const hasData = transactions.some(t => t.type !== "ingreso" && !t.excluir_del_analisis);
+  const hasData = (data?.celdas?.length || 0) > 0;
 
   return (
     <div style={{ display: "flex", flexDirection: "column", gap: 14 }}>
@@ -56,8 +56,9 @@ export default function InversionesTab({ investments, snapshots, onAdd, onEdit,
   const forceRefresh = async () => {
     setRefreshing(true);
     try {
-      await api.refreshPrices();
-      await new Promise(r => setTimeout(r, 2500));
+      const { refresh_id } = await api.refreshPrices();
+      // Espera el fin del refresh (SSE); cada fuente lista recarga los precios
+      await api.watchPriceRefresh(refresh_id, loadCachedPrices);
       await loadCachedPrices();
       const info = await api.getScheduleInfo();
       setScheduleInfo(info);
@@ -82,6 +83,25 @@ export default function InversionesTab({ investments, snapshots, onAdd, onEdit,
     }
   }, [investments.length]);
 
+  // ── Precios en vivo (SSE /v3/stream) ───────────────────────
+  useEffect(() => {
+    if (investments.length === 0) return;
+    return api.openStream({ topics: ["prices"] }, {
+      prices: (delta) => {
+        if (delta.prices) {
+          const flat = {};
+          Object.entries(delta.prices).forEach(([ticker, info]) => {
+            flat[ticker.toUpperCase()] = info.price_usd;
+          });
+          setPrices(p => ({ ...p, ...flat }));
+          setLastUpdated(new Date());
+        }
+        if (delta.exchange_rate) setExRate(delta.exchange_rate);
+      },
+      resync: loadCachedPrices,
+    });
+  }, [investments.length]);
+
   // ── Cálculos del portafolio ────────────────────────────────
   const getPrice = (ticker) => {
     const t = ticker.toUpperCase();
@@ -294,6 +314,19 @@ export default function InversionesTab({ investments, snapshots, onAdd, onEdit,
           <span style={{color:"#1a1a24",fontSize:10,marginLeft:"auto"}}>
             crypto/4h · acciones/6h · TC/1h · snapshot/fin-mes
           </span>
+          {/* Fuentes en corte y tickers sin datos (circuit breakers) */}
+          {Object.entries(scheduleInfo.health?.sources || {})
+            .filter(([, st]) => st.state !== "closed")
+            .map(([src, st]) => (
+              <span key={src} title={st.last_error || ""} style={{color:"#f59e0b",fontSize:10,width:"100%"}}>
+                ⚠ {src} en corte{st.state === "open" ? ` · reintento en ${Math.ceil(st.retry_in_s/60)} min` : " · probando"}
+              </span>
+            ))}
+          {Object.keys(scheduleInfo.health?.unresolvable || {}).length > 0 && (
+            <span style={{color:"#555",fontSize:10,width:"100%"}}>
+              Sin datos en ninguna fuente: {Object.keys(scheduleInfo.health.unresolvable).join(", ")}
+            </span>
+          )}
         </div>
       )}
 
@@ -41,12 +41,13 @@ export default function NetWorthChart() {
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    api.getHistorialPatrimonio()
+    // Serie diaria reducida en el backend (LTTB) a lo que el gráfico puede mostrar
+    api.getHistorialPatrimonio({ maxPoints: 180 })
       .then((res) => {
         const formatted = (Array.isArray(res) ? res : []).map((d) => ({
           ...d,
-          fecha: new Date(d.fecha).toLocaleDateString("es-PE", {
-            month:"short", year:"2-digit",
+          fecha: new Date(`${d.fecha}T12:00:00`).toLocaleDateString("es-PE", {
+            day:"2-digit", month:"short", year:"2-digit",
           }),
         }));
         setData(formatted);
@@ -61,6 +61,13 @@ export default function PatrimonioConsolidado() {
 
   useEffect(() => { fetchData(); }, []);
 
+  // Snapshots o precios nuevos (SSE): recalcular el consolidado
+  useEffect(() => api.openStream({ topics: ["prices", "snapshots"] }, {
+    prices:    fetchData,
+    snapshots: fetchData,
+    resync:    fetchData,
+  }), []);
+
   // Loading
   if (loading) return (
     <div style={{ display:"flex", flexDirection:"column", alignItems:"center", justifyContent:"center", padding:60, gap:12 }}>